@@ -0,0 +1,384 @@
+## Brian Blaylock
+## October 19, 2026
+
+"""
+Indexed catalog of the GOES ABI and GLM files on horel-group7.
+
+Listing the hourly directories and running datetime.strptime on every file
+name is slow when we ask for many hours of GLM files (180 files per hour).
+Instead, each (satellite, product) has a catalog that is a compact sorted
+index of the files:
+
+    start, end, created - int64 arrays of the file times (datetime64[ms])
+    path_bytes          - All the file paths (relative to the product
+                          directory) as one byte string...
+    path_offsets        - ...and the offset of each path in path_bytes
+    dirs, dirs_mtime    - The directories that have been indexed and their
+                          modified time when they were indexed
+
+The catalog is saved as a NumPy .npz file in CATALOG_DIR. Requests for a date
+range only list directories that were never indexed or that were still being
+written to when they were indexed, so a catalog is built once and refreshed
+incrementally. Range and nearest-time queries are np.searchsorted lookups.
+
+    cat = get_catalog(16, 'GLM', sDATE, eDATE)
+    idx = files_for_range(cat, sDATE, eDATE, on='end')
+    FILES = catalog_files(cat, idx)
+"""
+
+import os
+import numpy as np
+from datetime import datetime, timedelta
+
+# Increment the version if the catalog format changes.
+CATALOG_VERSION = 1
+
+# Directory where the catalogs are saved. Set PYBKB_CACHE to use another
+# directory than ~/.cache/pyBKB.
+CATALOG_DIR = os.path.join(
+    os.environ.get("PYBKB_CACHE", os.path.expanduser("~/.cache/pyBKB")), "catalog"
+)
+
+# Directory all data is stored on horel-group7
+HG7 = "/uufs/chpc.utah.edu/common/home/horel-group7/Pando/GOES%s/%s/"
+
+# Full name of the product
+PRODUCTS = {"ABI": "ABI-L2-MCMIPC", "GLM": "GLM-L2-LCFA"}
+
+# A directory isn't indexed for good until this long after its last file.
+SETTLE = timedelta(hours=3)
+
+
+def parse_GOES_times(names):
+    """
+    Start, end, and created times from GOES file names as datetime64[ms]
+    arrays. The times are parsed as fixed-width digits for all the names at
+    once instead of using datetime.strptime on each name.
+
+    File names look like:
+        OR_GLM-L2-LCFA_G16_s20181280332000_e20181280332200_c20181280332227.nc
+    where the times are %Y%j%H%M%S and tenths of a second.
+    """
+    names = [os.path.basename(n) for n in names]
+    times = []
+    for k in [3, 4, 5]:
+        stamps = np.array([n.split("_")[k][1:15] for n in names], dtype="S14")
+        digits = np.frombuffer(stamps.tobytes(), dtype=np.uint8).reshape(-1, 14)
+        digits = digits.astype(np.int64) - ord("0")
+
+        def number(a, b):
+            return digits[:, a:b] @ (10 ** np.arange(b - a - 1, -1, -1))
+
+        years = (number(0, 4) - 1970).astype("datetime64[Y]")
+        DATES = years.astype("datetime64[ms]") + (number(4, 7) - 1).astype(
+            "timedelta64[D]"
+        )
+        ms = (
+            number(7, 9) * 3600000
+            + number(9, 11) * 60000
+            + number(11, 13) * 1000
+            + number(13, 14) * 100
+        )
+        times.append(DATES + ms.astype("timedelta64[ms]"))
+    return times
+
+
+def _leaf_dirs(satellite, product, sDATE, eDATE):
+    """
+    Directories (relative to the product directory) that may have files
+    between sDATE and eDATE, and the datetime at the end of each directory.
+    """
+    # I apologize, but I am downloadling GOES-16 ABI data differently than
+    # everything else (GOES-16 is not kept in hour direcotires).
+    if satellite == 16 and product == "ABI":
+        step = timedelta(days=1)
+        first = datetime(sDATE.year, sDATE.month, sDATE.day)
+        fmt = "%Y%m%d/"
+    else:
+        step = timedelta(hours=1)
+        first = datetime(sDATE.year, sDATE.month, sDATE.day, sDATE.hour)
+        fmt = "%Y%m%d/%H/"
+
+    dirs = []
+    DATE = first
+    while DATE <= eDATE:
+        dirs.append((DATE.strftime(fmt), DATE + step))
+        DATE += step
+    return dirs
+
+
+def _empty_catalog(satellite, product):
+    return {
+        "version": CATALOG_VERSION,
+        "satellite": satellite,
+        "product": product,
+        "BASE": HG7 % (satellite, PRODUCTS[product]),
+        "start": np.array([], dtype="datetime64[ms]"),
+        "end": np.array([], dtype="datetime64[ms]"),
+        "created": np.array([], dtype="datetime64[ms]"),
+        "path_bytes": np.array([], dtype=np.uint8),
+        "path_offsets": np.zeros(1, dtype=np.int64),
+        "dirs": np.array([], dtype=str),
+        "dirs_mtime": np.array([], dtype=float),
+        "dirs_settled": np.array([], dtype=bool),
+    }
+
+
+def _catalog_file(satellite, product, CATALOG_DIR=CATALOG_DIR):
+    return os.path.join(
+        CATALOG_DIR,
+        "GOES%s_%s_catalog_v%s.npz" % (satellite, PRODUCTS[product], CATALOG_VERSION),
+    )
+
+
+def load_catalog(satellite=16, product="GLM", CATALOG_DIR=CATALOG_DIR):
+    """Load the saved catalog, or an empty catalog if there isn't one."""
+    FILE = _catalog_file(satellite, product, CATALOG_DIR)
+    if not os.path.exists(FILE):
+        return _empty_catalog(satellite, product)
+
+    with np.load(FILE) as f:
+        catalog = {k: f[k] for k in f.files}
+    if int(catalog["version"]) != CATALOG_VERSION:
+        return _empty_catalog(satellite, product)
+    catalog["version"] = int(catalog["version"])
+    catalog["satellite"] = int(catalog["satellite"])
+    catalog["product"] = str(catalog["product"])
+    catalog["BASE"] = str(catalog["BASE"])
+    return catalog
+
+
+def save_catalog(catalog, CATALOG_DIR=CATALOG_DIR):
+    """Save the catalog (write to a temporary file, then rename)."""
+    if not os.path.exists(CATALOG_DIR):
+        os.makedirs(CATALOG_DIR)
+    FILE = _catalog_file(catalog["satellite"], catalog["product"], CATALOG_DIR)
+    TMP = FILE + ".%s.tmp.npz" % os.getpid()
+    np.savez(TMP, **catalog)
+    os.replace(TMP, FILE)
+
+
+def catalog_paths(catalog, idx=None):
+    """Relative paths of the files in the catalog (all files if idx is None)."""
+    offsets = catalog["path_offsets"]
+    data = catalog["path_bytes"].tobytes()
+    if idx is None:
+        idx = range(len(offsets) - 1)
+    return [data[offsets[i] : offsets[i + 1]].decode() for i in idx]
+
+
+def catalog_files(catalog, idx):
+    """Full path and name of the files at the catalog indexes idx."""
+    return np.array([catalog["BASE"] + p for p in catalog_paths(catalog, idx)])
+
+
+def refresh_catalog(catalog, sDATE, eDATE, verbose=False):
+    """
+    Index the directories between sDATE and eDATE that aren't in the catalog
+    yet, or that have changed and were not settled when they were indexed.
+
+    Return:
+        True if the catalog changed.
+    """
+    satellite = catalog["satellite"]
+    product = catalog["product"]
+    now = datetime.utcnow()
+
+    known = {d: i for i, d in enumerate(catalog["dirs"])}
+
+    relist = []
+    for DIR, DIR_end in _leaf_dirs(satellite, product, sDATE, eDATE):
+        i = known.get(DIR)
+        if i is not None and catalog["dirs_settled"][i]:
+            continue
+        FULL_DIR = catalog["BASE"] + DIR
+        if not os.path.exists(FULL_DIR):
+            print("**************************************************************")
+            print("!!!WARNING!!! Missing %s directory: %s" % (product, FULL_DIR))
+            print("**************************************************************")
+            continue
+        mtime = os.path.getmtime(FULL_DIR)
+        if i is not None and catalog["dirs_mtime"][i] == mtime:
+            continue
+        relist.append((DIR, mtime, DIR_end + SETTLE < now))
+
+    if len(relist) == 0:
+        return False
+
+    # Remove the old entries for the directories we are listing again.
+    relist_dirs = set(d for d, _, _ in relist)
+    old_paths = catalog_paths(catalog)
+    keep = np.array(
+        [p[: p.rfind("/") + 1] not in relist_dirs for p in old_paths], dtype=bool
+    )
+    paths = [p for p, k in zip(old_paths, keep) if k]
+    start = catalog["start"][keep]
+    end = catalog["end"][keep]
+    created = catalog["created"][keep]
+
+    # List the directories. Sometimes a file might be in the wrong directory
+    # (this was the case when GOES-17 was being tested). We only want NetCDF
+    # files for the requested satellite.
+    new_paths = []
+    for DIR, _, _ in relist:
+        if verbose:
+            print("Indexing: %s" % (catalog["BASE"] + DIR))
+        new_paths += [
+            DIR + f
+            for f in os.listdir(catalog["BASE"] + DIR)
+            if "_G%02d_" % satellite in f and f.endswith(".nc")
+        ]
+
+    if len(new_paths) > 0:
+        s, e, c = parse_GOES_times(new_paths)
+        paths += new_paths
+        start = np.concatenate([start, s])
+        end = np.concatenate([end, e])
+        created = np.concatenate([created, c])
+
+    # Unique paths sorted by start time
+    _, unique_idx = np.unique(np.array(paths, dtype=str), return_index=True)
+    order = unique_idx[np.argsort(start[unique_idx], kind="stable")]
+
+    encoded = [paths[i].encode() for i in order]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(p) for p in encoded])
+
+    catalog["start"] = start[order]
+    catalog["end"] = end[order]
+    catalog["created"] = created[order]
+    catalog["path_bytes"] = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    catalog["path_offsets"] = offsets
+
+    # Update the directory records
+    dirs = list(catalog["dirs"])
+    mtimes = list(catalog["dirs_mtime"])
+    settled = list(catalog["dirs_settled"])
+    for DIR, mtime, is_settled in relist:
+        if DIR in known:
+            i = known[DIR]
+            mtimes[i] = mtime
+            settled[i] = is_settled
+        else:
+            dirs.append(DIR)
+            mtimes.append(mtime)
+            settled.append(is_settled)
+    catalog["dirs"] = np.array(dirs, dtype=str)
+    catalog["dirs_mtime"] = np.array(mtimes, dtype=float)
+    catalog["dirs_settled"] = np.array(settled, dtype=bool)
+
+    return True
+
+
+def get_catalog(
+    satellite=16,
+    product="GLM",
+    sDATE=None,
+    eDATE=None,
+    CATALOG_DIR=CATALOG_DIR,
+    verbose=False,
+):
+    """
+    Load the catalog for a satellite and product and make sure the dates
+    between sDATE and eDATE are indexed.
+
+    Input:
+        satellite - 16 or 17, denotes GOES-16 or GOES-17. Default is 16.
+        product   - 'ABI' for Advanced Baseline Imager, or
+                    'GLM' for Geostationary Lightning Mapper
+        sDATE     - Begining of the dates that need to be indexed
+        eDATE     - Ending of the dates that need to be indexed
+    """
+    assert satellite in [16, 17], "satellite must be 16 or 17"
+    assert product in PRODUCTS, 'product must be "ABI" or "GLM"'
+
+    catalog = load_catalog(satellite, product, CATALOG_DIR)
+    if sDATE is not None and eDATE is not None:
+        if refresh_catalog(catalog, sDATE, eDATE, verbose=verbose):
+            save_catalog(catalog, CATALOG_DIR)
+    return catalog
+
+
+# -----------------------------------------------------------------------------
+
+
+def _datetime64(DATE):
+    return np.datetime64(DATE, "ms")
+
+
+def files_for_range(catalog, sDATE, eDATE, on="start"):
+    """
+    Catalog indexes of the files with a start (or end) time in [sDATE, eDATE).
+
+    Input:
+        on - 'start' or 'end'. Which file time to compare with the range.
+    """
+    s = _datetime64(sDATE)
+    e = _datetime64(eDATE)
+    start = catalog["start"]
+    if on == "start":
+        return np.arange(
+            np.searchsorted(start, s, side="left"),
+            np.searchsorted(start, e, side="left"),
+        )
+    elif on == "end":
+        # The catalog is sorted by start. Narrow the search by the longest
+        # file duration, then check the end times in that small window.
+        if len(start) == 0:
+            return np.array([], dtype=np.intp)
+        longest = np.max(catalog["end"] - start)
+        idx = np.arange(
+            np.searchsorted(start, s - longest, side="left"),
+            np.searchsorted(start, e, side="left"),
+        )
+        end = catalog["end"][idx]
+        return idx[(end >= s) & (end < e)]
+    else:
+        raise ValueError("on must be 'start' or 'end'")
+
+
+def files_within(catalog, sDATE, eDATE):
+    """
+    Catalog indexes of the files that start after sDATE and end before eDATE
+    (inclusive).
+    """
+    s = _datetime64(sDATE)
+    e = _datetime64(eDATE)
+    idx = np.arange(
+        np.searchsorted(catalog["start"], s, side="left"),
+        np.searchsorted(catalog["start"], e, side="right"),
+    )
+    return idx[catalog["end"][idx] <= e]
+
+
+def file_nearest(catalog, DATE, on="start", max_distance=None):
+    """
+    Catalog index of the file with a start (or end) time nearest DATE.
+    Returns None if there isn't a file within max_distance (a timedelta).
+    """
+    times = catalog[on]
+    if len(times) == 0:
+        return None
+    D = _datetime64(DATE)
+    if on == "start":
+        i = np.searchsorted(times, D)
+        candidates = np.array([i - 1, i])
+        candidates = candidates[(candidates >= 0) & (candidates < len(times))]
+    else:
+        # End times are nearly sorted; look at the neighbors by start time.
+        i = np.searchsorted(catalog["start"], D)
+        candidates = np.arange(max(i - 2, 0), min(i + 2, len(times)))
+        if len(candidates) == 0:
+            candidates = np.array([len(times) - 1])
+    distance = np.abs(times[candidates] - D)
+    nearest = candidates[np.argmin(distance)]
+    if max_distance is not None and np.min(distance) > np.timedelta64(
+        max_distance
+    ).astype("timedelta64[ms]"):
+        return None
+    return int(nearest)
+
+
+def to_datetime(value):
+    """Convert a datetime64 value from the catalog to a datetime."""
+    return value.astype("datetime64[ms]").astype(datetime)
@@ -0,0 +1,281 @@
+## Brian Blaylock
+## October 19, 2026
+
+"""
+Cached latitude/longitude grids for the GOES ABI fixed grid.
+
+The latitude and longitude of the ABI pixels are the same for every scan of a
+satellite and scene (i.e. GOES-16 CONUS), so they are computed once and saved
+in GEOLOCATION_DIR as float32 .npy files:
+
+    G16_CONUS_<hash>_lat.npy        - Latitude
+    G16_CONUS_<hash>_lon.npy        - Longitude
+    G16_CONUS_<hash>_offearth.npy   - True for pixels that look at space
+
+The hash is of the projection attributes and the x/y coordinates, so a
+different fixed grid (i.e. a Mesoscale sector that moved) gets its own files.
+The files are opened as memory maps, and a grid used again in the same Python
+session isn't read again. Reduced resolution (decimated) grids for quick-look
+images are cached the same way, at the center of each block of pixels that is
+averaged by block_reduce.
+
+The latitude and longitude are computed from the scan angles with the
+equations in the GOES-R Product User Guide (Section 5.1.2.8.1), which also
+tell which pixels are off the earth, so no channel is loaded to find them.
+
+    G = get_geolocation(C)      # C is an ABI file opened with xarray
+    G['lat'], G['lon'], G['off earth']
+"""
+
+import os
+import hashlib
+import numpy as np
+
+# Increment the version if the cache format changes.
+GEOLOCATION_VERSION = 1
+
+# Directory where the grids are saved. Set PYBKB_CACHE to use another
+# directory than ~/.cache/pyBKB.
+GEOLOCATION_DIR = os.path.join(
+    os.environ.get("PYBKB_CACHE", os.path.expanduser("~/.cache/pyBKB")), "geolocation"
+)
+
+# Latitude and longitude given to the pixels that look at space
+# (a single point in the Gulf of Alaska).
+OFF_EARTH_LATLON = (57, -152)
+
+# Grids already loaded in this Python session
+_GEOLOCATION = {}
+
+
+def projection_attributes(C):
+    """The projection attributes of an ABI file."""
+    proj = C["goes_imager_projection"]
+    return {
+        "perspective_point_height": float(proj.perspective_point_height),
+        "longitude_of_projection_origin": float(proj.longitude_of_projection_origin),
+        "semi_major_axis": float(proj.semi_major_axis),
+        "semi_minor_axis": float(proj.semi_minor_axis),
+        "sweep_angle_axis": str(proj.sweep_angle_axis),
+    }
+
+
+def block_reduce(data, size):
+    """
+    Average blocks of size x size points in the last two dimensions (or
+    blocks of size points of a 1D array). Points left over at the end of a
+    dimension are dropped.
+
+    Input:
+        data - An array
+        size - Number of points in each direction of the block.
+               If 1, data is returned as it is.
+    """
+    if size == 1:
+        return data
+    data = np.asarray(data)
+    if data.ndim == 1:
+        n = len(data) // size
+        return data[: n * size].reshape(n, size).mean(axis=1)
+    ny, nx = data.shape[-2] // size, data.shape[-1] // size
+    data = data[..., : ny * size, : nx * size]
+    blocks = data.reshape(data.shape[:-2] + (ny, size, nx, size))
+    return blocks.mean(axis=(-3, -1))
+
+
+def _scan_angles(C, decimate=1):
+    """The x and y scan angles (at the center of each block if decimated)."""
+    x = np.asarray(C["x"].data, dtype=np.float64)
+    y = np.asarray(C["y"].data, dtype=np.float64)
+    return block_reduce(x, decimate), block_reduce(y, decimate)
+
+
+def geolocation_key(C, decimate=1):
+    """
+    Name of the cached grid for an ABI file, i.e. 'G16_CONUS_<hash>', or
+    'G16_CONUS_d4_<hash>' for the grid decimated by 4.
+
+    Input:
+        C - An ABI file opened with xarray.
+    """
+    satellite = str(C.attrs.get("platform_ID", "GOES"))
+    scene = str(C.attrs.get("scene_id", "scene")).replace(" ", "")
+    if decimate != 1:
+        scene += "_d%s" % decimate
+    x, y = _scan_angles(C, decimate)
+    h = hashlib.sha1()
+    h.update(("%s" % GEOLOCATION_VERSION).encode())
+    h.update(repr(sorted(projection_attributes(C).items())).encode())
+    h.update(x.tobytes())
+    h.update(y.tobytes())
+    return "%s_%s_%s" % (satellite, scene, h.hexdigest()[:16])
+
+
+def fixed_grid_latlon(
+    x,
+    y,
+    perspective_point_height,
+    longitude_of_projection_origin,
+    semi_major_axis,
+    semi_minor_axis,
+    sweep_angle_axis="x",
+):
+    """
+    Latitude and longitude of the ABI fixed grid.
+
+    Input:
+        x, y - 1D arrays of the E/W and N/S scan angles (radians)
+        The rest are the goes_imager_projection attributes.
+
+    Return:
+        lat, lon  - 2D arrays (degrees). NaN off the earth.
+        off_earth - 2D boolean array. True for pixels that look at space.
+    """
+    assert sweep_angle_axis == "x", "Only the GOES sweep ('x') is supported"
+    r_eq = semi_major_axis
+    r_pol = semi_minor_axis
+    H = perspective_point_height + semi_major_axis
+    lon_0 = np.radians(longitude_of_projection_origin)
+
+    # Compute the trigonometry on the 1D coordinates and broadcast to 2D.
+    x = np.asarray(x, dtype=np.float64)[np.newaxis, :]
+    y = np.asarray(y, dtype=np.float64)[:, np.newaxis]
+    sin_x, cos_x = np.sin(x), np.cos(x)
+    sin_y, cos_y = np.sin(y), np.cos(y)
+
+    a = sin_x ** 2 + cos_x ** 2 * (cos_y ** 2 + (r_eq / r_pol) ** 2 * sin_y ** 2)
+    b = -2 * H * cos_x * cos_y
+    c = H ** 2 - r_eq ** 2
+    discriminant = b ** 2 - 4 * a * c
+    off_earth = discriminant < 0
+
+    with np.errstate(invalid="ignore"):
+        r_s = (-b - np.sqrt(discriminant)) / (2 * a)
+    s_x = r_s * cos_x * cos_y
+    s_y = -r_s * sin_x
+    s_z = r_s * cos_x * sin_y
+
+    lat = np.degrees(
+        np.arctan((r_eq / r_pol) ** 2 * s_z / np.sqrt((H - s_x) ** 2 + s_y ** 2))
+    )
+    lon = np.degrees(lon_0 - np.arctan(s_y / (H - s_x)))
+    return lat, lon, off_earth
+
+
+def latlon_to_fixed_grid(
+    lat,
+    lon,
+    perspective_point_height,
+    longitude_of_projection_origin,
+    semi_major_axis,
+    semi_minor_axis,
+    sweep_angle_axis="x",
+):
+    """
+    Scan angles of the ABI fixed grid for latitudes and longitudes. This is
+    the inverse of fixed_grid_latlon (GOES-R Product User Guide, Section
+    5.1.2.8.2).
+
+    Input:
+        lat, lon - Arrays of latitude and longitude (degrees)
+        The rest are the goes_imager_projection attributes.
+
+    Return:
+        x, y    - Arrays of the E/W and N/S scan angles (radians)
+        visible - Boolean array. False where the satellite can't see the point.
+    """
+    assert sweep_angle_axis == "x", "Only the GOES sweep ('x') is supported"
+    r_eq = semi_major_axis
+    r_pol = semi_minor_axis
+    H = perspective_point_height + semi_major_axis
+    lon_0 = np.radians(longitude_of_projection_origin)
+    e2 = (r_eq ** 2 - r_pol ** 2) / r_eq ** 2
+
+    lat = np.radians(np.asarray(lat, dtype=np.float64))
+    lon = np.radians(np.asarray(lon, dtype=np.float64))
+
+    lat_c = np.arctan((r_pol / r_eq) ** 2 * np.tan(lat))
+    r_c = r_pol / np.sqrt(1 - e2 * np.cos(lat_c) ** 2)
+    s_x = H - r_c * np.cos(lat_c) * np.cos(lon - lon_0)
+    s_y = -r_c * np.cos(lat_c) * np.sin(lon - lon_0)
+    s_z = r_c * np.sin(lat_c)
+
+    visible = H * (H - s_x) >= s_y ** 2 + (r_eq / r_pol) ** 2 * s_z ** 2
+    y = np.arctan(s_z / s_x)
+    x = np.arcsin(-s_y / np.sqrt(s_x ** 2 + s_y ** 2 + s_z ** 2))
+    return x, y, visible
+
+
+def _files(key, GEOLOCATION_DIR):
+    return {
+        name: os.path.join(GEOLOCATION_DIR, "%s_%s.npy" % (key, name))
+        for name in ["lat", "lon", "offearth"]
+    }
+
+
+def _save(FILE, array):
+    """Save an array (write to a temporary file, then rename)."""
+    TMP = FILE + ".%s.tmp.npy" % os.getpid()
+    np.save(TMP, array)
+    os.replace(TMP, FILE)
+
+
+def get_geolocation(
+    C, GEOLOCATION_DIR=GEOLOCATION_DIR, cache=True, decimate=1, verbose=True
+):
+    """
+    Latitude, longitude, and off-earth mask for an ABI file's fixed grid.
+
+    Input:
+        C        - An ABI file opened with xarray.
+        cache    - If True, read the grids from GEOLOCATION_DIR (and save them
+                   there if they aren't cached yet). If False, compute them.
+        decimate - Grid for the channels reduced with block_reduce(data,
+                   decimate). Default 1 is the full resolution grid.
+
+    Return:
+        Dictionary with
+            'lat', 'lon' - float32 arrays (read-only memory maps if cached).
+                           Pixels off the earth are OFF_EARTH_LATLON.
+            'off earth'  - Boolean array. True for pixels that look at space.
+            'key'        - Name of the cached grid
+    """
+    key = geolocation_key(C, decimate)
+    if cache and key in _GEOLOCATION:
+        return _GEOLOCATION[key]
+
+    FILES = _files(key, GEOLOCATION_DIR)
+    if cache and all(os.path.exists(F) for F in FILES.values()):
+        if verbose:
+            print("Geolocation from cache: %s" % key)
+        G = {
+            "lat": np.load(FILES["lat"], mmap_mode="r"),
+            "lon": np.load(FILES["lon"], mmap_mode="r"),
+            "off earth": np.load(FILES["offearth"], mmap_mode="r"),
+            "key": key,
+        }
+        _GEOLOCATION[key] = G
+        return G
+
+    if verbose:
+        print("Computing geolocation: %s" % key)
+    x, y = _scan_angles(C, decimate)
+    lat, lon, off_earth = fixed_grid_latlon(x, y, **projection_attributes(C))
+    lat[off_earth] = OFF_EARTH_LATLON[0]
+    lon[off_earth] = OFF_EARTH_LATLON[1]
+    G = {
+        "lat": lat.astype(np.float32),
+        "lon": lon.astype(np.float32),
+        "off earth": off_earth,
+        "key": key,
+    }
+
+    if cache:
+        if not os.path.exists(GEOLOCATION_DIR):
+            os.makedirs(GEOLOCATION_DIR)
+        _save(FILES["lat"], G["lat"])
+        _save(FILES["lon"], G["lon"])
+        # The off-earth mask is saved last. A grid is cached if it exists.
+        _save(FILES["offearth"], G["off earth"])
+        _GEOLOCATION[key] = G
+    return G
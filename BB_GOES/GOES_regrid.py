@@ -0,0 +1,229 @@
+## Brian Blaylock
+## October 19, 2026
+
+"""
+Regrid ABI data to the HRRR grid with precomputed sparse operators.
+
+An operator is a sparse matrix with a row for each HRRR grid point and a
+column for each ABI pixel, so regridding a scan is one sparse matrix-vector
+product and regridding many scans (or a stack of channels) is one sparse
+matrix product. The operators are the same for every scan with the same fixed
+grid, so they are saved in REGRID_DIR as CSR .npz files for each ABI grid
+(see GOES_geolocation.geolocation_key) and reused.
+
+Methods:
+    'nearest' - The ABI pixel nearest each HRRR grid point (the scan angle of
+                the HRRR grid point is computed and rounded, like GOES_warp).
+    'area'    - The mean of the ABI pixels with centers in each HRRR grid
+                cell. The pixels in a 3 km cell have about the same area, so
+                this is the area-weighted mean. HRRR cells without an ABI
+                pixel center use the nearest pixel.
+
+    R = regrid_operator(C, 'area')      # C is an ABI file (xarray)
+    H = regrid(C['CMI_C13'].data, R)    # (1059, 1799)
+
+    for files, H in regrid_scans(FILES, 'CMI_C13'):
+        ...                             # H is (len(files), 1059, 1799)
+"""
+
+import os
+import numpy as np
+import scipy.sparse
+import xarray
+
+import sys
+
+sys.path.append("/uufs/chpc.utah.edu/common/home/u0553130/pyBKB_v3")
+from BB_GOES.GOES_geolocation import geolocation_key, get_geolocation, block_reduce
+from BB_GOES.GOES_warp import compute_warp_indices
+from BB_HRRR.HRRR_grid_index import (
+    HRRR_SHAPE,
+    HRRR_lambert_index,
+    HRRR_lambert_latlon,
+)
+
+# Directory where the operators are saved. Set PYBKB_CACHE to use another
+# directory than ~/.cache/pyBKB.
+REGRID_DIR = os.path.join(
+    os.environ.get("PYBKB_CACHE", os.path.expanduser("~/.cache/pyBKB")), "regrid"
+)
+
+# Operators already loaded in this Python session
+_OPERATORS = {}
+
+
+def nearest_operator(C, decimate=1):
+    """
+    Nearest-neighbor operator from the ABI grid to the HRRR grid.
+
+    Input:
+        C        - An ABI file opened with xarray.
+        decimate - Operator for channels decimated by this factor (see
+                   GOES_geolocation.block_reduce).
+    """
+    Hlat, Hlon = HRRR_lambert_latlon()
+    x = block_reduce(np.asarray(C["x"].data), decimate)
+    y = block_reduce(np.asarray(C["y"].data), decimate)
+    idx = compute_warp_indices(C, {"lat": Hlat, "lon": Hlon}, decimate=decimate)
+    idx = idx.ravel()
+    rows = np.flatnonzero(idx >= 0)
+    return scipy.sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.float32), (rows, idx[rows])),
+        shape=(idx.size, len(x) * len(y)),
+    )
+
+
+def area_operator(C, decimate=1):
+    """
+    Area-weighted operator from the ABI grid to the HRRR grid: each HRRR grid
+    point is the mean of the ABI pixels with centers in its grid cell.
+    Grid cells without an ABI pixel center use the nearest ABI pixel.
+
+    Input:
+        C        - An ABI file opened with xarray.
+        decimate - Operator for channels decimated by this factor.
+    """
+    G = get_geolocation(C, decimate=decimate, verbose=False)
+    on_earth = ~np.asarray(G["off earth"]).ravel()
+    cols = np.flatnonzero(on_earth)
+    i, j = HRRR_lambert_index(
+        np.asarray(G["lat"]).ravel()[cols], np.asarray(G["lon"]).ravel()[cols]
+    )
+    i = np.round(i).astype(np.intp)
+    j = np.round(j).astype(np.intp)
+    ny, nx = HRRR_SHAPE
+    inside = (i >= 0) & (i < ny) & (j >= 0) & (j < nx)
+    rows = i[inside] * nx + j[inside]
+    cols = cols[inside]
+
+    count = np.bincount(rows, minlength=ny * nx)
+    weights = 1 / count[rows].astype(np.float32)
+
+    # Fill the grid cells that don't have an ABI pixel center
+    nearest = nearest_operator(C, decimate=decimate).tocoo()
+    empty = count[nearest.row] == 0
+    rows = np.concatenate([rows, nearest.row[empty]])
+    cols = np.concatenate([cols, nearest.col[empty]])
+    weights = np.concatenate([weights, nearest.data[empty]])
+
+    return scipy.sparse.csr_matrix(
+        (weights, (rows, cols)), shape=(ny * nx, np.size(G["lat"]))
+    )
+
+
+OPERATORS = {
+    "nearest": nearest_operator,
+    "area": area_operator,
+}
+
+
+def regrid_operator(
+    C, method="area", decimate=1, REGRID_DIR=REGRID_DIR, cache=True, verbose=True
+):
+    """
+    Operator from an ABI grid to the HRRR grid. The operator is read from
+    REGRID_DIR if it was computed before.
+
+    Input:
+        C        - An ABI file opened with xarray.
+        method   - 'nearest' or 'area'
+        decimate - Operator for channels decimated by this factor.
+        cache    - If True, read and save the operator in REGRID_DIR.
+
+    Return:
+        A scipy.sparse CSR matrix with shape (HRRR points, ABI pixels)
+    """
+    if method not in OPERATORS:
+        raise ValueError(
+            "Unknown method '%s'. Use one of %s" % (method, list(OPERATORS))
+        )
+    key = "%s_%s_to_HRRR" % (geolocation_key(C, decimate), method)
+    if cache and key in _OPERATORS:
+        return _OPERATORS[key]
+
+    FILE = os.path.join(REGRID_DIR, "%s.npz" % key)
+    if cache and os.path.exists(FILE):
+        if verbose:
+            print("Regrid operator from cache: %s" % key)
+        _OPERATORS[key] = scipy.sparse.load_npz(FILE).tocsr()
+        return _OPERATORS[key]
+
+    if verbose:
+        print("Computing regrid operator: %s" % key)
+    R = OPERATORS[method](C, decimate=decimate)
+    if cache:
+        if not os.path.exists(REGRID_DIR):
+            os.makedirs(REGRID_DIR)
+        TMP = FILE + ".%s.tmp.npz" % os.getpid()
+        scipy.sparse.save_npz(TMP, R)
+        os.replace(TMP, FILE)
+        _OPERATORS[key] = R
+    return R
+
+
+def regrid(data, R):
+    """
+    Regrid ABI data to the HRRR grid.
+
+    Input:
+        data - ABI array (y, x), or a stack of arrays (..., y, x) (i.e. many
+               scans or channels). NaNs are left out of the mean.
+        R    - The operator from regrid_operator()
+
+    Return:
+        float32 array (..., 1059, 1799). NaN where there isn't any ABI data.
+    """
+    data = np.asarray(data, dtype=np.float32)
+    stack = data.shape[:-2]
+    npix = data.shape[-2] * data.shape[-1]
+    if npix != R.shape[1]:
+        raise ValueError(
+            "The data has %s pixels, but the operator is for %s pixels"
+            % (npix, R.shape[1])
+        )
+
+    # One column for each array
+    flat = data.reshape(-1, npix).T
+    valid = np.isfinite(flat)
+    if valid.all():
+        total = R @ flat
+        weight = np.asarray(R.sum(axis=1), dtype=np.float32)
+    else:
+        total = R @ np.where(valid, flat, 0)
+        weight = R @ valid.astype(np.float32)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        H = total / weight
+    return H.T.reshape(stack + HRRR_SHAPE).astype(np.float32)
+
+
+def regrid_scans(FILES, variable, method="area", decimate=1, batch=12, verbose=True):
+    """
+    Regrid a variable from many ABI files, a batch of scans at a time.
+
+    Input:
+        FILES    - List of ABI files
+        variable - Variable name, i.e. 'CMI_C13'
+        method   - 'nearest' or 'area'
+        decimate - Regrid the variable decimated by this factor.
+        batch    - Number of scans regridded with each matrix product.
+
+    Yield:
+        files, H - The files in the batch and an array (files, 1059, 1799).
+                   A batch only has files with the same ABI grid.
+    """
+    files, scans, R = [], [], None
+    for FILE in FILES:
+        with xarray.open_dataset(FILE) as C:
+            this_R = regrid_operator(C, method, decimate=decimate, verbose=verbose)
+            data = block_reduce(
+                np.asarray(C[variable].data, dtype=np.float32), decimate
+            )
+        if len(files) > 0 and (this_R is not R or len(files) == batch):
+            yield files, regrid(np.array(scans), R)
+            files, scans = [], []
+        R = this_R
+        files.append(FILE)
+        scans.append(data)
+    if len(files) > 0:
+        yield files, regrid(np.array(scans), R)
@@ -0,0 +1,219 @@
+## Brian Blaylock
+## October 19, 2026
+
+"""
+Draw ABI RGB images on a map with imshow instead of pcolormesh.
+
+Plotting an RGB with pcolormesh needs a color tuple for every pixel
+(get_ABI.make_colorTuple) and draws a quadrilateral for every pixel, which is
+very slow for a CONUS scene. Instead, the RGB is warped onto the pixels of the
+map image: for each map pixel, the nearest ABI pixel is found by computing
+its scan angle from the pixel's latitude and longitude
+(GOES_geolocation.latlon_to_fixed_grid). The warp indices are the same for
+every scan with the same fixed grid, so they are saved in WARP_DIR for each
+(ABI grid, map grid) and reused. Warping an RGB is then one indexing
+operation, and the image is drawn with imshow or saved as a PNG.
+
+    target = map_grid(m)                       # m is a Basemap
+    idx = warp_indices(C, target)              # C is an ABI file (xarray)
+    image = warp_RGB(RGB, idx)
+    m.imshow(image, origin='upper')
+    # or, without a map
+    plt.imshow(image, extent=target['extent'], origin='upper')
+    save_image('TrueColor.png', image, target)
+"""
+
+import os
+import hashlib
+import numpy as np
+import matplotlib.pyplot as plt
+
+import sys
+
+sys.path.append("/uufs/chpc.utah.edu/common/home/u0553130/pyBKB_v3")
+from BB_GOES.GOES_geolocation import (
+    geolocation_key,
+    latlon_to_fixed_grid,
+    block_reduce,
+    projection_attributes,
+)
+
+# Directory where the warp indices are saved. Set PYBKB_CACHE to use another
+# directory than ~/.cache/pyBKB.
+WARP_DIR = os.path.join(
+    os.environ.get("PYBKB_CACHE", os.path.expanduser("~/.cache/pyBKB")), "warp"
+)
+
+# Warp indices already loaded in this Python session
+_WARP = {}
+
+
+def map_grid(m, nx=1000, ny=None):
+    """
+    Latitude and longitude of the image pixels for a Basemap.
+
+    Input:
+        m  - A Basemap object (i.e. from BB_maps.my_basemap.draw_HRRR_map())
+        nx - Number of image pixels in the x direction
+        ny - Number of image pixels in the y direction. If None, the pixels
+             are square.
+
+    Return:
+        Dictionary with 'lat' and 'lon' of the pixel centers (the first row
+        is the top of the image) and 'extent' (xmin, xmax, ymin, ymax) of the
+        image in the map coordinates.
+    """
+    dx = (m.xmax - m.xmin) / nx
+    if ny is None:
+        ny = int(round((m.ymax - m.ymin) / dx))
+    dy = (m.ymax - m.ymin) / ny
+    X = m.xmin + dx * (np.arange(nx) + 0.5)
+    Y = m.ymax - dy * (np.arange(ny) + 0.5)
+    XX, YY = np.meshgrid(X, Y)
+    lon, lat = m(XX, YY, inverse=True)
+    return {
+        "lat": np.asarray(lat),
+        "lon": np.asarray(lon),
+        "extent": (m.xmin, m.xmax, m.ymin, m.ymax),
+    }
+
+
+def latlon_grid(llcrnrlat, urcrnrlat, llcrnrlon, urcrnrlon, resolution=0.02):
+    """
+    Latitude and longitude of the image pixels for a regular lat/lon grid
+    (i.e. a cylindrical map).
+
+    Input:
+        llcrnrlat, urcrnrlat - Latitude of the bottom and top of the image
+        llcrnrlon, urcrnrlon - Longitude of the left and right of the image
+        resolution           - Size of the pixels (degrees)
+
+    Return:
+        Dictionary like map_grid(). 'extent' is in degrees.
+    """
+    nx = int(round((urcrnrlon - llcrnrlon) / resolution))
+    ny = int(round((urcrnrlat - llcrnrlat) / resolution))
+    lon = llcrnrlon + resolution * (np.arange(nx) + 0.5)
+    lat = urcrnrlat - resolution * (np.arange(ny) + 0.5)
+    lon, lat = np.meshgrid(lon, lat)
+    return {
+        "lat": lat,
+        "lon": lon,
+        "extent": (llcrnrlon, urcrnrlon, llcrnrlat, urcrnrlat),
+    }
+
+
+def _warp_key(C, target, decimate):
+    h = hashlib.sha1()
+    h.update(np.asarray(target["lat"], dtype=np.float64).tobytes())
+    h.update(np.asarray(target["lon"], dtype=np.float64).tobytes())
+    return "%s_to_%s" % (geolocation_key(C, decimate), h.hexdigest()[:16])
+
+
+def compute_warp_indices(C, target, decimate=1):
+    """
+    Index of the nearest ABI pixel for each image pixel.
+
+    Return:
+        int32 array with the shape of the image. The values are indexes of
+        the flattened ABI grid, and -1 where the image pixel is outside the
+        ABI grid or can't be seen by the satellite.
+    """
+    x = block_reduce(np.asarray(C["x"].data, dtype=np.float64), decimate)
+    y = block_reduce(np.asarray(C["y"].data, dtype=np.float64), decimate)
+
+    tx, ty, visible = latlon_to_fixed_grid(
+        target["lat"], target["lon"], **projection_attributes(C)
+    )
+
+    # The fixed grid is evenly spaced in scan angle, so the nearest pixel is
+    # found by rounding.
+    with np.errstate(invalid="ignore"):
+        j = np.round((tx - x[0]) / (x[1] - x[0]))
+        i = np.round((ty - y[0]) / (y[1] - y[0]))
+    inside = visible & (j >= 0) & (j < len(x)) & (i >= 0) & (i < len(y))
+
+    indices = np.full(np.shape(target["lat"]), -1, dtype=np.int32)
+    indices[inside] = (i[inside] * len(x) + j[inside]).astype(np.int32)
+    return indices
+
+
+def warp_indices(C, target, decimate=1, WARP_DIR=WARP_DIR, cache=True, verbose=True):
+    """
+    Warp indices from an ABI grid to an image grid (see compute_warp_indices).
+    The indices are read from WARP_DIR if they were computed before.
+
+    Input:
+        C        - An ABI file opened with xarray.
+        target   - The image grid from map_grid() or latlon_grid().
+        decimate - The RGB is decimated by this factor (see make_RGB).
+        cache    - If True, read and save the indices in WARP_DIR.
+    """
+    key = _warp_key(C, target, decimate)
+    if cache and key in _WARP:
+        return _WARP[key]
+
+    FILE = os.path.join(WARP_DIR, "%s.npy" % key)
+    if cache and os.path.exists(FILE):
+        if verbose:
+            print("Warp indices from cache: %s" % key)
+        _WARP[key] = np.load(FILE, mmap_mode="r")
+        return _WARP[key]
+
+    if verbose:
+        print("Computing warp indices: %s" % key)
+    indices = compute_warp_indices(C, target, decimate=decimate)
+    if cache:
+        if not os.path.exists(WARP_DIR):
+            os.makedirs(WARP_DIR)
+        TMP = FILE + ".%s.tmp.npy" % os.getpid()
+        np.save(TMP, indices)
+        os.replace(TMP, FILE)
+        _WARP[key] = indices
+    return indices
+
+
+def warp_RGB(RGB, indices, alpha=True):
+    """
+    Warp an RGB onto the image grid.
+
+    Input:
+        RGB     - RGB array (y, x, 3) on the ABI grid (i.e. from make_RGB)
+        indices - Warp indices from warp_indices()
+        alpha   - If True, add an alpha channel that is transparent where
+                  there isn't any data.
+
+    Return:
+        RGB or RGBA array with the shape of the image grid.
+    """
+    flat = np.asarray(RGB).reshape(-1, RGB.shape[-1])
+    valid = indices >= 0
+    image = flat[np.where(valid, indices, 0)]
+    valid &= ~np.isnan(image).any(axis=-1)
+    image[~valid] = 0
+    if alpha:
+        image = np.concatenate(
+            [image, valid[..., np.newaxis].astype(image.dtype)], axis=-1
+        )
+    return image
+
+
+def save_image(FILE, image, target=None):
+    """
+    Save an image as a PNG. If a target grid is given, also save a world file
+    (i.e. TrueColor.pgw) with the georeferencing of the image in the target's
+    coordinates (degrees for latlon_grid, map coordinates for map_grid).
+    """
+    plt.imsave(FILE, np.clip(image, 0, 1))
+    if target is not None:
+        xmin, xmax, ymin, ymax = target["extent"]
+        ny, nx = image.shape[:2]
+        dx = (xmax - xmin) / nx
+        dy = (ymax - ymin) / ny
+        WORLD = os.path.splitext(FILE)[0] + ".pgw"
+        with open(WORLD, "w") as f:
+            # Pixel size, rotation, and the center of the upper left pixel
+            f.write(
+                "%r\n0.0\n0.0\n%r\n%r\n%r\n" % (dx, -dy, xmin + dx / 2, ymax - dy / 2)
+            )
+    return FILE
@@ -15,7 +15,8 @@ Contents:
     get_GOES_dates()            - For ABI file opened with xarray, return the
                                   scan's start, end, and midpoint datetimes.
     get_GOES_latlon()           - Return the latitude/longitude values for the
-                                  grid. Also return satellite's height and longitude.
+                                  grid (cached). Also return satellite's height
+                                  and longitude.
     make_colorTuple()           - Convert a 3D RGB array into a list of color
                                   tuples suitable for plotting with pcolormesh.
     
@@ -23,11 +24,14 @@ Contents:
     get_GOES_FireTemperature()  - RGB Product: Fire Temperature
     get_GOES_DayConvection()    - RGB Product: Day Convection
     get_GOES_AirMass()          - RGB Product: Air Mass
+
+The RGB products accept decimate=N to average blocks of NxN pixels for quick
+look images (i.e. decimate=4 for web thumbnails). The lat/lon grid returned is
+for the decimated grid.
 """
 
 import numpy as np
 from datetime import datetime, timedelta
-from pyproj import Proj
 import subprocess
 import xarray
 import matplotlib.pyplot as pyplot
@@ -37,6 +41,9 @@ import sys
 
 sys.path.append("/uufs/chpc.utah.edu/common/home/u0553130/pyBKB_v3")
 sys.path.append("B:\pyBKB_v3")
+from BB_GOES.GOES_catalog import get_catalog, files_within, catalog_files
+from BB_GOES.GOES_geolocation import get_geolocation
+from BB_GOES.make_RGB import load_channel
 
 
 def contrast_correction(color, contrast):
@@ -84,54 +91,13 @@ def get_files_for_range(sDATE, eDATE, satellite=16, dataset="ABI", verbose=False
     assert satellite in [16, 17], "satellite must be either 16 or 17"
     assert dataset in ["ABI", "GLM"], 'dataset must be either "ABI" or "GLM"'
 
-    if dataset == "ABI":
-        Data = "ABI-L2-MCMIPC"
-    elif dataset == "GLM":
-        Data = "GLM-L2-LCFA"
-
-    # GOES16 ABI and GLM data is stored on horel-group7 and on Pando
-    HG7 = "/uufs/chpc.utah.edu/common/home/horel-group7/Pando/GOES%s/%s/" % (
-        satellite,
-        Data,
-    )
+    # GOES16 ABI and GLM data is stored on horel-group7 and on Pando. The
+    # files are looked up in the file catalog (BB_GOES.GOES_catalog), which
+    # only lists the directories it hasn't indexed yet.
+    catalog = get_catalog(satellite, dataset, sDATE, eDATE, verbose=verbose)
 
-    # Directories are sorted by hour. Get all possible direcotires within the
-    # requested range of dates.
-    dt = eDATE - sDATE
-    hours = dt.days * 24 + int((dt).seconds / 3600)
-    look_here_DATES = [sDATE + timedelta(hours=h) for h in range(hours + 1)]
-
-    # Store the files from each directory
-    files = []
-    for DATE in look_here_DATES:
-        # Directory path for this date...
-        DIR = HG7 + "%s/" % DATE.strftime("%Y%m%d/%H")
-        if verbose:
-            print("Looking here: %s" % DIR)
-        # Store the files (full path) from those directories, if it exists
-        if os.path.exists(DIR):
-            files += list(map(lambda x: DIR + x, os.listdir(DIR)))
-
-    # Sometime a file might be in the wrong directory. This was the case when GLM on GOES-17
-    # was being tested. We want to remove these, so save this variable for later.
-    files = list(filter(lambda x: "_G%02d_" % satellite in x, files))
-
-    # Convert to numpy array for indexing
-    files = np.array(files)
-
-    # Filter the files based on the requested range. File start scan should
-    # be after sDATE and file end scan should be before eDATE.
-    # First, we need arrays of the datetimes of each file.
-    sSCANS = np.array(
-        [datetime.strptime(x.split("_")[3], "s%Y%j%H%M%S%f") for x in files]
-    )
-    eSCANS = np.array(
-        [datetime.strptime(x.split("_")[4], "e%Y%j%H%M%S%f") for x in files]
-    )
-
-    # Determine index of files within the bounds.
-    within_bounds = np.logical_and(sSCANS >= sDATE, eSCANS <= eDATE)
-    files = files[within_bounds]
+    # Files with a start scan after sDATE and end scan before eDATE.
+    files = catalog_files(catalog, files_within(catalog, sDATE, eDATE))
 
     return files
 
@@ -183,45 +149,32 @@ def get_GOES_dates(C, verbose=True):
     return {"sDATE": scan_start, "eDATE": scan_end, "DATE": scan_mid}
 
 
-def get_GOES_latlon(C, verbose=True):
+def get_GOES_latlon(C, cache=True, decimate=1, verbose=True):
     """
-    Performs cartographic transformation of the geostationary dataset with pyproj.
-    This transformation returns a lat/lon array for each GOES-16 gridpoint.
+    Return the latitude/longitude values for each GOES gridpoint.
+
+    The grids are the same for every scan of a satellite and scene, so they
+    are computed once and read from the cache after that
+    (see BB_GOES.GOES_geolocation).
 
     Input:
-        C - An ABI file opened with xarray.
+        C        - An ABI file opened with xarray.
+        cache    - If True, use the cached grids. Cached grids are float32
+                   read-only memory maps.
+        decimate - Return the grid for channels decimated by this factor (the
+                   center of each block of decimate x decimate pixels).
     """
-    # Satellite height
+    # Satellite height and longitude
     sat_h = C["goes_imager_projection"].perspective_point_height
-
-    # Satellite longitude
     sat_lon = C["goes_imager_projection"].longitude_of_projection_origin
 
-    # Satellite sweep
-    sat_sweep = C["goes_imager_projection"].sweep_angle_axis
-
-    # The projection x and y coordinates equals the scanning angle (in radians)
-    # multiplied by the satellite height. See details here:
-    #   https://proj4.org/operations/projections/geos.html?highlight=geostationary
-    x = C["x"][:] * sat_h
-    y = C["y"][:] * sat_h
-
-    # Create a pyproj geostationary map object
-    p = Proj(proj="geos", h=sat_h, lon_0=sat_lon, sweep=sat_sweep)
-
-    # Perform cartographic transformation. That is, convert image projection
-    # coordinates (x and y) to latitude and longitude values.
-    XX, YY = np.meshgrid(x, y)
-    lons, lats = p(XX, YY, inverse=True)
-
-    # Assign the pixels showing empty space as a single point in the Gulf of Alaska
-    R = C["CMI_C02"].data  # load a visible channel to get NAN values
-    lats[np.isnan(R)] = 57
-    lons[np.isnan(R)] = -152
+    # The pixels showing empty space are a single point in the Gulf of Alaska
+    G = get_geolocation(C, cache=cache, decimate=decimate, verbose=verbose)
 
     return {
-        "lat": lats,
-        "lon": lons,
+        "lat": G["lat"],
+        "lon": G["lon"],
+        "off earth": G["off earth"],
         "Satellite Height": sat_h,
         "Satellite Longitude": sat_lon,
     }
@@ -239,10 +192,9 @@ def make_colorTuple(RGB, verbose=True):
     rgb = RGB[:, :-1, :]
 
     # Flatten the array, because that's what pcolormesh wants.
-    colorTuple = rgb.reshape((rgb.shape[0] * rgb.shape[1]), 3)
-
     # Adding an alpha channel will plot faster, according to Stack Overflow. Not sure why.
-    colorTuple = np.insert(colorTuple, 3, 1.0, axis=1)
+    colorTuple = np.ones((rgb.shape[0] * rgb.shape[1], 4), dtype=rgb.dtype)
+    colorTuple[:, :3] = rgb.reshape(-1, 3)
 
     if verbose:
         print("\n******************************************")
@@ -264,6 +216,7 @@ def get_GOES_TrueColor(
     true_green=True,
     night_IR=True,
     contrast_adjust=True,
+    decimate=1,
     verbose=True,
 ):
     """
@@ -285,16 +238,19 @@ def get_GOES_TrueColor(
         "FILE": FILE,
     }
 
+    # Channels read from the file (each channel is only read once)
+    channels = {}
+
     # Get Date and geospatial info
     if return_dates:
         return_this.update(get_GOES_dates(C, verbose=verbose))
     if return_latlon:
-        return_this.update(get_GOES_latlon(C, verbose=verbose))
+        return_this.update(get_GOES_latlon(C, decimate=decimate, verbose=verbose))
 
     # Load the three channels into appropriate R, G, and B variables
-    R = C["CMI_C02"].data
-    G = C["CMI_C03"].data
-    B = C["CMI_C01"].data
+    R = load_channel(C, 2, channels, decimate)
+    G = load_channel(C, 3, channels, decimate)
+    B = load_channel(C, 1, channels, decimate)
 
     # Apply range limits for each channel. RGB values must be between 0 and 1
     R = np.clip(R, 0, 1)
@@ -326,7 +282,7 @@ def get_GOES_TrueColor(
             print("    Contrast correction, contrast=", contrast_amount)
 
     if night_IR:
-        cleanIR = C["CMI_C13"].data
+        cleanIR = load_channel(C, 13, channels, decimate)
         # Normalize the channel between a range. e.g. cleanIR = (cleanIR-minimum)/(maximum-minimum)
         cleanIR = (cleanIR - 90) / (313 - 90)
         # Apply range limits for each channel. RGB values must be between 0 and 1
@@ -349,7 +305,9 @@ def get_GOES_TrueColor(
     return return_this
 
 
-def get_GOES_FireTemperature(FILE, return_dates=True, return_latlon=True, verbose=True):
+def get_GOES_FireTemperature(
+    FILE, return_dates=True, return_latlon=True, decimate=1, verbose=True
+):
     """
     Create a "Fire Temperature" RGB product.
 
@@ -369,16 +327,19 @@ def get_GOES_FireTemperature(FILE, return_dates=True, return_latlon=True, verbos
         "FILE": FILE,
     }
 
+    # Channels read from the file (each channel is only read once)
+    channels = {}
+
     # Get Date and geospatial info
     if return_dates:
         return_this.update(get_GOES_dates(C, verbose=verbose))
     if return_latlon:
-        return_this.update(get_GOES_latlon(C, verbose=verbose))
+        return_this.update(get_GOES_latlon(C, decimate=decimate, verbose=verbose))
 
     # Load the three channels into appropriate R, G, and B variables
-    R = C["CMI_C07"].data
-    G = C["CMI_C06"].data
-    B = C["CMI_C05"].data
+    R = load_channel(C, 7, channels, decimate)
+    G = load_channel(C, 6, channels, decimate)
+    B = load_channel(C, 5, channels, decimate)
 
     # Normalize each channel by the appropriate range of values  e.g. R = (R-minimum)/(maximum-minimum)
     R = (R - 273) / (333 - 273)
@@ -405,7 +366,9 @@ def get_GOES_FireTemperature(FILE, return_dates=True, return_latlon=True, verbos
     return return_this
 
 
-def get_GOES_DayConvection(FILE, return_dates=True, return_latlon=True, verbose=True):
+def get_GOES_DayConvection(
+    FILE, return_dates=True, return_latlon=True, decimate=1, verbose=True
+):
     """
     Create a "Day Convection" RGB product.
 
@@ -425,16 +388,20 @@ def get_GOES_DayConvection(FILE, return_dates=True, return_latlon=True, verbose=
         "FILE": FILE,
     }
 
+    # Channels read from the file (each channel is only read once)
+    channels = {}
+
     # Get Date and geospatial info
     if return_dates:
         return_this.update(get_GOES_dates(C, verbose=verbose))
     if return_latlon:
-        return_this.update(get_GOES_latlon(C, verbose=verbose))
+        return_this.update(get_GOES_latlon(C, decimate=decimate, verbose=verbose))
 
     # Load the three channels into appropriate R, G, and B variables
-    R = C["CMI_C08"].data - C["CMI_C10"].data
-    G = C["CMI_C07"].data - C["CMI_C13"].data
-    B = C["CMI_C05"].data - C["CMI_C02"].data
+    CMI = {c: load_channel(C, c, channels, decimate) for c in [2, 5, 7, 8, 10, 13]}
+    R = CMI[8] - CMI[10]
+    G = CMI[7] - CMI[13]
+    B = CMI[5] - CMI[2]
 
     # Normalize each channel by the appropriate range of values. e.g. R = (R-minimum)/(maximum-minimum)
     R = (R - -35) / (5 - -35)
@@ -456,7 +423,9 @@ def get_GOES_DayConvection(FILE, return_dates=True, return_latlon=True, verbose=
     return return_this
 
 
-def get_GOES_AirMass(FILE, return_dates=True, return_latlon=True, verbose=True):
+def get_GOES_AirMass(
+    FILE, return_dates=True, return_latlon=True, decimate=1, verbose=True
+):
     """
     Create an "Air Mass" RGB product.
 
@@ -476,16 +445,20 @@ def get_GOES_AirMass(FILE, return_dates=True, return_latlon=True, verbose=True):
         "FILE": FILE,
     }
 
+    # Channels read from the file (each channel is only read once)
+    channels = {}
+
     # Get Date and geospatial info
     if return_dates:
         return_this.update(get_GOES_dates(C, verbose=verbose))
     if return_latlon:
-        return_this.update(get_GOES_latlon(C, verbose=verbose))
+        return_this.update(get_GOES_latlon(C, decimate=decimate, verbose=verbose))
 
     # Load the three channels into appropriate R, G, and B variables
-    R = C["CMI_C08"].data - C["CMI_C10"].data
-    G = C["CMI_C12"].data - C["CMI_C13"].data
-    B = C["CMI_C08"].data - 273.15  # remember to convert to Celsius
+    CMI = {c: load_channel(C, c, channels, decimate) for c in [8, 10, 12, 13]}
+    R = CMI[8] - CMI[10]
+    G = CMI[12] - CMI[13]
+    B = CMI[8] - 273.15  # remember to convert to Celsius
 
     # Normalize each channel by the appropriate range of values. e.g. R = (R-minimum)/(maximum-minimum)
     R = (R - -26.2) / (0.6 - -26.2)
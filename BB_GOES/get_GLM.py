@@ -25,7 +25,10 @@ Approximate Timeline of 5 minutes of ABI and GLM data collection:
 Functions:
     get_GLM_files_for_range() - Get GLM file names for a date range
     get_GLM_files_for_ABI()   - Get GLM file names for an ABI image
+    read_GLM()                - Read GLM data from many files into float32 arrays
     accumulate_GLM()          - Return list of point data for a list of files
+    GLM_xarray_dataset()      - Lazy xarray Dataset of GLM data from many files
+    GLM_xarray_concatenate()  - Dictionary of xarray DataArrays from many files
     filter_by_path()          - Filter GLM flashes by a path.
     filter_by_HRRR()          - Filter GLM flashes by HRRR domain.
 """
@@ -34,13 +37,27 @@ import os
 import numpy as np
 from datetime import datetime, timedelta
 import xarray
+import netCDF4
 import multiprocessing
-import itertools
+from multiprocessing import shared_memory
+from functools import partial
 
 import sys
 
 sys.path.append("/uufs/chpc.utah.edu/common/home/u0553130/pyBKB_v3/")
 sys.path.append("B:\pyBKB_v3")
+from BB_HRRR.HRRR_grid_index import (
+    HRRR_grid_affine,
+    latlon_to_HRRR_index,
+    bin_on_HRRR_grid,
+)
+from BB_GOES.GOES_catalog import (
+    get_catalog,
+    files_for_range,
+    file_nearest,
+    catalog_files,
+    to_datetime,
+)
 
 
 def get_GLM_file_nearesttime(DATE, satellite=16, window=0, verbose=True):
@@ -51,6 +68,8 @@ def get_GLM_file_nearesttime(DATE, satellite=16, window=0, verbose=True):
     represents observed events/groups/flashes begining at DATE and ending at
     DATE+20 seconds.
 
+    The files are looked up in the GLM file catalog (BB_GOES.GOES_catalog).
+
     Input:
         DATE      - Datetime object for the date you want to find the nearest GLM
                     file available.
@@ -66,86 +85,19 @@ def get_GLM_file_nearesttime(DATE, satellite=16, window=0, verbose=True):
     # Number of expected files
     expected = window * 3 * 2
 
-    # List available files for the requested datetime and include files for
+    # Index the files for the requested datetime and include files for
     # +/- 1 hour
-    HG7 = (
-        "/uufs/chpc.utah.edu/common/home/horel-group7/Pando/GOES%s/GLM-L2-LCFA/"
-        % satellite
+    search = timedelta(minutes=max(window, 60))
+    catalog = get_catalog(
+        satellite, "GLM", DATE - search, DATE + search, verbose=verbose
     )
-    ls1 = HG7 + "%s/" % (DATE - timedelta(hours=1)).strftime("%Y%m%d/%H")
-    ls2 = HG7 + "%s/" % DATE.strftime("%Y%m%d/%H")
-    ls3 = HG7 + "%s/" % (DATE + timedelta(hours=1)).strftime("%Y%m%d/%H")
-
-    if verbose:
-        print(
-            "Looking for GOES-%s in these file paths for the nearest datetime"
-            % satellite
-        )
-        print("  ", ls1)
-        print("  ", ls2)
-        print("  ", ls3)
-        print("---------------------------------------------------")
-
-    # List the files in those directory, if the directory exists.
-    if os.path.exists(ls1):
-        files1 = list(
-            map(
-                lambda x: HG7
-                + (datetime.strptime(x.split("_")[3], "s%Y%j%H%M%S%f")).strftime(
-                    "%Y%m%d/%H/"
-                )
-                + x,
-                os.listdir(ls1),
-            )
-        )
-        # Remove GOES files from other satellite if there are any
-        files1 = list(filter(lambda x: "_G%s_" % satellite in x, files1))
-    else:
-        files1 = []
-        print("**************************************************************")
-        print("!!!WARNING!!! Missing GLM directory", ls1)
-        print("**************************************************************")
-    if os.path.exists(ls2):
-        files2 = list(
-            map(
-                lambda x: HG7
-                + (datetime.strptime(x.split("_")[3], "s%Y%j%H%M%S%f")).strftime(
-                    "%Y%m%d/%H/"
-                )
-                + x,
-                os.listdir(ls2),
-            )
-        )
-        # Remove GOES files from other satellite if there are any
-        files2 = list(filter(lambda x: "_G%s_" % satellite in x, files2))
-    else:
-        files2 = []
-        print("**************************************************************")
-        print("!!!WARNING!!! Missing GLM directory", ls2)
-        print("**************************************************************")
-    if os.path.exists(ls3):
-        files3 = list(
-            map(
-                lambda x: HG7
-                + (datetime.strptime(x.split("_")[3], "s%Y%j%H%M%S%f")).strftime(
-                    "%Y%m%d/%H/"
-                )
-                + x,
-                os.listdir(ls3),
-            )
-        )
-        # Remove GOES files from other satellite if there are any
-        files3 = list(filter(lambda x: "_G%s_" % satellite in x, files3))
-    else:
-        files3 = []
-        print("**************************************************************")
-        print("!!!WARNING!!! Missing GLM directory", ls3)
-        print("**************************************************************")
 
-    all_files = np.array(files1 + files2 + files3)
-    all_files = np.sort(all_files)  # Sort files by name
+    # Find the file nearest the requested DATE
+    nearest_idx = file_nearest(
+        catalog, DATE, on="start", max_distance=timedelta(hours=1)
+    )
 
-    if len(all_files) == 0:
+    if nearest_idx is None:
         print("There are no GLM files within three hours of Date requested")
         if window == 0:
             return None
@@ -157,17 +109,7 @@ def get_GLM_file_nearesttime(DATE, satellite=16, window=0, verbose=True):
                 "Range": [np.nan, np.nan],
             }
 
-    # Get start datetime of all files
-    files_datetime = list(
-        map(lambda x: datetime.strptime(x.split("_")[3], "s%Y%j%H%M%S%f"), all_files)
-    )
-    files_datetime = np.array(files_datetime)
-
-    # Find the file nearest the requested DATE
-    nearest_datetime_idx = np.argmin(np.abs(files_datetime - DATE))
-    nearest_datetime = datetime.strptime(
-        all_files[nearest_datetime_idx].split("_")[3], "s%Y%j%H%M%S%f"
-    )
+    nearest_datetime = to_datetime(catalog["start"][nearest_idx])
 
     if verbose:
         print("    Date Requested:", DATE)
@@ -180,7 +122,7 @@ def get_GLM_file_nearesttime(DATE, satellite=16, window=0, verbose=True):
                 "Return 1 file nearest to %s because window is set to 0"
                 % nearest_datetime
             )
-        return all_files[nearest_datetime_idx]
+        return catalog_files(catalog, [nearest_idx])[0]
     else:
         """
         GLM outputs files are every 20 seconds. We expect 3 files per minute.
@@ -192,12 +134,11 @@ def get_GLM_file_nearesttime(DATE, satellite=16, window=0, verbose=True):
         minus_window_datetime = DATE - timedelta(minutes=window)
         plus_window_datetime = DATE + timedelta(minutes=window)
 
-        dates_in_window = np.logical_and(
-            files_datetime >= minus_window_datetime,
-            files_datetime < plus_window_datetime,
+        idx = files_for_range(
+            catalog, minus_window_datetime, plus_window_datetime, on="start"
         )
 
-        if np.sum(dates_in_window) == 0:
+        if len(idx) == 0:
             print("************************************************************")
             print("!! WARNING !! There are no GLM files for the period requested!")
             print("************************************************************")
@@ -208,17 +149,10 @@ def get_GLM_file_nearesttime(DATE, satellite=16, window=0, verbose=True):
                 "Range": [np.nan, np.nan],
             }
 
-        # Get index of plus and minus window datetime
-        # minus_window_datetime_idx = np.argmin(np.abs(files_datetime-minus_window_datetime))
-        # plus_window_datetime_idx = np.argmin(np.abs(files_datetime-plus_window_datetime))
-
         # Retrieve files for the requested window
-        # a = slice(minus_window_datetime_idx, plus_window_datetime_idx)
-        # sDATE = datetime.strptime(all_files[a][0].split('_')[3], 's%Y%j%H%M%S%f')
-        # eDATE = datetime.strptime(all_files[a][-1].split('_')[4], 'e%Y%j%H%M%S%f')
-        a = all_files[dates_in_window]
-        sDATE = datetime.strptime(a[0].split("_")[3], "s%Y%j%H%M%S%f")
-        eDATE = datetime.strptime(a[-1].split("_")[4], "e%Y%j%H%M%S%f")
+        a = catalog_files(catalog, idx)
+        sDATE = to_datetime(catalog["start"][idx[0]])
+        eDATE = to_datetime(catalog["end"][idx[-1]])
         if verbose:
             print("---------------------------------------------------")
             print(" Window == +/- %s Minutes" % (window))
@@ -243,47 +177,31 @@ def get_GLM_file_nearesttime(DATE, satellite=16, window=0, verbose=True):
         }
 
 
-def get_GLM_files_for_range(sDATE, eDATE, HOURS=range(24)):
+def get_GLM_files_for_range(sDATE, eDATE, HOURS=range(24), satellite=16):
     """
     Get all the GLM 'flashes' data file names that occurred within a range of
     DATES
 
     Input:
-        sDATE - the begining date you want GLM data for
-        eDATE - the ending date you want GLM data for (exclusive)
-        HOURS - Separate retreval by hour
+        sDATE     - the begining date you want GLM data for
+        eDATE     - the ending date you want GLM data for (exclusive)
+        HOURS     - Only return files for these hours of the day
+        satellite - 16 or 17, for GOES 16 or GOES 17. Default is 16
     """
-    # GOES16 ABI and GLM data is stored on horel-group7 and on Pando
-    HG7 = "/uufs/chpc.utah.edu/common/home/horel-group7/Pando/GOES16/GLM-L2-LCFA/"
-
-    # List range of dates by hour. Each hour is a directory we need to grab files from.
-    ## Old method: All possible files from all hours
-    # hours = int((eDATE-sDATE).seconds/60/60 + (eDATE-sDATE).days*24 + 1)
-    # DATES = [sDATE+timedelta(hours=h) for h in range(hours)]
-    ## New method: All possible files from hours requested
-    days = (eDATE - sDATE).days
-    DAYS = [sDATE + timedelta(days=d) for d in range(days)]
-    DATES = [datetime(d.year, d.month, d.day, h) for d in DAYS for h in HOURS]
-
-    PATHS = ["%s/%s/" % (HG7, i.strftime("%Y%m%d/%H")) for i in DATES]
-
-    GLM = []
-    for i in PATHS:
-        try:
-            for f in os.listdir(i):
-                GLM.append(i + f)
-        except:
-            print("Missing: %s" % i)
-            pass
-
-    # Filter out the ones not within the requested sDATE and eDATE
-    GLM_FILES = list(
-        filter(
-            lambda x: datetime.strptime(x.split("_")[4], "e%Y%j%H%M%S%f") < eDATE
-            and datetime.strptime(x.split("_")[4], "e%Y%j%H%M%S%f") >= sDATE,
-            GLM,
-        )
-    )
+    # GOES16 ABI and GLM data is stored on horel-group7 and on Pando. The
+    # files are looked up in the GLM file catalog.
+    catalog = get_catalog(satellite, "GLM", sDATE, eDATE, verbose=True)
+
+    # Files ending within the requested sDATE and eDATE
+    idx = files_for_range(catalog, sDATE, eDATE, on="end")
+
+    # Only the files from the hours requested (files are stored in a directory
+    # for the hour they start).
+    if len(set(HOURS)) < 24:
+        start_hour = catalog["start"][idx].astype("datetime64[h]").astype(int) % 24
+        idx = idx[np.isin(start_hour, list(HOURS))]
+
+    GLM_FILES = list(catalog_files(catalog, idx))
 
     return_this = {"Files": GLM_FILES, "Range": [sDATE, eDATE]}
 
@@ -300,65 +218,104 @@ def get_GLM_files_for_ABI(FILE, next_minutes=5):
         next_minutes - Time time duration to collect GLM file names. Default is
                        5 minutes which is the timedelta between ABI scans.
     """
-    # GOES16 ABI and GLM data is stored on horel-group7 and on Pando
-    HG7 = "/uufs/chpc.utah.edu/common/home/horel-group7/Pando/GOES16/GLM-L2-LCFA/"
-
-    # List range of dates by hour. Each hour is a directory we need to grab files from.
     # Get info from the file name
-    FILE_SPLIT = FILE.split("_")
+    FILE_SPLIT = os.path.basename(FILE).split("_")
+    satellite = int(FILE_SPLIT[2][1:])
     sDATE = datetime.strptime(FILE_SPLIT[3], "s%Y%j%H%M%S%f")
     eDATE = sDATE + timedelta(minutes=next_minutes)
 
-    hours = int((eDATE - sDATE).seconds / 60 / 60 + (eDATE - sDATE).days * 24 + 1)
-    DATES = [sDATE + timedelta(hours=h) for h in range(hours)]
+    # GOES16 ABI and GLM data is stored on horel-group7 and on Pando. The
+    # files are looked up in the GLM file catalog.
+    catalog = get_catalog(satellite, "GLM", sDATE, eDATE, verbose=True)
 
-    GLM = []
-    for i in DATES:
-        DIR = "%s/%s/" % (HG7, i.strftime("%Y%m%d/%H"))
-        try:
-            for f in os.listdir(DIR):
-                GLM.append(DIR + f)
-        except:
-            print("Missing: %s" % DIR)
-            pass
-
-    GLM_FILES = list(
-        filter(
-            lambda x: datetime.strptime(x.split("_")[4], "e%Y%j%H%M%S%f") < eDATE
-            and datetime.strptime(x.split("_")[4], "e%Y%j%H%M%S%f") >= sDATE,
-            GLM,
-        )
-    )
+    idx = files_for_range(catalog, sDATE, eDATE, on="end")
+    GLM_FILES = list(catalog_files(catalog, idx))
 
     return_this = {"Files": GLM_FILES, "Range": [sDATE, eDATE]}
 
     return return_this
 
 
-def accumulate_GLM_FAST_MP(inputs):
-    """input - the full path to a GLM directory"""
-    complete, data_type, FILE = inputs
-    G = xarray.open_dataset(FILE)
-    lats = G.variables[data_type + "_lat"].data
-    lons = G.variables[data_type + "_lon"].data
-    energy = G.variables[data_type + "_energy"].data
-    if data_type == "event":
-        area = np.nan
-    else:
-        area = G.variables[data_type + "_area"].data
-    G.close()
+# Variables read from each GLM file for each data type. Only these variables
+# are read (and scaled) from the file.
+GLM_VARIABLES = {
+    "flash": ["lat", "lon", "energy", "area"],
+    "group": ["lat", "lon", "energy", "area"],
+    "event": ["lat", "lon", "energy"],
+}
+
+# Name of the output key for each variable
+GLM_KEYS = {"lat": "latitude", "lon": "longitude", "energy": "energy", "area": "area"}
+
+# Name of the dimension for each data type
+GLM_DIMS = {
+    "flash": "number_of_flashes",
+    "group": "number_of_groups",
+    "event": "number_of_events",
+}
+
+
+def _GLM_file_length_MP(inputs):
+    """Number of flashes, groups, or events in a GLM file (header only)."""
+    FILE, data_type = inputs
+    with netCDF4.Dataset(FILE, "r") as G:
+        return len(G.dimensions[GLM_DIMS[data_type]])
+
+
+def _fill_GLM(out, FILE, data_type, variables, start):
+    """Read the requested variables of a GLM file into out[:, start:]."""
+    with netCDF4.Dataset(FILE, "r") as G:
+        for k, var in enumerate(variables):
+            # CF decoding (scale_factor, add_offset, _FillValue) is only done
+            # for the variables that are read.
+            data = G.variables["%s_%s" % (data_type, var)][:]
+            out[k, start : start + len(data)] = np.ma.filled(data, np.nan)
+
+
+def _fill_GLM_MP(inputs):
+    """
+    Read the requested variables from one GLM file and write them into the
+    shared output array at this file's offset.
+    """
+    complete, FILE, data_type, variables, shm_name, total, start = inputs
+    shm = shared_memory.SharedMemory(name=shm_name)
+    out = np.ndarray((len(variables), total), dtype=np.float32, buffer=shm.buf)
+    _fill_GLM(out, FILE, data_type, variables, start)
+    shm.close()
     if complete % 5 == 0:
-        sys.stdout.write("\r-->> Accumulate GLM FAST MP: %.1f%%" % complete)
-    return [lats, lons, area, energy]
+        sys.stdout.write("\r-->> Read GLM: %.1f%%" % complete)
+    return None
 
 
-def accumulate_GLM_FAST(GLM, data_type="flash", verbose=True):
+def read_GLM(GLM, data_type="flash", variables=None, cpus=10, verbose=True):
     """
-    A multiprocessing (fast) version of accumulate_GLM
-        GLM       - a list of file paths
+    Read GLM flash, group, or event data from many files into float32 arrays.
+
+    1) Get the number of flashes/groups/events in each file from the file
+       headers and compute the offset of each file in the output.
+    2) Fill one shared float32 array in parallel. Each process reads only
+       the requested variables from its file and writes them in place. The
+       shared array is copied out once and unlinked. With cpus=1, or when
+       called from a Pool worker (which can't start its own Pool), the files
+       are read one at a time into the output instead.
+
+    Input:
+        GLM       - A list of GLM file paths and names, or the dictionary
+                    returned by get_GLM_file_nearesttime(),
+                    get_GLM_files_for_range(), or get_GLM_files_for_ABI().
         data_type - 'flash', 'group', or 'event'
-    """
+        variables - List of variables to read, i.e. ['lat', 'lon'].
+                    Default reads all in GLM_VARIABLES[data_type].
+        cpus      - Maximum number of processes. 1 reads the files serially.
 
+    Return:
+        A dictionary of columns with a float32 array for each variable
+        ('latitude', 'longitude', 'energy', 'area'), and
+            'offsets'  - Data from FILES[i] is in [offsets[i]:offsets[i+1]]
+            'FILES'    - The files that were read
+            'DATETIME' - [first file start date, last file start date]
+        Returns None if there are no files.
+    """
     # If GLM is not a dictionary with a key 'Files', then package it as a dict
     if type(GLM) is not dict:
         GLM = {"Files": GLM}
@@ -366,50 +323,100 @@ def accumulate_GLM_FAST(GLM, data_type="flash", verbose=True):
         FILE_DATES = [
             datetime.strptime(i.split("_")[3], "s%Y%j%H%M%S%f") for i in GLM["Files"]
         ]
-        GLM["Range"] = [min(FILE_DATES), max(FILE_DATES)]
+        if len(FILE_DATES) > 0:
+            GLM["Range"] = [min(FILE_DATES), max(FILE_DATES)]
 
-    if len(GLM["Files"]) == 0:
+    FILES = list(GLM["Files"])
+    if len(FILES) == 0:
         print("************************************************************")
         print("!! WARNING !! There are no GLM files!")
         print("************************************************************")
         return None
 
-    inputs = [
-        [i / len(GLM["Files"]) * 100, data_type, f] for i, f in enumerate(GLM["Files"])
-    ]
-
-    cpus = np.minimum(len(GLM["Files"]), 10)
-    P = multiprocessing.Pool(cpus)
-    results = P.map(accumulate_GLM_FAST_MP, inputs)
-    P.close()
-
-    lats = [i[0] for i in results]
-    lons = [i[1] for i in results]
-    area = [i[2] for i in results]
-    energy = [i[3] for i in results]
-
-    lats = list(itertools.chain(*lats))
-    lons = list(itertools.chain(*lons))
-    energy = list(itertools.chain(*energy))
-    if data_type == "event":
-        area = None
+    if variables is None:
+        variables = GLM_VARIABLES[data_type]
+
+    cpus = int(np.minimum(len(FILES), cpus))
+    if multiprocessing.current_process().daemon:
+        # Daemonic processes are not allowed to have children
+        cpus = 1
+
+    # 1) Length of each file and the offsets in the output arrays
+    if cpus > 1:
+        with multiprocessing.Pool(cpus) as P:
+            lengths = P.map(_GLM_file_length_MP, [(f, data_type) for f in FILES])
+            P.close()
+            P.join()
+    else:
+        lengths = [_GLM_file_length_MP((f, data_type)) for f in FILES]
+    offsets = np.zeros(len(FILES) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(lengths)
+    total = int(offsets[-1])
+
+    # 2) Fill the output (a shared float32 array in parallel).
+    shape = (len(variables), total)
+    if total == 0 or cpus == 1:
+        columns = np.empty(shape, dtype=np.float32)
+        for f, start, n in zip(FILES, offsets, lengths):
+            if n > 0:
+                _fill_GLM(columns, f, data_type, variables, start)
     else:
-        area = list(itertools.chain(*area))
+        nbytes = len(variables) * total * np.dtype(np.float32).itemsize
+        shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        try:
+            inputs = [
+                [i / len(FILES) * 100, f, data_type, variables, shm.name, total, s]
+                for i, (f, s, n) in enumerate(zip(FILES, offsets, lengths))
+                if n > 0
+            ]
+            with multiprocessing.Pool(cpus) as P:
+                P.map(_fill_GLM_MP, inputs)
+                P.close()
+                P.join()
+            # The only copy. The shared memory is freed right after.
+            columns = np.ndarray(shape, dtype=np.float32, buffer=shm.buf).copy()
+        finally:
+            shm.close()
+            shm.unlink()
 
-    return {
-        "latitude": np.array(lats),
-        "longitude": np.array(lons),
-        "area": np.array(area),
-        "energy": np.array(energy),
-        "DATETIME": GLM["Range"],
-    }
+    if verbose:
+        print(
+            "\nRead {:,} GLM {} data points from {} files".format(
+                total, data_type, len(FILES)
+            )
+        )
 
+    return_this = {GLM_KEYS[var]: columns[k] for k, var in enumerate(variables)}
+    return_this["offsets"] = offsets
+    return_this["FILES"] = FILES
+    return_this["DATETIME"] = GLM.get("Range")
+    return return_this
+
+
+def _accumulate_GLM(GLM, data_type="flash", cpus=10, verbose=True):
+    """read_GLM() with area=None for events (events don't have an area)."""
+    glm = read_GLM(GLM, data_type=data_type, cpus=cpus, verbose=verbose)
+    if glm is not None and data_type == "event":
+        glm["area"] = None
+    return glm
+
+
+def accumulate_GLM_FAST(GLM, data_type="flash", verbose=True):
+    """
+    Return the latitude, longitude, energy, and area of all the flashes (or
+    groups or events) in a list of GLM files. Uses read_GLM() in parallel.
+        GLM       - a list of file paths
+        data_type - 'flash', 'group', or 'event'
+    """
+    return _accumulate_GLM(GLM, data_type=data_type, verbose=verbose)
 
-def accumulate_GLM(GLM, data_type="flash", verbose=True, in_HRRR_domain=False):
+
+def accumulate_GLM(GLM, data_type="flash", verbose=True, in_HRRR_domain=False, cpus=1):
     """
     Accumulate all the GLM 'flash' data that occurred within the 5-minute
     scan window for an ABI file and return the latitude, longitude, and energy
-    of all the flashes.
+    of all the flashes. Uses read_GLM(), serially by default so it can be
+    called from a Pool worker (i.e. make_plot in plot_HRRR_LTNG_GLM.py).
 
     Input:
         GLM       - A list of GLM file paths and names returned by
@@ -417,108 +424,155 @@ def accumulate_GLM(GLM, data_type="flash", verbose=True, in_HRRR_domain=False):
         data_type - Data to retrieve. Default is 'flash' data. Other options
                     are 'event' and 'group' which have messed up latitude and
                     longitude, so don't use them unless you figure them out.
+        cpus      - Maximum number of processes. Default reads the files
+                    serially.
 
     Output:
         A dictionary containing the latitudes, longitudes, and energy of each
         flash (or event or group).
     """
-    # If GLM is not a dictionary with a key 'Files', then package it as a dict
-    if type(GLM) is not dict:
-        GLM = {"Files": GLM}
-        # Find the earliest and latest file start date if they are not provided
-        FILE_DATES = [
-            datetime.strptime(i.split("_")[3], "s%Y%j%H%M%S%f") for i in GLM["Files"]
-        ]
-        GLM["Range"] = [min(FILE_DATES), max(FILE_DATES)]
-
-    # Initialize arrays for latitude, longitude, and flash energy
-    lats = np.array([])
-    lons = np.array([])
-    energy = np.array([])
-    area = np.array([])
-
-    # Read the data
-    for i, FILE in enumerate(GLM["Files"]):
-        G = xarray.open_dataset(FILE)
-        lats = np.append(lats, G.variables[data_type + "_lat"].data)
-        lons = np.append(lons, G.variables[data_type + "_lon"].data)
-        energy = np.append(energy, G.variables[data_type + "_energy"].data)
-        area = np.append(energy, G.variables[data_type + "_area"].data)
-        G.close()
-        if verbose:
-            DATE = datetime.strptime(FILE.split("_")[3], "s%Y%j%H%M%S%f")
-            sys.stdout.write(
-                "\r%.1f%% Complete (%s of %s) : %s"
-                % (i / len(GLM["Files"]) * 100, i, len(GLM["Files"]), DATE)
-            )
+    glm = _accumulate_GLM(GLM, data_type=data_type, cpus=cpus, verbose=verbose)
 
     # Filter results if not in HRRR domain
-    if in_HRRR_domain:
+    if in_HRRR_domain and glm is not None:
         # HRRR max/min latitude and longitude were determined previously
         # 21.138, 52.61565, -134.09613, -60.91784
+        lats = glm["latitude"]
+        lons = glm["longitude"]
 
         # Filter for locations within the HRRR domain
         index_bound_lat = np.logical_and(lats > 21.138, lats < 52.61565)
         index_bound_lon = np.logical_and(lons > -134.09613, lons < -60.91784)
         bound = np.logical_and(index_bound_lat, index_bound_lon)
 
-        lats = lats[bound]
-        lons = lons[bound]
-        energy = energy[bound]
-        area = area[bound]
+        for key in ["latitude", "longitude", "energy", "area"]:
+            if glm[key] is not None:
+                glm[key] = glm[key][bound]
+        # The per-file offsets don't apply after filtering
+        glm["offsets"] = None
 
-    return {
-        "latitude": lats,
-        "longitude": lons,
-        "energy": energy,
-        "area": area,
-        "DATETIME": GLM["Range"],
-    }
+    return glm
+
+
+def _GLM_preprocess(G, data_type="flash", variables=None):
+    """Keep only the requested variables of a GLM file for open_mfdataset."""
+    G = G[["%s_%s" % (data_type, v) for v in variables]]
+    G = G.rename({"%s_%s" % (data_type, v): GLM_KEYS[v] for v in variables})
+    # Drop the scalar coordinates (i.e. product_time) that differ by file.
+    return G.reset_coords(drop=True)
 
 
-def GLM_xarray_concatenate(FILES, data_type="flash", verbose=True):
+def GLM_xarray_dataset(
+    FILES, data_type="flash", variables=None, chunks={}, parallel=False, verbose=True
+):
     """
-    ** This function isn't as fast as accumulate_GLM, but it returns the output
-    ** in xarray format.
+    Return GLM data from multiple files as a lazy, dask-backed xarray Dataset.
 
-    Return GLM data from multiple files as a concatenated xarray dataframe.
-    I wonder what the limit of number of open files is? Depends on available
-    memory.
+    1) Get the number of flashes/groups/events in each file from the file
+       headers (the same offsets as read_GLM).
+    2) Open all the files with xarray.open_mfdataset. The flash/group/event
+       dimension is concatenated once, and each file is a dask chunk, so
+       nothing is read until it is computed.
+    3) Add the start date of each file as the 'file_start' coordinate.
+
+    Reductions are done chunk by chunk, i.e.
+        G = GLM_xarray_dataset(FILES)
+        G.energy.sum().compute()
+        G.energy.groupby('file_start').sum().compute()
 
     Input:
         FILES     - A list of file paths and names for each GLM file
         data_type - 'flash', 'group', or 'event'
+        variables - List of variables to read, i.e. ['lat', 'lon'].
+                    Default reads all in GLM_VARIABLES[data_type].
+        chunks    - Chunks passed to open_mfdataset. Default, {}, is one
+                    chunk per file. An int rechunks the concatenated dimension
+                    to that many points per chunk.
+        parallel  - Open the files in parallel with dask.delayed.
+
+    Return:
+        An xarray Dataset with 'latitude', 'longitude', 'energy', and 'area'
+        (flash and group only) along the GLM_DIMS[data_type] dimension.
+        Data from FILES[i] is in [offsets[i]:offsets[i+1]] of the 'offsets'
+        attribute. Returns None if there are no files.
     """
-    # Open all the files for the ABI scan and store in a dictionary
-    for i, f in enumerate(FILES):
-        with xarray.open_dataset(f) as G:
-            if i == 0:
-                lon = G.flash_lon
-                lat = G.flash_lat
-                energy = G.flash_energy
-                area = G.flash_area
-            else:
-                lon = xarray.concat([lon, G.flash_lon], dim="number_of_flashes")
-                lat = xarray.concat([lat, G.flash_lat], dim="number_of_flashes")
-                energy = xarray.concat(
-                    [energy, G.flash_energy], dim="number_of_flashes"
-                )
-                area = xarray.concat([area, G.flash_area], dim="number_of_flashes")
+    assert data_type in GLM_VARIABLES, "data_type must be flash, group, or event"
+    if variables is None:
+        variables = GLM_VARIABLES[data_type]
 
-            if verbose:
-                num = len(FILES)
-                sys.stdout.write(
-                    "\r%.1f%% Complete (%s of %s)" % (i / num * 100, i, num)
-                )
-    # Other Variables:
-    # flash_id = xarray.concat([dd[i].flash_id for i in dd.keys()], dim='number_of_flashes')
-    # flash_quality_flag = xarray.concat([dd[i].flash_quality_flag for i in dd.keys()], dim='number_of_flashes')
-    # flash_time_offset_of_first_event = xarray.concat([dd[i].flash_time_offset_of_first_event for i in dd.keys()], dim='number_of_flashes')
-    # flash_time_offset_of_last_event = xarray.concat([dd[i].flash_time_offset_of_last_event for i in dd.keys()], dim='number_of_flashes')
-    # group_parent_flash_id = xarray.concat([dd[i].group_parent_flash_id for i in dd.keys()], dim='number_of_groups')
+    FILES = list(FILES)
+    if len(FILES) == 0:
+        print("!! WARNING !! There are no GLM files to concatenate")
+        return None
+
+    DIM = GLM_DIMS[data_type]
+
+    # Offset of each file in the concatenated dimension (header only).
+    lengths = [_GLM_file_length_MP([f, data_type]) for f in FILES]
+    offsets = np.zeros(len(FILES) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(lengths)
 
-    # Return the values
-    return {"longitude": lon, "latitude": lat, "area": area, "energy": energy}
+    FILE_DATES = np.array(
+        [
+            datetime.strptime(os.path.basename(f).split("_")[3], "s%Y%j%H%M%S%f")
+            for f in FILES
+        ],
+        dtype="datetime64[ms]",
+    )
+
+    if isinstance(chunks, int):
+        chunks, rechunk = {}, chunks
+    else:
+        rechunk = None
+
+    G = xarray.open_mfdataset(
+        FILES,
+        combine="nested",
+        concat_dim=DIM,
+        data_vars="minimal",
+        coords="minimal",
+        compat="override",
+        preprocess=partial(_GLM_preprocess, data_type=data_type, variables=variables),
+        chunks=chunks,
+        parallel=parallel,
+    )
+    G = G.assign_coords(file_start=(DIM, np.repeat(FILE_DATES, lengths)))
+    if rechunk is not None:
+        G = G.chunk({DIM: rechunk})
+    G.attrs["offsets"] = offsets
+
+    if verbose:
+        print(
+            "Opened {:,} GLM {} data points from {} files".format(
+                offsets[-1], data_type, len(FILES)
+            )
+        )
+
+    return G
+
+
+def GLM_xarray_concatenate(FILES, data_type="flash", verbose=True, **kwargs):
+    """
+    Return GLM data from multiple files as concatenated xarray DataArrays.
+    Uses GLM_xarray_dataset(), so the arrays are lazy.
+
+    Input:
+        FILES     - A list of file paths and names for each GLM file
+        data_type - 'flash', 'group', or 'event'
+        kwargs    - Passed to GLM_xarray_dataset (variables, chunks, parallel)
+
+    Return:
+        A dictionary with the 'longitude', 'latitude', 'area', and 'energy'
+        DataArrays ('area' is None for events). Returns None if there are
+        no files.
+    """
+    G = GLM_xarray_dataset(FILES, data_type=data_type, verbose=verbose, **kwargs)
+    if G is None:
+        return None
+    return {
+        key: G[key] if key in G else None
+        for key in ["longitude", "latitude", "area", "energy"]
+    }
 
 
 # ==============================================================================
@@ -527,7 +581,6 @@ def GLM_xarray_concatenate(FILES, data_type="flash", verbose=True):
 
 
 def filter_by_path(glm):
-
     """
     Inputs:
         glm    - the object returned by accumulate_GLM
@@ -666,7 +719,8 @@ def filter_by_HRRR(lats, lons, Hlat, Hlon, m=False):
           with the `contains_points` path method to check if it exists.
           This faster method is possible because the HRRR grid is regular and
           in a box. If the path is irregular, we would have to use the
-          `contains_points` method.
+          `contains_points` method. Only the points are projected; the HRRR
+          grid's origin and spacing come from BB_HRRR.HRRR_grid_index.
 
     Input:
         lats - a vector of latitudes
@@ -675,20 +729,12 @@ def filter_by_HRRR(lats, lons, Hlat, Hlon, m=False):
         Hlon - HRRR gridded longitudes from `get_hrrr_latlon(DICT=False)`
         m    - the HRRR domain basemap object from `draw_HRRR_map()`
     """
-    # Convert HRRR lat/lon points to map coordinates
-    X, Y = m(Hlon, Hlat)
-
-    # Convert input points to map coordinates
-    glm_X, glm_Y = m(lons, lats)
-
-    # Determine which are inside
-    filtered = np.logical_and.reduce(
-        (glm_X > X.min(), glm_X < X.max(), glm_Y > Y.min(), glm_Y < Y.max())
-    )
+    affine = HRRR_grid_affine(m, Hlat, Hlon)
+    _, _, filtered = latlon_to_HRRR_index(lats, lons, m, affine)
     return filtered
 
 
-def bin_GLM_on_HRRR_grid(glm, Hlat, Hlon, m):
+def bin_GLM_on_HRRR_grid(glm, Hlat, Hlon, m, weights=None):
     """
     Return a grid of flash counts on the HRRR grid.
 
@@ -696,54 +742,47 @@ def bin_GLM_on_HRRR_grid(glm, Hlat, Hlon, m):
     because the HRRR lat/lon grid is irregularly spaced in lat/lon units. But,
     if we use the lambert-conformal map coordinates (the projection of the HRRR
     output), the grid spacing is equal. With the regular grid, in map
-    coordinates, we can bin the GLM data as a 2D histogram.
-    NOTE: We cannot do this with the lat/lon grid because `np.histogram2d`
-          requires 1D vectors in the x and y direction to specify the bins, and
-          the lat/lon grid is not uniform. The map coordinates, however, are
-          uniform (almost).
+    coordinates, the HRRR grid cell of each point is found with affine
+    arithmetic and the points are binned with np.bincount on the flat index.
+    Each point is projected once, and the HRRR grid isn't projected (only its
+    middle row and column, once per map object).
+    NOTE: Grid cells are centered on the HRRR grid points.
 
     Inputs:
-        glm  - dictionary returned from accumulate_glm().
-        Hlat - HRRR latitude grid
-        Hlon - HRRR longitude grid
-        m    - basemap map object of HRRR grid returned by draw_HRRR_map
+        glm     - dictionary returned from accumulate_glm().
+        Hlat    - HRRR latitude grid
+        Hlon    - HRRR longitude grid
+        m       - basemap map object of HRRR grid returned by draw_HRRR_map
+        weights - None to count the points in each grid cell, or a key in glm
+                  (i.e. 'energy' or 'area') or an array to sum in each cell.
 
     Return:
-        hist     - the 2D histogram binned on HRRR grid
+        hist     - the 2D histogram binned on HRRR grid (masked where there are
+                   no points)
         filtered - the boolean array of which of the points are inside the
                    HRRR domain.
     """
+    affine = HRRR_grid_affine(m, Hlat, Hlon)
 
-    # Get the boolean of GLM points that are within the HRRR domain
-    filtered = filter_by_HRRR(glm["latitude"], glm["longitude"], Hlat, Hlon, m)
-
-    # Convert GLM points and HRRR latitude/longitude grid to the HRRR's
-    # lambert-conformal map coordinates.
-    glm_X, glm_Y = m(glm["longitude"][filtered], glm["latitude"][filtered])
-    X, Y = m(Hlon, Hlat)
+    # HRRR grid row and column of the GLM points inside the HRRR domain.
+    i, j, filtered = latlon_to_HRRR_index(glm["latitude"], glm["longitude"], m, affine)
 
-    # My working in the HRRR's map grid coordinates rather than latitude/longitude
-    # coordinates, the grid spacing is approximately linear and we can generate
-    # a 2D histogram with evenly spaced bins. Bin measurements are based on the
-    # middle row and middle column of the HRRR grid.
-    mid_row_idx, mid_col_idx = np.array(np.shape(Hlon)) // 2
+    counts = bin_on_HRRR_grid(i, j, affine["shape"])
 
-    # Bins in the x and y directions are derived from the model's middle row.
-    # To make the size of the 2D histogram to have the same number HRRR grid
-    # points, we need one extra bin. Add an extra bin value at the end.
-    xbins = X[mid_row_idx]
-    xbins = np.append(xbins, xbins[-1] + np.mean(np.diff(xbins)))
-
-    ybins = Y[:, mid_col_idx]
-    ybins = np.append(ybins, ybins[-1] + np.mean(np.diff(ybins)))
-
-    ## Generate the 2D histogram
-    hist, xedges, yedges = np.histogram2d(glm_X, glm_Y, bins=(xbins, ybins))
+    if weights is None:
+        hist = counts
+    else:
+        if isinstance(weights, str):
+            if glm.get(weights) is None:
+                raise ValueError(
+                    "GLM data doesn't have '%s' to use as weights" % weights
+                )
+            weights = glm[weights]
+        weights = np.asarray(weights)[filtered]
+        hist = bin_on_HRRR_grid(i, j, affine["shape"], weights=weights)
 
-    # The histogram needs to be transposed to be same as HRRR. Also, mask
-    # the zero counts.
-    hist = np.transpose(hist)
-    hist = np.ma.array(hist, mask=hist == 0)
+    # Mask the grid cells without any points.
+    hist = np.ma.array(hist, mask=counts == 0)
 
     return (hist, filtered)
 
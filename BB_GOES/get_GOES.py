@@ -31,6 +31,13 @@ import sys
 
 sys.path.append("/uufs/chpc.utah.edu/common/home/u0553130/pyBKB_v3/")
 sys.path.append("B:\pyBKB_v3")
+from BB_GOES.GOES_catalog import (
+    get_catalog,
+    files_within,
+    file_nearest,
+    catalog_files,
+    to_datetime,
+)
 
 
 def get_GOES_nearesttime(DATE, product="ABI", satellite=16, window=0, verbose=True):
@@ -72,82 +79,33 @@ def get_GOES_nearesttime(DATE, product="ABI", satellite=16, window=0, verbose=Tr
                 2019, 2, 7
             ), "GOES-17 GLM available after 7 February 2019."
 
-    # Full name of the product
-    if product == "ABI":
-        PRODUCT = "ABI-L2-MCMIPC"
-    elif product == "GLM":
-        PRODUCT = "GLM-L2-LCFA"
-
     # List all files for directory of interest and previous and next hour
     # (just in case the closest time is in one of those). If we are requesting
     # a single nearest time, or a window of files less than one hour, then we
     # look in the requested DATE directory and previous and next hour. If
     # window > 60 minutes, then we need to look in additional directories.
     # For example, if window is 200 minutes, then we need to check +/-
-    # 3 hours
+    # 3 hours. The files are looked up in the file catalog
+    # (BB_GOES.GOES_catalog), which only lists directories it hasn't indexed.
     hours_window_adjust = int(np.maximum(1, np.ceil(window / 60)))
     sDATE = DATE - timedelta(hours=hours_window_adjust)
     eDATE = DATE + timedelta(hours=hours_window_adjust)
-
-    # Files are organized by hour. Get all hours
-    dt = eDATE - sDATE
-    hours = dt.days * 24 + int((dt).seconds / 3600)
-    look_here_DATES = [sDATE + timedelta(hours=h) for h in range(hours + 1)]
-
-    # Directory all data is stored on horel-group7
-    HG7 = "/uufs/chpc.utah.edu/common/home/horel-group7/Pando/GOES%s/%s/" % (
-        satellite,
-        PRODUCT,
-    )
-
-    files = []
-    for D in look_here_DATES:
-        # I apologize, but I am downloadling GOES-16 ABI data differently than
-        # everything else (GOES-16 is not kept in hour direcotires).
-        if satellite == 16 and product == "ABI":
-            DIR = HG7 + "%s/" % D.strftime("%Y%m%d")
-        else:
-            DIR = HG7 + "%s/" % D.strftime("%Y%m%d/%H")
-        if verbose:
-            print("Looking here: %s" % DIR)
-        # List the files in those directories, if the directory exists.
-        if os.path.exists(DIR):
-            files += list(map(lambda x: DIR + x, os.listdir(DIR)))
-        else:
-            print("**************************************************************")
-            print("!!!WARNING!!! Missing %s directory: %s", (product, DIR))
-            print("**************************************************************")
-
-    # Sometime a file might be in the wrong directory (this was the case when
-    # GOES-17 was being tested). We only want files for the requested satelite.
-    files = list(filter(lambda x: "_G%02d_" % satellite in x, files))
-
-    # Filter for NetCDF type file (remove .png images, if any)
-    files = list(filter(lambda x: x[-3:] == ".nc", files))
-
-    # Convert to numpy array, only get unique items (in case there are
-    # duplicates), and sort by name.
-    files = np.array(files)
-    files = np.unique(files)
-    files = np.sort(files)
-
-    # Convert the files start scan and end scan to datetime object.
-    sSCANS = np.array(
-        [datetime.strptime(x.split("_")[3], "s%Y%j%H%M%S%f") for x in files]
-    )
-    eSCANS = np.array(
-        [datetime.strptime(x.split("_")[4], "e%Y%j%H%M%S%f") for x in files]
-    )
+    catalog = get_catalog(satellite, product, sDATE, eDATE, verbose=verbose)
 
     if window == 0:
         # We only expect 1 file to be closest to the date requested.
         expected = 1
         # Nearest file is the closest eSCAN datetime to the requested DATE
-        nearest_file_idx = np.argmin(np.abs(eSCANS - DATE))
-        nearest_file = files[nearest_file_idx]
+        nearest_file_idx = file_nearest(
+            catalog, DATE, on="end", max_distance=timedelta(hours=hours_window_adjust)
+        )
+        if nearest_file_idx is None:
+            print("!! WARNING !! There are no %s files near %s" % (product, DATE))
+            return None
+        nearest_file = catalog_files(catalog, [nearest_file_idx])[0]
         if verbose:
             print("Nearest File:", nearest_file)
-            print("File DATETIME:", eSCANS[nearest_file_idx])
+            print("File DATETIME:", to_datetime(catalog["end"][nearest_file_idx]))
         return nearest_file
     else:
         # GLM outputs files are every 20 seconds, thus, we expect 3 files per
@@ -162,8 +120,7 @@ def get_GOES_nearesttime(DATE, product="ABI", satellite=16, window=0, verbose=Tr
         # after sDATE and file end scan should be before eDATE.
         sWINDOW = DATE - timedelta(minutes=window)
         eWINDOW = DATE + timedelta(minutes=window)
-        within_bounds = np.logical_and(sSCANS >= sWINDOW, eSCANS <= eWINDOW)
-        window_files = files[within_bounds]
+        window_files = catalog_files(catalog, files_within(catalog, sWINDOW, eWINDOW))
 
         len_files = len(window_files)
         if len_files == 0:
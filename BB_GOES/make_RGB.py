@@ -42,11 +42,26 @@ with xarray:
     FILE = 'OR_ABI-L2-MCMIPC-M6_G17_s20192201631196_e20192201633575_c20192201634109.nc'
     C = xarray.open_dataset(FILE)
 
+The recipes are in RECIPES. To make several products from the same file, use
+make_RGBs, which reads each channel once (as float32) and computes the
+products in place:
+    RGB = make_RGBs(C, ['TrueColor', 'AirMass', 'Dust'])
+    plt.imshow(RGB['AirMass'])
+
+For quick-look images, decimate=4 averages blocks of 4x4 pixels when the
+channels are read, so the products are made on a grid 1/16 the size:
+    RGB = make_RGBs(C, ['TrueColor'], decimate=4)
+
 """
 import numpy as np
 import matplotlib.pyplot as plt
 import xarray
 
+import sys
+
+sys.path.append("/uufs/chpc.utah.edu/common/home/u0553130/pyBKB_v3")
+from BB_GOES.GOES_geolocation import block_reduce
+
 
 def load_RGB_channels(C, channels):
     """
@@ -97,7 +112,200 @@ def normalize(value, lower_limit, upper_limit, clip=True):
     return norm
 
 
-def TrueColor(C, pseudoGreen=True):
+# Each product is a list of the (R, G, B) color components. Each component is
+#   (channel, minus_channel, lower_limit, upper_limit, gamma, invert)
+# i.e. the Air Mass red is C08-C10 normalized between -26.2 and 0.6.
+# The limits for a single channel in Kelvin are in Celsius (like
+# load_RGB_channels). Products with one component are greyscale.
+RECIPES = {
+    "TrueColor": [
+        (2, None, 0, 1, 2.2, False),
+        (3, None, 0, 1, 2.2, False),
+        (1, None, 0, 1, 2.2, False),
+    ],
+    "FireTemperature": [
+        (7, None, -0.15, 59.85, 0.4, False),  # 273 to 333 K
+        (6, None, 0, 1, 1, False),
+        (5, None, 0, 0.75, 1, False),
+    ],
+    "AirMass": [
+        (8, 10, -26.2, 0.6, 1, False),
+        (12, 13, -42.2, 6.7, 1, False),
+        (8, None, -64.65, -29.25, 1, True),
+    ],
+    "DayCloudPhase": [
+        (13, None, -53.5, 7.5, 1, True),
+        (2, None, 0, 0.78, 1, False),
+        (5, None, 0.01, 0.59, 1, False),
+    ],
+    "DayConvection": [
+        (8, 10, -35, 5, 1, False),
+        (7, 13, -5, 60, 1, False),
+        (5, 2, -0.75, 0.25, 1, False),
+    ],
+    "DayCloudConvection": [
+        (2, None, 0, 1, 1.7, False),
+        (2, None, 0, 1, 1.7, False),
+        (13, None, -70.15, 49.85, 1, True),
+    ],
+    "DayLandCloud": [
+        (5, None, 0, 0.975, 1, False),
+        (3, None, 0, 1.086, 1, False),
+        (2, None, 0, 1, 1, False),
+    ],
+    "DayLandCloudFire": [
+        (6, None, 0, 1, 1, False),
+        (3, None, 0, 1, 1, False),
+        (2, None, 0, 1, 1, False),
+    ],
+    "WaterVapor": [
+        (13, None, -70.86, 5.81, 1, True),
+        (8, None, -58.49, -30.48, 1, True),
+        (10, None, -28.03, -12.12, 1, True),
+    ],
+    "DifferentialWaterVapor": [
+        (10, 8, -3, 30, 0.2587, True),
+        (10, None, -60, 5, 0.4, True),
+        (8, None, -64.65, -29.25, 0.4, True),
+    ],
+    "DaySnowFog": [
+        (3, None, 0, 1, 1.7, False),
+        (5, None, 0, 0.7, 1.7, False),
+        (7, 13, 0, 30, 1.7, False),
+    ],
+    "NighttimeMicrophysics": [
+        (15, 13, -6.7, 2.6, 1, False),
+        (13, 7, -3.1, 5.2, 1, False),
+        (13, None, -29.6, 19.5, 1, False),
+    ],
+    "Dust": [
+        (15, 13, -6.7, 2.6, 1, False),
+        (14, 11, -0.5, 20, 2.5, False),
+        (13, None, -11.95, 15.55, 1, False),
+    ],
+    "SulfurDioxide": [
+        (9, 10, -4, 2, 1, False),
+        (13, 11, -4, 5, 1, False),
+        (7, None, -30.1, 29.8, 1, False),
+    ],
+    "Ash": [
+        (15, 13, -6.7, 2.6, 1, False),
+        (14, 11, -6, 6.3, 1, False),
+        (13, None, -29.55, 29.25, 1, False),
+    ],
+    "SplitWindowDifference": [(15, 13, -10, 10, 1, False)],
+    "NightFogDifference": [(13, 7, -90, 15, 1, True)],
+}
+
+
+def load_channel(C, channel, channels=None, decimate=1):
+    """
+    Return a channel as a float32 array. The channel is only read from the
+    file once if the same `channels` dictionary is used.
+
+    Input:
+        C        - The GOES multi-channel file opened with xarray.
+        channel  - The channel number
+        channels - Dictionary of the channels already loaded.
+        decimate - Average blocks of decimate x decimate pixels (see
+                   BB_GOES.GOES_geolocation.block_reduce).
+    """
+    key = (channel, decimate)
+    if channels is not None and key in channels:
+        return channels[key]
+    data = np.asarray(C["CMI_C%02d" % channel].data, dtype=np.float32)
+    data = block_reduce(data, decimate)
+    if channels is not None:
+        channels[key] = data
+    return data
+
+
+def _color_component(C, component, channels, out, decimate=1):
+    """Compute a color component in the `out` array (without temporary arrays)."""
+    channel, minus, lower, upper, gamma, invert = component
+    if minus is None:
+        np.copyto(out, load_channel(C, channel, channels, decimate))
+        if C["CMI_C%02d" % channel].units == "K":
+            # Convert the limits from Celsius to Kelvin instead of the data
+            lower += 273.15
+            upper += 273.15
+    else:
+        np.subtract(
+            load_channel(C, channel, channels, decimate),
+            load_channel(C, minus, channels, decimate),
+            out=out,
+        )
+    # NormalizedValue = (OriginalValue-LowerLimit)/(UpperLimit-LowerLimit)
+    out -= lower
+    out *= 1 / (upper - lower)
+    np.clip(out, 0, 1, out=out)
+    if gamma != 1:
+        np.power(out, 1 / gamma, out=out)
+    if invert:
+        np.subtract(1, out, out=out)
+    return out
+
+
+def make_RGBs(C, products, channels=None, pseudoGreen=True, decimate=1):
+    """
+    Make one or more RGB products from the same file. Each channel is read
+    once (as float32) and shared by all the products, and each color
+    component is computed in place.
+
+    Input:
+        C           - The GOES multi-channel file opened with xarray.
+        products    - List of product names (keys of RECIPES), i.e.
+                      ['TrueColor', 'AirMass', 'Dust']
+        channels    - Dictionary of channels already loaded (see load_channel).
+                      Pass the same dictionary to reuse the channels in
+                      another call.
+        pseudoGreen - For TrueColor. True: the calculated "True" green.
+                                     False: the "veggie" channel.
+        decimate    - Make reduced resolution (quick-look) products. The
+                      channels are averaged in blocks of decimate x decimate
+                      pixels. Use BB_GOES.GOES_geolocation.get_geolocation(C,
+                      decimate=decimate) for the matching lat/lon.
+    Return:
+        Dictionary of the RGB arrays (float32) for each product.
+    """
+    if isinstance(products, str):
+        products = [products]
+    if channels is None:
+        channels = {}
+
+    return_this = {}
+    for product in products:
+        if product not in RECIPES:
+            raise ValueError(
+                "Unknown product '%s'. Use one of %s" % (product, list(RECIPES))
+            )
+        recipe = RECIPES[product]
+        shape = load_channel(C, recipe[0][0], channels, decimate).shape
+
+        # The R, G, and B are contiguous planes, returned as (y, x, 3).
+        RGB = np.empty((3,) + shape, dtype=np.float32)
+        for i, component in enumerate(recipe):
+            _color_component(C, component, channels, RGB[i], decimate)
+        if len(recipe) == 1:
+            # Greyscale
+            RGB[1] = RGB[0]
+            RGB[2] = RGB[0]
+
+        if product == "TrueColor" and pseudoGreen:
+            # Calculate the "True" Green: 0.45*R + 0.1*G + 0.45*B
+            R, G, B = RGB
+            RB = np.add(R, B)
+            RB *= 0.45
+            G *= 0.1
+            G += RB
+            np.clip(G, 0, 1, out=G)
+
+        return_this[product] = np.moveaxis(RGB, 0, -1)
+
+    return return_this
+
+
+def TrueColor(C, pseudoGreen=True, decimate=1):
     """
     True Color RGB:
     http://cimss.ssec.wisc.edu/goes/OCLOFactSheetPDFs/ABIQuickGuide_CIMSSRGB_v2.pdf
@@ -105,360 +313,152 @@ def TrueColor(C, pseudoGreen=True):
     pseudoGreen - True: returns the calculated "True" green color
                 False: returns the "veggie" channel
     """
-    # Load the three channels into appropriate R, G, and B variables
-    R, G, B = load_RGB_channels(C, (2, 3, 1))
-
-    # Apply range limits for each channel. RGB values must be between 0 and 1
-    R = np.clip(R, 0, 1)
-    G = np.clip(G, 0, 1)
-    B = np.clip(B, 0, 1)
-
-    # Apply a gamma correction to the image
-    gamma = 2.2
-    R = np.power(R, 1 / gamma)
-    G = np.power(G, 1 / gamma)
-    B = np.power(B, 1 / gamma)
+    RGB = make_RGBs(C, ["TrueColor"], pseudoGreen=pseudoGreen, decimate=decimate)
+    return RGB["TrueColor"]
 
-    if pseudoGreen:
-        # Calculate the "True" Green
-        G = 0.45 * R + 0.1 * G + 0.45 * B
-        G = np.maximum(G, 0)
-        G = np.minimum(G, 1)
 
-    return np.dstack([R, G, B])
-
-
-def FireTemperature(C):
+def FireTemperature(C, decimate=1):
     """
     Fire Temperature RGB:
     http://rammb.cira.colostate.edu/training/visit/quick_guides/Fire_Temperature_RGB.pdf
     """
-    # Load the three channels into appropriate R, G, and B variables
-    R, G, B = load_RGB_channels(C, (7, 6, 5))
-
-    # Normalize each channel by the appropriate range of values (clipping happens in function)
-    R = normalize(R, 273, 333)
-    G = normalize(G, 0, 1)
-    B = normalize(B, 0, 0.75)
+    RGB = make_RGBs(C, ["FireTemperature"], decimate=decimate)
+    return RGB["FireTemperature"]
 
-    # Apply the gamma correction to Red channel.
-    #   corrected_value = value^(1/gamma)
-    gamma = 0.4
-    R = np.power(R, 1 / gamma)
 
-    # The final RGB array :)
-    return np.dstack([R, G, B])
-
-
-def AirMass(C):
+def AirMass(C, decimate=1):
     """
     Air Mass RGB:
     http://rammb.cira.colostate.edu/training/visit/quick_guides/QuickGuide_GOESR_AirMassRGB_final.pdf
     """
-    # Load the three channels into appropriate R, G, and B variables
-    R = C["CMI_C08"].data - C["CMI_C10"].data
-    G = C["CMI_C12"].data - C["CMI_C13"].data
-    B = C["CMI_C08"].data - 273.15  # remember to convert to Celsius
-
-    # Normalize each channel by the appropriate range of values. e.g. R = (R-minimum)/(maximum-minimum)
-    R = normalize(R, -26.2, 0.6)
-    G = normalize(G, -42.2, 6.7)
-    B = normalize(B, -64.65, -29.25)
-
-    # Invert B
-    B = 1 - B
+    RGB = make_RGBs(C, ["AirMass"], decimate=decimate)
+    return RGB["AirMass"]
 
-    # The final RGB array :)
-    return np.dstack([R, G, B])
 
-
-def DayCloudPhase(C):
+def DayCloudPhase(C, decimate=1):
     """
     Day Cloud Phase Distinction RGB:
     http://rammb.cira.colostate.edu/training/visit/quick_guides/Day_Cloud_Phase_Distinction.pdf
     """
-    # Load the three channels into appropriate R, G, and B variables
-    R, G, B = load_RGB_channels(C, (13, 2, 5))
-
-    # Normalize each channel by the appropriate range of values. (Clipping happens inside function)
-    R = normalize(R, -53.5, 7.5)
-    G = normalize(G, 0, 0.78)
-    B = normalize(B, 0.01, 0.59)
-
-    # Invert R
-    R = 1 - R
+    RGB = make_RGBs(C, ["DayCloudPhase"], decimate=decimate)
+    return RGB["DayCloudPhase"]
 
-    # The final RGB array :)
-    return np.dstack([R, G, B])
 
-
-def DayConvection(C):
+def DayConvection(C, decimate=1):
     """
     Day Convection RGB:
     http://rammb.cira.colostate.edu/training/visit/quick_guides/QuickGuide_GOESR_DayConvectionRGB_final.pdf
     """
-    # Load the three channels into appropriate R, G, and B variables
-    # NOTE: Each R, G, B is a channel difference.
-    R = C["CMI_C08"].data - C["CMI_C10"].data
-    G = C["CMI_C07"].data - C["CMI_C13"].data
-    B = C["CMI_C05"].data - C["CMI_C02"].data
-
-    # Normalize each channel by the appropriate range of values.
-    R = normalize(R, -35, 5)
-    G = normalize(G, -5, 60)
-    B = normalize(B, -0.75, 0.25)
+    RGB = make_RGBs(C, ["DayConvection"], decimate=decimate)
+    return RGB["DayConvection"]
 
-    # The final RGB array :)
-    return np.dstack([R, G, B])
 
-
-def DayCloudConvection(C):
+def DayCloudConvection(C, decimate=1):
     """
     Day Convection RGB:
     http://rammb.cira.colostate.edu/training/visit/quick_guides/QuickGuide_DayCloudConvectionRGB_final.pdf
     """
-    # Load the three channels into appropriate R, G, and B variables
-    R, G, B = load_RGB_channels(C, (2, 2, 13))
-
-    # Normalize each channel by the appropriate range of values.
-    R = normalize(R, 0, 1)
-    G = normalize(G, 0, 1)
-    B = normalize(B, -70.15, 49.85)
-
-    # Invert B
-    B = 1 - B
-
-    # Apply the gamma correction to Red channel.
-    #   corrected_value = value^(1/gamma)
-    gamma = 1.7
-    R = np.power(R, 1 / gamma)
-    G = np.power(G, 1 / gamma)
-
-    # The final RGB array :)
-    return np.dstack([R, G, B])
+    RGB = make_RGBs(C, ["DayCloudConvection"], decimate=decimate)
+    return RGB["DayCloudConvection"]
 
 
-def DayLandCloud(C):
+def DayLandCloud(C, decimate=1):
     """
     Day Land Cloud Fire RGB:
     http://rammb.cira.colostate.edu/training/visit/quick_guides/QuickGuide_GOESR_daylandcloudRGB_final.pdf
     """
-    # Load the three channels into appropriate R, G, and B variables
-    R, G, B = load_RGB_channels(C, (5, 3, 2))
+    RGB = make_RGBs(C, ["DayLandCloud"], decimate=decimate)
+    return RGB["DayLandCloud"]
 
-    # Normalize each channel by the appropriate range of values  e.g. R = (R-minimum)/(maximum-minimum)
-    R = normalize(R, 0, 0.975)
-    G = normalize(G, 0, 1.086)
-    B = normalize(B, 0, 1)
 
-    # The final RGB array :)
-    return np.dstack([R, G, B])
-
-
-def DayLandCloudFire(C):
+def DayLandCloudFire(C, decimate=1):
     """
     Day Land Cloud Fire RGB:
     http://rammb.cira.colostate.edu/training/visit/quick_guides/QuickGuide_GOESR_DayLandCloudFireRGB_final.pdf
     """
-    # Load the three channels into appropriate R, G, and B variables
-    R, G, B = load_RGB_channels(C, (6, 3, 2))
-
-    # Normalize each channel by the appropriate range of values  e.g. R = (R-minimum)/(maximum-minimum)
-    R = normalize(R, 0, 1)
-    G = normalize(G, 0, 1)
-    B = normalize(B, 0, 1)
-
-    # The final RGB array :)
-    return np.dstack([R, G, B])
+    RGB = make_RGBs(C, ["DayLandCloudFire"], decimate=decimate)
+    return RGB["DayLandCloudFire"]
 
 
-def WaterVapor(C):
+def WaterVapor(C, decimate=1):
     """
     Simple Water Vapor RGB:
     http://rammb.cira.colostate.edu/training/visit/quick_guides/Simple_Water_Vapor_RGB.pdf
     """
-    # Load the three channels into appropriate R, G, and B variables.
-    R, G, B = load_RGB_channels(C, (13, 8, 10))
-
-    # Normalize each channel by the appropriate range of values. e.g. R = (R-minimum)/(maximum-minimum)
-    R = normalize(R, -70.86, 5.81)
-    G = normalize(G, -58.49, -30.48)
-    B = normalize(B, -28.03, -12.12)
-
-    # Invert the colors
-    R = 1 - R
-    G = 1 - G
-    B = 1 - B
-
-    # The final RGB array :)
-    return np.dstack([R, G, B])
+    RGB = make_RGBs(C, ["WaterVapor"], decimate=decimate)
+    return RGB["WaterVapor"]
 
 
-def DifferentialWaterVapor(C):
+def DifferentialWaterVapor(C, decimate=1):
     """
     Differential Water Vapor RGB:
     http://rammb.cira.colostate.edu/training/visit/quick_guides/QuickGuide_GOESR_DifferentialWaterVaporRGB_final.pdf
     """
-    # Load the three channels into appropriate R, G, and B variables.
-    R = C["CMI_C10"].data - C["CMI_C08"].data
-    G = C["CMI_C10"].data - 273.15
-    B = C["CMI_C08"].data - 273.15
+    RGB = make_RGBs(C, ["DifferentialWaterVapor"], decimate=decimate)
+    return RGB["DifferentialWaterVapor"]
 
-    # Normalize each channel by the appropriate range of values. e.g. R = (R-minimum)/(maximum-minimum)
-    R = normalize(R, -3, 30)
-    G = normalize(G, -60, 5)
-    B = normalize(B, -64.65, -29.25)
 
-    # Gamma correction
-    R = np.power(R, 1 / 0.2587)
-    G = np.power(G, 1 / 0.4)
-    B = np.power(B, 1 / 0.4)
-
-    # Invert the colors
-    R = 1 - R
-    G = 1 - G
-    B = 1 - B
-
-    # The final RGB array :)
-    return np.dstack([R, G, B])
-
-
-def DaySnowFog(C):
+def DaySnowFog(C, decimate=1):
     """
     Day Snow-Fog RGB:
     http://rammb.cira.colostate.edu/training/visit/quick_guides/QuickGuide_DaySnowFog.pdf
     """
-    # Load the three channels into appropriate R, G, and B variables
-    R = C["CMI_C03"].data
-    G = C["CMI_C05"].data
-    B = C["CMI_C07"].data - C["CMI_C13"].data
-
-    # Normalize values
-    R = normalize(R, 0, 1)
-    G = normalize(G, 0, 0.7)
-    B = normalize(B, 0, 30)
-
-    # Apply a gamma correction to the image
-    gamma = 1.7
-    R = np.power(R, 1 / gamma)
-    G = np.power(G, 1 / gamma)
-    B = np.power(B, 1 / gamma)
-
-    # The final RGB array :)
-    return np.dstack([R, G, B])
+    RGB = make_RGBs(C, ["DaySnowFog"], decimate=decimate)
+    return RGB["DaySnowFog"]
 
 
-def NighttimeMicrophysics(C):
+def NighttimeMicrophysics(C, decimate=1):
     """
     Nighttime Microphysics RGB:
     http://rammb.cira.colostate.edu/training/visit/quick_guides/QuickGuide_GOESR_NtMicroRGB_final.pdf
     """
-    # Load the three channels into appropriate R, G, and B variables
-    R = C["CMI_C15"].data - C["CMI_C13"].data
-    G = C["CMI_C13"].data - C["CMI_C07"].data
-    B = C["CMI_C13"].data - 273.15
+    RGB = make_RGBs(C, ["NighttimeMicrophysics"], decimate=decimate)
+    return RGB["NighttimeMicrophysics"]
 
-    # Normalize values
-    R = normalize(R, -6.7, 2.6)
-    G = normalize(G, -3.1, 5.2)
-    B = normalize(B, -29.6, 19.5)
 
-    # The final RGB array :)
-    return np.dstack([R, G, B])
-
-
-def Dust(C):
+def Dust(C, decimate=1):
     """
     SulfurDioxide RGB:
     http://rammb.cira.colostate.edu/training/visit/quick_guides/Dust_RGB_Quick_Guide.pdf
     """
-    # Load the three channels into appropriate R, G, and B variables
-    R = C["CMI_C15"].data - C["CMI_C13"].data
-    G = C["CMI_C14"].data - C["CMI_C11"].data
-    B = C["CMI_C13"].data - 273.15
-
-    # Normalize values
-    R = normalize(R, -6.7, 2.6)
-    G = normalize(G, -0.5, 20)
-    B = normalize(B, -11.95, 15.55)
-
-    # Apply a gamma correction to the image
-    gamma = 2.5
-    G = np.power(G, 1 / gamma)
+    RGB = make_RGBs(C, ["Dust"], decimate=decimate)
+    return RGB["Dust"]
 
-    # The final RGB array :)
-    return np.dstack([R, G, B])
 
-
-def SulfurDioxide(C):
+def SulfurDioxide(C, decimate=1):
     """
     SulfurDioxide RGB:
     http://rammb.cira.colostate.edu/training/visit/quick_guides/Quick_Guide_SO2_RGB.pdf
     """
-    # Load the three channels into appropriate R, G, and B variables
-    R = C["CMI_C09"].data - C["CMI_C10"].data
-    G = C["CMI_C13"].data - C["CMI_C11"].data
-    B = C["CMI_C07"].data - 273.15
-
-    # Normalize values
-    R = normalize(R, -4, 2)
-    G = normalize(G, -4, 5)
-    B = normalize(B, -30.1, 29.8)
-
-    # The final RGB array :)
-    return np.dstack([R, G, B])
+    RGB = make_RGBs(C, ["SulfurDioxide"], decimate=decimate)
+    return RGB["SulfurDioxide"]
 
 
-def Ash(C):
+def Ash(C, decimate=1):
     """
     Ash RGB:
     http://rammb.cira.colostate.edu/training/visit/quick_guides/GOES_Ash_RGB.pdf
     """
-    # Load the three channels into appropriate R, G, and B variables
-    R = C["CMI_C15"].data - C["CMI_C13"].data
-    G = C["CMI_C14"].data - C["CMI_C11"].data
-    B = C["CMI_C13"].data - 273.15
+    RGB = make_RGBs(C, ["Ash"], decimate=decimate)
+    return RGB["Ash"]
 
-    # Normalize values
-    R = normalize(R, -6.7, 2.6)
-    G = normalize(G, -6, 6.3)
-    B = normalize(B, -29.55, 29.25)
 
-    # The final RGB array :)
-    return np.dstack([R, G, B])
-
-
-def SplitWindowDifference(C):
+def SplitWindowDifference(C, decimate=1):
     """
     Split Window Difference RGB (greyscale):
     http://cimss.ssec.wisc.edu/goes/OCLOFactSheetPDFs/ABIQuickGuide_SplitWindowDifference.pdf
     """
-    # Load the three channels into appropriate R, G, and B variables
-    data = C["CMI_C15"].data - C["CMI_C13"].data
-
-    # Normalize values
-    data = normalize(data, -10, 10)
-
-    # The final RGB array :)
-    return np.dstack([data, data, data])
+    RGB = make_RGBs(C, ["SplitWindowDifference"], decimate=decimate)
+    return RGB["SplitWindowDifference"]
 
 
-def NightFogDifference(C):
+def NightFogDifference(C, decimate=1):
     """
     Night Fog Difference RGB (greyscale):
     http://cimss.ssec.wisc.edu/goes/OCLOFactSheetPDFs/ABIQuickGuide_NightFogBTD.pdf
     """
-    # Load the three channels into appropriate R, G, and B variables
-    data = C["CMI_C13"].data - C["CMI_C07"].data
-
-    # Normalize values
-    data = normalize(data, -90, 15)
-
-    # Invert data
-    data = 1 - data
-
-    # The final RGB array :)
-    return np.dstack([data, data, data])
+    RGB = make_RGBs(C, ["NightFogDifference"], decimate=decimate)
+    return RGB["NightFogDifference"]
 
 
 if __name__ == "__main__":
@@ -8,7 +8,6 @@ GLM binary array on HRRR grid
 from datetime import datetime, timedelta
 import matplotlib.pyplot as plt
 import numpy as np
-import scipy.ndimage as ndimage
 import os
 import multiprocessing
 
@@ -20,6 +19,7 @@ from BB_HRRR.HRRR_Pando import get_hrrr_all_valid, get_hrrr_latlon, get_hrrr_var
 from BB_GOES.get_GOES import get_GOES_nearesttime
 from BB_GOES.get_GLM import accumulate_GLM_FAST, bin_GLM_on_HRRR_grid
 from BB_maps.my_basemap import draw_HRRR_map, draw_centermap
+from BB_wx_calcs.footprint_filters import footprint_max
 
 # Get HRRR lat/lon grid and map object
 Hlat, Hlon = get_hrrr_latlon(DICT=False)
@@ -51,8 +51,8 @@ custom_filter = np.array(
         [0, 1, 1, 1, 0],
     ]
 )
-bloat_glm17 = ndimage.generic_filter(hist17, np.max, footprint=custom_filter)
-bloat_glm16 = ndimage.generic_filter(hist16, np.max, footprint=custom_filter)
+bloat_glm17 = footprint_max(hist17, custom_filter)
+bloat_glm16 = footprint_max(hist16, custom_filter)
 
 # Only use if number of events > 1...More than 1 GLM event in a grid box.
 binary17 = bloat_glm17 > 1
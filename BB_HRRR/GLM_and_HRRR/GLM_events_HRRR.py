@@ -16,7 +16,6 @@ Workflow for putting GLM on HRRR grid and evaluating the contingency table.
 from datetime import datetime, timedelta
 import matplotlib.pyplot as plt
 import numpy as np
-import scipy.ndimage as ndimage
 import os
 import multiprocessing
 
@@ -31,7 +30,21 @@ from BB_GOES.get_GLM import (
     bin_GLM_on_HRRR_grid,
 )
 from BB_maps.my_basemap import draw_HRRR_map, draw_centermap
-from BB_HRRR.HRRR_paths import get_domains
+from BB_wx_calcs.footprint_filters import footprint_max
+from BB_HRRR.GLM_and_HRRR.binary_store import load_binary_fields, save_binary_fields
+from BB_HRRR.GLM_and_HRRR.score_store import (
+    SCORE_DB,
+    NO_FXX,
+    upsert_rows,
+    missing_dates,
+    product_metric,
+)
+from BB_HRRR.HRRR_domain_labels import (
+    load_domain_labels,
+    get_domain_masks,
+    domain_sums,
+    domain_contingency_tables,
+)
 from BB_wx_calcs.binary_events import *
 
 
@@ -44,21 +57,29 @@ Hlat, Hlon = get_hrrr_latlon(DICT=False)
 fxx = range(1, 19)
 print("Forecasts", list(fxx))
 
-## Generate Domain Paths and Domain Masks
-print("Generate domains and masks.")
+## Load Domain Labels and Domain Masks
+# The labels are computed once and stored (see BB_HRRR.HRRR_domain_labels).
+print("Load domain labels and masks.")
 
-domains = get_domains(add_states=["UT", "CO", "TX", "FL"], HRRR_specific=True)
-# domains = get_domains(add_states=['CO', 'TX', 'FL'], HRRR_specific=False)
+domain_labels = load_domain_labels(
+    add_states=["UT", "CO", "TX", "FL"], HRRR_specific=True
+)
+# domain_labels = load_domain_labels(add_states=['CO', 'TX', 'FL'], HRRR_specific=False)
+domains = get_domain_masks(domain_labels)
 print(domains.keys())
 
 
-def get_GLM_HRRR_contingency_stats(validDATE, fxx=range(1, 19), GOES=16, verbose=True):
+def get_GLM_HRRR_contingency_stats(
+    validDATE, fxx=range(1, 19), GOES=16, verbose=True, files=None
+):
     """
     Inputs:
         validDATE - A datetime that represents the end of the hour.
         fxx       - List of forecasts. Deafult starts at 0 because
                     the F00 LTNG forecast doesn't have any output.
         GOES      - Number of GOES satellite (16 or 17)
+        files     - The GLM files for the hour before validDATE returned by
+                    get_GLM_file_nearesttime(). Default gets them.
 
     Return:
         (A, B, C, D) - A list of values for contingency table of binary events.
@@ -71,18 +92,14 @@ def get_GLM_HRRR_contingency_stats(validDATE, fxx=range(1, 19), GOES=16, verbose
     if verbose:
         print(">>> get_GLM_HRRR_contingency_stats: %s" % validDATE)
 
-    # Get contingency stats, which contains the binary field:
-    if GOES == 16:
-        BASE = "/uufs/chpc.utah.edu/common/home/horel-group8/blaylock/GLM-HRRR_LTNG_binary/"
-    elif GOES == 17:
-        BASE = "/uufs/chpc.utah.edu/common/home/horel-group8/blaylock/GLM-HRRR_LTNG_binary/HRRR-GLM-GOES17/"
-    BINARY_FILE = BASE + "/HRRR-GLM-Binary_%s.npy" % validDATE.strftime("%Y-%m-%d_%H%M")
-
-    if os.path.exists(BINARY_FILE) and fxx == range(1, 19):
-        if verbose:
-            print(">>Load binary stats from file", BINARY_FILE)
-        stats = np.load(BINARY_FILE, allow_pickle=True).item()
-        return stats
+    # Get contingency stats, which contains the binary field, from the
+    # monthly binary store (see BB_HRRR.GLM_and_HRRR.binary_store):
+    if fxx == range(1, 19):
+        stats = load_binary_fields(validDATE, GOES=GOES)
+        if stats is not None:
+            if verbose:
+                print(">>Loaded binary stats from the binary store")
+            return stats
 
     if verbose:
         print(">>No previous file saved. Need to generate binary stats right now...")
@@ -90,9 +107,13 @@ def get_GLM_HRRR_contingency_stats(validDATE, fxx=range(1, 19), GOES=16, verbose
     ## 1) Get GLM Events for the previous hour.
     if verbose:
         print("(1/7) Get GLM Events. %s" % validDATE)
-    files = get_GLM_file_nearesttime(
-        validDATE - timedelta(minutes=30), window=30, satellite=GOES, verbose=verbose
-    )
+    if files is None:
+        files = get_GLM_file_nearesttime(
+            validDATE - timedelta(minutes=30),
+            window=30,
+            satellite=GOES,
+            verbose=verbose,
+        )
     E = accumulate_GLM_FAST(files, data_type="event", verbose=verbose)
 
     if verbose:
@@ -124,12 +145,10 @@ def get_GLM_HRRR_contingency_stats(validDATE, fxx=range(1, 19), GOES=16, verbose
     # Before we bloat the Events grid, lets get a count of the total events
     # inside each domain.
     return_this = {"Number Events": {}}
+    num_events = domain_sums(domain_labels, hist)
     for DOMAIN in domains:
-        # Get hist for the masked domains
-        hist_domain = np.ma.array(hist, mask=domains[DOMAIN]["mask"])
-        num_events = int(np.sum(hist_domain.filled(0)))
-        return_this["Number Events"][DOMAIN] = num_events
-        print("{:>15,} events in {:}".format(num_events, DOMAIN))
+        return_this["Number Events"][DOMAIN] = int(num_events[DOMAIN])
+        print("{:>15,} events in {:}".format(int(num_events[DOMAIN]), DOMAIN))
 
     # =============================================================================
     ## 5) Apply a spatial filter to bloat (enlarge or upscale) the number of HRRR
@@ -149,7 +168,7 @@ def get_GLM_HRRR_contingency_stats(validDATE, fxx=range(1, 19), GOES=16, verbose
             [0, 1, 1, 1, 0],
         ]
     )
-    bloat_glm = ndimage.generic_filter(hist, np.max, footprint=custom_filter)
+    bloat_glm = footprint_max(hist, custom_filter)
 
     ##=============================================================================
     ## 6) Compute the GLM/HRRR contingency table for every requested forecast hour.
@@ -176,35 +195,18 @@ def get_GLM_HRRR_contingency_stats(validDATE, fxx=range(1, 19), GOES=16, verbose
 
     if verbose:
         print("(7/7) Compute contingency table for each subdomain.")
-    # For each subdomains...
-    for DOMAIN in domains.keys():
-        if verbose:
-            print("    Stats for %s" % DOMAIN)
-        # masked binaries
-        if DOMAIN != "HRRR":
-            O_m = np.ma.array(Observed_binary, mask=domains[DOMAIN]["mask"])
-            F_m = np.ma.array(
-                [np.ma.array(F, mask=domains[DOMAIN]["mask"]) for F in Forecast_binary]
-            )
-        else:
-            O_m = Observed_binary
-            F_m = np.array([F for F in Forecast_binary])
-        #
-        # Compute contingency table for domain-masked observations and each forecast.
-        tables = np.array(
-            [contingency_table(F_m_i, O_m, print_table=False) for F_m_i in F_m]
-        )
-        A, B, C, D = [tables[:, n] for n in range(0, 4)]
-        #
-        return_this["table"][DOMAIN] = (A, B, C, D)
+    # Contingency table for each subdomain and each forecast from the labels.
+    return_this["table"] = domain_contingency_tables(
+        domain_labels, Forecast_binary, Observed_binary
+    )
     if verbose:
         print("(FIN)")
 
     if fxx == range(1, 19):
-        # Save the dictionary for later use
-        np.save(BINARY_FILE, return_this)
+        # Save the binary fields and tables for later use
+        BINARY_FILE = save_binary_fields(return_this, GOES=GOES, verbose=False)
         if verbose:
-            print("\n***Saved Binary Dictionary:", BINARY_FILE, "***\n")
+            print("\n***Saved Binary Fields:", BINARY_FILE, "***\n")
 
     return return_this
 
@@ -245,80 +247,43 @@ def plot_map(O_binary, F_binary):
     plt.show()
 
 
-def write_table_to_file(
-    contingency_dict, DATE, write_domains, SAVEDIR="./HRRR_GLM_contingency_table/"
-):
+def write_table_to_file(contingency_dict, DATE, write_domains, DB=SCORE_DB):
     """
+    Write the contingency table for each domain to the score store
+    (see BB_HRRR.GLM_and_HRRR.score_store). Writing a date that is already in
+    the store replaces it.
+
     Inputs:
         contingency_dict - the dictionary returned from
                            get_GLM_HRRR_contingency_stats()
         DATE             -
-        write_domains    - list of which domains to write data to file.
-                           (prevents double-recording if the domain already
-                            has this line)
+        write_domains    - list of which domains to write data to the store.
     """
+    rows = []
     for DOMAIN in domains:
         if DOMAIN in write_domains:
-            # Directories for each Domain
-            DOM_DIR = "%s/%s/" % (SAVEDIR, DOMAIN)
-            if not os.path.exists(DOM_DIR):
-                os.makedirs(DOM_DIR)
-
-            SAVEFILE = "%s/%s_%s.csv" % (DOM_DIR, DOMAIN, DATE.strftime("%Y_m%m_h%H"))
-
-            # Initiate new file with header if the day of the month is 1.
-            if DATE.day == 1:
-                A_str = ",".join(["F%02d_A" % i for i in fxx])
-                B_str = ",".join(["F%02d_B" % i for i in fxx])
-                C_str = ",".join(["F%02d_C" % i for i in fxx])
-                D_str = ",".join(["F%02d_D" % i for i in fxx])
-                HEADER = (
-                    "DATE,GLM Event COUNT,NUM FILES,EXPECTED FILES,"
-                    + A_str
-                    + ","
-                    + B_str
-                    + ","
-                    + C_str
-                    + ","
-                    + D_str
-                )
-                with open(SAVEFILE, "w") as f:
-                    f.write("%s\n" % HEADER)
-
             if contingency_dict is None:
-                A_str = ",".join(np.array(np.ones_like(fxx) * np.nan, dtype=str))
-                B_str = ",".join(np.array(np.ones_like(fxx) * np.nan, dtype=str))
-                C_str = ",".join(np.array(np.ones_like(fxx) * np.nan, dtype=str))
-                D_str = ",".join(np.array(np.ones_like(fxx) * np.nan, dtype=str))
-                line = "%s,%s,%s,%s,%s,%s,%s,%s" % (
-                    DATE,
-                    np.nan,
-                    0,  # None returned because GLM files was zero
-                    180,  # We expected 180 GLM files
-                    A_str,
-                    B_str,
-                    C_str,
-                    D_str,
-                )
+                # None returned because GLM files was zero, and we expected
+                # 180 GLM files.
+                events, files, expected = np.nan, 0, 180
+                A = B = C = D = np.ones(len(fxx)) * np.nan
             else:
                 A, B, C, D = contingency_dict["table"][DOMAIN]
-                A_str = ",".join(np.array(A, dtype=str))
-                B_str = ",".join(np.array(B, dtype=str))
-                C_str = ",".join(np.array(C, dtype=str))
-                D_str = ",".join(np.array(D, dtype=str))
-                line = "%s,%s,%s,%s,%s,%s,%s,%s" % (
-                    DATE,
-                    contingency_dict["Number Events"][DOMAIN],
-                    contingency_dict["Number GLM Files"],
-                    contingency_dict["Number Expected Files"],
-                    A_str,
-                    B_str,
-                    C_str,
-                    D_str,
-                )
-            with open(SAVEFILE, "a") as f:
-                f.write("%s\n" % line)
-            print("Wrote to", SAVEFILE)
+                events = contingency_dict["Number Events"][DOMAIN]
+                files = contingency_dict["Number GLM Files"]
+                expected = contingency_dict["Number Expected Files"]
+            rows += [
+                (product_metric("contingency", name), DOMAIN, 0, DATE, NO_FXX, value)
+                for name, value in [
+                    ("GLM Event COUNT", events),
+                    ("NUM FILES", files),
+                    ("EXPECTED FILES", expected),
+                ]
+            ]
+            for name, values in zip(["A", "B", "C", "D"], [A, B, C, D]):
+                rows += [(name, DOMAIN, 0, DATE, f, v) for f, v in zip(fxx, values)]
+    upsert_rows(rows, DB=DB)
+    print("Wrote %s to %s" % (write_domains, DB))
 
 
 def write_to_files_MP(inputs):
@@ -354,10 +319,8 @@ def write_to_files_MP(inputs):
     print("=========================================================")
     print("=========================================================")
     #
-    ### Check if the file we are working on exists
+    ### Which dates are missing from the score store for each domain?
     #
-    SAVEDIR = "./HRRR_GLM_contingency_table/"
-
     DOMAINS = [
         "Utah",
         "Colorado",
@@ -368,51 +331,10 @@ def write_to_files_MP(inputs):
         "Central",
         "East",
     ]
-    FILES = [
-        "%s/%s/%s_%s.csv" % (SAVEDIR, D, D, sDATE.strftime("%Y_m%m_h%H"))
-        for D in DOMAINS
-    ]
-    EXISTS = [os.path.exists(i) for i in FILES]
-
-    Next_DATE = []
-    for (F, E) in zip(FILES, EXISTS):
-        if E:
-            list_DATES = np.genfromtxt(
-                F, delimiter=",", names=True, encoding="UTF-8", dtype=None
-            )["DATE"]
-            if np.shape(list_DATES) == ():
-                # I suppose there is only one date in the list
-                last = str(list_DATES)
-            else:
-                # Else, get the last date in the list
-                last = list_DATES[-1]
-            try:
-                Next_DATE.append(
-                    datetime.strptime(last, "%Y-%m-%d %H:%M:%S") + timedelta(days=1)
-                )
-                DATE_fmt = "%Y-%m-%d %H:%M:%S"
-            except:
-                Next_DATE.append(
-                    datetime.strptime(last, "%m/%d/%Y %H:%M") + timedelta(days=1)
-                )
-                DATE_fmt = "%m/%d/%Y %H:%M"
-
-        else:
-            Next_DATE.append(sDATE)
-            DATE_fmt = "%Y-%m-%d %H:%M:%S"
-
-    # Does the last date equal to the last day of the month of interest?
-    have_all_dates = np.array(Next_DATE) == eDATE
-
-    DOM_DATES = []
-    for i in Next_DATE:
-        next_sDATE = i
-        days = int((eDATE - next_sDATE).days)
-        DATES = [next_sDATE + timedelta(days=d) for d in range(days)]
-        DOM_DATES.append(DATES)
-
     days = int((eDATE - sDATE).days)
     DATES = [sDATE + timedelta(days=d) for d in range(days)]
+    metric = product_metric("contingency", "GLM Event COUNT")
+    DOM_DATES = [missing_dates(metric, D, DATES) for D in DOMAINS]
 
     for DATE in DATES:
         print(DATE)
@@ -0,0 +1,391 @@
+## Brian Blaylock
+## October 19, 2026
+
+"""
+Resumable batch runner for the HRRR/GLM verification products.
+
+The monthly runs used to decide what to compute by looking at what was on disk
+and a crash left half-written files. Instead, the runner keeps a manifest of
+tasks (valid time x product) and a ledger of which tasks are done or failed in
+a SQLite file. Restarting the same run only does the tasks that aren't done.
+
+Products:
+    'binary'      - HRRR/GLM binary fields in the monthly binary store
+    'contingency' - Contingency table for each domain in the score store
+    'FSS_r05'     - Fractions Skill Score with radius 5 in the score store
+                    (any radius, i.e. 'FSS_r10', 'FSS_r40')
+    'flashes'     - GLM flash count in the HRRR domains in the score store
+
+The tasks for the same valid time are run together by one worker with one
+cache, so the GLM file list is found once for all the products, and the binary
+fields are fetched once and shared by the 'binary', 'contingency', and 'FSS'
+products. The cache is kept when a task is tried again. A failed task is tried
+again after waiting (backoff, 2*backoff, 4*backoff, ... seconds). Each product
+is written in one transaction of the score store, and an hour is added to the
+binary store by renaming a complete copy of the month into place, so a task
+is either written or not.
+
+A task for an hour without any GLM files is recorded as 'missing' instead of
+'done', and is run again by the next run_batch (the GLM files may not have
+been downloaded yet).
+
+    run_batch(datetime(2018, 5, 1), datetime(2018, 6, 1),
+              products=['binary', 'contingency', 'FSS_r05', 'FSS_r10'])
+"""
+
+import os
+import sqlite3
+import time
+import traceback
+import concurrent.futures
+from datetime import datetime, timedelta
+
+import sys
+
+sys.path.append("/uufs/chpc.utah.edu/common/home/u0553130/pyBKB_v3")
+from BB_datetimes.range import range_dates
+
+# Default ledger file. Set HRRR_GLM_BATCH_LEDGER to use another file.
+LEDGER_DB = os.path.abspath(
+    os.environ.get(
+        "HRRR_GLM_BATCH_LEDGER",
+        "/uufs/chpc.utah.edu/common/home/horel-group8/blaylock/GLM-HRRR_LTNG_binary/HRRR_GLM_batch_ledger.db",
+    )
+)
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _to_seconds(DATE):
+    return int((DATE - _EPOCH).total_seconds())
+
+
+def _to_datetime(seconds):
+    return _EPOCH + timedelta(seconds=int(seconds))
+
+
+###############################################################################
+# Products
+# Each product function computes and writes one product for a valid time and
+# returns 'done', or 'missing' if there weren't any GLM files for the hour.
+# `cache` is shared by the products for the same valid time.
+
+
+def _GLM_files(DATE, cache):
+    """The GLM files for the hour before DATE (only found once per hour)."""
+    if "GLM files" not in cache:
+        from BB_GOES.get_GLM import get_GLM_file_nearesttime
+
+        cache["GLM files"] = get_GLM_file_nearesttime(
+            DATE - timedelta(minutes=30), window=30, verbose=False
+        )
+    return cache["GLM files"]
+
+
+def _contingency_stats(DATE, cache):
+    """The binary fields and contingency tables (only fetched once per hour)."""
+    if "stats" not in cache:
+        from BB_HRRR.GLM_and_HRRR.GLM_events_HRRR import (
+            get_GLM_HRRR_contingency_stats,
+        )
+        from BB_HRRR.GLM_and_HRRR.binary_store import has_binary_fields
+
+        # Loaded from the binary store, or computed (with the shared GLM file
+        # list) and saved to the store.
+        files = None if has_binary_fields(DATE) else _GLM_files(DATE, cache)
+        cache["stats"] = get_GLM_HRRR_contingency_stats(
+            DATE, verbose=False, files=files
+        )
+    return cache["stats"]
+
+
+def product_binary(DATE, cache):
+    stats = _contingency_stats(DATE, cache)
+    return "missing" if stats is None else "done"
+
+
+def product_contingency(DATE, cache):
+    from BB_HRRR.GLM_and_HRRR.GLM_events_HRRR import write_table_to_file, domains
+
+    stats = _contingency_stats(DATE, cache)
+    write_table_to_file(stats, DATE, list(domains))
+    return "missing" if stats is None else "done"
+
+
+def product_FSS(DATE, cache, radius):
+    from BB_HRRR.GLM_and_HRRR.GLM_events_HRRR import domains
+    from BB_HRRR.GLM_and_HRRR.fractions_skill_score_SPECIAL import (
+        fractions_skill_score_SPECIAL,
+        write_table_to_file,
+    )
+
+    stats = _contingency_stats(DATE, cache)
+    if stats is None:
+        FSS = None
+    else:
+        FSS = fractions_skill_score_SPECIAL(
+            stats["Observed Binary"], stats["Forecast Binary"], domains, radius=radius
+        )
+    write_table_to_file(FSS, DATE, list(domains), radius=radius)
+    return "missing" if stats is None else "done"
+
+
+def product_flashes(DATE, cache):
+    from BB_HRRR.HRRR_GLM_LTNG_flashes import (
+        get_HRRR_LTNG_hit_rate,
+        write_table_to_file,
+    )
+
+    GLM = _GLM_files(DATE, cache)
+    a, (files, expected) = get_HRRR_LTNG_hit_rate(DATE, files=GLM)
+    write_table_to_file(
+        a, files, expected, DATE, ["HRRR", "West", "Central", "East", "Utah"]
+    )
+    return "missing" if files == 0 else "done"
+
+
+PRODUCTS = {
+    "binary": product_binary,
+    "contingency": product_contingency,
+    "flashes": product_flashes,
+}
+
+
+def run_product(product, DATE, cache):
+    """Compute and write a product for a valid time. Returns the status."""
+    if product.startswith("FSS_r"):
+        return product_FSS(DATE, cache, radius=int(product[5:]))
+    if product not in PRODUCTS:
+        raise ValueError(
+            "Unknown product '%s'. Use one of %s or 'FSS_rXX'"
+            % (product, list(PRODUCTS))
+        )
+    return PRODUCTS[product](DATE, cache)
+
+
+###############################################################################
+# Ledger
+
+
+def connect_ledger(LEDGER=LEDGER_DB, timeout=600):
+    """Open the ledger (create it if it doesn't exist)."""
+    DIR = os.path.dirname(os.path.abspath(LEDGER))
+    if not os.path.exists(DIR):
+        os.makedirs(DIR)
+    con = sqlite3.connect(LEDGER, timeout=timeout)
+    con.execute("""CREATE TABLE IF NOT EXISTS tasks (
+               valid INTEGER NOT NULL,
+               product TEXT NOT NULL,
+               status TEXT NOT NULL,
+               attempts INTEGER NOT NULL DEFAULT 0,
+               error TEXT,
+               updated TEXT,
+               PRIMARY KEY (valid, product)
+           )""")
+    return con
+
+
+def add_tasks(DATES, products, LEDGER=LEDGER_DB):
+    """
+    Add tasks (every valid time x product) to the manifest. Tasks already in
+    the ledger are left alone.
+    """
+    con = connect_ledger(LEDGER)
+    try:
+        with con:
+            con.executemany(
+                """INSERT OR IGNORE INTO tasks (valid, product, status)
+                   VALUES (?, ?, 'pending')""",
+                [(_to_seconds(D), p) for D in DATES for p in products],
+            )
+    finally:
+        con.close()
+
+
+def record_task(DATE, product, status, attempts, error="", LEDGER=LEDGER_DB):
+    """Record a task as 'done', 'missing', or 'failed' in the ledger."""
+    con = connect_ledger(LEDGER)
+    try:
+        with con:
+            con.execute(
+                """INSERT INTO tasks (valid, product, status, attempts, error, updated)
+                   VALUES (?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (valid, product) DO UPDATE SET
+                       status=excluded.status,
+                       attempts=tasks.attempts + excluded.attempts,
+                       error=excluded.error,
+                       updated=excluded.updated""",
+                (
+                    _to_seconds(DATE),
+                    product,
+                    status,
+                    attempts,
+                    error,
+                    datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                ),
+            )
+    finally:
+        con.close()
+
+
+def pending_tasks(
+    DATES, products, retry_failed=True, max_attempts=None, LEDGER=LEDGER_DB
+):
+    """
+    Tasks in the manifest that aren't done.
+
+    Input:
+        retry_failed - If True, include the failed tasks.
+        max_attempts - Don't include failed tasks that were tried this many
+                       times.
+    Return:
+        Dictionary of {valid datetime: [products]}, in order of valid time.
+        Tasks that were 'missing' GLM files are always included.
+    """
+    statuses = ["pending", "missing"]
+    if retry_failed:
+        statuses.append("failed")
+    want = set((_to_seconds(D), p) for D in DATES for p in products)
+    con = connect_ledger(LEDGER)
+    try:
+        rows = con.execute(
+            "SELECT valid, product, status, attempts FROM tasks ORDER BY valid"
+        ).fetchall()
+    finally:
+        con.close()
+
+    tasks = {}
+    for valid, product, status, attempts in rows:
+        if (valid, product) not in want or status not in statuses:
+            continue
+        if status == "failed" and max_attempts is not None:
+            if attempts >= max_attempts:
+                continue
+        DATE = _to_datetime(valid)
+        tasks.setdefault(DATE, [])
+        tasks[DATE].append(product)
+
+    # Keep the products in the order they were requested (i.e. 'binary' first)
+    return {D: [p for p in products if p in tasks[D]] for D in tasks}
+
+
+def ledger_summary(LEDGER=LEDGER_DB):
+    """Number of tasks with each status for each product."""
+    con = connect_ledger(LEDGER)
+    try:
+        rows = con.execute(
+            "SELECT product, status, COUNT(*) FROM tasks GROUP BY product, status"
+        ).fetchall()
+    finally:
+        con.close()
+    summary = {}
+    for product, status, count in rows:
+        summary.setdefault(product, {})
+        summary[product][status] = count
+    return summary
+
+
+###############################################################################
+# Runner
+
+
+def run_hour(inputs):
+    """
+    Run all the products for a valid time. Products that raise an exception
+    are tried `retries` more times, waiting backoff*2**attempt seconds. The
+    cache is kept between attempts, so data that was already fetched isn't
+    fetched again.
+
+    Return:
+        DATE, and a list of (product, status, attempts, error)
+    """
+    DATE, products, retries, backoff = inputs
+    cache = {}
+    results = []
+    for product in products:
+        for attempt in range(retries + 1):
+            try:
+                status = run_product(product, DATE, cache)
+                error = "No GLM files" if status == "missing" else ""
+                results.append((product, status, attempt + 1, error))
+                break
+            except Exception:
+                error = traceback.format_exc()
+                print("!! %s %s (attempt %s) failed" % (DATE, product, attempt + 1))
+                if attempt < retries:
+                    time.sleep(backoff * 2 ** attempt)
+        else:
+            results.append((product, "failed", retries + 1, error))
+    return DATE, results
+
+
+def run_batch(
+    sDATE,
+    eDATE,
+    products=["binary", "contingency"],
+    HOURS=range(24),
+    processes=4,
+    retries=2,
+    backoff=30,
+    retry_failed=True,
+    max_attempts=None,
+    LEDGER=LEDGER_DB,
+):
+    """
+    Run the products for every hour between sDATE and eDATE. Tasks already
+    done in the ledger are skipped, so the same run can be restarted. Tasks
+    that were missing GLM files are run again.
+
+    Input:
+        sDATE, eDATE - Start and end valid datetime (eDATE not included)
+        products     - List of products (see PRODUCTS and 'FSS_rXX')
+        HOURS        - Hours of the day to run
+        processes    - Number of valid times run at the same time. Each valid
+                       time runs in a separate process, and those processes
+                       may start their own multiprocessing pools.
+        retries      - Number of times to try a failed task again
+        backoff      - Seconds to wait before the first retry
+        retry_failed - If True, run tasks that failed in a previous run.
+        max_attempts - Don't run failed tasks that were tried this many times.
+        LEDGER       - Path to the ledger file
+
+    Return:
+        Summary of the ledger (number of tasks with each status).
+    """
+    for product in products:
+        if not product.startswith("FSS_r") and product not in PRODUCTS:
+            raise ValueError("Unknown product '%s'" % product)
+
+    DATES = [D for D in range_dates(sDATE, eDATE, HOURS=1) if D.hour in HOURS]
+    add_tasks(DATES, products, LEDGER=LEDGER)
+    tasks = pending_tasks(
+        DATES,
+        products,
+        retry_failed=retry_failed,
+        max_attempts=max_attempts,
+        LEDGER=LEDGER,
+    )
+
+    print("\n     =======================================")
+    print(
+        "        %s valid times need %s tasks"
+        % (len(tasks), sum(map(len, tasks.values())))
+    )
+    print("     =======================================\n")
+
+    inputs = [(D, P, retries, backoff) for D, P in tasks.items()]
+    timer = datetime.now()
+    with concurrent.futures.ProcessPoolExecutor(processes) as executor:
+        futures = [executor.submit(run_hour, i) for i in inputs]
+        for n, future in enumerate(concurrent.futures.as_completed(futures)):
+            DATE, results = future.result()
+            # Only this process writes to the ledger.
+            for product, status, attempts, error in results:
+                record_task(DATE, product, status, attempts, error, LEDGER=LEDGER)
+            status = ", ".join("%s %s" % (r[0], r[1]) for r in results)
+            print(
+                "[%s/%s] %s: %s (%s)"
+                % (n + 1, len(inputs), DATE, status, datetime.now() - timer)
+            )
+
+    return ledger_summary(LEDGER)
@@ -0,0 +1,251 @@
+## Brian Blaylock
+## October 19, 2026
+
+"""
+Monthly store for the hourly HRRR/GLM binary fields and contingency tables.
+
+get_GLM_HRRR_contingency_stats used to save a pickled dictionary for each hour
+with np.save (about 36 MB/hour). Instead, each month is one zip file and the
+members of each hour are under the hour's YYYYmmddHH:
+
+    HRRR-GLM-Binary_2018-05.zip
+        2018050100/observed.bits   - np.packbits of the GLM binary grid
+        2018050100/forecast.bits   - np.packbits of the HRRR binary grids
+        2018050100/table.npy       - int64 contingency table
+                                     (domain, abcd, fxx)
+        2018050100/meta.json       - shapes, domain names, event and file
+                                     counts
+        2018050101/...
+
+The packed bits are compressed with zstd (if the zstandard package is
+installed) or zlib. The zip directory is the hour index, so a single hour is
+read without reading (or unpickling) the rest of the month.
+
+A writer holds a lock on HRRR-GLM-Binary_YYYY-MM.zip.lock, appends the hour to
+a copy of the month, and renames the copy into place. Readers don't need the
+lock because the file at the month's path is always a complete zip, and a
+crash while saving an hour leaves the month as it was.
+
+    save_binary_fields(stats)            # The dict from get_GLM_HRRR_contingency_stats
+    stats = load_binary_fields(DATE)     # Same dict, or None if it isn't stored
+    DATES = stored_dates(DATE)           # Hours stored for DATE's month
+"""
+
+import os
+import io
+import json
+import fcntl
+import shutil
+import zipfile
+import numpy as np
+from datetime import datetime
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Increment the version if the store format changes.
+BINARY_STORE_VERSION = 3
+
+# Directory where the stores are saved for each GOES satellite
+STORE_DIR = {
+    16: "/uufs/chpc.utah.edu/common/home/horel-group8/blaylock/GLM-HRRR_LTNG_binary/",
+    17: "/uufs/chpc.utah.edu/common/home/horel-group8/blaylock/GLM-HRRR_LTNG_binary/HRRR-GLM-GOES17/",
+}
+
+
+def store_file(DATE, GOES=16, SAVEDIR=None):
+    """File name of the monthly store for DATE."""
+    if SAVEDIR is None:
+        SAVEDIR = STORE_DIR[GOES]
+    return os.path.join(SAVEDIR, "HRRR-GLM-Binary_%s.zip" % DATE.strftime("%Y-%m"))
+
+
+def _hour_key(DATE):
+    return DATE.strftime("%Y%m%d%H")
+
+
+def _compress(data):
+    """Return (member suffix, bytes, zip compression type)."""
+    if zstandard is not None:
+        return (
+            ".zst",
+            zstandard.ZstdCompressor(level=10).compress(data),
+            zipfile.ZIP_STORED,
+        )
+    return "", data, zipfile.ZIP_DEFLATED
+
+
+def _decompress(name, data):
+    if name.endswith(".zst"):
+        if zstandard is None:
+            raise ImportError("zstandard is needed to read %s" % name)
+        return zstandard.ZstdDecompressor().decompress(data)
+    return data
+
+
+def _pack(binary):
+    """Pack a boolean array into bits (along the last dimension)."""
+    return np.packbits(np.asarray(binary, dtype=bool), axis=-1).tobytes()
+
+
+def _unpack(data, shape):
+    """Unpack bits to a boolean array with the given shape."""
+    packed_shape = tuple(shape[:-1]) + ((shape[-1] + 7) // 8,)
+    packed = np.frombuffer(data, dtype=np.uint8).reshape(packed_shape)
+    return np.unpackbits(packed, axis=-1, count=shape[-1]).astype(bool)
+
+
+def _members(Z, key):
+    """Member names for an hour, i.e. {'observed': '2018050100/observed.bits'}"""
+    members = {}
+    for name in Z.namelist():
+        if name.startswith(key + "/"):
+            members[name[len(key) + 1 :].split(".")[0]] = name
+    return members
+
+
+def _stored_keys(FILE):
+    """The hours (YYYYmmddHH) in a monthly store."""
+    if not os.path.exists(FILE):
+        return set()
+    with zipfile.ZipFile(FILE, "r") as Z:
+        return {name.split("/")[0] for name in Z.namelist()}
+
+
+def stored_dates(DATE, GOES=16, SAVEDIR=None):
+    """Sorted list of the hours stored in DATE's monthly store."""
+    keys = _stored_keys(store_file(DATE, GOES, SAVEDIR))
+    return sorted(datetime.strptime(k, "%Y%m%d%H") for k in keys)
+
+
+def has_binary_fields(DATE, GOES=16, SAVEDIR=None):
+    """True if the hour is in the store."""
+    return _hour_key(DATE) in _stored_keys(store_file(DATE, GOES, SAVEDIR))
+
+
+def save_binary_fields(stats, GOES=16, SAVEDIR=None, verbose=True):
+    """
+    Add an hour to the monthly store.
+
+    Input:
+        stats - The dictionary returned by get_GLM_HRRR_contingency_stats()
+                with 'DATETIME', 'Observed Binary', 'Forecast Binary',
+                'table', 'Number Events', 'Number GLM Files', and
+                'Number Expected Files'.
+    """
+    DATE = stats["DATETIME"]
+    FILE = store_file(DATE, GOES, SAVEDIR)
+    key = _hour_key(DATE)
+
+    observed = np.asarray(stats["Observed Binary"], dtype=bool)
+    forecast = np.asarray(stats["Forecast Binary"], dtype=bool)
+
+    domains = list(stats["table"])
+    table = np.array([np.array(stats["table"][d], dtype=np.int64) for d in domains])
+
+    meta = {
+        "version": BINARY_STORE_VERSION,
+        "DATETIME": DATE.strftime("%Y-%m-%d %H:%M"),
+        "observed shape": list(observed.shape),
+        "forecast shape": list(forecast.shape),
+        "domains": domains,
+        "Number Events": {k: int(v) for k, v in stats.get("Number Events", {}).items()},
+        "Number GLM Files": int(stats["Number GLM Files"]),
+        "Number Expected Files": int(stats["Number Expected Files"]),
+    }
+
+    # Compress before taking the lock
+    members = []
+    for name, data in [
+        ("observed.bits", _pack(observed)),
+        ("forecast.bits", _pack(forecast)),
+    ]:
+        suffix, data, compress_type = _compress(data)
+        members.append(("%s/%s%s" % (key, name, suffix), data, compress_type))
+    buffer = io.BytesIO()
+    np.save(buffer, table)
+    members.append(("%s/table.npy" % key, buffer.getvalue(), zipfile.ZIP_DEFLATED))
+    members.append(("%s/meta.json" % key, json.dumps(meta), zipfile.ZIP_DEFLATED))
+
+    os.makedirs(os.path.dirname(FILE), exist_ok=True)
+
+    # One writer at a time for each month. The lock file is never removed.
+    with open(FILE + ".lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            if key in _stored_keys(FILE):
+                if verbose:
+                    print("%s is already in %s" % (DATE, FILE))
+                return FILE
+
+            # Append to a copy of the month and rename it into place.
+            TMP = FILE + ".%s.tmp" % os.getpid()
+            try:
+                if os.path.exists(FILE):
+                    shutil.copyfile(FILE, TMP)
+                with zipfile.ZipFile(TMP, "a") as Z:
+                    for name, data, compress_type in members:
+                        Z.writestr(name, data, compress_type)
+                os.replace(TMP, FILE)
+            finally:
+                if os.path.exists(TMP):
+                    os.remove(TMP)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+    if verbose:
+        print("Saved %s binary fields in %s" % (DATE, FILE))
+    return FILE
+
+
+def load_binary_fields(DATE, GOES=16, SAVEDIR=None, fields=True):
+    """
+    Read one hour from the monthly store.
+
+    Input:
+        DATE   - The valid datetime
+        fields - If False, only read the contingency table and meta data
+                 (skip the binary grids).
+
+    Return:
+        Dictionary like get_GLM_HRRR_contingency_stats(), or None if the hour
+        isn't in the store.
+    """
+    FILE = store_file(DATE, GOES, SAVEDIR)
+    if not os.path.exists(FILE):
+        return None
+
+    with zipfile.ZipFile(FILE, "r") as Z:
+        members = _members(Z, _hour_key(DATE))
+        if "meta" not in members:
+            return None
+        meta = json.loads(Z.read(members["meta"]))
+        table = np.load(io.BytesIO(Z.read(members["table"])))
+
+        return_this = {
+            "table": {d: tuple(table[i]) for i, d in enumerate(meta["domains"])},
+            "Number Events": meta["Number Events"],
+            "Number GLM Files": meta["Number GLM Files"],
+            "Number Expected Files": meta["Number Expected Files"],
+            "DATETIME": datetime.strptime(meta["DATETIME"], "%Y-%m-%d %H:%M"),
+        }
+        if fields:
+            for field, key, shape in [
+                ("Observed Binary", "observed", meta["observed shape"]),
+                ("Forecast Binary", "forecast", meta["forecast shape"]),
+            ]:
+                data = _decompress(members[key], Z.read(members[key]))
+                return_this[field] = _unpack(data, shape)
+
+    return return_this
+
+
+def import_binary_npy(NPY_FILE, GOES=16, SAVEDIR=None, verbose=True):
+    """
+    Add an hour saved in the old format (a pickled dictionary saved with
+    np.save) to the monthly store.
+    """
+    stats = np.load(NPY_FILE, allow_pickle=True).item()
+    return save_binary_fields(stats, GOES=GOES, SAVEDIR=SAVEDIR, verbose=verbose)
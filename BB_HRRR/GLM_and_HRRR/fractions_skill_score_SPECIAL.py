@@ -14,26 +14,19 @@ forecast grids and for different domains.
 """
 
 import numpy as np
-import scipy.ndimage as ndimage
 import multiprocessing
 import os
 from datetime import datetime, timedelta
 
+import sys
 
-def fraction(values):
-    """
-    For each set of binary values for the window, compute the fraction of the
-    window that is True.
-    """
-    return np.sum(values) / np.size(values)
-
-
-def radial_footprint(radius):
-    """A footprint with the given radius"""
-    y, x = np.ogrid[-radius : radius + 1, -radius : radius + 1]
-    footprint = x ** 2 + y ** 2 <= radius ** 2
-    footprint = 1 * footprint.astype(float)
-    return footprint
+sys.path.append("/uufs/chpc.utah.edu/common/home/u0553130/pyBKB_v3")
+from BB_wx_calcs.footprint_filters import (
+    radial_footprint,
+    square_footprint,
+    footprint_fraction,
+)
+from BB_HRRR.GLM_and_HRRR.score_store import SCORE_DB, upsert_rows, missing_dates
 
 
 def FSS_MP(inputs):
@@ -49,13 +42,9 @@ def FSS_MP(inputs):
 
     print("Working on job %02d: %s = %s grid spaces" % (n, neighbor_type, w_or_r))
     if neighbor_type == "window":
-        fxx_f = ndimage.generic_filter(
-            fxx_b, fraction, mode="constant", cval=0, size=w_or_r
-        )
+        fxx_f = footprint_fraction(fxx_b, square_footprint(w_or_r))
     elif neighbor_type == "radius":
-        fxx_f = ndimage.generic_filter(
-            fxx_b, fraction, mode="constant", cval=0, footprint=radial_footprint(w_or_r)
-        )
+        fxx_f = footprint_fraction(fxx_b, radial_footprint(w_or_r))
     print("Finished on job %02d: %s = %s grid spaces" % (n, neighbor_type, w_or_r))
     return fxx_f
 
@@ -108,9 +97,7 @@ def fractions_skill_score_SPECIAL(
         return_this["window"] = window
 
         # Observations fractions
-        obs_fracs = ndimage.generic_filter(
-            obs_binary, fraction, size=window, mode="constant", cval=0
-        )
+        obs_fracs = footprint_fraction(obs_binary, square_footprint(window))
 
         # Use Multiprocessing to compute fractions for each forecast grid.
         # These are the inputs for that function...
@@ -122,13 +109,7 @@ def fractions_skill_score_SPECIAL(
         return_this["radius"] = radius
 
         # Observations fractions
-        obs_fracs = ndimage.generic_filter(
-            obs_binary,
-            fraction,
-            footprint=radial_footprint(radius),
-            mode="constant",
-            cval=0,
-        )
+        obs_fracs = footprint_fraction(obs_binary, radial_footprint(radius))
 
         # Use Multiprocessing to compute fractions for each forecast grid.
         # These are the inputs for that function...
@@ -190,43 +171,27 @@ def fractions_skill_score_SPECIAL(
 
 
 def write_table_to_file(
-    FSS_dict,
-    DATE,
-    write_domains,
-    fxx=range(1, 19),
-    DATE_fmt="%Y-%m-%d %H:%M:%S",
-    SAVEDIR="./HRRR_GLM_Fractions_Skill_Score/",
+    FSS_dict, DATE, write_domains, radius, fxx=range(1, 19), DB=SCORE_DB
 ):
     """
+    Write the FSS for each domain to the score store
+    (see BB_HRRR.GLM_and_HRRR.score_store). Writing a date that is already in
+    the store replaces it.
+
     Inputs:
-        FSS - the dictionary returned from
-              fractions_skill_score_SPECIAL()
+        FSS    - the dictionary returned from
+                 fractions_skill_score_SPECIAL()
+        radius - the radius the FSS was computed with
     """
-    for DOMAIN in domains:
-        if DOMAIN in write_domains:
-            # Directories for each Domain
-            DOM_DIR = "%s/%s/" % (SAVEDIR, DOMAIN)
-            if not os.path.exists(DOM_DIR):
-                os.makedirs(DOM_DIR)
-            #
-            SAVEFILE = "%s/%s_%s.csv" % (DOM_DIR, DOMAIN, DATE.strftime("%Y_m%m_h%H"))
-            #
-            # Initiate new file with header if the day of the month is 1.
-            if DATE.day == 1:
-                FSS_str = ",".join(["F%02d_FSS" % i for i in fxx])
-                HEADER = "DATE," + FSS_str
-                with open(SAVEFILE, "w") as f:
-                    f.write("%s\n" % HEADER)
-            #
-            if FSS_dict is None:
-                FSS_str = ",".join(np.array(np.ones_like(fxx) * np.nan, dtype=str))
-                line = "%s,%s" % (DATE.strftime(DATE_fmt), FSS_str)
-            else:
-                FSS_str = ",".join(np.array(np.round(FSS_dict[DOMAIN], 4), dtype=str))
-                line = "%s,%s" % (DATE.strftime(DATE_fmt), FSS_str)
-            with open(SAVEFILE, "a") as f:
-                f.write("%s\n" % line)
-            print("Wrote to", SAVEFILE)
+    rows = []
+    for DOMAIN in write_domains:
+        if FSS_dict is None:
+            FSS = np.ones(len(fxx)) * np.nan
+        else:
+            FSS = FSS_dict[DOMAIN]
+        rows += [("FSS", DOMAIN, radius, DATE, f, v) for f, v in zip(fxx, FSS)]
+    upsert_rows(rows, DB=DB)
+    print("Wrote %s r%02d to %s" % (write_domains, radius, DB))
 
 
 def write_to_files_MP(inputs):
@@ -266,10 +231,8 @@ def write_to_files_MP(inputs):
     print("=========================================================")
     print("=========================================================")
     #
-    ### Check if the file we are working on exists
+    ### Which dates are missing from the score store for each domain?
     #
-    SAVEDIR = "./HRRR_GLM_Fractions_Skill_Score_r%02d/" % radii[0]
-
     DOMAINS = [
         "Utah",
         "Colorado",
@@ -280,51 +243,9 @@ def write_to_files_MP(inputs):
         "Central",
         "East",
     ]
-    FILES = [
-        "%s/%s/%s_%s.csv" % (SAVEDIR, D, D, sDATE.strftime("%Y_m%m_h%H"))
-        for D in DOMAINS
-    ]
-    EXISTS = [os.path.exists(i) for i in FILES]
-
-    Next_DATE = []
-    for (F, E) in zip(FILES, EXISTS):
-        if E:
-            list_DATES = np.genfromtxt(
-                F, delimiter=",", names=True, encoding="UTF-8", dtype=None
-            )["DATE"]
-            if np.shape(list_DATES) == ():
-                # I suppose there is only one date in the list
-                last = str(list_DATES)
-            else:
-                # Else, get the last date in the list
-                last = list_DATES[-1]
-            try:
-                Next_DATE.append(
-                    datetime.strptime(last, "%Y-%m-%d %H:%M:%S") + timedelta(days=1)
-                )
-                DATE_fmt = "%Y-%m-%d %H:%M:%S"
-            except:
-                Next_DATE.append(
-                    datetime.strptime(last, "%m/%d/%Y %H:%M") + timedelta(days=1)
-                )
-                DATE_fmt = "%m/%d/%Y %H:%M"
-
-        else:
-            Next_DATE.append(sDATE)
-            DATE_fmt = "%Y-%m-%d %H:%M:%S"
-
-    # Does the last date equal to the last day of the month of interest?
-    have_all_dates = np.array(Next_DATE) == eDATE
-
-    DOM_DATES = []
-    for i in Next_DATE:
-        next_sDATE = i
-        days = int((eDATE - next_sDATE).days)
-        DATES = [next_sDATE + timedelta(days=d) for d in range(days)]
-        DOM_DATES.append(DATES)
-
     days = int((eDATE - sDATE).days)
     DATES = [sDATE + timedelta(days=d) for d in range(days)]
+    DOM_DATES = [missing_dates("FSS", D, DATES, radius=radii[0]) for D in DOMAINS]
 
     for DATE in DATES:
         # print(DATE)
@@ -347,21 +268,9 @@ def write_to_files_MP(inputs):
                     FSS = fractions_skill_score_SPECIAL(
                         obs_binary, fxx_binary, domains, radius=r
                     )
-                    write_table_to_file(
-                        FSS,
-                        DATE,
-                        write_domains,
-                        DATE_fmt=DATE_fmt,
-                        SAVEDIR="./HRRR_GLM_Fractions_Skill_Score_r%02d/" % r,
-                    )
+                    write_table_to_file(FSS, DATE, write_domains, radius=r)
                 else:
-                    write_table_to_file(
-                        None,
-                        DATE,
-                        write_domains,
-                        DATE_fmt=DATE_fmt,
-                        SAVEDIR="./HRRR_GLM_Fractions_Skill_Score_r%02d/" % r,
-                    )
+                    write_table_to_file(None, DATE, write_domains, radius=r)
     return "Finished %s" % len(DATES)
 
 
@@ -2,8 +2,8 @@
 ## May 7, 2019
 
 """
-Generate HRRR-GLM binary Lightning tables and store data in a dictionary.
-Save the dictionary for later use. Store on Horel-Group8 (approx. 150 GB).
+Generate HRRR-GLM binary Lightning tables and binary fields. Save them in the
+monthly binary store (BB_HRRR.GLM_and_HRRR.binary_store) on Horel-Group8.
 """
 
 import numpy as np
@@ -22,31 +22,19 @@ from BB_GOES.get_GLM import (
     accumulate_GLM_FAST,
     filter_by_HRRR,
 )
-from BB_datetimes.range import range_dates
 
-from BB_HRRR.GLM_and_HRRR.GLM_events_HRRR import get_GLM_HRRR_contingency_stats, domains
+from BB_HRRR.GLM_and_HRRR.batch_runner import run_batch
 
 
-def get_and_save(DATE):
-    print(DATE)
-    BASE = "/uufs/chpc.utah.edu/common/home/horel-group8/blaylock/GLM-HRRR_LTNG_binary/"
-    FILE = BASE + "/HRRR-GLM-Binary_%s" % DATE.strftime("%Y-%m-%d_%H%M")
-    if not os.path.exists(FILE):
-        # This function will write the file if it isn't available
-        a = get_GLM_HRRR_contingency_stats(DATE)
+if __name__ == "__main__":
+    # sDATE = datetime(2018, 5, 1)
+    # eDATE = datetime(2018, 8, 1)
 
+    sDATE = datetime(2018, 8, 1)
+    eDATE = datetime(2018, 10, 1)
 
-# sDATE = datetime(2018, 5, 1)
-# eDATE = datetime(2018, 8, 1)
-
-sDATE = datetime(2018, 8, 1)
-eDATE = datetime(2018, 10, 1)
-
-DATES = range_dates(sDATE, eDATE, HOURS=1)
-
-
-list(map(get_and_save, DATES))
-
-
-# NOTE: Can't use multiprocessing because the get_GLM_HRRR_contingency_stats
-#       uses it instead.
+    # Hours already in the ledger as done are skipped, so this can be restarted.
+    # Each hour is run in its own process (get_GLM_HRRR_contingency_stats uses
+    # multiprocessing too).
+    summary = run_batch(sDATE, eDATE, products=["binary"], processes=3)
+    print(summary)
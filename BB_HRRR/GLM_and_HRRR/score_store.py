@@ -0,0 +1,345 @@
+## Brian Blaylock
+## October 19, 2026
+
+"""
+SQLite store for the HRRR/GLM verification scores.
+
+The scores used to be appended as lines in a CSV file for each domain, month,
+and hour. Finding the missing dates meant reading every CSV file (with two
+date formats), and filling a missing date meant rewriting the file. Now every
+score is a row in one table:
+
+    scores(metric, domain, radius, valid, fxx, value)
+
+    metric - i.e. 'FSS', 'A', 'B', 'C', 'D', 'hit rate/GLM FLASH COUNT',
+             'contingency/NUM FILES'
+    domain - i.e. 'HRRR', 'West', 'Utah'
+    radius - Neighborhood radius in grid points (0 if it doesn't have one)
+    valid  - Valid datetime (seconds since 1970-01-01)
+    fxx    - Forecast lead time (NO_FXX if it doesn't have one)
+    value  - The score (NULL for NaN)
+
+Values that aren't scores (counts of flashes and files) are written by more
+than one product, so their metric name starts with the product, i.e.
+product_metric('contingency', 'NUM FILES') is 'contingency/NUM FILES'.
+
+Writes are upserts, so writing the same score twice doesn't duplicate it, and
+dates can be written in any order. The database uses SQLite's rollback
+journal (not WAL, which needs shared memory that NFS doesn't have). Writers
+hold an flock on <DB>.lock for the transaction, so parallel jobs, including
+jobs on other hosts of an NFS file system with a lock manager, write one at
+a time.
+
+    upsert_scores('FSS', 'Utah', DATE, FSS['Utah'], fxx=range(1, 19), radius=5)
+    DATES = missing_dates('FSS', 'Utah', expected_DATES, radius=5)
+    S = read_scores('FSS', 'Utah', radius=5)   # S['value'] is (time, fxx)
+
+The old CSV files are imported with import_csv_directory(), or by running this
+file in the directory with the CSV directories.
+"""
+
+import os
+import re
+import fcntl
+import sqlite3
+import numpy as np
+from datetime import datetime, timedelta
+
+# Default database file. Set HRRR_GLM_SCORE_DB to use another file.
+SCORE_DB = os.path.abspath(
+    os.environ.get(
+        "HRRR_GLM_SCORE_DB",
+        "/uufs/chpc.utah.edu/common/home/horel-group8/blaylock/GLM-HRRR_LTNG_binary/HRRR_GLM_scores.db",
+    )
+)
+
+# fxx for scores that don't have a forecast lead time
+NO_FXX = -1
+
+_EPOCH = datetime(1970, 1, 1)
+
+# Product of the old CSV files in each directory (see import_csv_directory)
+CSV_PRODUCTS = {
+    "HRRR_GLM_hit_rate_data": "hit rate",
+    "HRRR_GLM_contingency_table": "contingency",
+    "HRRR_GLM_Fractions_Skill_Score": "FSS",
+}
+
+
+def product_metric(product, metric):
+    """Name of a value that isn't a score, i.e. 'contingency/NUM FILES'."""
+    return "%s/%s" % (product, metric)
+
+
+def _to_seconds(DATE):
+    return int((DATE - _EPOCH).total_seconds())
+
+
+def _to_datetime(seconds):
+    return _EPOCH + timedelta(seconds=int(seconds))
+
+
+def connect(DB=SCORE_DB, timeout=600):
+    """
+    Open the score database (create it if it doesn't exist).
+
+    Input:
+        DB      - Path to the SQLite file
+        timeout - Seconds to wait for another process that is writing.
+    """
+    DIR = os.path.dirname(os.path.abspath(DB))
+    if not os.path.exists(DIR):
+        os.makedirs(DIR)
+    con = sqlite3.connect(DB, timeout=timeout)
+    con.execute("PRAGMA journal_mode=DELETE")
+    con.execute("""CREATE TABLE IF NOT EXISTS scores (
+               metric TEXT NOT NULL,
+               domain TEXT NOT NULL,
+               radius INTEGER NOT NULL,
+               valid INTEGER NOT NULL,
+               fxx INTEGER NOT NULL,
+               value REAL,
+               PRIMARY KEY (metric, domain, radius, valid, fxx)
+           ) WITHOUT ROWID""")
+    return con
+
+
+def upsert_rows(rows, DB=SCORE_DB):
+    """
+    Insert or replace many scores in one transaction.
+
+    Input:
+        rows - List of (metric, domain, radius, valid datetime, fxx, value)
+    """
+    data = []
+    for metric, domain, radius, DATE, fxx, value in rows:
+        if value is None or (np.isscalar(value) and np.isnan(value)):
+            value = None
+        else:
+            value = float(value)
+        data.append((metric, domain, int(radius), _to_seconds(DATE), int(fxx), value))
+
+    DIR = os.path.dirname(os.path.abspath(DB))
+    if not os.path.exists(DIR):
+        os.makedirs(DIR)
+
+    # One writer at a time. The lock file is never removed.
+    with open(DB + ".lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            con = connect(DB)
+            try:
+                with con:
+                    con.executemany(
+                        """INSERT INTO scores (metric, domain, radius, valid, fxx, value)
+                           VALUES (?, ?, ?, ?, ?, ?)
+                           ON CONFLICT (metric, domain, radius, valid, fxx)
+                           DO UPDATE SET value=excluded.value""",
+                        data,
+                    )
+            finally:
+                con.close()
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+    return len(data)
+
+
+def upsert_scores(metric, domain, DATE, values, fxx=None, radius=0, DB=SCORE_DB):
+    """
+    Insert or replace the scores for a valid date.
+
+    Input:
+        metric - Name of the score, i.e. 'FSS'
+        domain - Name of the domain, i.e. 'Utah'
+        DATE   - Valid datetime
+        values - A single value, or a value for each fxx
+        fxx    - List of forecast lead times for each value. None if the
+                 value doesn't have a lead time.
+        radius - Neighborhood radius (0 if it doesn't have one)
+    """
+    if fxx is None:
+        rows = [(metric, domain, radius, DATE, NO_FXX, values)]
+    else:
+        fxx = list(fxx)
+        values = np.broadcast_to(np.asarray(values, dtype=float), (len(fxx),))
+        rows = [(metric, domain, radius, DATE, f, v) for f, v in zip(fxx, values)]
+    return upsert_rows(rows, DB=DB)
+
+
+def stored_dates(metric, domain, radius=0, sDATE=None, eDATE=None, DB=SCORE_DB):
+    """Sorted list of the valid dates that have a score (between sDATE and eDATE)."""
+    query = "SELECT DISTINCT valid FROM scores WHERE metric=? AND domain=? AND radius=?"
+    params = [metric, domain, int(radius)]
+    if sDATE is not None:
+        query += " AND valid>=?"
+        params.append(_to_seconds(sDATE))
+    if eDATE is not None:
+        query += " AND valid<?"
+        params.append(_to_seconds(eDATE))
+    con = connect(DB)
+    try:
+        valid = [v for (v,) in con.execute(query + " ORDER BY valid", params)]
+    finally:
+        con.close()
+    return [_to_datetime(v) for v in valid]
+
+
+def missing_dates(metric, domain, expected_DATES, radius=0, DB=SCORE_DB):
+    """
+    The expected dates that don't have a score yet.
+
+    Input:
+        expected_DATES - List of the valid datetimes that should have a score
+    """
+    expected_DATES = list(expected_DATES)
+    if len(expected_DATES) == 0:
+        return []
+    have = set(
+        stored_dates(
+            metric,
+            domain,
+            radius=radius,
+            sDATE=min(expected_DATES),
+            eDATE=max(expected_DATES) + timedelta(seconds=1),
+            DB=DB,
+        )
+    )
+    return sorted(set(expected_DATES) - have)
+
+
+def read_scores(metric, domain, radius=0, sDATE=None, eDATE=None, DB=SCORE_DB):
+    """
+    Read the scores for a metric and domain.
+
+    Return:
+        Dictionary with
+            'DATETIME' - Array of valid datetimes
+            'fxx'      - Array of the forecast lead times
+            'value'    - Array of the scores with shape (DATETIME, fxx). NaN
+                         where there isn't a score.
+    """
+    query = (
+        "SELECT valid, fxx, value FROM scores WHERE metric=? AND domain=? AND radius=?"
+    )
+    params = [metric, domain, int(radius)]
+    if sDATE is not None:
+        query += " AND valid>=?"
+        params.append(_to_seconds(sDATE))
+    if eDATE is not None:
+        query += " AND valid<?"
+        params.append(_to_seconds(eDATE))
+    con = connect(DB)
+    try:
+        rows = con.execute(query, params).fetchall()
+    finally:
+        con.close()
+
+    if len(rows) == 0:
+        return {
+            "DATETIME": np.array([]),
+            "fxx": np.array([]),
+            "value": np.empty((0, 0)),
+        }
+
+    valid = np.array([r[0] for r in rows])
+    fxx = np.array([r[1] for r in rows])
+    values = np.array([np.nan if r[2] is None else r[2] for r in rows])
+
+    all_valid, i = np.unique(valid, return_inverse=True)
+    all_fxx, j = np.unique(fxx, return_inverse=True)
+    table = np.full((len(all_valid), len(all_fxx)), np.nan)
+    table[i, j] = values
+
+    return {
+        "DATETIME": np.array([_to_datetime(v) for v in all_valid]),
+        "fxx": all_fxx,
+        "value": table,
+    }
+
+
+def _parse_date(DATE_str):
+    for DATE_fmt in ["%Y-%m-%d %H:%M:%S", "%m/%d/%Y %H:%M"]:
+        try:
+            return datetime.strptime(DATE_str, DATE_fmt)
+        except ValueError:
+            pass
+    raise ValueError("Unknown date format: %s" % DATE_str)
+
+
+def import_csv(FILE, domain, product, radius=0, DB=SCORE_DB):
+    """
+    Import one of the old CSV score files. Columns named like 'F01_FSS' or
+    'F01_A' are stored as metric 'FSS' or 'A' for that fxx. The other columns
+    (i.e. 'GLM FLASH COUNT', 'NUM FILES') are stored with NO_FXX as
+    product_metric(product, name).
+
+    Input:
+        FILE    - The CSV file. The first column is DATE.
+        domain  - The domain the file is for (the domain isn't in the file).
+        product - The product the file is for, i.e. 'contingency'
+        radius  - The FSS radius the file is for.
+    """
+    with open(FILE, "r") as f:
+        header = f.readline().strip().split(",")
+        lines = [l.strip().split(",") for l in f if l.strip() != ""]
+
+    columns = []
+    for name in header[1:]:
+        match = re.match(r"F(\d\d)_(.+)", name)
+        if match:
+            columns.append((match.group(2), int(match.group(1))))
+        else:
+            columns.append((product_metric(product, name), NO_FXX))
+
+    rows = []
+    for line in lines:
+        DATE = _parse_date(line[0])
+        for (metric, fxx), value in zip(columns, line[1:]):
+            rows.append((metric, domain, radius, DATE, fxx, float(value)))
+
+    return upsert_rows(rows, DB=DB)
+
+
+def import_csv_directory(SAVEDIR, DB=SCORE_DB, verbose=True):
+    """
+    Import all the old CSV score files in a directory (and sub directories).
+    The domain is taken from the file name, i.e. 'Utah_2018_m05_h03.csv' or
+    'GLM_in_HRRR_Utah_2018_m05_h03.csv', the product from the CSV_PRODUCTS
+    directory the file is in, and the radius from a directory named like
+    'HRRR_GLM_Fractions_Skill_Score_r05'.
+    """
+    count = 0
+    for root, dirs, files in os.walk(SAVEDIR):
+        product = None
+        for DIR in os.path.abspath(root).split(os.sep):
+            for prefix in CSV_PRODUCTS:
+                if DIR.startswith(prefix):
+                    product = CSV_PRODUCTS[prefix]
+        for name in sorted(files):
+            match = re.match(r"(?:GLM_in_HRRR_)?(.+)_\d{4}_m\d\d_h\d\d\.csv$", name)
+            if not match:
+                continue
+            FILE = os.path.join(root, name)
+            if product is None:
+                raise ValueError(
+                    "%s isn't in one of the CSV_PRODUCTS directories" % FILE
+                )
+            radius = re.search(r"_r(\d+)(/|$)", os.path.abspath(root) + "/")
+            radius = 0 if radius is None else int(radius.group(1))
+            n = import_csv(FILE, match.group(1), product, radius=radius, DB=DB)
+            count += n
+            if verbose:
+                print("Imported %s scores from %s" % (n, FILE))
+    return count
+
+
+if __name__ == "__main__":
+
+    import sys
+    from glob import glob
+
+    # Import the CSV files from the working directory into the store
+    DIRS = ["./HRRR_GLM_hit_rate_data/", "./HRRR_GLM_contingency_table/"]
+    DIRS += sorted(glob("./HRRR_GLM_Fractions_Skill_Score_r*/"))
+    for SAVEDIR in sys.argv[1:] or DIRS:
+        print(SAVEDIR, import_csv_directory(SAVEDIR))
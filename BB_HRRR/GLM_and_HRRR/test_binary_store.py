@@ -0,0 +1,124 @@
+"""
+Test the monthly HRRR/GLM binary store in a temporary directory.
+
+    python -m unittest BB_HRRR.GLM_and_HRRR.test_binary_store
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+import multiprocessing
+import numpy as np
+from datetime import datetime
+
+import sys
+
+sys.path.append("/uufs/chpc.utah.edu/common/home/u0553130/pyBKB_v3")
+from BB_HRRR.GLM_and_HRRR import binary_store as bs
+
+
+def make_stats(DATE, seed=0, shape=(20, 37), fxx=3):
+    """A dictionary like get_GLM_HRRR_contingency_stats() returns."""
+    rng = np.random.default_rng(seed)
+    return {
+        "DATETIME": DATE,
+        "Observed Binary": rng.random(shape) > 0.7,
+        "Forecast Binary": rng.random((fxx,) + shape) > 0.5,
+        "table": {
+            "HRRR": tuple(rng.integers(0, 1000, fxx) for _ in range(4)),
+            "Utah": tuple(rng.integers(0, 100, fxx) for _ in range(4)),
+        },
+        "Number Events": {"HRRR": 1234, "Utah": 56},
+        "Number GLM Files": 178,
+        "Number Expected Files": 180,
+    }
+
+
+def _save_hour(args):
+    DATE, SAVEDIR = args
+    bs.save_binary_fields(
+        make_stats(DATE, seed=DATE.hour), SAVEDIR=SAVEDIR, verbose=False
+    )
+
+
+class TestBinaryStore(unittest.TestCase):
+    def setUp(self):
+        self.SAVEDIR = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.SAVEDIR)
+
+    def assertSameStats(self, stats, loaded, fields=True):
+        self.assertEqual(loaded["DATETIME"], stats["DATETIME"])
+        for key in ["Number Events", "Number GLM Files", "Number Expected Files"]:
+            self.assertEqual(loaded[key], stats[key])
+        self.assertEqual(list(loaded["table"]), list(stats["table"]))
+        for d in stats["table"]:
+            np.testing.assert_array_equal(
+                np.array(loaded["table"][d]), np.array(stats["table"][d])
+            )
+        if fields:
+            for key in ["Observed Binary", "Forecast Binary"]:
+                self.assertEqual(loaded[key].dtype, bool)
+                np.testing.assert_array_equal(loaded[key], stats[key])
+        else:
+            self.assertNotIn("Observed Binary", loaded)
+
+    def test_round_trip(self):
+        DATES = [datetime(2018, 5, 1, h) for h in [3, 0, 17]]
+        saved = {D: make_stats(D, seed=D.hour) for D in DATES}
+        for D in DATES:
+            bs.save_binary_fields(saved[D], SAVEDIR=self.SAVEDIR, verbose=False)
+
+        # One file for the month
+        self.assertEqual(
+            [f for f in os.listdir(self.SAVEDIR) if f.endswith(".zip")],
+            ["HRRR-GLM-Binary_2018-05.zip"],
+        )
+        self.assertEqual(bs.stored_dates(DATES[0], SAVEDIR=self.SAVEDIR), sorted(DATES))
+        for D in DATES:
+            self.assertTrue(bs.has_binary_fields(D, SAVEDIR=self.SAVEDIR))
+            loaded = bs.load_binary_fields(D, SAVEDIR=self.SAVEDIR)
+            self.assertSameStats(saved[D], loaded)
+            loaded = bs.load_binary_fields(D, SAVEDIR=self.SAVEDIR, fields=False)
+            self.assertSameStats(saved[D], loaded, fields=False)
+
+    def test_save_existing_hour(self):
+        DATE = datetime(2018, 5, 1, 0)
+        bs.save_binary_fields(
+            make_stats(DATE, seed=1), SAVEDIR=self.SAVEDIR, verbose=False
+        )
+        bs.save_binary_fields(
+            make_stats(DATE, seed=2), SAVEDIR=self.SAVEDIR, verbose=False
+        )
+        loaded = bs.load_binary_fields(DATE, SAVEDIR=self.SAVEDIR)
+        self.assertSameStats(make_stats(DATE, seed=1), loaded)
+
+    def test_missing_hour(self):
+        DATE = datetime(2018, 5, 1, 0)
+        # No store for the month
+        self.assertIsNone(bs.load_binary_fields(DATE, SAVEDIR=self.SAVEDIR))
+        self.assertFalse(bs.has_binary_fields(DATE, SAVEDIR=self.SAVEDIR))
+        self.assertEqual(bs.stored_dates(DATE, SAVEDIR=self.SAVEDIR), [])
+
+        # The month is stored, but not this hour
+        bs.save_binary_fields(make_stats(DATE), SAVEDIR=self.SAVEDIR, verbose=False)
+        other = datetime(2018, 5, 1, 1)
+        self.assertIsNone(bs.load_binary_fields(other, SAVEDIR=self.SAVEDIR))
+        self.assertFalse(bs.has_binary_fields(other, SAVEDIR=self.SAVEDIR))
+
+    def test_parallel_writers(self):
+        DATES = [datetime(2018, 6, 2, h) for h in range(12)]
+        with multiprocessing.Pool(4) as P:
+            P.map(_save_hour, [(D, self.SAVEDIR) for D in DATES])
+        self.assertEqual(bs.stored_dates(DATES[0], SAVEDIR=self.SAVEDIR), DATES)
+        for D in DATES:
+            loaded = bs.load_binary_fields(D, SAVEDIR=self.SAVEDIR)
+            self.assertSameStats(make_stats(D, seed=D.hour), loaded)
+        # No temporary files are left
+        self.assertFalse([f for f in os.listdir(self.SAVEDIR) if f.endswith(".tmp")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,163 @@
+"""
+Test the HRRR/GLM score store in a temporary directory.
+
+    python -m unittest BB_HRRR.GLM_and_HRRR.test_score_store
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from datetime import datetime, timedelta
+
+import sys
+
+sys.path.append("/uufs/chpc.utah.edu/common/home/u0553130/pyBKB_v3")
+from BB_HRRR.GLM_and_HRRR import score_store as ss
+
+
+class TestScoreStore(unittest.TestCase):
+    def setUp(self):
+        self.DIR = tempfile.mkdtemp()
+        self.DB = os.path.join(self.DIR, "scores.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.DIR)
+
+    def test_default_path(self):
+        self.assertTrue(os.path.isabs(ss.SCORE_DB))
+
+    def test_upsert(self):
+        DATE = datetime(2018, 5, 1, 3)
+        ss.upsert_scores(
+            "FSS", "Utah", DATE, [0.1, 0.2, np.nan], fxx=[1, 2, 3], DB=self.DB
+        )
+        # Writing again replaces the values instead of adding rows
+        ss.upsert_scores(
+            "FSS", "Utah", DATE, [0.5, 0.2, 0.3], fxx=[1, 2, 3], DB=self.DB
+        )
+        ss.upsert_scores(
+            ss.product_metric("contingency", "NUM FILES"), "Utah", DATE, 178, DB=self.DB
+        )
+
+        S = ss.read_scores("FSS", "Utah", DB=self.DB)
+        self.assertEqual(list(S["DATETIME"]), [DATE])
+        self.assertEqual(list(S["fxx"]), [1, 2, 3])
+        np.testing.assert_allclose(S["value"], [[0.5, 0.2, 0.3]])
+
+        S = ss.read_scores("contingency/NUM FILES", "Utah", DB=self.DB)
+        self.assertEqual(list(S["fxx"]), [ss.NO_FXX])
+        np.testing.assert_allclose(S["value"], [[178]])
+
+        con = ss.connect(self.DB)
+        (count,) = con.execute("SELECT COUNT(*) FROM scores").fetchone()
+        con.close()
+        self.assertEqual(count, 4)
+
+    def test_read_scores(self):
+        DATES = [datetime(2018, 5, 1) + timedelta(days=d) for d in range(4)]
+        # Dates written out of order, and fxx=2 missing on the last date
+        for D in DATES[::-1]:
+            fxx = [1, 2] if D != DATES[-1] else [1]
+            ss.upsert_scores("FSS", "West", D, D.day, fxx=fxx, radius=5, DB=self.DB)
+        ss.upsert_scores("FSS", "West", DATES[0], 99, fxx=[1], radius=10, DB=self.DB)
+
+        S = ss.read_scores("FSS", "West", radius=5, DB=self.DB)
+        self.assertEqual(list(S["DATETIME"]), DATES)
+        self.assertEqual(S["value"].shape, (4, 2))
+        np.testing.assert_allclose(S["value"][:, 0], [1, 2, 3, 4])
+        self.assertTrue(np.isnan(S["value"][-1, 1]))
+
+        S = ss.read_scores(
+            "FSS", "West", radius=5, sDATE=DATES[1], eDATE=DATES[3], DB=self.DB
+        )
+        self.assertEqual(list(S["DATETIME"]), DATES[1:3])
+
+        S = ss.read_scores("FSS", "East", radius=5, DB=self.DB)
+        self.assertEqual(S["value"].shape, (0, 0))
+
+    def test_missing_dates(self):
+        DATES = [datetime(2018, 5, 1, 12) + timedelta(days=d) for d in range(10)]
+        for D in DATES[::3]:
+            ss.upsert_scores("FSS", "Utah", D, [0.1], fxx=[1], radius=5, DB=self.DB)
+
+        missing = ss.missing_dates("FSS", "Utah", DATES, radius=5, DB=self.DB)
+        self.assertEqual(missing, [D for i, D in enumerate(DATES) if i % 3 != 0])
+        # Other radii, domains, and metrics are separate
+        self.assertEqual(
+            ss.missing_dates("FSS", "Utah", DATES, radius=10, DB=self.DB), DATES
+        )
+        self.assertEqual(
+            ss.missing_dates("FSS", "West", DATES, radius=5, DB=self.DB), DATES
+        )
+        self.assertEqual(
+            ss.missing_dates("A", "Utah", DATES, radius=5, DB=self.DB), DATES
+        )
+        self.assertEqual(ss.missing_dates("FSS", "Utah", [], DB=self.DB), [])
+
+    def write_csv(self, DIR, name, lines):
+        os.makedirs(DIR, exist_ok=True)
+        with open(os.path.join(DIR, name), "w") as f:
+            f.write("\n".join(lines) + "\n")
+
+    def test_import_csv_directory(self):
+        # Hit rate file with the '%Y-%m-%d %H:%M:%S' dates
+        self.write_csv(
+            os.path.join(self.DIR, "HRRR_GLM_hit_rate_data"),
+            "GLM_in_HRRR_Utah_2018_m05_h03.csv",
+            [
+                "DATE,GLM FLASH COUNT,NUM FILES,EXPECTED FILES,F01_Hit Rate",
+                "2018-05-01 03:00:00,12,180,180,0.5",
+                "2018-05-02 03:00:00,nan,0,180,nan",
+            ],
+        )
+        # Contingency file with the '%m/%d/%Y %H:%M' dates
+        self.write_csv(
+            os.path.join(self.DIR, "HRRR_GLM_contingency_table", "Utah"),
+            "Utah_2018_m05_h03.csv",
+            [
+                "DATE,GLM Event COUNT,NUM FILES,EXPECTED FILES,F01_A,F02_A",
+                "05/01/2018 03:00,40,178,180,1,2",
+            ],
+        )
+        # FSS file with a radius
+        self.write_csv(
+            os.path.join(self.DIR, "HRRR_GLM_Fractions_Skill_Score_r05", "Utah"),
+            "Utah_2018_m05_h03.csv",
+            ["DATE,F01_FSS,F02_FSS", "2018-05-01 03:00:00,0.25,0.75"],
+        )
+
+        count = ss.import_csv_directory(self.DIR, DB=self.DB, verbose=False)
+        self.assertEqual(count, 2 * 4 + 5 + 2)
+
+        DATE = datetime(2018, 5, 1, 3)
+        S = ss.read_scores("hit rate/NUM FILES", "Utah", DB=self.DB)
+        self.assertEqual(list(S["DATETIME"]), [DATE, DATE + timedelta(days=1)])
+        np.testing.assert_allclose(S["value"][:, 0], [180, 0])
+
+        # NUM FILES from each product is kept
+        S = ss.read_scores("contingency/NUM FILES", "Utah", DB=self.DB)
+        self.assertEqual(list(S["DATETIME"]), [DATE])
+        np.testing.assert_allclose(S["value"], [[178]])
+
+        S = ss.read_scores("hit rate/GLM FLASH COUNT", "Utah", DB=self.DB)
+        self.assertTrue(np.isnan(S["value"][1, 0]))
+
+        S = ss.read_scores("A", "Utah", DB=self.DB)
+        self.assertEqual(list(S["fxx"]), [1, 2])
+        np.testing.assert_allclose(S["value"], [[1, 2]])
+
+        S = ss.read_scores("FSS", "Utah", radius=5, DB=self.DB)
+        np.testing.assert_allclose(S["value"], [[0.25, 0.75]])
+
+        # Importing again doesn't add rows
+        ss.import_csv_directory(self.DIR, DB=self.DB, verbose=False)
+        con = ss.connect(self.DB)
+        (rows,) = con.execute("SELECT COUNT(*) FROM scores").fetchone()
+        con.close()
+        self.assertEqual(rows, count)
+
+
+if __name__ == "__main__":
+    unittest.main()
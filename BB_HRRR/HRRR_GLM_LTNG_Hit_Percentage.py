@@ -5,6 +5,9 @@
 Count the number of GLM flashes inside a HRRR forecasted area of lightning
 threat.
 
+NOTE: HRRR_GLM_LTNG_Hit_Percentage_grid computes the same statistics on the
+      HRRR grid without contours and is much faster.
+
 1) Get HRRR forecasts for a valid time.
 2) Use matplotlib.pyplot.contour to draw patches of lightning threat
    greater than 0.
@@ -25,7 +28,7 @@ sys.path.append("/uufs/chpc.utah.edu/common/home/u0553130/pyBKB_v3/")
 from BB_HRRR.HRRR_Pando import get_hrrr_latlon, get_hrrr_all_valid, get_hrrr_variable
 from BB_maps.my_basemap import draw_HRRR_map, draw_CONUS_cyl_map
 from BB_GOES.get_GLM import get_GLM_file_nearesttime, accumulate_GLM_FAST
-from geojson_area.area import area as geojson_area
+from geojson_area.area.vectorized import pack_rings, rings_area
 
 import matplotlib as mpl
 
@@ -153,25 +156,23 @@ def points_inside_contours_MP(inputs):
             "area with flash": 0,
         }
         #
+        # Compute the area of every contour at once. Units: square kilometers
+        contour_paths = CONTOUR.collections[level].get_paths()
+        offsets, coords = pack_rings([V.vertices for V in contour_paths])
+        contour_areas = np.abs(rings_area(offsets, coords)) / 1e6
+        #
         if num_flashes == 0:
             # If there are no GLM flashes inside the Path domain, then return
             # None to indicate that there were no flashes. We use this later to
             # indicate a hit-rate of np.nan.
             fxx_stats[i]["flash inside"] = None
             # Return the total contoured LTNG area.
-            for j, V in enumerate(CONTOUR.collections[level].get_paths()):
-                obj = {
-                    "type": "Polygon",
-                    "coordinates": [[tuple(i) for i in V.vertices]],
-                }
-                json_area = geojson_area(obj) / 1e6  # Units: square kilometers
-                # Add area to area_total and area_w_flash
-                fxx_stats[i]["area total"] += json_area
+            fxx_stats[i]["area total"] = np.sum(contour_areas)
         #
         else:
-            # Combine the GLM lat/lon points into a tuple pair
-            latlon_pair = list(
-                zip(GLM_HRRR_dict[i]["longitude"], GLM_HRRR_dict[i]["latitude"])
+            # Combine the GLM lat/lon points into an (N, 2) array
+            latlon_pair = np.column_stack(
+                [GLM_HRRR_dict[i]["longitude"], GLM_HRRR_dict[i]["latitude"]]
             )
             #
             # Each collection may have many paths--a path for each contour area.
@@ -181,8 +182,8 @@ def points_inside_contours_MP(inputs):
             # contour to 'area with flash'.
 
             # Number of individual contours. V is the contour.
-            num = len(CONTOUR.collections[level].get_paths())
-            for j, V in enumerate(CONTOUR.collections[level].get_paths()):
+            num = len(contour_paths)
+            for j, V in enumerate(contour_paths):
                 # 1) Determine which flashes are inside each contour
                 is_inside = V.contains_points(latlon_pair)
                 fxx_stats[i]["flash inside"] += is_inside
@@ -190,12 +191,8 @@ def points_inside_contours_MP(inputs):
                 # 2) Was there any flash in this contoured area?
                 any_flash = np.sum(is_inside) > 0
                 #
-                # 3) Compute area of the contour
-                obj = {
-                    "type": "Polygon",
-                    "coordinates": [[tuple(i) for i in V.vertices]],
-                }
-                json_area = geojson_area(obj) / 1e6  # Units: square kilometers
+                # 3) Area of the contour
+                json_area = contour_areas[j]
                 #
                 # Add the contour area to 'area total'
                 fxx_stats[i]["area total"] += json_area
@@ -526,6 +523,10 @@ if __name__ == "__main__":
     # =========================================================================
 
     if True:
+        from BB_HRRR.HRRR_GLM_LTNG_Hit_Percentage_grid import (
+            get_HRRR_LTNG_hit_rate_grid,
+        )
+
         # months = [5, 6, 7, 8, 9, 10]
 
         year = 2019
@@ -619,8 +620,9 @@ if __name__ == "__main__":
                             with open(SAVEFILE, "w") as f:
                                 f.write("%s\n" % HEADER)
 
-                    # Get Hit Rate Data for each domain Path
-                    a, (files, expected) = get_HRRR_LTNG_hit_rate(DATE)
+                    # Get Hit Rate Data for each domain. The grid version
+                    # gives the same statistics without drawing contours.
+                    a, (files, expected) = get_HRRR_LTNG_hit_rate_grid(DATE)
 
                     for d in PATHS.keys():
                         # Write the following
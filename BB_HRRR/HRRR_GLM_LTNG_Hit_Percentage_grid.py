@@ -0,0 +1,255 @@
+## Brian Blaylock
+## October 19, 2026
+
+"""
+Count the number of GLM flashes inside a HRRR forecasted area of lightning
+threat, computed on the HRRR grid.
+
+Same statistics as HRRR_GLM_LTNG_Hit_Percentage, but without matplotlib
+contours, Path.contains_points, or polygon areas:
+
+1) Get HRRR forecasts for a valid time.
+2) Label the connected areas of lightning threat greater than 0 in each
+   domain with scipy.ndimage.label. Each labeled area is one "contour".
+3) Get GLM flashes for the hour previous to the valid time and find the HRRR
+   grid cell of each flash with the HRRR grid index.
+4) A flash is inside a forecast if its grid cell has a label (one gather).
+   The area of each labeled area is the sum of the grid-cell areas, and the
+   area with a flash is the sum for the labels that have a flash.
+
+The domains come from the HRRR domain label store (BB_HRRR.HRRR_domain_labels)
+so there are no path tests. The West, Central, East, and Utah vertices are the
+same as the PATH_points in HRRR_GLM_LTNG_Hit_Percentage.
+"""
+
+import numpy as np
+import scipy.ndimage as ndimage
+from datetime import datetime, timedelta
+
+import sys
+
+sys.path.append("/uufs/chpc.utah.edu/common/home/u0553130/pyBKB_v3/")
+from BB_HRRR.HRRR_Pando import get_hrrr_latlon, get_hrrr_all_valid
+from BB_HRRR.HRRR_domain_labels import load_domain_labels, get_domain_masks
+from BB_HRRR.HRRR_grid_index import (
+    HRRR_grid_affine,
+    latlon_to_HRRR_index,
+    HRRR_cell_area,
+)
+from BB_maps.my_basemap import draw_HRRR_map
+from BB_GOES.get_GLM import get_GLM_file_nearesttime, accumulate_GLM_FAST
+
+# Domains used by HRRR_GLM_LTNG_Hit_Percentage
+DOMAINS = ["HRRR", "West", "Central", "East", "Utah"]
+
+# The domain vertices of HRRR_GLM_LTNG_Hit_Percentage (the HRRR domain is the
+# model domain boundary from get_domains()).
+# West, Central, East: A 16 degree wide and 26 degree tall boundary region.
+PATH_points = {
+    "West": {
+        "lon": [-120, -104, -104, -120, -120],
+        "lat": [24.4, 24.4, 50.2, 50.2, 24.2],
+    },
+    "Central": {
+        "lon": [-104, -88, -88, -104, -104],
+        "lat": [24.4, 24.4, 50.2, 50.2, 24.2],
+    },
+    "East": {"lon": [-88, -72, -72, -88, -88], "lat": [24.4, 24.4, 50.2, 50.2, 24.2]},
+    "Utah": {
+        "lon": [
+            -114.041664,
+            -111.047526,
+            -111.045645,
+            -109.051460,
+            -109.048632,
+            -114.051534,
+            -114.041664,
+        ],
+        "lat": [
+            41.993580,
+            42.002846,
+            40.998538,
+            40.998403,
+            36.998310,
+            37.000574,
+            41.993580,
+        ],
+    },
+}
+
+
+def prepare_domains(store, domains=DOMAINS):
+    """
+    The bounding box slice, the in-domain boolean (inside the bounding box),
+    and the label bit for each domain. Only needs to be done once.
+
+    Input:
+        store   - The dictionary returned by load_domain_labels()
+        domains - List of domain names
+    """
+    masks = get_domain_masks(store, domains=domains)
+    prepared = {}
+    for DOMAIN in domains:
+        in_domain = np.invert(masks[DOMAIN]["mask"])
+        rows = np.flatnonzero(in_domain.any(axis=1))
+        cols = np.flatnonzero(in_domain.any(axis=0))
+        box = (slice(rows[0], rows[-1] + 1), slice(cols[0], cols[-1] + 1))
+        prepared[DOMAIN] = {
+            "box": box,
+            "in domain": np.array(in_domain[box]),
+            "bit": store["labels"].dtype.type(1 << store["domains"][DOMAIN]["bit"]),
+        }
+    return prepared
+
+
+def hit_rate_on_grid(HH, flash_i, flash_j, labels, cell_area, prepared, contour=0):
+    """
+    HRRR lightning hit rate and false alarm area for each domain and each
+    forecast lead time.
+
+    Input:
+        HH        - Forecast grids for each lead time (fxx, y, x)
+        flash_i   - HRRR grid row of each GLM flash
+        flash_j   - HRRR grid column of each GLM flash
+        labels    - Domain label raster from load_domain_labels()['labels']
+        cell_area - Area of each HRRR grid cell in km^2
+        prepared  - Dictionary returned by prepare_domains()
+        contour   - Forecast areas are where the forecast is greater than this
+                    value. Default is 0.
+
+    Return:
+        Dictionary for each domain with the following for each fxx:
+            Flash Inside   - T/F flash inside HRRR forecast area (None if
+                             there are no flashes in the domain).
+            Hit Rate       - Percentage of GLM flashes inside HRRR forecast area
+            False Alarm    - Percentage of HRRR forecast area without a GLM flash
+            Total Area km2 - Total HRRR forecast area
+        and 'In Domain', a boolean of which flashes are in the domain.
+    """
+    flash_labels = np.asarray(labels)[flash_i, flash_j]
+
+    return_this = {}
+    for DOMAIN, dom in prepared.items():
+        rows, cols = dom["box"]
+        in_domain = (flash_labels & dom["bit"]) != 0
+        fi = flash_i[in_domain] - rows.start
+        fj = flash_j[in_domain] - cols.start
+        box_area = np.asarray(cell_area[dom["box"]]).ravel()
+
+        stats = {
+            "Flash Inside": [],
+            "Hit Rate": [],
+            "False Alarm": [],
+            "Total Area km2": [],
+        }
+        for H in HH:
+            forecast = np.logical_and(
+                np.asarray(H)[dom["box"]] > contour, dom["in domain"]
+            )
+
+            # Each connected forecast area gets a label (0 is no forecast)
+            areas, num = ndimage.label(forecast)
+            label_area = np.bincount(areas.ravel(), weights=box_area, minlength=num + 1)
+            area_total = np.sum(label_area[1:])
+
+            if len(fi) == 0:
+                flash_inside = None
+                hit_rate = np.nan
+                area_w_flash = 0
+            else:
+                flash_area_label = areas[fi, fj]
+                flash_inside = flash_area_label > 0
+                hit_rate = np.sum(flash_inside) / len(flash_inside)
+                area_w_flash = np.sum(
+                    label_area[np.unique(flash_area_label[flash_inside])]
+                )
+
+            if area_total != 0:
+                false_alarm = (area_total - area_w_flash) / area_total
+            else:
+                # If area_total == 0, then the area of the LTNG forecast area
+                # is zero, and there were no false alarms.
+                false_alarm = 0
+
+            stats["Flash Inside"].append(flash_inside)
+            stats["Hit Rate"].append(hit_rate)
+            stats["False Alarm"].append(false_alarm)
+            stats["Total Area km2"].append(area_total)
+
+        return_this[DOMAIN] = {"In Domain": in_domain, "HRRR LTNG": stats}
+
+    return return_this
+
+
+## Load the HRRR grid, map, domain labels, and grid-cell areas once.
+m = draw_HRRR_map(resolution="c")
+Hlat, Hlon = get_hrrr_latlon(DICT=False)
+affine = HRRR_grid_affine(m, Hlat, Hlon)
+cell_area = HRRR_cell_area(Hlat)
+domain_labels = load_domain_labels(HRRR_specific=True, custom_domains=PATH_points)
+prepared_domains = prepare_domains(domain_labels)
+
+
+def get_HRRR_LTNG_hit_rate_grid(DATE, fxx=range(19), contour=0):
+    """
+    Return the HRRR's hit rate for lightning forecasts from the GLM flash data.
+    Same input and output as HRRR_GLM_LTNG_Hit_Percentage.get_HRRR_LTNG_hit_rate.
+
+    Input:
+        DATE    - The valid time requested
+        fxx     - A list of the forecast hour lead times. Default is f00-f18.
+        contour - Forecast areas are where LTNG is greater than this value.
+                  Default is 0.
+
+    Return:
+        paths_glm - a dictionary of GLM flashes and if it is inside the
+                    HRRR forecast for each domain
+        files     - A tuple: (number of GLM files, number of expected GLM files)
+    """
+    ## Get GLM data for the hour before the DATE.
+    timer = datetime.now()
+    files = get_GLM_file_nearesttime(
+        DATE - timedelta(minutes=30), window=30, verbose=True
+    )
+    glm = accumulate_GLM_FAST(files)
+    print("\n GLM Download Timer:", datetime.now() - timer)
+
+    if glm is None or len(glm["latitude"]) == 0:
+        print("!!! Warning !!! DATE %s had no lightning data" % DATE)
+        return None, (files["Number"], files["Number Expected"])
+
+    ## Get HRRR data. Use the unmasked data for the LTNG masked arrays.
+    timer = datetime.now()
+    HH = np.ma.getdata(get_hrrr_all_valid(DATE, "LTNG:entire", fxx=fxx))
+    print("\n HRRR Download Timer:", datetime.now() - timer)
+
+    ## Map the GLM flashes to the HRRR grid and compute the statistics.
+    timer = datetime.now()
+    flash_i, flash_j, in_HRRR = latlon_to_HRRR_index(
+        glm["latitude"], glm["longitude"], m, affine
+    )
+    stats = hit_rate_on_grid(
+        HH,
+        flash_i,
+        flash_j,
+        domain_labels["labels"],
+        cell_area,
+        prepared_domains,
+        contour=contour,
+    )
+    print("\n!!! Timer: HRRR/GLM statistics on grid:", datetime.now() - timer)
+
+    ## Package like get_HRRR_LTNG_hit_rate
+    HRRR_GLM_info = {}
+    for DOMAIN in stats:
+        keep = np.flatnonzero(in_HRRR)[stats[DOMAIN]["In Domain"]]
+        HRRR_GLM_info[DOMAIN] = {
+            "latitude": glm["latitude"][keep],
+            "longitude": glm["longitude"][keep],
+            "energy": glm["energy"][keep],
+            "area": glm["area"][keep],
+            "HRRR LTNG": stats[DOMAIN]["HRRR LTNG"],
+        }
+        print("    %s\t:\t%s" % (DOMAIN, "{:,}".format(len(keep))))
+
+    return HRRR_GLM_info, (files["Number"], files["Number Expected"])
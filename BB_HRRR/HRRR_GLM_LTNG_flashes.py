@@ -26,6 +26,13 @@ from BB_HRRR.HRRR_Pando import get_hrrr_latlon, get_hrrr_all_valid, get_hrrr_var
 from BB_maps.my_basemap import draw_HRRR_map, draw_CONUS_cyl_map
 from BB_GOES.get_GLM import get_GLM_file_nearesttime, accumulate_GLM_FAST
 from geojson_area.area import area as geojson_area
+from BB_HRRR.GLM_and_HRRR.score_store import (
+    SCORE_DB,
+    NO_FXX,
+    upsert_rows,
+    missing_dates,
+    product_metric,
+)
 
 import matplotlib as mpl
 
@@ -112,7 +119,7 @@ print("                    ...Done")
 # =============================================================================
 
 
-def get_HRRR_LTNG_hit_rate(DATE, fxx=range(19), contour=0):
+def get_HRRR_LTNG_hit_rate(DATE, fxx=range(19), contour=0, files=None):
     """
     Return the HRRR's hit rate for lightning forecasts from the GLM flash data.
 
@@ -121,6 +128,8 @@ def get_HRRR_LTNG_hit_rate(DATE, fxx=range(19), contour=0):
         fxx     - A list of the forecast hour lead times. Default is f00-f18.
         contour - The plt.contour level interval. Default is 0 indicating
                   that we are looking for where LTNG > 0.
+        files   - The GLM files for the hour before DATE returned by
+                  get_GLM_file_nearesttime(). Default gets them.
 
     Return:
         paths_glm - a dictionary of GLM flashes and if it is inside the
@@ -136,9 +145,10 @@ def get_HRRR_LTNG_hit_rate(DATE, fxx=range(19), contour=0):
     # minutes, i.e. all GLM files for the hour before the DATE.
     # If there isn't any GLM files for the hour period, then return nans.
     timer = datetime.now()
-    files = get_GLM_file_nearesttime(
-        DATE - timedelta(minutes=30), window=30, verbose=True
-    )
+    if files is None:
+        files = get_GLM_file_nearesttime(
+            DATE - timedelta(minutes=30), window=30, verbose=True
+        )
     glm = accumulate_GLM_FAST(files)
     print("\n GLM Download Timer:", datetime.now() - timer)
     #
@@ -276,42 +286,30 @@ def get_HRRR_LTNG_hit_rate(DATE, fxx=range(19), contour=0):
     return filtered_glm, (files["Number"], files["Number Expected"])
 
 
-def write_table_to_file(
-    a, files, expected, DATE, write_domains, SAVEDIR, DATE_fmt="%Y-%m-%d %H:%M:%S"
-):
-    """ """
+def write_table_to_file(a, files, expected, DATE, write_domains, DB=SCORE_DB):
+    """
+    Write the number of GLM flashes in each domain to the score store
+    (see BB_HRRR.GLM_and_HRRR.score_store). Writing a date that is already in
+    the store replaces it.
+    """
+    rows = []
     for DOMAIN in ["HRRR", "West", "Central", "East", "Utah"]:
         if DOMAIN in write_domains:
-            #
-            SAVEFILE = SAVEDIR + "GLM_in_HRRR_%s_%s.csv" % (
-                DOMAIN,
-                DATE.strftime("%Y_m%m_h%H"),
-            )
-            #
-            # Initiate new file with header if the day of the month is 1.
-            if DATE.day == 1:
-                HEADER = "DATE,GLM FLASH COUNT,NUM FILES,EXPECTED FILES"
-                with open(SAVEFILE, "w") as f:
-                    f.write("%s\n" % HEADER)
-            #
             if a is None:
-                line = "%s,%s,%s,%s" % (
-                    DATE,
-                    np.nan,  # because there are no flashes
-                    files,  # should be zero
-                    expected,  # 180
-                )
+                count = np.nan  # because there are no flashes
             else:
-                line = "%s,%s,%s,%s" % (
-                    DATE,
-                    len(a[DOMAIN]["latitude"]),
-                    files,
-                    expected,
-                )
-            print(line)
-            with open(SAVEFILE, "a") as f:
-                f.write("%s\n" % line)
-            print("Wrote to", SAVEFILE)
+                count = len(a[DOMAIN]["latitude"])
+            rows += [
+                (product_metric("hit rate", name), DOMAIN, 0, DATE, NO_FXX, value)
+                for name, value in [
+                    ("GLM FLASH COUNT", count),
+                    ("NUM FILES", files),  # zero if a is None
+                    ("EXPECTED FILES", expected),  # 180
+                ]
+            ]
+            print("%s,%s,%s,%s,%s" % (DOMAIN, DATE, count, files, expected))
+    upsert_rows(rows, DB=DB)
+    print("Wrote to", DB)
 
 
 def write_to_file(inputs):
@@ -345,55 +343,13 @@ def write_to_file(inputs):
     print("=========================================================")
 
     #
-    ### Check if the file we are working on exists
+    ### Which dates are missing from the score store for each domain?
     #
-    SAVEDIR = "./HRRR_GLM_hit_rate_data/"
     DOMAINS = ["Utah", "HRRR", "West", "Central", "East"]
-    FILES = [
-        "%s/GLM_in_HRRR_%s_%s.csv" % (SAVEDIR, D, sDATE.strftime("%Y_m%m_h%H"))
-        for D in DOMAINS
-    ]
-    EXISTS = [os.path.exists(i) for i in FILES]
-
-    Next_DATE = []
-    for (F, E) in zip(FILES, EXISTS):
-        if E:
-            list_DATES = np.genfromtxt(
-                F, delimiter=",", names=True, encoding="UTF-8", dtype=None
-            )["DATE"]
-            if np.shape(list_DATES) == ():
-                # I suppose there is only one date in the list
-                last = str(list_DATES)
-            else:
-                # Else, get the last date in the list
-                last = list_DATES[-1]
-            try:
-                Next_DATE.append(
-                    datetime.strptime(last, "%Y-%m-%d %H:%M:%S") + timedelta(days=1)
-                )
-                DATE_fmt = "%Y-%m-%d %H:%M:%S"
-            except:
-                Next_DATE.append(
-                    datetime.strptime(last, "%m/%d/%Y %H:%M") + timedelta(days=1)
-                )
-                DATE_fmt = "%m/%d/%Y %H:%M"
-        #
-        else:
-            Next_DATE.append(sDATE)
-            DATE_fmt = "%Y-%m-%d %H:%M:%S"
-
-    # Does the last date equal to the last day of the month of interest?
-    have_all_dates = np.array(Next_DATE) == eDATE
-
-    DOM_DATES = []
-    for i in Next_DATE:
-        next_sDATE = i
-        days = int((eDATE - next_sDATE).days)
-        DATES = [next_sDATE + timedelta(days=d) for d in range(days)]
-        DOM_DATES.append(DATES)
-
     days = int((eDATE - sDATE).days)
     DATES = [sDATE + timedelta(days=d) for d in range(days)]
+    metric = product_metric("hit rate", "GLM FLASH COUNT")
+    DOM_DATES = [missing_dates(metric, D, DATES) for D in DOMAINS]
 
     for DATE in DATES:
         print(DATE)
@@ -407,15 +363,7 @@ def write_to_file(inputs):
             print(write_domains)
             # Get GLM Flashes for each path and save to file
             a, (files, expected) = get_HRRR_LTNG_hit_rate(DATE)
-            write_table_to_file(
-                a,
-                files,
-                expected,
-                DATE,
-                write_domains,
-                SAVEDIR,
-                DATE_fmt="%Y-%m-%d %H:%M:%S",
-            )
+            write_table_to_file(a, files, expected, DATE, write_domains)
 
     return "Finished %s" % len(DATES)
 
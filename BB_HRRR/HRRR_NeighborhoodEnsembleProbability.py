@@ -15,7 +15,6 @@ Schwartz, C.S. and R.A. Sobash, 2017: Generating Probabilistic Forecasts from
 
 import numpy as np
 from datetime import datetime, timedelta
-import scipy.ndimage as ndimage
 import matplotlib.pyplot as plt
 import multiprocessing
 
@@ -26,6 +25,7 @@ sys.path.append("B:\\pyBKB_v2")
 from BB_HRRR.HRRR_Pando import get_hrrr_variable, get_hrrr_latlon
 from BB_maps.my_basemap import draw_HRRR_map, draw_centermap
 from BB_cmap.NCAR_ensemble_cmap import cm_prob
+from BB_wx_calcs.footprint_filters import radial_footprint, footprint_mean
 
 import matplotlib as mpl
 
@@ -40,17 +40,6 @@ mpl.rcParams["axes.titlesize"] = 12
 mpl.rcParams["figure.subplot.hspace"] = 0.01
 
 
-def radial_footprint(radius):
-    y, x = np.ogrid[-radius : radius + 1, -radius : radius + 1]
-    footprint = x ** 2 + y ** 2 <= radius ** 2
-    footprint = 1 * footprint.astype(float)
-    return footprint
-
-
-def neighborhood_mean(values):
-    return np.mean(values)
-
-
 def member_multipro(inputs):
     """Multiprocessing Inputs for member"""
     validDATE = inputs[0]
@@ -115,9 +104,7 @@ def NEP(
     EP = np.mean(members, axis=0)
 
     ## Second, average EP neighborhood at each point.
-    NEP = ndimage.generic_filter(
-        EP, neighborhood_mean, footprint=radial_footprint(radius)
-    )
+    NEP = footprint_mean(EP, radial_footprint(radius))
 
     print("\n###########################################################")
     print("  Neighborhood Ensemble Probability:")
@@ -0,0 +1,359 @@
+## Brian Blaylock
+## October 19, 2026
+
+"""
+One chunked HDF5 file for the HRRR OSG climatology of a variable.
+
+The OSG percentiles (OpenScienceGrid/hrrr_percentiles_by_hour) are saved in a
+file for each hour of the year, with each percentile a gzip level 9 dataset.
+Reading a few points for a few hours opens and decompresses a whole grid for
+every hour. The store puts every hour in one dataset
+
+    values (hour of year, percentile, y, x)
+
+saved as int16 (value = int16 * scale_factor + add_offset, the same as the
+two decimals the OSG files are rounded to) in chunks of 24 hours and a
+64 x 64 tile of grid points. A map reads the tiles of one hour and a point
+time series reads one tile for each day. The chunks are compressed with
+Blosc lz4 if hdf5plugin is installed (lzf if it isn't), which is much faster
+to read than gzip 9.
+
+    convert_osg_files(DIR, 'TMP_2_m')                    # make the store
+    FILE = DIR + 'OSG_HRRR_TMP_2_m_f00.h5'
+    climatology_map(FILE, DATE, percentiles=[5, 95])      # {'p05': ..., }
+    climatology_points(FILE, XY_point_pairs, DATES, 95)   # (DATES, points)
+"""
+
+import os
+import warnings
+from datetime import datetime, timedelta
+import numpy as np
+import h5py
+
+try:
+    import hdf5plugin
+
+    _COMPRESSION = dict(
+        hdf5plugin.Blosc(cname="lz4", clevel=5, shuffle=hdf5plugin.Blosc.SHUFFLE)
+    )
+except ImportError:
+    _COMPRESSION = {"compression": "lzf", "shuffle": True}
+
+# File names of the hourly OSG files and the store
+HOURLY_NAME = "OSG_HRRR_%s_m%02d_d%02d_h%02d_f%02d.h5"
+STORE_NAME = "OSG_HRRR_%s_f%02d.h5"
+
+# Hours in a leap year. The hour of the year is for 2016.
+HOURS = 8784
+_YEAR = datetime(2016, 1, 1)
+
+# int16 value for missing data
+MISSING = -32768
+
+
+def hour_of_year(DATES):
+    """
+    Hour of the year (in 2016, so February 29 is included) for a datetime or
+    a list of datetimes. The year of the dates doesn't matter.
+    """
+    if isinstance(DATES, datetime):
+        return int(hour_of_year([DATES])[0])
+    return np.array(
+        [
+            (datetime(2016, D.month, D.day, D.hour) - _YEAR) // timedelta(hours=1)
+            for D in DATES
+        ],
+        dtype=np.int64,
+    )
+
+
+def quantize(value, scale_factor, add_offset):
+    """
+    int16 of the values (MISSING for NaN or masked values). Values outside
+    the range of scale_factor and add_offset are clipped with a warning.
+    """
+    value = np.ma.filled(np.ma.asarray(value, dtype=np.float64), np.nan)
+    q = np.round((value - add_offset) / scale_factor)
+    with np.errstate(invalid="ignore"):
+        clipped = np.count_nonzero((q < MISSING + 1) | (q > 32767))
+    if clipped:
+        warnings.warn(
+            "%s values outside %s to %s were clipped"
+            % (
+                clipped,
+                add_offset + (MISSING + 1) * scale_factor,
+                add_offset + 32767 * scale_factor,
+            ),
+            RuntimeWarning,
+        )
+    q = np.clip(q, MISSING + 1, 32767)
+    return np.where(np.isnan(q), MISSING, q).astype(np.int16)
+
+
+def dequantize(q, scale_factor, add_offset):
+    """float32 of the int16 values (NaN for MISSING)."""
+    value = q.astype(np.float32) * np.float32(scale_factor) + np.float32(add_offset)
+    return np.where(q == MISSING, np.nan, value).astype(np.float32)
+
+
+def create_store(
+    FILE, percentiles, shape, scale_factor, add_offset, hours_chunk=24, tile=64
+):
+    """
+    Make an empty store.
+
+    Input:
+        FILE         - The HDF5 file name
+        percentiles  - List of the percentiles
+        shape        - Shape of the grid, (y, x)
+        scale_factor - value = int16 * scale_factor + add_offset
+        add_offset
+        hours_chunk  - Number of hours in each chunk
+        tile         - Number of grid points on each side of a chunk
+    """
+    ny, nx = shape
+    f = h5py.File(FILE, "w")
+    f.create_dataset("percentiles", data=np.array(percentiles))
+    f.create_dataset(
+        "values",
+        shape=(HOURS, len(percentiles), ny, nx),
+        dtype=np.int16,
+        chunks=(hours_chunk, 1, min(tile, ny), min(tile, nx)),
+        fillvalue=MISSING,
+        **_COMPRESSION
+    )
+    f.create_dataset(
+        "mean",
+        shape=(HOURS, ny, nx),
+        dtype=np.int16,
+        chunks=(hours_chunk, min(tile, ny), min(tile, nx)),
+        fillvalue=MISSING,
+        **_COMPRESSION
+    )
+    f.create_dataset("samples", shape=(HOURS,), dtype=np.int32, fillvalue=0)
+    f.attrs["scale_factor"] = scale_factor
+    f.attrs["add_offset"] = add_offset
+    f.attrs["missing_value"] = MISSING
+    f.attrs["first hour"] = str(_YEAR)
+    return f
+
+
+def convert_osg_files(
+    DIR,
+    var,
+    fxx=0,
+    OUTDIR=None,
+    scale_factor=None,
+    add_offset=None,
+    hours_chunk=24,
+    tile=64,
+    verbose=True,
+):
+    """
+    Make a store from the hourly OSG files of a variable.
+
+    Input:
+        DIR          - Directory of the hourly files
+        var          - The variable in the file names, i.e. 'TMP_2_m'
+        fxx          - The forecast hour in the file names
+        OUTDIR       - Directory of the store. Default is DIR.
+        scale_factor - int16 scale. Default is 0.01 (the OSG files are
+                       rounded to two decimals), or bigger if the range of
+                       the values in all the files doesn't fit.
+        add_offset   - Default is the middle of the range of all the files.
+                       Values outside the range of scale_factor and
+                       add_offset are clipped with a warning.
+
+    Return:
+        The store file name. Hours without a file are missing.
+    """
+    if OUTDIR is None:
+        OUTDIR = DIR
+    DATES = [_YEAR + timedelta(hours=h) for h in range(HOURS)]
+    FILES = [
+        os.path.join(DIR, HOURLY_NAME % (var, D.month, D.day, D.hour, fxx))
+        for D in DATES
+    ]
+    exists = [os.path.exists(F) for F in FILES]
+    if not any(exists):
+        raise FileNotFoundError("No OSG files for %s in %s" % (var, DIR))
+
+    # The percentiles and grid shape from the first file
+    with h5py.File(FILES[exists.index(True)], "r") as f:
+        percentiles = list(f["percentiles"][:])
+        shape = f["p%02d" % percentiles[0]].shape
+
+    if scale_factor is None or add_offset is None:
+        # The range of all the files (the values of a seasonal variable,
+        # i.e. CAPE, in the summer are far from the values in January)
+        low, high = np.inf, -np.inf
+        for F, e in zip(FILES, exists):
+            if e:
+                with h5py.File(F, "r") as f:
+                    low = min(low, np.nanmin(f["p%02d" % percentiles[0]][:]))
+                    high = max(high, np.nanmax(f["p%02d" % percentiles[-1]][:]))
+        if verbose:
+            print("  Range of the values: %s to %s" % (low, high))
+        if add_offset is None:
+            add_offset = round(float(low + high) / 2, 2)
+        if scale_factor is None:
+            # Room for the range and the rounding of add_offset
+            scale_factor = max(0.01, float(high - low) / 65000)
+
+    FILE = os.path.join(OUTDIR, STORE_NAME % (var, fxx))
+    TMP = FILE + ".%s.tmp" % os.getpid()
+    timer = datetime.now()
+    with create_store(
+        TMP, percentiles, shape, scale_factor, add_offset, hours_chunk, tile
+    ) as store:
+        # Write a chunk of hours at a time so each chunk is compressed once
+        for h0 in range(0, HOURS, hours_chunk):
+            hours = range(h0, min(h0 + hours_chunk, HOURS))
+            files = {h: h5py.File(FILES[h], "r") for h in hours if exists[h]}
+            if len(files) == 0:
+                # The chunks are already the missing value
+                continue
+            try:
+                for i, p in enumerate(percentiles):
+                    block = np.full((len(hours),) + shape, MISSING, dtype=np.int16)
+                    for k, h in enumerate(hours):
+                        if h in files:
+                            block[k] = quantize(
+                                files[h]["p%02d" % p][:], scale_factor, add_offset
+                            )
+                    store["values"][h0 : h0 + len(hours), i] = block
+
+                block = np.full((len(hours),) + shape, MISSING, dtype=np.int16)
+                for k, h in enumerate(hours):
+                    if h in files:
+                        block[k] = quantize(
+                            files[h]["mean"][:], scale_factor, add_offset
+                        )
+                        store["samples"][h] = files[h]["samples"][()]
+                store["mean"][h0 : h0 + len(hours)] = block
+            finally:
+                for f in files.values():
+                    f.close()
+            if verbose:
+                print(
+                    "\r  Converted %s to %s (%s)"
+                    % (DATES[h0], DATES[hours[-1]], datetime.now() - timer),
+                    end="",
+                )
+    os.replace(TMP, FILE)
+    if verbose:
+        print("\n  Saved %s (%.1f MB)" % (FILE, os.path.getsize(FILE) / 1e6))
+    return FILE
+
+
+def open_store(FILE, cache_MB=256):
+    """Open a store with a chunk cache big enough for a map or a tile."""
+    return h5py.File(FILE, "r", rdcc_nbytes=cache_MB * 1024 ** 2, rdcc_nslots=100003)
+
+
+def _percentile_index(f, percentiles):
+    available = list(f["percentiles"][:])
+    try:
+        return [available.index(p) for p in percentiles]
+    except ValueError:
+        raise ValueError(
+            "Percentiles %s are not all in the store %s" % (percentiles, available)
+        )
+
+
+def climatology_map(FILE, DATE, percentiles=[5, 95], mean=False):
+    """
+    Percentile maps for an hour of the year.
+
+    Input:
+        FILE        - The store file
+        DATE        - datetime of the valid time (the year doesn't matter)
+        percentiles - List of percentiles
+        mean        - If True, also return the mean
+
+    Return:
+        Dictionary of float32 grids, i.e. {'p05': ..., 'p95': ..., 'mean': ...}
+    """
+    h = hour_of_year(DATE)
+    with open_store(FILE) as f:
+        scale, offset = f.attrs["scale_factor"], f.attrs["add_offset"]
+        idx = _percentile_index(f, percentiles)
+        # h5py reads a list of indexes in increasing order
+        order = np.argsort(idx)
+        data = f["values"][h, sorted(idx)]
+        return_this = {
+            "p%02d" % percentiles[i]: dequantize(data[k], scale, offset)
+            for k, i in enumerate(order)
+        }
+        if mean:
+            return_this["mean"] = dequantize(f["mean"][h], scale, offset)
+    return return_this
+
+
+def climatology_points(FILE, XY_point_pairs, DATES, percentile=95):
+    """
+    Percentile at points for many hours of the year.
+
+    Input:
+        FILE           - The store file
+        XY_point_pairs - Grid (row, column) of each point
+        DATES          - List of valid datetimes (the year doesn't matter)
+        percentile     - The percentile, or 'mean'
+
+    Return:
+        float32 array (DATES, points)
+    """
+    points = np.atleast_2d(np.asarray(XY_point_pairs, dtype=np.int64))
+    hours, inverse = np.unique(hour_of_year(DATES), return_inverse=True)
+    if len(hours) == hours[-1] - hours[0] + 1:
+        read_hours = slice(int(hours[0]), int(hours[-1]) + 1)
+    else:
+        read_hours = list(hours)
+
+    out = np.full((len(hours), len(points)), np.nan, dtype=np.float32)
+    with open_store(FILE) as f:
+        scale, offset = f.attrs["scale_factor"], f.attrs["add_offset"]
+        if percentile == "mean":
+            ds = f["mean"]
+            index = ()
+        else:
+            ds = f["values"]
+            index = (_percentile_index(f, [percentile])[0],)
+        ty, tx = ds.chunks[-2:]
+
+        # Read each chunk tile with points once
+        tiles = points // [ty, tx]
+        for t in np.unique(tiles, axis=0):
+            inside = np.flatnonzero((tiles == t).all(axis=1))
+            y0, x0 = t * [ty, tx]
+            block = ds[(read_hours,) + index + (slice(y0, y0 + ty), slice(x0, x0 + tx))]
+            m, n = points[inside].T
+            out[:, inside] = dequantize(block[:, m - y0, n - x0], scale, offset)
+    return out[inverse]
+
+
+def read_osg_percentile(DIR, FILE, percentile):
+    """
+    A percentile map from the store in DIR for the variable, hour, and
+    forecast of an hourly OSG file name. If there isn't a store, read the
+    hourly file.
+    """
+    # OSG_HRRR_<var>_mMM_dDD_hHH_fFF.h5
+    parts = FILE[len("OSG_HRRR_") : -len(".h5")].split("_")
+    var = "_".join(parts[:-4])
+    month, day, hour, fxx = [int(i[1:]) for i in parts[-4:]]
+    STORE = os.path.join(DIR, STORE_NAME % (var, fxx))
+    if os.path.exists(STORE):
+        DATE = datetime(2016, month, day, hour)
+        return climatology_map(STORE, DATE, [percentile])["p%02d" % percentile]
+    with h5py.File(os.path.join(DIR, FILE), "r") as f:
+        return f["p%02d" % percentile][:]
+
+
+if __name__ == "__main__":
+    # python HRRR_OSG_store.py DIR var [fxx]
+    import sys
+
+    convert_osg_files(
+        sys.argv[1], sys.argv[2], fxx=int(sys.argv[3]) if len(sys.argv) > 3 else 0
+    )
@@ -8,7 +8,6 @@ https://rapidrefresh.noaa.gov/internal/pdfs/alcott_HRRRTLE_8jun2016-adj.pdf
 
 import numpy as np
 from datetime import datetime, timedelta
-import scipy.ndimage as ndimage
 import matplotlib.pyplot as plt
 import multiprocessing
 
@@ -19,6 +18,11 @@ sys.path.append("B:\\pyBKB_v2")
 from BB_HRRR.HRRR_Pando import get_hrrr_variable, get_hrrr_latlon
 from BB_maps.my_basemap import draw_HRRR_map, draw_centermap
 from BB_cmap.NCAR_ensemble_cmap import cm_prob
+from BB_wx_calcs.footprint_filters import (
+    radial_footprint,
+    footprint_max,
+    footprint_sum,
+)
 
 import matplotlib as mpl
 
@@ -33,31 +37,6 @@ mpl.rcParams["axes.titlesize"] = 12
 mpl.rcParams["figure.subplot.hspace"] = 0.01
 
 
-def radial_footprint(radius):
-    y, x = np.ogrid[-radius : radius + 1, -radius : radius + 1]
-    footprint = x ** 2 + y ** 2 <= radius ** 2
-    footprint = 1 * footprint.astype(float)
-    return footprint
-
-
-def first_filter(values, threshold):
-    """
-    If the pixel is over the threshold, then set all surrounding pixels as
-    above the threshold. This ensures that this pixel will receive 100%
-    probability that it will be over the threshold. We do this with a filter.
-    If any pixel within the radius exceeds the threshold, then that point is
-    set to exceed the threshold.
-    """
-    return np.max(values) >= threshold
-
-
-def second_filter(values):
-    """
-    The second filter sums up the amount of points in the radius
-    """
-    return np.sum(values)
-
-
 def member_multipro(inputs):
     """Multiprocessing Inputs for member"""
     validDATE = inputs[0]
@@ -69,15 +48,14 @@ def member_multipro(inputs):
     runDATE = validDATE - timedelta(hours=f)
     H = get_hrrr_variable(runDATE, "REFC:entire", fxx=f)
     # Apply spatial filters
-    first = ndimage.generic_filter(
-        H["value"],
-        first_filter,
-        footprint=radial_footprint(radius),
-        extra_keywords={"threshold": threshold},
-    )
-    second = ndimage.generic_filter(
-        first, second_filter, footprint=radial_footprint(radius)
-    )
+    # First filter: If the pixel is over the threshold, then set all
+    # surrounding pixels as above the threshold. This ensures that this pixel
+    # will receive 100% probability that it will be over the threshold.
+    # If any pixel within the radius exceeds the threshold, then that point is
+    # set to exceed the threshold.
+    first = footprint_max(H["value"], radial_footprint(radius)) >= threshold
+    # Second filter: sums up the amount of points in the radius
+    second = footprint_sum(first, radial_footprint(radius))
     #
     return second
 
@@ -0,0 +1,390 @@
+## Brian Blaylock
+## October 19, 2026
+
+"""
+Precomputed domain labels on the HRRR grid.
+
+BB_HRRR.HRRR_paths.get_domains() tests all 1.9 million HRRR grid points
+against the Path of every domain each time a script starts. Here, that test
+is done once and the result is saved as a label raster on the HRRR grid. Each
+domain is one bit of the label, so overlapping domains (i.e. Utah and West)
+are stored in the same raster.
+
+The store is versioned and kept in DOMAIN_DIR, with a hash of the domain set
+(add_states, HRRR_specific, and custom_domains) in the name so each set has
+its own store:
+    HRRR_domain_labels_v1_<hash>.npy   - (1059, 1799) uint8/uint16/uint32 bitset
+    HRRR_domain_labels_v1_<hash>.json  - domain names, bits, areas, and boundaries
+
+Loading the store is a memory map of the .npy file. Masks are bit tests and
+per-domain reductions are an np.bincount on the labels, so there are no path
+tests at runtime.
+
+    store = load_domain_labels(add_states=['UT', 'CO', 'TX', 'FL'])
+    domains = get_domain_masks(store)    # Same 'mask' key as get_domains()
+    events = domain_sums(store, hist)    # {'HRRR': 1234, 'West': 567, ...}
+
+Domains that aren't in get_domains() (or that need different vertices) are
+given as custom_domains, a dictionary of {'lon': [...], 'lat': [...]} for each
+name. A custom domain replaces a domain of the same name.
+"""
+
+import os
+import json
+import hashlib
+import numpy as np
+from matplotlib.path import Path
+
+# Increment the version if the way the labels are computed changes.
+DOMAIN_LABELS_VERSION = 1
+
+# Directory where the label store is saved. Set PYBKB_CACHE to use another
+# directory than ~/.cache/pyBKB.
+DOMAIN_DIR = os.path.join(
+    os.environ.get("PYBKB_CACHE", os.path.expanduser("~/.cache/pyBKB")), "domain_labels"
+)
+
+
+def _label_dtype(num_domains):
+    """The smallest unsigned integer that has a bit for each domain."""
+    for dtype in [np.uint8, np.uint16, np.uint32]:
+        if num_domains <= np.iinfo(dtype).bits:
+            return dtype
+    raise ValueError("Can't store more than 32 domains in a label raster.")
+
+
+def _custom_vertices(custom_domains):
+    """The custom domain vertices as lists of floats (for the hash and meta)."""
+    if custom_domains is None:
+        return None
+    return {
+        name: {
+            "lon": np.asarray(custom_domains[name]["lon"], dtype=float).tolist(),
+            "lat": np.asarray(custom_domains[name]["lat"], dtype=float).tolist(),
+        }
+        for name in custom_domains
+    }
+
+
+def domain_key(
+    add_states=None,
+    HRRR_specific=True,
+    version=DOMAIN_LABELS_VERSION,
+    custom_domains=None,
+):
+    """
+    Name of the store for a set of domains, i.e. 'HRRR_domain_labels_v1_<hash>'.
+    The order of add_states is the order of the label bits, so it is part of
+    the hash. The vertices of the custom domains are part of the hash too.
+    """
+    h = hashlib.sha1()
+    h.update(("%s" % version).encode())
+    h.update(json.dumps([add_states, HRRR_specific]).encode())
+    if custom_domains is not None:
+        h.update(json.dumps(_custom_vertices(custom_domains)).encode())
+    return "HRRR_domain_labels_v%s_%s" % (version, h.hexdigest()[:16])
+
+
+def _store_files(SAVEDIR, add_states, HRRR_specific, version, custom_domains=None):
+    BASE = os.path.join(
+        SAVEDIR, domain_key(add_states, HRRR_specific, version, custom_domains)
+    )
+    return BASE + ".npy", BASE + ".json"
+
+
+def build_domain_labels(
+    add_states=None,
+    HRRR_specific=True,
+    SAVEDIR=DOMAIN_DIR,
+    version=DOMAIN_LABELS_VERSION,
+    verbose=True,
+    custom_domains=None,
+):
+    """
+    Compute the domain label raster and save it in SAVEDIR. This is the only
+    place the Path.contains_points test is done.
+
+    Input:
+        add_states     - A list of state abbreviations, i.e. add_states=['UT', 'CO', 'TX']
+        HRRR_specific  - Include the HRRR, West, Central, and East domains
+        SAVEDIR        - Directory to save the store
+        version        - Version number of the store
+        custom_domains - Dictionary of {'lon': [...], 'lat': [...]} vertices
+                         for each domain name. Replaces a domain of the same
+                         name from get_domains().
+    """
+    # Only need the HRRR grid and the Paths when building the store.
+    from BB_HRRR.HRRR_paths import get_domains, Hlat, Hlon
+    from geojson_area.area.vectorized import ring_area
+
+    if add_states is not None:
+        add_states = [i.upper() for i in add_states]
+
+    domains = get_domains(
+        add_states=add_states, HRRR_specific=HRRR_specific, compute_area=True
+    )
+
+    if custom_domains is not None:
+        custom_domains = _custom_vertices(custom_domains)
+        latlon_pair = list(zip(Hlon.flatten(), Hlat.flatten()))
+        for DOMAIN, verts in custom_domains.items():
+            path = Path(list(zip(verts["lon"], verts["lat"])))
+            in_path = path.contains_points(latlon_pair).reshape(np.shape(Hlat))
+            domains[DOMAIN] = {
+                "lon": verts["lon"],
+                "lat": verts["lat"],
+                "mask": np.invert(in_path),
+                "area": abs(ring_area(path.vertices)),
+            }
+
+    dtype = _label_dtype(len(domains))
+    shape = np.shape(domains[list(domains)[0]]["mask"])
+    labels = np.zeros(shape, dtype=dtype)
+
+    meta = {
+        "version": version,
+        "add_states": add_states,
+        "HRRR_specific": HRRR_specific,
+        "custom_domains": custom_domains,
+        "shape": list(shape),
+        "dtype": np.dtype(dtype).name,
+        "domains": [],
+    }
+    for bit, DOMAIN in enumerate(domains):
+        labels[np.invert(domains[DOMAIN]["mask"])] |= dtype(1 << bit)
+        meta["domains"].append(
+            {
+                "name": DOMAIN,
+                "bit": bit,
+                "area": float(domains[DOMAIN]["area"]),
+                "lon": np.asarray(domains[DOMAIN]["lon"], dtype=float).tolist(),
+                "lat": np.asarray(domains[DOMAIN]["lat"], dtype=float).tolist(),
+            }
+        )
+        if verbose:
+            print("Label bit %02d: %s" % (bit, DOMAIN))
+
+    if not os.path.exists(SAVEDIR):
+        os.makedirs(SAVEDIR)
+
+    # Write to a temporary file first so a half-written store is never loaded.
+    NPY, JSON = _store_files(
+        SAVEDIR, add_states, HRRR_specific, version, custom_domains
+    )
+    TMP = ".%s.tmp" % os.getpid()
+    np.save(NPY + TMP + ".npy", labels)
+    os.replace(NPY + TMP + ".npy", NPY)
+    with open(JSON + TMP, "w") as f:
+        json.dump(meta, f)
+    os.replace(JSON + TMP, JSON)
+
+    if verbose:
+        print("Saved domain labels:", NPY)
+
+    return load_domain_labels(
+        add_states=add_states,
+        HRRR_specific=HRRR_specific,
+        SAVEDIR=SAVEDIR,
+        version=version,
+        build=False,
+        custom_domains=custom_domains,
+    )
+
+
+def load_domain_labels(
+    add_states=None,
+    HRRR_specific=True,
+    SAVEDIR=DOMAIN_DIR,
+    version=DOMAIN_LABELS_VERSION,
+    build=True,
+    verbose=True,
+    custom_domains=None,
+):
+    """
+    Load the domain label store as a memory map.
+
+    Input:
+        add_states     - A list of state abbreviations, i.e. add_states=['UT', 'CO', 'TX']
+        HRRR_specific  - Include the HRRR, West, Central, and East domains
+        SAVEDIR        - Directory where the store is saved
+        version        - Version number of the store
+        build          - If True, build the store if it doesn't exist or if it
+                         doesn't have the requested domains.
+        custom_domains - Dictionary of {'lon': [...], 'lat': [...]} vertices
+                         for each domain name (see build_domain_labels).
+
+    Return:
+        A dictionary with the 'labels' memory map and the 'domains' info
+        (bit, area, lon, lat) for each domain name.
+    """
+    if add_states is not None:
+        add_states = [i.upper() for i in add_states]
+
+    custom_domains = _custom_vertices(custom_domains)
+    NPY, JSON = _store_files(
+        SAVEDIR, add_states, HRRR_specific, version, custom_domains
+    )
+
+    meta = None
+    if os.path.exists(NPY) and os.path.exists(JSON):
+        with open(JSON, "r") as f:
+            meta = json.load(f)
+        if (
+            meta["version"] != version
+            or meta["add_states"] != add_states
+            or meta["HRRR_specific"] != HRRR_specific
+            or meta.get("custom_domains") != custom_domains
+        ):
+            if verbose:
+                print("Domain label store doesn't match the requested domains.")
+            meta = None
+
+    if meta is None:
+        if not build:
+            raise FileNotFoundError(
+                "No domain label store for add_states=%s, HRRR_specific=%s in %s"
+                % (add_states, HRRR_specific, SAVEDIR)
+            )
+        return build_domain_labels(
+            add_states=add_states,
+            HRRR_specific=HRRR_specific,
+            SAVEDIR=SAVEDIR,
+            version=version,
+            verbose=verbose,
+            custom_domains=custom_domains,
+        )
+
+    labels = np.load(NPY, mmap_mode="r")
+    domains = {}
+    for d in meta["domains"]:
+        domains[d["name"]] = {
+            "bit": d["bit"],
+            "area": d["area"],
+            "lon": np.array(d["lon"]),
+            "lat": np.array(d["lat"]),
+        }
+
+    return {"labels": labels, "domains": domains, "version": meta["version"]}
+
+
+def get_domain_masks(store, domains=None):
+    """
+    Domain dictionary like BB_HRRR.HRRR_paths.get_domains(), but the masks
+    come from the label store.
+
+    Input:
+        store   - The dictionary returned by load_domain_labels()
+        domains - List of domain names. Default is all domains in the store.
+    """
+    if domains is None:
+        domains = list(store["domains"])
+
+    return_this = {}
+    for DOMAIN in domains:
+        info = store["domains"][DOMAIN]
+        bit = store["labels"].dtype.type(1 << info["bit"])
+        return_this[DOMAIN] = {
+            "lon": info["lon"],
+            "lat": info["lat"],
+            "path": Path(list(zip(info["lon"], info["lat"]))),
+            "mask": (store["labels"] & bit) == 0,  # True where NOT in domain
+            "area": info["area"],
+        }
+    return return_this
+
+
+def _label_index(store):
+    """
+    Flat bincount index for the labels and the label value for each bin.
+    uint8 and uint16 labels are used directly. uint32 labels are reduced to
+    the unique values first (there are only a few dozen combinations).
+    """
+    if "_index" not in store:
+        labels = np.asarray(store["labels"]).ravel()
+        if labels.itemsize <= 2:
+            combos = np.arange(2 ** (8 * labels.itemsize), dtype=labels.dtype)
+            index = labels.astype(np.intp)
+        else:
+            combos, index = np.unique(labels, return_inverse=True)
+        store["_combos"] = combos
+        store["_index"] = index
+    return store["_index"], store["_combos"]
+
+
+def _members(store, DOMAIN, combos):
+    """Boolean array of the label values that are in the domain."""
+    bit = combos.dtype.type(1 << store["domains"][DOMAIN]["bit"])
+    return (combos & bit) != 0
+
+
+def domain_sums(store, values, domains=None):
+    """
+    Sum of values inside each domain with np.bincount on the labels.
+
+    Input:
+        store   - The dictionary returned by load_domain_labels()
+        values  - Array on the HRRR grid. Can have leading dimensions,
+                  i.e. (fxx, y, x), and a sum is returned for each.
+        domains - List of domain names. Default is all domains in the store.
+
+    Return:
+        A dictionary with the sum for each domain.
+    """
+    if domains is None:
+        domains = list(store["domains"])
+
+    index, combos = _label_index(store)
+    values = np.asarray(values)
+    lead_shape = values.shape[:-2]
+    values = values.reshape(-1, index.size)
+
+    sums = np.array(
+        [np.bincount(index, weights=v, minlength=combos.size) for v in values]
+    )
+
+    return_this = {}
+    for DOMAIN in domains:
+        total = sums[:, _members(store, DOMAIN, combos)].sum(axis=1)
+        return_this[DOMAIN] = total.reshape(lead_shape) if lead_shape else total[0]
+    return return_this
+
+
+def domain_contingency_tables(store, forecast_binary, observed_binary, domains=None):
+    """
+    Contingency table values (a, b, c, d) inside each domain. Gives the same
+    result as BB_wx_calcs.binary_events.contingency_table() on masked arrays.
+
+    Input:
+        store           - The dictionary returned by load_domain_labels()
+        forecast_binary - Array of True/False if the event was forecasted.
+                          Can have a leading dimension, i.e. (fxx, y, x).
+        observed_binary - Array of True/False if the event was observed (y, x)
+        domains         - List of domain names. Default is all in the store.
+
+    Return:
+        A dictionary with (A, B, C, D) for each domain. Each is an array with
+        a value for each forecast grid.
+    """
+    if domains is None:
+        domains = list(store["domains"])
+
+    index, combos = _label_index(store)
+    observed = np.asarray(observed_binary, dtype=bool).ravel()
+    forecast = np.asarray(forecast_binary, dtype=bool).reshape(-1, index.size)
+
+    # Each label gets four bins: 0=d, 1=c, 2=b, 3=a
+    counts = np.array(
+        [
+            np.bincount(
+                4 * index + 2 * F + observed, minlength=4 * combos.size
+            ).reshape(combos.size, 4)
+            for F in forecast
+        ]
+    )
+
+    return_this = {}
+    for DOMAIN in domains:
+        table = counts[:, _members(store, DOMAIN, combos)].sum(axis=1)
+        d, c, b, a = [table[:, n] for n in range(4)]
+        return_this[DOMAIN] = (a, b, c, d)
+    return return_this
@@ -0,0 +1,208 @@
+## Brian Blaylock
+## October 19, 2026
+
+"""
+Map points to HRRR grid cells and the area of each HRRR grid cell.
+
+The HRRR grid is regular in the model's lambert-conformal map coordinates, so
+a point's grid cell is found with affine arithmetic on its map coordinates
+instead of a path test or a histogram bin search:
+
+    i = round((y - y0) / dy)      (row)
+    j = round((x - x0) / dx)      (column)
+
+Points are binned on the HRRR grid with np.bincount on the flat index
+i * nx + j, with optional weights (i.e. GLM energy or area).
+
+HRRR_lambert_index() and HRRR_lambert_latlon() do the same projection with the
+HRRR grid definition and numpy, for when there isn't a basemap map object.
+
+The grid-cell area raster (km^2) is computed once from the lambert-conformal
+map factor and saved as a float32 .npy file that is loaded as a memory map.
+"""
+
+import os
+import json
+import hashlib
+import numpy as np
+
+# HRRR lambert-conformal projection. From the HRRR's namelist.wps file:
+# https://rapidrefresh.noaa.gov/hrrr/HRRR/static/HRRRv1/namelist.wps
+HRRR_TRUELAT = 38.5
+HRRR_DX = 3000  # meters
+HRRR_LON0 = -97.5
+HRRR_SHAPE = (1059, 1799)
+HRRR_LAT1, HRRR_LON1 = 21.138123, -122.719528  # Lower-left grid point
+HRRR_EARTH_RADIUS = 6371229  # meters (spherical earth)
+
+# Directory where the grid-cell area raster is saved. Set PYBKB_CACHE to use another
+# directory than ~/.cache/pyBKB.
+GRID_DIR = os.path.join(
+    os.environ.get("PYBKB_CACHE", os.path.expanduser("~/.cache/pyBKB")), "domain_labels"
+)
+
+# HRRR_grid_affine() results for each map object, so the grid is only
+# projected once per map. Keeps a reference to the map so its id isn't reused.
+_AFFINE_CACHE = {}
+
+
+def HRRR_grid_affine(m, Hlat, Hlon, cache=True):
+    """
+    Origin and spacing of the HRRR grid in the map coordinates of m.
+    These are derived from the model's middle row and middle column, so only
+    those points are projected. The result is cached for each map object.
+
+    Input:
+        m     - basemap map object of HRRR grid returned by draw_HRRR_map
+        Hlat  - HRRR latitude grid
+        Hlon  - HRRR longitude grid
+        cache - Use the cached affine for this map object, if there is one.
+
+    Return:
+        Dictionary with x0, y0, dx, dy and the grid shape.
+    """
+    key = (id(m), np.shape(Hlon))
+    if cache and key in _AFFINE_CACHE:
+        return _AFFINE_CACHE[key][1]
+
+    mid_row_idx, mid_col_idx = np.array(np.shape(Hlon)) // 2
+    X, _ = m(Hlon[mid_row_idx], Hlat[mid_row_idx])
+    _, Y = m(Hlon[:, mid_col_idx], Hlat[:, mid_col_idx])
+    affine = {
+        "x0": X[0],
+        "y0": Y[0],
+        "dx": np.mean(np.diff(X)),
+        "dy": np.mean(np.diff(Y)),
+        "shape": np.shape(Hlon),
+    }
+    _AFFINE_CACHE[key] = (m, affine)
+    return affine
+
+
+def latlon_to_HRRR_index(lats, lons, m, affine):
+    """
+    Row and column of the HRRR grid cell for each point.
+
+    Input:
+        lats   - a vector of latitudes
+        lons   - a vector of longitudes
+        m      - basemap map object of HRRR grid returned by draw_HRRR_map
+        affine - dictionary returned by HRRR_grid_affine()
+
+    Return:
+        i, j   - Row and column index of each point inside the HRRR grid
+        inside - Boolean of which points are inside the HRRR grid. i and j
+                 only have values for these points.
+    """
+    x, y = m(np.asarray(lons), np.asarray(lats))
+    i = np.round((np.asarray(y) - affine["y0"]) / affine["dy"]).astype(np.intp)
+    j = np.round((np.asarray(x) - affine["x0"]) / affine["dx"]).astype(np.intp)
+    ny, nx = affine["shape"]
+    inside = (i >= 0) & (i < ny) & (j >= 0) & (j < nx)
+    return i[inside], j[inside], inside
+
+
+def bin_on_HRRR_grid(i, j, shape, weights=None):
+    """
+    Bin points on the HRRR grid with np.bincount on the flat grid index.
+
+    Input:
+        i, j    - Row and column index of each point from latlon_to_HRRR_index()
+        shape   - Shape of the HRRR grid, i.e. affine['shape']
+        weights - Weight of each point. Default is None, which counts the
+                  number of points in each grid cell.
+
+    Return:
+        Array the shape of the HRRR grid with the count (or sum of the
+        weights) in each grid cell.
+    """
+    ny, nx = shape
+    flat = np.asarray(i, dtype=np.intp) * nx + np.asarray(j, dtype=np.intp)
+    return np.bincount(flat, weights=weights, minlength=ny * nx).reshape(ny, nx)
+
+
+def _lambert_xy(lats, lons):
+    """HRRR lambert-conformal map coordinates (meters) of points."""
+    phi0 = np.radians(HRRR_TRUELAT)
+    n = np.sin(phi0)
+    F = np.cos(phi0) * np.tan(np.pi / 4 + phi0 / 2) ** n / n
+    phi = np.radians(np.asarray(lats, dtype=np.float64))
+    theta = n * np.radians(
+        (np.asarray(lons, dtype=np.float64) - HRRR_LON0 + 180) % 360 - 180
+    )
+    rho = HRRR_EARTH_RADIUS * F / np.tan(np.pi / 4 + phi / 2) ** n
+    rho0 = HRRR_EARTH_RADIUS * F / np.tan(np.pi / 4 + phi0 / 2) ** n
+    return rho * np.sin(theta), rho0 - rho * np.cos(theta)
+
+
+def HRRR_lambert_index(lats, lons):
+    """
+    Fractional row and column of points on the HRRR grid, computed with the
+    lambert-conformal projection equations (no map object is needed).
+    Round them to get the HRRR grid cell, like latlon_to_HRRR_index().
+
+    Return:
+        i, j - Row and column (float) with the shape of lats
+    """
+    x0, y0 = _lambert_xy(HRRR_LAT1, HRRR_LON1)
+    x, y = _lambert_xy(lats, lons)
+    return (y - y0) / HRRR_DX, (x - x0) / HRRR_DX
+
+
+def HRRR_lambert_latlon():
+    """
+    Latitude and longitude of the HRRR grid computed from the projection
+    (the inverse of HRRR_lambert_index).
+    """
+    phi0 = np.radians(HRRR_TRUELAT)
+    n = np.sin(phi0)
+    F = np.cos(phi0) * np.tan(np.pi / 4 + phi0 / 2) ** n / n
+    rho0 = HRRR_EARTH_RADIUS * F / np.tan(np.pi / 4 + phi0 / 2) ** n
+
+    x0, y0 = _lambert_xy(HRRR_LAT1, HRRR_LON1)
+    ny, nx = HRRR_SHAPE
+    x = x0 + HRRR_DX * np.arange(nx)[np.newaxis, :]
+    y = y0 + HRRR_DX * np.arange(ny)[:, np.newaxis]
+    rho = np.sqrt(x ** 2 + (rho0 - y) ** 2)
+    theta = np.arctan2(x, rho0 - y)
+    lat = np.degrees(
+        2 * np.arctan((HRRR_EARTH_RADIUS * F / rho) ** (1 / n)) - np.pi / 2
+    )
+    lon = HRRR_LON0 + np.degrees(theta / n)
+    return lat, lon
+
+
+def HRRR_cell_area(Hlat, SAVEDIR=GRID_DIR):
+    """
+    Area of each HRRR grid cell in km^2. The 3 km grid spacing is true at
+    38.5 N and is scaled by the lambert-conformal map factor everywhere else.
+
+    The raster is saved as a float32 .npy file the first time and loaded as a
+    memory map after that. A hash of the latitude grid is in the file name, so
+    a different grid (or a subset of the grid) gets its own raster.
+    """
+    Hlat32 = np.ascontiguousarray(Hlat, dtype=np.float32)
+    h = hashlib.sha1()
+    h.update(json.dumps(list(Hlat32.shape)).encode())
+    h.update(Hlat32.tobytes())
+    FILE = os.path.join(SAVEDIR, "HRRR_cell_area_km2_%s.npy" % h.hexdigest()[:16])
+    if os.path.exists(FILE):
+        area = np.load(FILE, mmap_mode="r")
+        if area.shape == Hlat32.shape:
+            return area
+
+    phi0 = np.radians(HRRR_TRUELAT)
+    phi = np.radians(np.asarray(Hlat, dtype=float))
+    n = np.sin(phi0)  # Cone constant for a single true latitude
+    k = (np.cos(phi0) * np.tan(np.pi / 4 + phi0 / 2) ** n) / (
+        np.cos(phi) * np.tan(np.pi / 4 + phi / 2) ** n
+    )
+    area = ((HRRR_DX / 1000) / k) ** 2
+
+    if not os.path.exists(SAVEDIR):
+        os.makedirs(SAVEDIR)
+    TMP = FILE + ".%s.tmp.npy" % os.getpid()
+    np.save(TMP, area.astype(np.float32))
+    os.replace(TMP, FILE)
+
+    return np.load(FILE, mmap_mode="r")
@@ -6,8 +6,12 @@ Paths for HRRR domain and for other subsets
 
 Source of GeoJson files:
 https://github.com/johan/world.geo.json/tree/master/countries/USA
+
+Offline copies of the state GeoJSON files are kept in ./state_geojson/
+(see the README there).
 """
 
+import os
 import numpy as np
 from matplotlib.path import Path
 import json
@@ -17,7 +21,7 @@ import sys
 
 sys.path.append("/uufs/chpc.utah.edu/common/home/u0553130/pyBKB_v3/")
 from BB_HRRR.HRRR_Pando import get_hrrr_latlon
-from geojson_area.area import area
+from geojson_area.area.vectorized import ring_area
 
 all_states = [
     "AL",
@@ -76,16 +80,32 @@ all_states = [
 Hlat, Hlon = get_hrrr_latlon(DICT=False)
 
 
-def read_GeoJSON(state):
+# Directory with the vendored state GeoJSON files
+GEOJSON_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "state_geojson")
+
+
+def read_GeoJSON(state, GEOJSON_DIR=GEOJSON_DIR):
     """
     Abbreviated State
+
+    Reads the vendored file in GEOJSON_DIR. If it isn't there, the file is
+    downloaded from GitHub and a copy is saved in GEOJSON_DIR.
     """
+    FILE = os.path.join(GEOJSON_DIR, "%s.geo.json" % state.upper())
+    if os.path.exists(FILE):
+        with open(FILE, "r") as f:
+            return json.load(f)
+
     URL = (
         "https://raw.githubusercontent.com/johan/world.geo.json/master/countries/USA/%s.geo.json"
         % state.upper()
     )
     f = requests.get(URL)
-    return f.json()
+    data = f.json()
+    if os.path.isdir(GEOJSON_DIR):
+        with open(FILE, "w") as f:
+            json.dump(data, f)
+    return data
 
 
 def get_domains(add_states=None, HRRR_specific=True, compute_area=True):
@@ -170,11 +190,7 @@ def get_domains(add_states=None, HRRR_specific=True, compute_area=True):
             domains[i]["mask"] = not_in_path
 
         if compute_area:
-            data = {
-                "type": "Polygon",
-                "coordinates": [[tuple(i) for i in domains[i]["path"].vertices]],
-            }
-            this_area = area(data)
+            this_area = abs(ring_area(domains[i]["path"].vertices))
             print("%s Area in meters squared: %s" % (i, this_area))
             domains[i]["area"] = this_area
     #
@@ -9,6 +9,7 @@ These functions were originally created because we needed to pluck forecasted
 gusts at the location of power transmission lines.
 """
 
+import os
 import numpy as np
 from datetime import datetime, timedelta
 import xarray
@@ -17,6 +18,7 @@ import sys
 
 sys.path.append("/uufs/chpc.utah.edu/common/home/u0553130/pyBKB_v3")
 from BB_HRRR.HRRR_Pando import get_hrrr_latlon, get_hrrr_variable
+from BB_HRRR.HRRR_OSG_store import STORE_NAME, climatology_points
 
 
 def forecast_data(runDATE, XY_point_pairs, variable="GUST:surface", fxx=range(19)):
@@ -64,6 +66,9 @@ def osg_data(
     """
     Return a dictionary of HRRR climatology from OSG statistics for a series of points
 
+    If the OSG files were converted to a store (HRRR_OSG_store), the points
+    for every fxx are read from the store at once.
+
     Input:
         runDATE        - Python Datetime Object for the model run date interested in
         XY_point_pairs - XY array coordinates for the points you want
@@ -84,17 +89,26 @@ def osg_data(
     # We want to return these
     return_this = {"lat": ulat, "lon": ulon, "percentile": percentile}
 
+    var = variable.replace(":", "_").replace(" ", "_")
+    DIR = (
+        "/uufs/chpc.utah.edu/common/home/horel-group8/blaylock/HRRR_OSG/hourly30/%s/"
+        % var
+    )
+
+    STORE = DIR + STORE_NAME % (var, 0)
+    if os.path.exists(STORE):
+        validDATES = [runDATE + timedelta(hours=f) for f in fxx]
+        OSG_pth = climatology_points(STORE, XY_point_pairs, validDATES, percentile)
+        for i, f in enumerate(fxx):
+            return_this["f%02d" % f] = OSG_pth[i]
+        return return_this
+
     ## Next, get the forecasts for each of the points
     for f in fxx:
         print("\rworking on f%02d" % f, end="")
         # Get the HRRR File
         validDATE = runDATE + timedelta(hours=f)
         DATE = datetime(2016, validDATE.month, validDATE.day, validDATE.hour)
-        var = variable.replace(":", "_").replace(" ", "_")
-        DIR = (
-            "/uufs/chpc.utah.edu/common/home/horel-group8/blaylock/HRRR_OSG/hourly30/%s/"
-            % var
-        )
         FILE = "OSG_HRRR_%s_m%02d_d%02d_h%02d_f00.h5" % (
             var,
             DATE.month,
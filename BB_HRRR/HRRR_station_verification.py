@@ -0,0 +1,316 @@
+## Brian Blaylock
+## October 19, 2026
+
+"""
+Verify HRRR forecasts at MesoWest/Synoptic stations.
+
+LocDic_hrrr_time_series finds the nearest grid point for every station on
+every grid and returns nested dictionaries, so verifying many stations over a
+season is slow and needs all the data at once. Instead:
+
+    1. The HRRR grid index of every station is computed once with the HRRR
+       lambert-conformal projection (HRRR_grid_index.HRRR_lambert_index).
+    2. For a batch of valid times, each HRRR grid (valid time x fxx) is
+       downloaded in a worker process, the station values are taken with the
+       grid index, and only those values are returned. This is the forecast
+       cube (station, valid time, fxx).
+    3. The observations for the batch (a long DataFrame from
+       OLD_get_Synoptic.stations_timeseries or fetch_Synoptic.fetch_timeseries
+       with as_long=True) are matched to the valid times. This is the
+       observation cube (station, valid time).
+    4. The running sums of the errors for each station and fxx are updated,
+       and the batch is thrown away.
+
+    S = verify_stations(datetime(2019, 6, 1), datetime(2019, 9, 1), location_dic,
+                        'TMP:2 m', 'air_temp_set_1', forecast_offset=-273.15)
+    S['RMSE']    # (station, fxx)
+"""
+
+import multiprocessing
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+
+import sys
+
+sys.path.append("/uufs/chpc.utah.edu/common/home/u0553130/pyBKB_v3")
+from BB_HRRR.HRRR_grid_index import HRRR_SHAPE, HRRR_lambert_index
+
+
+def station_grid_index(lats, lons):
+    """
+    Row and column of the HRRR grid point nearest each station.
+
+    Input:
+        lats, lons - Arrays of the station latitude and longitude
+
+    Return:
+        Dictionary with 'i', 'j' (0 for stations outside the grid) and
+        'inside' (False for stations outside the HRRR grid)
+    """
+    i, j = HRRR_lambert_index(lats, lons)
+    i = np.round(i).astype(np.intp)
+    j = np.round(j).astype(np.intp)
+    ny, nx = HRRR_SHAPE
+    inside = (i >= 0) & (i < ny) & (j >= 0) & (j < nx)
+    return {"i": np.where(inside, i, 0), "j": np.where(inside, j, 0), "inside": inside}
+
+
+def pluck_stations(value, index):
+    """
+    HRRR values at the stations (float32). NaN for stations outside the grid
+    or if the grid is missing.
+    """
+    n = len(index["i"])
+    if np.ndim(value) != 2:
+        return np.full(n, np.nan, dtype=np.float32)
+    value = np.ma.filled(np.ma.asarray(value, dtype=np.float32), np.nan)
+    plucked = np.where(index["inside"], value[index["i"], index["j"]], np.nan)
+    return plucked.astype(np.float32)
+
+
+def _pluck_MP(inputs):
+    """Download a HRRR grid and return only the values at the stations."""
+    VALID, variable, fxx, index, model = inputs
+    from BB_HRRR.HRRR_Pando import get_hrrr_variable
+
+    H = get_hrrr_variable(
+        VALID - timedelta(hours=fxx),
+        variable,
+        fxx=fxx,
+        model=model,
+        value_only=True,
+        verbose=False,
+    )
+    return pluck_stations(H["value"], index)
+
+
+def forecast_cube(
+    VALID_DATES, variable, index, fxx=range(19), model="hrrr", processes=8
+):
+    """
+    HRRR forecasts at the stations.
+
+    Input:
+        VALID_DATES - List of valid datetimes
+        variable    - HRRR variable, i.e. 'TMP:2 m'
+        index       - Station grid index from station_grid_index()
+        fxx         - Forecast lead times
+
+    Return:
+        float32 array (station, valid time, fxx)
+    """
+    fxx = list(fxx)
+    inputs = [(V, variable, f, index, model) for V in VALID_DATES for f in fxx]
+    with multiprocessing.Pool(processes) as p:
+        values = p.map(_pluck_MP, inputs)
+    cube = np.array(values, dtype=np.float32).reshape(
+        len(VALID_DATES), len(fxx), len(index["i"])
+    )
+    return np.moveaxis(cube, -1, 0)
+
+
+def observation_cube(df, STIDs, VALID_DATES, variable, within=30):
+    """
+    Observations matched to the valid times: for each station and valid time,
+    the observation nearest the valid time within `within` minutes.
+
+    Input:
+        df          - Long DataFrame (station, date_time, variable, value)
+                      from parse_Synoptic.parse_timeseries
+        STIDs       - List of the station IDs (the order of the cube)
+        VALID_DATES - List of valid datetimes
+        variable    - Observation name, i.e. 'air_temp_set_1'
+
+    Return:
+        float32 array (station, valid time). NaN if there isn't an
+        observation.
+    """
+    valid = np.array(VALID_DATES, dtype="datetime64[s]")
+    cube = np.full((len(STIDs), len(valid)), np.nan, dtype=np.float32)
+
+    df = df[df["variable"] == variable]
+    s = pd.Index(STIDs).get_indexer(np.asarray(df["station"], dtype=str))
+    t = df["date_time"].values.astype("datetime64[s]")
+    value = df["value"].values.astype(np.float32)
+    keep = (s >= 0) & np.isfinite(value)
+    s, t, value = s[keep], t[keep], value[keep]
+    if len(s) == 0:
+        return cube
+
+    # Nearest valid time to each observation
+    k = np.clip(np.searchsorted(valid, t), 0, len(valid) - 1)
+    before = np.clip(k - 1, 0, len(valid) - 1)
+    k = np.where(np.abs(t - valid[before]) < np.abs(t - valid[k]), before, k)
+    dist = np.abs(t - valid[k]).astype("timedelta64[s]").astype(np.int64)
+    near = dist <= within * 60
+    s, k, dist, value = s[near], k[near], dist[near], value[near]
+
+    # Keep the nearest observation for each (station, valid time)
+    order = np.lexsort((dist, k, s))
+    flat = (s * len(valid) + k)[order]
+    first = np.concatenate([[True], flat[1:] != flat[:-1]])
+    cube[s[order][first], k[order][first]] = value[order][first]
+    return cube
+
+
+def new_scores(n_stations, n_fxx):
+    """Empty running sums for each station and fxx."""
+    return {
+        "count": np.zeros((n_stations, n_fxx), dtype=np.int64),
+        "sum error": np.zeros((n_stations, n_fxx)),
+        "sum abs error": np.zeros((n_stations, n_fxx)),
+        "sum squared error": np.zeros((n_stations, n_fxx)),
+    }
+
+
+def update_scores(scores, forecast, observed):
+    """
+    Add a batch of matched forecasts and observations to the running sums.
+
+    Input:
+        forecast - Array (station, valid time, fxx)
+        observed - Array (station, valid time)
+    """
+    error = forecast.astype(np.float64) - observed[:, :, np.newaxis]
+    ok = np.isfinite(error)
+    error = np.where(ok, error, 0)
+    scores["count"] += ok.sum(axis=1)
+    scores["sum error"] += error.sum(axis=1)
+    scores["sum abs error"] += np.abs(error).sum(axis=1)
+    scores["sum squared error"] += (error ** 2).sum(axis=1)
+    return scores
+
+
+def finish_scores(scores):
+    """Bias, MAE, and RMSE (station, fxx) from the running sums."""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        n = scores["count"]
+        return {
+            "count": n,
+            "bias": scores["sum error"] / n,
+            "MAE": scores["sum abs error"] / n,
+            "RMSE": np.sqrt(scores["sum squared error"] / n),
+        }
+
+
+def _get_observations(STIDs, sDATE, eDATE, obs_variable):
+    """The observations for a batch of valid times as a long DataFrame."""
+    from BB_MesoWest.fetch_Synoptic import fetch_timeseries
+
+    return fetch_timeseries(
+        STIDs,
+        sDATE,
+        eDATE,
+        vars=obs_variable.split("_set_")[0],
+        as_long=True,
+        verbose=False,
+    )
+
+
+def verify_stations(
+    sDATE,
+    eDATE,
+    location_dic,
+    variable,
+    obs_variable,
+    fxx=range(19),
+    forecast_offset=0,
+    within=30,
+    batch_hours=24,
+    model="hrrr",
+    processes=8,
+    CUBE_FILE=None,
+    get_observations=_get_observations,
+    verbose=True,
+):
+    """
+    Bias, MAE, and RMSE of HRRR forecasts at stations for each fxx.
+
+    Input:
+        sDATE, eDATE    - Valid time range (eDATE not included). Valid times
+                          are every hour.
+        location_dic    - Dictionary of station locations in the form
+                          {'STID': {'latitude': xxx, 'longitude': xxx}}
+                          (i.e. get_mesowest_stninfo().to_dict())
+        variable        - HRRR variable, i.e. 'TMP:2 m'
+        obs_variable    - Observation name, i.e. 'air_temp_set_1'
+        fxx             - Forecast lead times
+        forecast_offset - Added to the forecasts to convert to the units of
+                          the observations (i.e. -273.15 for K to C)
+        within          - Minutes an observation may be from the valid time
+        batch_hours     - Number of valid times in each batch. Only one batch
+                          of forecasts and observations is in memory.
+        processes       - Number of HRRR grids downloaded at the same time
+        CUBE_FILE       - If given, the forecast and observation cubes are
+                          also saved as .npy memory maps, CUBE_FILE_fcst.npy
+                          (station, valid, fxx) and CUBE_FILE_obs.npy.
+        get_observations - Function (STIDs, sDATE, eDATE, obs_variable) that
+                          returns the long observation DataFrame.
+
+    Return:
+        Dictionary with 'STID', 'fxx', and 'count', 'bias', 'MAE', 'RMSE'
+        arrays (station, fxx)
+    """
+    STIDs = list(location_dic)
+    fxx = list(fxx)
+    index = station_grid_index(
+        [float(location_dic[s]["latitude"]) for s in STIDs],
+        [float(location_dic[s]["longitude"]) for s in STIDs],
+    )
+    if verbose and not index["inside"].all():
+        print(" >> %s stations are outside the HRRR grid" % (~index["inside"]).sum())
+
+    hours = int((eDATE - sDATE).total_seconds() // 3600)
+    VALID_DATES = [sDATE + timedelta(hours=h) for h in range(hours)]
+
+    if CUBE_FILE is not None:
+        fcst_file = np.lib.format.open_memmap(
+            CUBE_FILE + "_fcst.npy",
+            mode="w+",
+            dtype=np.float32,
+            shape=(len(STIDs), len(VALID_DATES), len(fxx)),
+        )
+        obs_file = np.lib.format.open_memmap(
+            CUBE_FILE + "_obs.npy",
+            mode="w+",
+            dtype=np.float32,
+            shape=(len(STIDs), len(VALID_DATES)),
+        )
+
+    scores = new_scores(len(STIDs), len(fxx))
+    timer = datetime.now()
+    for b in range(0, len(VALID_DATES), batch_hours):
+        batch = VALID_DATES[b : b + batch_hours]
+        forecast = forecast_cube(
+            batch, variable, index, fxx=fxx, model=model, processes=processes
+        )
+        forecast += forecast_offset
+
+        # Observations within `within` minutes of the batch's valid times
+        df = get_observations(
+            STIDs,
+            batch[0] - timedelta(minutes=within),
+            batch[-1] + timedelta(minutes=within),
+            obs_variable,
+        )
+        observed = observation_cube(df, STIDs, batch, obs_variable, within=within)
+
+        update_scores(scores, forecast, observed)
+        if CUBE_FILE is not None:
+            fcst_file[:, b : b + len(batch)] = forecast
+            obs_file[:, b : b + len(batch)] = observed
+        if verbose:
+            print(
+                " >> Verified %s to %s (%s)"
+                % (batch[0], batch[-1], datetime.now() - timer)
+            )
+
+    if CUBE_FILE is not None:
+        fcst_file.flush()
+        obs_file.flush()
+
+    return_this = finish_scores(scores)
+    return_this["STID"] = np.array(STIDs)
+    return_this["fxx"] = np.array(fxx)
+    return return_this
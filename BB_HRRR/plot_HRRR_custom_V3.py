@@ -55,6 +55,7 @@ sys.path.append("/uufs/chpc.utah.edu/common/home/u0553130/pyBKB_v3")
 # sys.path.append('/uufs/chpc.utah.edu/sys/pkg/python/2.7.3_rhel6/lib/python2.7/site-packages/')
 # import BB_maps.my_basemap import draw_HRRR_map, draw_ALASKA_map
 from BB_HRRR.HRRR_Pando import get_hrrr_variable, get_hrrr_latlon, hrrr_subset
+from BB_HRRR.HRRR_OSG_store import read_osg_percentile
 from BB_MesoWest.get_MesoWest import get_mesowest_stninfo
 from BB_wx_calcs.humidity import Tempdwpt_to_RH
 from BB_wx_calcs.pressure import vapor_pressure_deficit
@@ -302,8 +303,7 @@ def draw_wind(m, lons, lats,
     if p95:
         DIR = '/uufs/chpc.utah.edu/common/home/horel-group8/blaylock/HRRR_OSG/hourly30/UVGRD_%s/' % level.replace(' ', '_')
         FILE = 'OSG_HRRR_%s_m%02d_d%02d_h%02d_f00.h5' % (('UVGRD_%s' % level.replace(' ', '_'), VALIDDATE.month, VALIDDATE.day, VALIDDATE.hour))
-        with h5py.File(DIR+FILE, 'r') as f:
-            spd_p95 = f["p95"][:]
+        spd_p95 = read_osg_percentile(DIR, FILE, 95)
         masked = H_UV['SPEED']-spd_p95
         masked = np.ma.array(masked)
         masked[masked < 0] = np.ma.masked
@@ -486,8 +486,7 @@ def draw_tmp_dpt(m, lons, lats,
         FILE = 'OSG_HRRR_%s_%s_m%02d_d%02d_h%02d_f00.h5' % (VAR, level.replace(' ', '_'), VALIDDATE.month, VALIDDATE.day, VALIDDATE.hour)
 
         ### Plot Depression
-        with h5py.File(DIR+FILE, 'r') as f:
-            p05 = f["p05"][:]
+        p05 = read_osg_percentile(DIR, FILE, 5)
         masked = H['value']-p05 # both these datasets are in Kelvin, but when we take the difference it is in Celsius
         masked = np.ma.array(masked)
         masked[masked > 0] = np.ma.masked
@@ -499,8 +498,7 @@ def draw_tmp_dpt(m, lons, lats,
                                     cmap=cmapOSG)
         
         ### Plot Exceedance
-        with h5py.File(DIR+FILE, 'r') as f:
-            p95 = f["p95"][:]
+        p95 = read_osg_percentile(DIR, FILE, 95)
         masked = H['value']-p95 # both these datasets are in Kelvin, but when we take the difference it is in Celsius
         masked = np.ma.array(masked)
         masked[masked < 0] = np.ma.masked
@@ -658,8 +656,7 @@ def draw_hgt(m, lons, lats,
         FILE = 'OSG_HRRR_%s_%s_m%02d_d%02d_h%02d_f00.h5' % (VAR, level.split(' ')[0], VALIDDATE.month, VALIDDATE.day, VALIDDATE.hour)
 
         ### Plot Depression
-        with h5py.File(DIR+FILE, 'r') as f:
-            p05 = f["p05"][:]
+        p05 = read_osg_percentile(DIR, FILE, 5)
         masked = H['value']-p05
         masked = np.ma.array(masked)
         masked[masked > 0] = np.ma.masked
@@ -671,8 +668,7 @@ def draw_hgt(m, lons, lats,
                                        cmap=cmapOSG)
         
         ### Plot Exceedance
-        with h5py.File(DIR+FILE, 'r') as f:
-            p95 = f["p95"][:]
+        p95 = read_osg_percentile(DIR, FILE, 95)
         masked = H['value']-p95
         masked = np.ma.array(masked)
         masked[masked < 0] = np.ma.masked
@@ -91,6 +91,8 @@ import pandas as pd
 from datetime import datetime
 
 from .get_credentials import get_MW_token
+from .response_cache import cached_request
+from .parse_Synoptic import parse_timeseries
 from BB_wx_calcs.wind import spddir_to_uv
 
 ##======================================================================
@@ -296,7 +298,33 @@ def _parse_latest_nearesttime(data, rename_value_1):
 # =======================================================================
 
 
-def synoptic_api(service, verbose=True, **params):
+def _cached_get(URL, params):
+    """
+    requests.get(URL, params) with the response cache (see response_cache).
+    Successful responses are saved and used again until they expire.
+    """
+    response = []
+
+    def fetch():
+        f = requests.get(URL, params)
+        response.append(f)
+        ok = f.ok and f.json()["SUMMARY"]["RESPONSE_CODE"] == 1
+        return f.url, f.content, ok
+
+    r = cached_request(URL, params, fetch)
+    if not r["cached"]:
+        return response[0]
+
+    # Make a requests object from the cached JSON
+    f = requests.models.Response()
+    f._content = r["content"]
+    f.status_code = 200
+    f.encoding = "utf-8"
+    f.url = r["url"]
+    return f
+
+
+def synoptic_api(service, verbose=True, cache=True, **params):
     """
     Request data from the Synoptic API. Returns a *requests* object.
 
@@ -311,6 +339,11 @@ def synoptic_api(service, verbose=True, **params):
         API service to use, including {'auth', 'latest', 'metadata',
         'nearesttime', 'networks', 'networktypes', 'precipitation',
         'qctypes', 'timeseries', 'variables'}
+    cache : bool
+        True - Use a saved response if the same request was made before
+          and it hasn't expired (see ``response_cache``). Time series in
+          the past are saved forever, latest observations for minutes.
+        False - Always request from the API.
     **params : keyword arguments
         API request parameters (arguments).
         Lists will be converted to a comma-separated string.
@@ -375,7 +408,10 @@ def synoptic_api(service, verbose=True, **params):
     ########################
     # Make the API request #
     ########################
-    f = requests.get(URL, params)
+    if service == "auth" or not cache:
+        f = requests.get(URL, params)
+    else:
+        f = _cached_get(URL, params)
 
     if service == "auth":
         return f
@@ -445,7 +481,9 @@ def stations_metadata(verbose=True, **params):
     return df.transpose().sort_index()
 
 
-def stations_timeseries(verbose=True, rename_set_1=True, **params):
+def stations_timeseries(
+    verbose=True, rename_set_1=True, as_long=False, as_xarray=False, **params
+):
     """
     Get station data for time series.
 
@@ -479,6 +517,12 @@ def stations_timeseries(verbose=True, rename_set_1=True, **params):
             You may also look at the 'SENSOR_VARIABLES' attribute for
             more specific information, like how each set is derived.
 
+    as_long, as_xarray : bool
+        Parse all the stations at once with
+        ``parse_Synoptic.parse_timeseries`` (much faster for many stations)
+        and return a long DataFrame (station, date_time, variable, value)
+        or an xarray Dataset (station, time). Columns are not renamed and
+        wind is not broken into U and V components.
     **params : keyword arguments
         Synoptic API arguments used to specify the data request.
         **Must include ``start`` and ``end`` argument *or* ``recent``.**
@@ -514,6 +558,10 @@ def stations_timeseries(verbose=True, rename_set_1=True, **params):
 
     # Get the data
     web = synoptic_api("timeseries", verbose=verbose, **params)
+
+    if as_long or as_xarray:
+        return parse_timeseries(web.content, as_xarray=as_xarray)
+
     data = web.json()
 
     # Build a separate pandas.DataFrame for each station.
@@ -0,0 +1,332 @@
+## Brian Blaylock
+## October 19, 2026
+
+"""
+Concurrent, chunked time series requests from the Synoptic API.
+
+``stations_timeseries`` and ``get_mesowest_ts`` make one blocking request, so
+a long time range or a long list of stations is too big for one API request
+(or has to be looped by hand). ``fetch_timeseries`` splits the request into
+chunks of stations and time, requests the chunks at the same time with a
+thread pool (no more than ``rate`` requests per second), tries the chunks
+that fail again, and merges the chunks into one DataFrame.
+
+    df = fetch_timeseries(['WBB', 'KSLC', 'MTMET'],
+                          datetime(2019, 1, 1), datetime(2020, 1, 1),
+                          vars='air_temp,wind_speed')
+    df['WBB']['air_temp_set_1']
+
+The API root is an argument, so the requests can be sent to a local server
+that replays recorded JSON (see test_fetch_Synoptic.py).
+"""
+
+import time
+import threading
+import concurrent.futures
+import urllib
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+import requests
+
+import sys
+
+sys.path.append("/uufs/chpc.utah.edu/common/home/u0553130/pyBKB_v3")
+from BB_MesoWest.parse_Synoptic import parse_timeseries
+
+## Synoptic API
+API_ROOT = "https://api.synopticdata.com/v2/"
+
+## HTTP status codes that are tried again
+_RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+def format_params(params):
+    """
+    Change the keyword parameters to the API request format (like
+    synoptic_api): lower case keys, lists joined as comma separated strings,
+    and datetimes as 'YYYYmmddHHMM'.
+    """
+    params = {k.lower(): v for k, v in params.items()}
+    for key, value in params.items():
+        if isinstance(value, (list, tuple)) and key not in ["obrange"]:
+            params[key] = ",".join(map(str, value))
+    for i in ["start", "end", "expire", "attime"]:
+        if i in params and not isinstance(params[i], str):
+            params[i] = f"{params[i]:%Y%m%d%H%M}"
+    return params
+
+
+def chunk_requests(stid, start, end, stations_per_chunk=50, chunk_days=31):
+    """
+    Split a request for many stations and a long time range into chunks.
+
+    Input:
+        stid               - List of station IDs (or a comma separated string)
+        start, end         - datetime of the time range
+        stations_per_chunk - Number of stations in each chunk
+        chunk_days         - Number of days in each chunk
+
+    Return:
+        List of (stid, start, end) for each chunk. The time ranges don't
+        overlap (the API includes the start and end minute).
+    """
+    if isinstance(stid, str):
+        stid = stid.split(",")
+    stid = list(stid)
+
+    times = []
+    sDATE = start
+    while sDATE <= end:
+        eDATE = min(sDATE + timedelta(days=chunk_days) - timedelta(minutes=1), end)
+        times.append((sDATE, eDATE))
+        sDATE = eDATE + timedelta(minutes=1)
+
+    return [
+        (stid[i : i + stations_per_chunk], sDATE, eDATE)
+        for i in range(0, len(stid), stations_per_chunk)
+        for sDATE, eDATE in times
+    ]
+
+
+def rate_limiter(rate):
+    """
+    A function that waits so it isn't called more than `rate` times per
+    second by all threads. If rate is None, it doesn't wait.
+    """
+    lock = threading.Lock()
+    next_time = [time.monotonic()]
+
+    def wait():
+        if rate is None:
+            return
+        with lock:
+            now = time.monotonic()
+            delay = next_time[0] - now
+            next_time[0] = max(now, next_time[0]) + 1 / rate
+        if delay > 0:
+            time.sleep(delay)
+
+    return wait
+
+
+def fetch_json(
+    service, params, root=API_ROOT, retries=3, backoff=2, timeout=60, wait=None
+):
+    """
+    Request JSON from the Synoptic API. Connection errors, timeouts, and
+    HTTP 429/5xx are tried again after waiting backoff*2**attempt seconds.
+
+    Input:
+        service - API service, i.e. 'timeseries' (requested from
+                  stations/timeseries) or 'networks'
+        params  - API parameters (with the token)
+        wait    - A function from rate_limiter() called before each request.
+
+    Return:
+        The JSON as a dictionary. An empty STATION list if the API didn't
+        find any data (RESPONSE_CODE 2).
+    """
+    if service in {"metadata", "timeseries", "precipitation", "nearesttime", "latest"}:
+        URL = f"{root.rstrip('/')}/stations/{service}"
+    else:
+        URL = f"{root.rstrip('/')}/{service}"
+
+    for attempt in range(retries + 1):
+        if wait is not None:
+            wait()
+        try:
+            f = requests.get(URL, params, timeout=timeout)
+            if f.status_code in _RETRY_STATUS:
+                raise requests.HTTPError(f"HTTP {f.status_code}", response=f)
+            f.raise_for_status()
+            data = f.json()
+            break
+        except (requests.ConnectionError, requests.Timeout, requests.HTTPError) as e:
+            status = getattr(getattr(e, "response", None), "status_code", None)
+            if status is not None and status not in _RETRY_STATUS:
+                raise
+            if attempt == retries:
+                raise
+            time.sleep(backoff * 2 ** attempt)
+
+    code = data["SUMMARY"]["RESPONSE_CODE"]
+    msg = data["SUMMARY"]["RESPONSE_MESSAGE"]
+    decode_url = urllib.parse.unquote(f.url)
+
+    # RESPONSE_CODE 2 is no stations or data for this request (i.e. a chunk
+    # of time before a station was installed).
+    assert code in [1, 2], f"🛑 There are errors in the API request {decode_url}. {msg}"
+    data.setdefault("STATION", [])
+    return data
+
+
+def merge_timeseries(chunks):
+    """
+    Merge the JSON of timeseries requests for chunks of stations and time
+    into JSON like a single request. Observations at the same time (in more
+    than one chunk) are only kept once.
+    """
+    stations = {}
+    units = {}
+    for data in chunks:
+        units.update(data.get("UNITS", {}))
+        for stn in data["STATION"]:
+            stations.setdefault(stn["STID"], []).append(stn)
+
+    merged = []
+    for STID, parts in stations.items():
+        stn = {k: v for k, v in parts[0].items() if k != "OBSERVATIONS"}
+        senvars = {}
+        for p in parts:
+            for var, sets in p.get("SENSOR_VARIABLES", {}).items():
+                senvars.setdefault(var, {}).update(sets)
+        stn["SENSOR_VARIABLES"] = senvars
+
+        # Concatenate each observation list. Fill with None where a chunk
+        # doesn't have a variable.
+        keys = []
+        for p in parts:
+            keys += [k for k in p["OBSERVATIONS"] if k not in keys]
+        obs = {k: [] for k in keys}
+        for p in parts:
+            n = len(p["OBSERVATIONS"].get("date_time", []))
+            for k in keys:
+                obs[k] += p["OBSERVATIONS"].get(k, [None] * n)
+
+        # Sort by time and remove duplicate times
+        dates = np.array(obs["date_time"])
+        _, idx = np.unique(dates, return_index=True)
+        stn["OBSERVATIONS"] = {k: [v[i] for i in idx] for k, v in obs.items()}
+        merged.append(stn)
+
+    return {
+        "STATION": merged,
+        "UNITS": units,
+        "SUMMARY": {
+            "RESPONSE_CODE": 1,
+            "NUMBER_OF_OBJECTS": len(merged),
+            "CHUNKS": len(chunks),
+        },
+    }
+
+
+def timeseries_dataframe(data):
+    """
+    A DataFrame of merged timeseries JSON. The index is the observation time
+    and the columns are (STID, variable), i.e. df['WBB']['air_temp_set_1'].
+    The station metadata, UNITS, and SENSOR_VARIABLES are in df.attrs.
+    """
+    dfs = {}
+    for stn in data["STATION"]:
+        df = pd.DataFrame(stn["OBSERVATIONS"]).set_index("date_time")
+        df.index = pd.to_datetime(df.index)
+        dfs[stn["STID"]] = df.apply(pd.to_numeric, errors="coerce")
+
+    if len(dfs) == 0:
+        df = pd.DataFrame()
+    else:
+        df = pd.concat(dfs, axis=1).sort_index(axis=1)
+    df.attrs["STATION"] = {
+        stn["STID"]: {
+            k: v
+            for k, v in stn.items()
+            if k not in ["OBSERVATIONS", "SENSOR_VARIABLES"]
+        }
+        for stn in data["STATION"]
+    }
+    df.attrs["SENSOR_VARIABLES"] = {
+        stn["STID"]: stn["SENSOR_VARIABLES"] for stn in data["STATION"]
+    }
+    df.attrs["UNITS"] = data["UNITS"]
+    df.attrs["SUMMARY"] = data["SUMMARY"]
+    return df
+
+
+def fetch_timeseries(
+    stid,
+    start,
+    end,
+    stations_per_chunk=50,
+    chunk_days=31,
+    workers=4,
+    rate=5,
+    retries=3,
+    backoff=2,
+    root=API_ROOT,
+    token=None,
+    as_json=False,
+    as_long=False,
+    as_xarray=False,
+    verbose=True,
+    **params,
+):
+    """
+    Get the time series for many stations and a long time range. The request
+    is split into chunks (see chunk_requests) that are requested at the same
+    time, and then merged.
+
+    Input:
+        stid               - List of station IDs
+        start, end         - datetime of the time range
+        stations_per_chunk - Number of stations in each API request
+        chunk_days         - Number of days in each API request
+        workers            - Number of requests made at the same time
+        rate               - Maximum number of requests per second (None
+                             for no limit)
+        retries            - Number of times to try a failed request again
+        backoff            - Seconds to wait before the first retry
+        root               - API root URL
+        token              - API token. Default is the token from
+                             get_credentials.
+        as_json            - If True, return the merged JSON instead of a
+                             DataFrame.
+        as_long, as_xarray - If True, return a long DataFrame or an xarray
+                             Dataset from parse_Synoptic.parse_timeseries
+                             (faster for many stations).
+        **params           - Other API parameters, i.e. vars, obtimezone,
+                             units
+
+    Return:
+        DataFrame from timeseries_dataframe() (or see as_json, as_long,
+        as_xarray)
+    """
+    if token is None:
+        from BB_MesoWest.get_credentials import get_MW_token
+
+        token = get_MW_token()["token"]
+
+    chunks = chunk_requests(
+        stid, start, end, stations_per_chunk=stations_per_chunk, chunk_days=chunk_days
+    )
+    wait = rate_limiter(rate)
+
+    def get(chunk):
+        stids, sDATE, eDATE = chunk
+        chunk_params = format_params(
+            dict(params, stid=stids, start=sDATE, end=eDATE, token=token)
+        )
+        return fetch_json(
+            "timeseries",
+            chunk_params,
+            root=root,
+            retries=retries,
+            backoff=backoff,
+            wait=wait,
+        )
+
+    timer = datetime.now()
+    with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+        results = list(executor.map(get, chunks))
+    if verbose:
+        print(
+            f"\n 🚚💨 Speedy Delivery from Synoptic API [timeseries]: "
+            f"{len(chunks)} requests in {datetime.now() - timer}\n"
+        )
+
+    data = merge_timeseries(results)
+    if as_json:
+        return data
+    if as_long or as_xarray:
+        return parse_timeseries(data, as_xarray=as_xarray)
+    return timeseries_dataframe(data)
@@ -0,0 +1,281 @@
+## Brian Blaylock
+## October 19, 2026
+
+"""
+Station percentile climatologies for many stations from the Synoptic API.
+
+``get_mesowest_percentiles`` requests one station and one variable and makes
+the DATETIME array with a Python loop. ``get_percentile_cube`` requests many
+stations in each API request, makes the requests at the same time (see
+fetch_Synoptic), and returns one float32 array (station, hour of year,
+percentile).
+
+Station climatologies rarely change, so the percentiles of each station are
+saved in PERCENTILE_DIR and used again for MAX_AGE. Only the stations that
+aren't saved are requested.
+
+    P = get_percentile_cube(['WBB', 'KSLC', 'MTMET'], variable='air_temp')
+    P['PERCENTILES']    # (station, hour of year, percentile)
+    P['DATETIME']       # hours of the year (the year is 2016)
+"""
+
+import os
+import json
+import hashlib
+import concurrent.futures
+from datetime import datetime, timedelta
+import numpy as np
+
+import sys
+
+sys.path.append("/uufs/chpc.utah.edu/common/home/u0553130/pyBKB_v3")
+from BB_MesoWest.fetch_Synoptic import API_ROOT, fetch_json, rate_limiter
+
+# Directory where the station percentiles are saved. Set PYBKB_CACHE to use another
+# directory than ~/.cache/pyBKB.
+PERCENTILE_DIR = os.path.join(
+    os.environ.get("PYBKB_CACHE", os.path.expanduser("~/.cache/pyBKB")),
+    "percentile_cache",
+)
+
+# Saved percentiles older than this are requested again
+MAX_AGE = timedelta(days=30)
+
+# The percentiles are for the hours of a leap year
+_YEAR = np.datetime64("2016-01-01T00", "h")
+
+
+def percentile_dates(date_time):
+    """
+    datetime64 hours of the API percentile times ('mmddHH' strings) in 2016.
+    """
+    mmddHH = np.asarray(date_time, dtype="U6").astype(np.int64)
+    month = mmddHH // 10000
+    day = mmddHH // 100 % 100
+    hour = mmddHH % 100
+    months = (np.datetime64("2016-01", "M") + (month - 1)).astype("datetime64[h]")
+    return months + (day - 1) * 24 + hour
+
+
+def hour_of_year(DATES):
+    """Hours since January 1 00Z (2016, so February 29 is included)."""
+    return (np.asarray(DATES, dtype="datetime64[h]") - _YEAR).astype(np.int64)
+
+
+def _station_file(STID, variable, psource, percentiles, PERCENTILE_DIR):
+    """File of the saved percentiles for a station."""
+    request = json.dumps([variable, psource, percentiles])
+    h = hashlib.sha1(request.encode()).hexdigest()[:10]
+    return os.path.join(
+        PERCENTILE_DIR, "%s_%s_%s" % (psource, variable, h), "%s.npz" % STID
+    )
+
+
+def _load_station(FILE):
+    """Saved percentiles for a station, or None if not saved or too old."""
+    try:
+        age = datetime.now() - datetime.fromtimestamp(os.path.getmtime(FILE))
+        if age > MAX_AGE:
+            return None
+        with np.load(FILE) as f:
+            return {k: f[k] for k in f.files}
+    except (OSError, ValueError):
+        return None
+
+
+def _save_station(FILE, station):
+    os.makedirs(os.path.dirname(FILE), exist_ok=True)
+    TMP = FILE + ".%s.tmp" % os.getpid()
+    with open(TMP, "wb") as f:
+        np.savez(f, **station)
+    os.replace(TMP, FILE)
+
+
+def _parse_station(stn, variable):
+    """
+    Arrays of the percentiles of one station in the API response.
+
+    Return:
+        Dictionary with 'hour' (hour of year), 'values' (hour, percentile),
+        'counts', 'years', and the station 'meta' (a JSON string)
+    """
+    P = stn["PERCENTILES"]
+    hour = hour_of_year(percentile_dates(P["date_time"]))
+    order = np.argsort(hour, kind="stable")
+    values = np.array(P[variable + "_set_1"], dtype=np.float32)
+    values = values.reshape(len(hour), -1)[order]
+    counts = np.array(P.get(variable + "_counts_1", []), dtype=np.int64)
+    if len(counts) == len(hour):
+        counts = counts[order]
+    years = np.array(P.get(variable + "_years_1", []), dtype=np.int64)
+    meta = {
+        k: stn.get(k) for k in ["STID", "NAME", "LATITUDE", "LONGITUDE", "ELEVATION"]
+    }
+    return {
+        "hour": hour[order],
+        "values": values,
+        "counts": counts,
+        "years": years,
+        "meta": np.array(json.dumps(meta)),
+    }
+
+
+def get_percentile_cube(
+    stid,
+    variable="air_temp",
+    percentiles=[0, 5, 25, 50, 75, 95, 100],
+    psource="PERCENTILES2",
+    sDATE=datetime(2016, 1, 1, 0),
+    eDATE=datetime(2016, 12, 31, 23),
+    stations_per_request=25,
+    workers=4,
+    rate=5,
+    root=API_ROOT,
+    token=None,
+    cache=True,
+    PERCENTILE_DIR=PERCENTILE_DIR,
+    verbose=True,
+):
+    """
+    Station history percentiles for many stations and a single variable.
+    Uses a 30 day window centered on the hour.
+
+    Input:
+        stid                 - List of station IDs
+        variable             - A single variable, i.e. 'air_temp'
+        percentiles          - A list of percentiles to retrieve, or 'ALL'
+        psource              - 'PERCENTILES2' or 'PERCENTILES_HRRR'
+        sDATE, eDATE         - Hours of the year returned. The year is 2016
+                               so it includes leap year. Default is the
+                               whole year.
+        stations_per_request - Number of stations in each API request
+        workers              - Number of requests made at the same time
+        rate                 - Maximum number of requests per second
+        token                - API token. Default is the token from
+                               get_credentials.
+        cache                - If True, use and save the percentiles in
+                               PERCENTILE_DIR.
+
+    Return:
+        A dictionary with
+            'STID', 'NAME', 'LAT', 'LON', 'ELEVATION' - Station arrays
+            'DATETIME'         - datetime64 hours from sDATE to eDATE
+            'PERCENTILES_LIST' - The percentiles
+            'PERCENTILES'      - float32 array (station, hour, percentile).
+                                 NaN for stations the API doesn't have.
+            'counts'           - Number of observations (station, hour)
+    """
+    if isinstance(stid, str):
+        stid = stid.split(",")
+    stid = list(stid)
+    if percentiles != "ALL":
+        percentiles = [int(p) for p in percentiles]
+
+    # Every hour of the year is saved, so the saved percentiles can be used
+    # for any sDATE and eDATE.
+    stations = {}
+    FILES = {
+        STID: _station_file(STID, variable, psource, percentiles, PERCENTILE_DIR)
+        for STID in stid
+    }
+    if cache:
+        for STID in stid:
+            station = _load_station(FILES[STID])
+            if station is not None:
+                stations[STID] = station
+
+    need = [STID for STID in stid if STID not in stations]
+    if len(need) > 0:
+        if token is None:
+            from BB_MesoWest.get_credentials import get_MW_token
+
+            token = get_MW_token()["token"]
+
+        wait = rate_limiter(rate)
+        params = {
+            "token": token,
+            "vars": variable,
+            "psource": psource,
+            "start": "010100",
+            "end": "123123",
+        }
+        if percentiles != "ALL":
+            params["percentiles"] = ",".join(map(str, percentiles))
+
+        def get(stids):
+            return fetch_json(
+                "percentiles", dict(params, stid=",".join(stids)), root=root, wait=wait
+            )
+
+        chunks = [
+            need[i : i + stations_per_request]
+            for i in range(0, len(need), stations_per_request)
+        ]
+        timer = datetime.now()
+        with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+            results = list(executor.map(get, chunks))
+        if verbose:
+            print(
+                f"\n 🚚💨 Speedy Delivery from Synoptic API [percentiles]: "
+                f"{len(need)} stations in {len(chunks)} requests in "
+                f"{datetime.now() - timer}\n"
+            )
+
+        for data in results:
+            for stn in data["STATION"]:
+                if stn["STID"] not in FILES:
+                    continue
+                station = _parse_station(stn, variable)
+                station["percentile_list"] = np.array(
+                    data.get("PERCENTILE_LIST", percentiles), dtype=float
+                )
+                stations[stn["STID"]] = station
+                if cache:
+                    _save_station(FILES[stn["STID"]], station)
+
+    # The percentile cube for the requested hours
+    DATETIME = np.arange(
+        np.datetime64(sDATE.replace(year=2016), "h"),
+        np.datetime64(eDATE.replace(year=2016), "h") + 1,
+    )
+    hours = hour_of_year(DATETIME)
+    if len(stations) > 0:
+        PERCENTILE_LIST = next(iter(stations.values()))["percentile_list"]
+    else:
+        PERCENTILE_LIST = np.array(percentiles, dtype=float)
+    n = len(PERCENTILE_LIST)
+
+    cube = np.full((len(stid), len(hours), n), np.nan, dtype=np.float32)
+    counts = np.zeros((len(stid), len(hours)), dtype=np.int64)
+    meta = []
+    for s, STID in enumerate(stid):
+        if STID not in stations:
+            meta.append({"STID": STID})
+            continue
+        station = stations[STID]
+        meta.append(json.loads(str(station["meta"])))
+
+        # Position of each requested hour in the station's hours
+        k = np.searchsorted(station["hour"], hours)
+        k = np.clip(k, 0, len(station["hour"]) - 1)
+        found = station["hour"][k] == hours
+        # The API adds the number of observations after the percentiles
+        cube[s, found] = station["values"][k[found], :n]
+        if len(station["counts"]) == len(station["hour"]):
+            counts[s, found] = station["counts"][k[found]]
+
+    def meta_array(name):
+        return np.array([m.get(name) for m in meta], dtype=float)
+
+    return {
+        "STID": np.array(stid),
+        "NAME": np.array([m.get("NAME", "") for m in meta]),
+        "LAT": meta_array("LATITUDE"),
+        "LON": meta_array("LONGITUDE"),
+        "ELEVATION": meta_array("ELEVATION"),
+        "variable": variable,
+        "DATETIME": DATETIME,
+        "PERCENTILES_LIST": PERCENTILE_LIST,
+        "PERCENTILES": cube,
+        "counts": counts,
+    }
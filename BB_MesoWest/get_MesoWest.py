@@ -20,6 +20,7 @@ Requires a MesoWest/SynopticLabs API token. You can get your own token here:
 """
 
 import sys
+import json
 from datetime import datetime
 import numpy as np
 import requests
@@ -27,6 +28,8 @@ import urllib
 import pandas as pd
 
 from .get_credentials import get_MW_token
+from .response_cache import cached_request
+from .fetch_percentiles import percentile_dates
 
 from BB_wx_calcs.wind import spddir_to_uv
 
@@ -53,8 +56,13 @@ default_vars = 'altimeter,' \
              + 'air_temp,' \
              + 'relative_humidity,' \
              + 'dew_point_temperature'
-def load_json(URL, params={}, verbose=True):
-    '''Return json data as a dictionary from a URL'''
+def load_json(URL, params={}, verbose=True, cache=True):
+    '''
+    Return json data as a dictionary from a URL
+
+    If cache is True, a saved response is used if the same request was made
+    before and it hasn't expired (see response_cache).
+    '''
         
     # Get my MesoWest API Token: INSERT YOUR TOKEN HERE
     params['token'] = get_MW_token()
@@ -84,13 +92,25 @@ def load_json(URL, params={}, verbose=True):
     ####################################################################
     # Make the request and return the JSON data
     ####################################################################
-    f = requests.get(URL, params)
-    
-    decoded_url = urllib.parse.unquote(f.url)
+    if not cache:
+        f = requests.get(URL, params)
+        decoded_url = urllib.parse.unquote(f.url)
+        if verbose:
+            print('\n🚚 Retrieved data from MesoWest API: %s\n' % decoded_url)
+        return decoded_url, f.json()
+
+    def fetch():
+        f = requests.get(URL, params)
+        data = f.json()
+        return f.url, f.content, f.ok and data['SUMMARY']['RESPONSE_CODE'] == 1
+
+    r = cached_request(URL, params, fetch)
+    decoded_url = urllib.parse.unquote(r['url'])
     if verbose:
-        print('\n🚚 Retrieved data from MesoWest API: %s\n' % decoded_url)
+        source = 'cache' if r['cached'] else 'MesoWest API'
+        print('\n🚚 Retrieved data from %s: %s\n' % (source, decoded_url))
     
-    return decoded_url, f.json()
+    return decoded_url, json.loads(r['content'])
 
 def get_network_ids(network_names='nws/faa,raws', verbose=True):
     """
@@ -408,6 +428,7 @@ def get_mesowest_percentiles(stn, variable='air_temp',
     """
     Station history percentiles for a single station and single variable:
     Uses a 30 day window centered on the hour.
+    For many stations, use fetch_percentiles.get_percentile_cube.
     Data at top of each hour of the year, including leap year.
     DATETIME returned is set to year 2016 to include leap year, but the data is
     is not limited to that year.
@@ -465,7 +486,7 @@ def get_mesowest_percentiles(stn, variable='air_temp',
                        'LON': float(stn['LONGITUDE']),
                        'variable': variable,
                        'counts': np.array(stn['PERCENTILES'][variable+'_counts_1'], dtype='int'),
-                       'DATETIME': np.array([datetime(2016, int(DATE[0:2]), int(DATE[2:4]), int(DATE[4:6])) for DATE in stn['PERCENTILES']['date_time']],),
+                       'DATETIME': percentile_dates(stn['PERCENTILES']['date_time']).astype(datetime),
                        'PERCENTILES_LIST': np.array(data['PERCENTILE_LIST'])
                       }
         if psource == 'PERCENTILES2':
@@ -0,0 +1,190 @@
+## Brian Blaylock
+## October 19, 2026
+
+"""
+Fast parsing of Synoptic API time series JSON.
+
+``stations_timeseries`` makes a DataFrame for each station, converts each
+column with ``pd.to_numeric``, renames the columns, and concatenates the
+DataFrames. For a request with 1000 stations that takes longer than the
+download. ``parse_timeseries`` converts the OBSERVATIONS straight to NumPy
+arrays instead:
+
+    - Each variable is one float32 array for all the stations, filled with
+      one conversion per station (None is NaN).
+    - The date_time strings are converted to datetime64 once for each
+      different list of times (stations with the same times share it).
+
+The result is a long DataFrame (station, date_time, variable, value) or an
+xarray Dataset with dimensions (station, time). If orjson is installed, it is
+used to decode the JSON.
+
+    data = load_json_bytes(web.content)
+    df = parse_timeseries(data)                     # long DataFrame
+    ds = parse_timeseries(data, as_xarray=True)     # ds['air_temp_set_1']
+"""
+
+import json
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+
+def load_json_bytes(content):
+    """Decode JSON (bytes or str) with orjson, if it is installed."""
+    return _loads(content)
+
+
+def _parse_times(times):
+    """
+    datetime64 of the API date_time strings. The UTC offset ('Z' or
+    '-0600' for obtimezone='local') is dropped, so local times are the
+    local clock time.
+    """
+    return np.array(times, dtype="U19").astype("datetime64[s]")
+
+
+def parse_timeseries(data, variables=None, as_xarray=False, dropna=True):
+    """
+    Parse the JSON from the timeseries service.
+
+    Input:
+        data      - The JSON as a dictionary (or bytes, which are decoded)
+        variables - List of observation names to parse, i.e.
+                    ['air_temp_set_1']. Default is every numeric variable.
+        as_xarray - False: Return a long DataFrame with columns station,
+                           date_time, variable, and value.
+                    True:  Return an xarray Dataset with a variable for each
+                           observation name and dimensions (station, time).
+        dropna    - Leave the NaN values out of the long DataFrame.
+
+    Return:
+        The DataFrame or Dataset. The station metadata is in the attrs (and
+        latitude, longitude, and ELEVATION are coordinates of the Dataset).
+        Variables that aren't numbers (i.e. weather_condition) are listed in
+        attrs['NON_NUMERIC'] and not parsed.
+    """
+    if isinstance(data, (bytes, str)):
+        data = load_json_bytes(data)
+    stations = data["STATION"]
+    STIDs = [stn["STID"] for stn in stations]
+    obs = [stn["OBSERVATIONS"] for stn in stations]
+    # Integer arrays, even when there aren't any stations
+    lengths = np.array([len(o.get("date_time", [])) for o in obs], dtype=np.intp)
+    starts = np.zeros(len(obs) + 1, dtype=np.intp)
+    starts[1:] = np.cumsum(lengths)
+    N = starts[-1]
+
+    # Time for every observation. Parse each different time list once.
+    parsed = {}
+    time = np.empty(N, dtype="datetime64[s]")
+    for s, o in enumerate(obs):
+        key = tuple(o.get("date_time", []))
+        if key not in parsed:
+            parsed[key] = _parse_times(key)
+        time[starts[s] : starts[s + 1]] = parsed[key]
+
+    # Observation names in the order they first appear
+    if variables is None:
+        variables = list(dict.fromkeys(k for o in obs for k in o if k != "date_time"))
+
+    # One float32 array for each variable for all the stations
+    values = {}
+    non_numeric = []
+    for var in variables:
+        v = np.full(N, np.nan, dtype=np.float32)
+        try:
+            for s, o in enumerate(obs):
+                if var in o and lengths[s] > 0:
+                    v[starts[s] : starts[s + 1]] = np.array(o[var], dtype=np.float32)
+        except (ValueError, TypeError):
+            non_numeric.append(var)
+            continue
+        values[var] = v
+    variables = list(values)
+
+    attrs = {
+        "STATION": {
+            stn["STID"]: {
+                k: v
+                for k, v in stn.items()
+                if k not in ["OBSERVATIONS", "SENSOR_VARIABLES"]
+            }
+            for stn in stations
+        },
+        "SENSOR_VARIABLES": {
+            stn["STID"]: stn.get("SENSOR_VARIABLES", {}) for stn in stations
+        },
+        "UNITS": data.get("UNITS", {}),
+        "SUMMARY": data.get("SUMMARY", {}),
+        "NON_NUMERIC": non_numeric,
+    }
+
+    station = np.repeat(np.arange(len(STIDs)), lengths)
+
+    if as_xarray:
+        import xarray as xr
+
+        all_times, t = np.unique(time, return_inverse=True)
+        data_vars = {}
+        for var in variables:
+            grid = np.full((len(STIDs), len(all_times)), np.nan, dtype=np.float32)
+            grid[station, t] = values[var]
+            data_vars[var] = (("station", "time"), grid)
+
+        def meta(name):
+            return np.array(
+                [pd.to_numeric(stn.get(name), errors="coerce") for stn in stations],
+                dtype=float,
+            )
+
+        ds = xr.Dataset(
+            data_vars,
+            coords={
+                "station": STIDs,
+                "time": all_times,
+                "latitude": ("station", meta("LATITUDE")),
+                "longitude": ("station", meta("LONGITUDE")),
+                "ELEVATION": ("station", meta("ELEVATION")),
+            },
+        )
+        ds.attrs["UNITS"] = attrs["UNITS"]
+        ds.attrs["NON_NUMERIC"] = non_numeric
+        # Nested dictionaries can't be netCDF attributes, so these are on
+        # the Python object only.
+        ds.attrs["STATION"] = attrs["STATION"]
+        ds.attrs["SENSOR_VARIABLES"] = attrs["SENSOR_VARIABLES"]
+        return ds
+
+    # Long DataFrame: stack the variables
+    columns = {"station": [], "date_time": [], "variable": [], "value": []}
+    for i, var in enumerate(variables):
+        v = values[var]
+        keep = ~np.isnan(v) if dropna else slice(None)
+        columns["station"].append(station[keep])
+        columns["date_time"].append(time[keep])
+        columns["variable"].append(np.full(len(v[keep]), i))
+        columns["value"].append(v[keep])
+    if len(variables) == 0:
+        columns = {k: [np.array([], dtype=int)] for k in columns}
+
+    df = pd.DataFrame(
+        {
+            "station": pd.Categorical.from_codes(
+                np.concatenate(columns["station"]), categories=STIDs
+            ),
+            "date_time": np.concatenate(columns["date_time"]).astype("datetime64[s]"),
+            "variable": pd.Categorical.from_codes(
+                np.concatenate(columns["variable"]), categories=variables
+            ),
+            "value": np.concatenate(columns["value"]).astype(np.float32),
+        }
+    )
+    df.attrs = attrs
+    return df
@@ -0,0 +1,312 @@
+## Brian Blaylock
+## October 19, 2026
+
+"""
+On-disk cache for Synoptic/MesoWest API responses.
+
+The dashboards request the same metadata, latest observations, and station
+info many times each hour, and a time series for a time range in the past
+never changes. The API responses are saved in CACHE_DIR (gzip compressed JSON,
+in ~/.cache/pyBKB/ or $PYBKB_CACHE) and used again until they expire.
+
+    Key - The API service and the request parameters (lower case keys,
+          sorted, without the token), so the same request gets the same key
+          no matter how the URL was written.
+    TTL - Seconds a response is used for each service (TTL, DEFAULT_TTL).
+          Time series and precipitation requests that end more than
+          CLOSED_AFTER ago, and nearesttime requests in the past, never
+          expire.
+
+When the files in CACHE_DIR are bigger than MAX_BYTES, the responses used
+least recently are removed. cache_stats() returns the number of hits and
+misses in this Python session.
+
+    r = cached_request(URL, params, fetch)   # r['content'] is the JSON
+"""
+
+import os
+import json
+import gzip
+import time
+import hashlib
+import threading
+import urllib.parse
+from datetime import datetime, timedelta
+
+# Directory where the responses are saved. Set PYBKB_CACHE to use another
+# directory than ~/.cache/pyBKB.
+CACHE_DIR = os.path.join(
+    os.environ.get("PYBKB_CACHE", os.path.expanduser("~/.cache/pyBKB")),
+    "response_cache",
+)
+
+# Size of the cache (bytes) before the least recently used responses are removed
+MAX_BYTES = 500 * 1024 ** 2
+
+# Seconds a response is used for each service. None never expires.
+TTL = {
+    "latest": 5 * 60,
+    "nearesttime": 5 * 60,
+    "timeseries": 5 * 60,
+    "precipitation": 5 * 60,
+    "metadata": 60 * 60,
+    "networks": 24 * 60 * 60,
+    "networktypes": 24 * 60 * 60,
+    "variables": 24 * 60 * 60,
+    "qctypes": 24 * 60 * 60,
+    "percentiles": 24 * 60 * 60,
+}
+DEFAULT_TTL = 60 * 60
+
+# Observations more than this long ago aren't expected to change.
+CLOSED_AFTER = timedelta(hours=2)
+
+# Parameters that aren't part of the key
+_NOT_KEY = {"token"}
+
+_STATS = {"hits": 0, "misses": 0, "expired": 0, "writes": 0, "evictions": 0}
+_LOCK = threading.Lock()
+
+# Size of the files in the cache (computed the first time it is needed)
+_SIZE = {}
+
+
+def _count(stat, n=1):
+    with _LOCK:
+        _STATS[stat] += n
+
+
+def _parse_time(value):
+    """A datetime from a datetime or an API 'YYYYmmddHHMM' string."""
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.strptime(str(value), "%Y%m%d%H%M")
+    except ValueError:
+        return None
+
+
+def normalize_params(URL, params={}):
+    """
+    Service name and the request parameters from the URL and the params
+    dictionary, with lower case keys and string values, without the token.
+    """
+    URL = urllib.parse.urlparse(URL)
+    service = URL.path.rstrip("/").split("/")[-1]
+    both = dict(urllib.parse.parse_qsl(URL.query))
+    both.update(params)
+    normal = {}
+    for k, v in both.items():
+        k = k.lower()
+        if k in _NOT_KEY:
+            continue
+        if isinstance(v, (list, tuple)):
+            v = ",".join(map(str, v))
+        elif isinstance(v, datetime):
+            v = f"{v:%Y%m%d%H%M}"
+        normal[k] = str(v).strip()
+    return service, normal
+
+
+def cache_key(service, params):
+    """Name of the cached response for a normalized request."""
+    h = hashlib.sha1(json.dumps([service, sorted(params.items())]).encode())
+    return "%s_%s" % (service, h.hexdigest())
+
+
+def ttl_for(service, params):
+    """Seconds to keep a response (None if it never expires)."""
+    now = datetime.utcnow()
+    if service in ["timeseries", "precipitation"] and "end" in params:
+        end = _parse_time(params["end"])
+        if end is not None and end < now - CLOSED_AFTER:
+            return None
+    if service == "nearesttime" and "attime" in params:
+        attime = _parse_time(params["attime"])
+        if attime is not None and attime < now - CLOSED_AFTER:
+            return None
+    return TTL.get(service, DEFAULT_TTL)
+
+
+def _file(key, CACHE_DIR):
+    return os.path.join(CACHE_DIR, key[-2:], "%s.json.gz" % key)
+
+
+def get_cached(key, CACHE_DIR=CACHE_DIR):
+    """
+    The cached response for a key, or None if it isn't cached or expired.
+
+    Return:
+        Dictionary with 'url' and 'content' (the JSON as bytes)
+    """
+    FILE = _file(key, CACHE_DIR)
+    try:
+        with gzip.open(FILE, "rb") as f:
+            meta = json.loads(f.readline())
+            content = f.read()
+    except (OSError, EOFError, ValueError):
+        _count("misses")
+        return None
+
+    if meta["expires"] is not None and meta["expires"] < time.time():
+        _count("expired")
+        _count("misses")
+        try:
+            os.remove(FILE)
+        except OSError:
+            pass
+        return None
+
+    # The modified time is when the response was last used (for eviction).
+    try:
+        os.utime(FILE)
+    except OSError:
+        pass
+    _count("hits")
+    return {"url": meta["url"], "content": content}
+
+
+def put_cached(key, url, content, ttl, CACHE_DIR=CACHE_DIR, max_bytes=MAX_BYTES):
+    """
+    Save a response.
+
+    Input:
+        url     - The request URL (without the token)
+        content - The JSON as bytes
+        ttl     - Seconds to keep the response (None to keep it forever)
+    """
+    FILE = _file(key, CACHE_DIR)
+    if not os.path.exists(os.path.dirname(FILE)):
+        os.makedirs(os.path.dirname(FILE), exist_ok=True)
+    meta = {"expires": None if ttl is None else time.time() + ttl, "url": url}
+    TMP = FILE + ".%s.%s.tmp" % (os.getpid(), threading.get_ident())
+    with gzip.open(TMP, "wb", compresslevel=6) as f:
+        f.write(json.dumps(meta).encode() + b"\n")
+        f.write(content)
+    # Size of the response this one replaces
+    try:
+        old_size = os.path.getsize(FILE)
+    except OSError:
+        old_size = 0
+    os.replace(TMP, FILE)
+    _count("writes")
+
+    with _LOCK:
+        if CACHE_DIR not in _SIZE:
+            _SIZE[CACHE_DIR] = sum(
+                os.path.getsize(F) for F, _ in _cached_files(CACHE_DIR)
+            )
+        else:
+            _SIZE[CACHE_DIR] += os.path.getsize(FILE) - old_size
+        over = _SIZE[CACHE_DIR] > max_bytes
+    if over:
+        evict(max_bytes, CACHE_DIR=CACHE_DIR)
+
+
+def _cached_files(CACHE_DIR):
+    """(file, last used) for every cached response."""
+    files = []
+    for root, dirs, names in os.walk(CACHE_DIR):
+        for name in names:
+            if name.endswith(".json.gz"):
+                F = os.path.join(root, name)
+                try:
+                    files.append((F, os.path.getmtime(F)))
+                except OSError:
+                    pass
+    return files
+
+
+def evict(max_bytes=MAX_BYTES, CACHE_DIR=CACHE_DIR):
+    """
+    Remove the least recently used responses until the cache is smaller than
+    max_bytes. Return the number of responses removed.
+    """
+    files = sorted(_cached_files(CACHE_DIR), key=lambda f: f[1])
+    sizes = [os.path.getsize(F) for F, _ in files]
+    total = sum(sizes)
+    removed = 0
+    for (F, _), size in zip(files, sizes):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(F)
+        except OSError:
+            pass
+        total -= size
+        removed += 1
+    with _LOCK:
+        _SIZE[CACHE_DIR] = total
+    _count("evictions", removed)
+    return removed
+
+
+def clear_cache(CACHE_DIR=CACHE_DIR):
+    """Remove every cached response."""
+    for F, _ in _cached_files(CACHE_DIR):
+        os.remove(F)
+    with _LOCK:
+        _SIZE[CACHE_DIR] = 0
+
+
+def cache_stats(CACHE_DIR=CACHE_DIR):
+    """
+    Number of cache hits, misses (including expired responses), writes, and
+    evictions in this Python session, and the number and size of the cached
+    responses.
+    """
+    with _LOCK:
+        stats = dict(_STATS)
+    files = _cached_files(CACHE_DIR)
+    stats["responses"] = len(files)
+    stats["bytes"] = sum(os.path.getsize(F) for F, _ in files)
+    requests = stats["hits"] + stats["misses"]
+    stats["hit rate"] = stats["hits"] / requests if requests else 0
+    return stats
+
+
+def reset_stats():
+    """Set the hit and miss counts to zero."""
+    with _LOCK:
+        for k in _STATS:
+            _STATS[k] = 0
+
+
+def cached_request(URL, params, fetch, ttl="default", CACHE_DIR=CACHE_DIR):
+    """
+    Return a cached response, or fetch and save it.
+
+    Input:
+        URL    - The API URL (may include a query string)
+        params - The request parameters
+        fetch  - A function that makes the request and returns (url, content,
+                 ok), where content is the JSON as bytes and ok is False if
+                 the response shouldn't be saved (i.e. an API error).
+        ttl    - Seconds to keep the response. Default is ttl_for() the
+                 service.
+
+    Return:
+        Dictionary with 'url', 'content', and 'cached' (True if it was read
+        from the cache)
+    """
+    service, normal = normalize_params(URL, params)
+    key = cache_key(service, normal)
+    hit = get_cached(key, CACHE_DIR=CACHE_DIR)
+    if hit is not None:
+        hit["cached"] = True
+        return hit
+
+    url, content, ok = fetch()
+    if ok:
+        if ttl == "default":
+            ttl = ttl_for(service, normal)
+        # Don't save the token
+        parts = urllib.parse.urlparse(url)
+        query = [
+            (k, v)
+            for k, v in urllib.parse.parse_qsl(parts.query)
+            if k.lower() not in _NOT_KEY
+        ]
+        url = parts._replace(query=urllib.parse.urlencode(query)).geturl()
+        put_cached(key, url, content, ttl, CACHE_DIR=CACHE_DIR)
+    return {"url": url, "content": content, "cached": False}
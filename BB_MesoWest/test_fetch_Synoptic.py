@@ -0,0 +1,167 @@
+"""
+Test fetch_Synoptic against a local server that replays recorded JSON.
+
+    python -m unittest BB_MesoWest.test_fetch_Synoptic
+"""
+
+import json
+import threading
+import unittest
+import urllib.parse
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import sys
+
+sys.path.append("/uufs/chpc.utah.edu/common/home/u0553130/pyBKB_v3")
+from BB_MesoWest import fetch_Synoptic as fs
+
+# Recorded timeseries for each station (hourly for 10 days). The server
+# replays the observations in the requested time range.
+sDATE = datetime(2020, 1, 1)
+DATES = [sDATE + timedelta(hours=h) for h in range(240)]
+RECORDED = {
+    STID: {
+        "STID": STID,
+        "NAME": "Station %s" % STID,
+        "LATITUDE": "40.%s" % n,
+        "LONGITUDE": "-111.%s" % n,
+        "SENSOR_VARIABLES": {"air_temp": {"air_temp_set_1": {}}},
+        "OBSERVATIONS": {
+            "date_time": [D.strftime("%Y-%m-%dT%H:%M:%SZ") for D in DATES],
+            "air_temp_set_1": [n + h / 10 for h in range(len(DATES))],
+        },
+    }
+    for n, STID in enumerate(["WBB", "KSLC", "MTMET", "UKBKB", "NAA"])
+}
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        URL = urllib.parse.urlparse(self.path)
+        params = dict(urllib.parse.parse_qsl(URL.query))
+        with server.lock:
+            server.requests.append(params)
+            fail = server.fail > 0
+            server.fail -= 1
+        if fail:
+            self.send_response(503)
+            self.end_headers()
+            return
+
+        start = datetime.strptime(params["start"], "%Y%m%d%H%M")
+        end = datetime.strptime(params["end"], "%Y%m%d%H%M")
+        stations = []
+        for STID in params["stid"].split(","):
+            stn = dict(RECORDED[STID])
+            keep = [i for i, D in enumerate(DATES) if start <= D <= end]
+            if len(keep) == 0:
+                continue
+            stn["OBSERVATIONS"] = {
+                k: [v[i] for i in keep] for k, v in stn["OBSERVATIONS"].items()
+            }
+            stations.append(stn)
+        if len(stations) == 0:
+            summary = {"RESPONSE_CODE": 2, "RESPONSE_MESSAGE": "No stations found"}
+        else:
+            summary = {"RESPONSE_CODE": 1, "RESPONSE_MESSAGE": "OK"}
+        body = json.dumps(
+            {"STATION": stations, "UNITS": {"air_temp": "Celsius"}, "SUMMARY": summary}
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class FetchTestCase(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), ReplayHandler)
+        self.server.lock = threading.Lock()
+        self.server.requests = []
+        self.server.fail = 0
+        self.root = "http://127.0.0.1:%s/v2/" % self.server.server_port
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def fetch(self, stid, start, end, **kwargs):
+        kwargs.setdefault("stations_per_chunk", 2)
+        kwargs.setdefault("chunk_days", 3)
+        return fs.fetch_timeseries(
+            stid,
+            start,
+            end,
+            root=self.root,
+            token="TEST",
+            rate=None,
+            backoff=0,
+            verbose=False,
+            **kwargs
+        )
+
+    def test_chunks(self):
+        """Chunks cover every station and minute once"""
+        chunks = fs.chunk_requests(list(RECORDED), DATES[0], DATES[-1], 2, 3)
+        self.assertEqual(len(chunks), 3 * 4)
+        self.assertEqual(chunks[0][2] + timedelta(minutes=1), chunks[1][1])
+        self.assertEqual(chunks[3][2], DATES[-1])
+
+    def test_merged_matches_recorded(self):
+        """Chunks merge to the recorded time series"""
+        df = self.fetch(list(RECORDED), DATES[0], DATES[-1])
+        self.assertEqual(len(self.server.requests), 12)
+        self.assertEqual(sorted(df.columns.get_level_values(0)), sorted(RECORDED))
+        self.assertEqual(len(df), len(DATES))
+        for STID, stn in RECORDED.items():
+            self.assertEqual(
+                list(df[STID]["air_temp_set_1"]),
+                stn["OBSERVATIONS"]["air_temp_set_1"],
+            )
+        self.assertEqual(df.attrs["STATION"]["WBB"]["NAME"], "Station WBB")
+
+    def test_retry(self):
+        """Transient server errors are tried again"""
+        self.server.fail = 2
+        df = self.fetch(["WBB"], DATES[0], DATES[-1], workers=1, retries=3)
+        self.assertEqual(len(df), len(DATES))
+        self.assertEqual(len(self.server.requests), 4 + 2)
+
+    def test_long(self):
+        """Chunks parse to a long DataFrame"""
+        df = self.fetch(list(RECORDED), DATES[0], DATES[-1], as_long=True)
+        self.assertEqual(len(df), len(RECORDED) * len(DATES))
+        wbb = df[df.station == "WBB"]
+        self.assertEqual(list(wbb.date_time)[-1], DATES[-1])
+        self.assertAlmostEqual(float(wbb.value.iloc[-1]), 23.9, places=5)
+
+    def test_no_data(self):
+        """Chunks without data (RESPONSE_CODE 2) are empty"""
+        df = self.fetch(["WBB"], DATES[-1], DATES[-1] + timedelta(days=5))
+        self.assertEqual(len(df), 1)
+
+    def test_no_data_long(self):
+        """A request without any data parses to an empty long DataFrame"""
+        start = DATES[-1] + timedelta(hours=1)
+        df = self.fetch(["WBB"], start, start + timedelta(days=5), as_long=True)
+        self.assertEqual(len(df), 0)
+        self.assertEqual(
+            list(df.columns), ["station", "date_time", "variable", "value"]
+        )
+
+    def test_no_data_xarray(self):
+        """A request without any data parses to an empty Dataset"""
+        start = DATES[-1] + timedelta(hours=1)
+        ds = self.fetch(["WBB"], start, start + timedelta(days=5), as_xarray=True)
+        self.assertEqual(ds.sizes["station"], 0)
+        self.assertEqual(ds.sizes["time"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
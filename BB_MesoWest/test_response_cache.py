@@ -0,0 +1,130 @@
+"""
+Test the Synoptic API response cache in a temporary directory.
+
+    python -m unittest BB_MesoWest.test_response_cache
+"""
+
+import os
+import gzip
+import json
+import time
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+import sys
+
+sys.path.append("/uufs/chpc.utah.edu/common/home/u0553130/pyBKB_v3")
+from BB_MesoWest import response_cache as rc
+
+URL = "https://api.synopticdata.com/v2/stations/timeseries"
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.CACHE_DIR = tempfile.mkdtemp()
+        rc.reset_stats()
+
+    def tearDown(self):
+        shutil.rmtree(self.CACHE_DIR)
+        rc._SIZE.pop(self.CACHE_DIR, None)
+
+    def fetch(self, content):
+        def fetch():
+            self.fetched += 1
+            return URL + "?stid=WBB&token=secret", content, True
+
+        self.fetched = 0
+        return fetch
+
+    def test_default_dir(self):
+        self.assertFalse(
+            rc.CACHE_DIR.startswith(os.path.dirname(os.path.abspath(rc.__file__)))
+        )
+
+    def test_key(self):
+        a = rc.cache_key(*rc.normalize_params(URL + "?STID=WBB&token=a", {}))
+        b = rc.cache_key(*rc.normalize_params(URL, {"stid": "WBB", "token": "b"}))
+        c = rc.cache_key(*rc.normalize_params(URL, {"stid": "KSLC"}))
+        self.assertEqual(a, b)
+        self.assertNotEqual(a, c)
+
+    def test_gzip_round_trip(self):
+        content = json.dumps({"STATION": [{"STID": "WBB", "T": [1.5] * 100}]}).encode()
+        fetch = self.fetch(content)
+        params = {"stid": "WBB", "token": "secret"}
+
+        r = rc.cached_request(URL, params, fetch, CACHE_DIR=self.CACHE_DIR)
+        self.assertFalse(r["cached"])
+        r = rc.cached_request(URL, params, fetch, CACHE_DIR=self.CACHE_DIR)
+        self.assertTrue(r["cached"])
+        self.assertEqual(r["content"], content)
+        self.assertNotIn("secret", r["url"])
+        self.assertEqual(self.fetched, 1)
+
+        # The file is gzip compressed, with the meta data on the first line
+        key = rc.cache_key(*rc.normalize_params(URL, params))
+        with gzip.open(rc._file(key, self.CACHE_DIR), "rb") as f:
+            meta = json.loads(f.readline())
+            self.assertEqual(f.read(), content)
+        self.assertNotIn("secret", meta["url"])
+
+        stats = rc.cache_stats(CACHE_DIR=self.CACHE_DIR)
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+    def test_ttl_expiry(self):
+        rc.put_cached("latest_a", URL, b"{}", 0.2, CACHE_DIR=self.CACHE_DIR)
+        rc.put_cached("latest_b", URL, b"{}", None, CACHE_DIR=self.CACHE_DIR)
+        self.assertIsNotNone(rc.get_cached("latest_a", CACHE_DIR=self.CACHE_DIR))
+        time.sleep(0.3)
+        self.assertIsNone(rc.get_cached("latest_a", CACHE_DIR=self.CACHE_DIR))
+        self.assertFalse(os.path.exists(rc._file("latest_a", self.CACHE_DIR)))
+        # Never expires
+        self.assertIsNotNone(rc.get_cached("latest_b", CACHE_DIR=self.CACHE_DIR))
+        self.assertEqual(rc.cache_stats(CACHE_DIR=self.CACHE_DIR)["expired"], 1)
+
+    def test_ttl_for(self):
+        now = datetime.utcnow()
+        closed = {"end": (now - timedelta(days=2)).strftime("%Y%m%d%H%M")}
+        recent = {"end": now.strftime("%Y%m%d%H%M")}
+        self.assertIsNone(rc.ttl_for("timeseries", closed))
+        self.assertEqual(rc.ttl_for("timeseries", recent), rc.TTL["timeseries"])
+        self.assertEqual(rc.ttl_for("unknown", {}), rc.DEFAULT_TTL)
+
+    def test_lru_eviction(self):
+        content = os.urandom(1000)  # Doesn't compress
+        for n, key in enumerate(["a", "b", "c"]):
+            rc.put_cached("k_" + key, URL, content, None, CACHE_DIR=self.CACHE_DIR)
+            # Modified times in the past, in order of use
+            t = time.time() - 100 + n
+            os.utime(rc._file("k_" + key, self.CACHE_DIR), (t, t))
+        size = os.path.getsize(rc._file("k_a", self.CACHE_DIR))
+
+        # Using 'a' makes 'b' the least recently used
+        self.assertIsNotNone(rc.get_cached("k_a", CACHE_DIR=self.CACHE_DIR))
+        removed = rc.evict(2 * size, CACHE_DIR=self.CACHE_DIR)
+        self.assertEqual(removed, 1)
+        self.assertIsNone(rc.get_cached("k_b", CACHE_DIR=self.CACHE_DIR))
+        self.assertIsNotNone(rc.get_cached("k_a", CACHE_DIR=self.CACHE_DIR))
+        self.assertIsNotNone(rc.get_cached("k_c", CACHE_DIR=self.CACHE_DIR))
+
+        # put_cached evicts when the cache is bigger than max_bytes
+        rc.put_cached(
+            "k_d", URL, content, None, CACHE_DIR=self.CACHE_DIR, max_bytes=2 * size
+        )
+        self.assertEqual(rc.cache_stats(CACHE_DIR=self.CACHE_DIR)["responses"], 2)
+
+    def test_size_of_overwritten_response(self):
+        for n in range(5):
+            rc.put_cached(
+                "k_same", URL, os.urandom(500), None, CACHE_DIR=self.CACHE_DIR
+            )
+        self.assertEqual(
+            rc._SIZE[self.CACHE_DIR],
+            rc.cache_stats(CACHE_DIR=self.CACHE_DIR)["bytes"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -21,6 +21,12 @@ Other Sources:
 
 import numpy as np
 
+from BB_wx_calcs.footprint_filters import (
+    radial_footprint,
+    square_footprint,
+    footprint_fraction,
+)
+
 
 def contingency_table(forecast_binary, observed_binary, print_table=True):
     """
@@ -326,14 +332,6 @@ def fraction(values):
     return np.sum(values) / np.size(values)
 
 
-def radial_footprint(radius):
-    """A footprint with the given radius"""
-    y, x = np.ogrid[-radius : radius + 1, -radius : radius + 1]
-    footprint = x ** 2 + y ** 2 <= radius ** 2
-    footprint = 1 * footprint.astype(float)
-    return footprint
-
-
 def fractions_skill_score(obs_binary, fxx_binary, window=None, radius=None):
     """
     Fractions Skill Score:
@@ -370,8 +368,6 @@ def fractions_skill_score(obs_binary, fxx_binary, window=None, radius=None):
     #     "These quantities assess the spatial density in the binary fields."
     #     "Points outside the domain are assigned a value of zero."
     #                                                     - Roberts et al. 2008
-    import scipy.ndimage as ndimage
-
     return_this = {}
 
     # Two different methods: A "window" box or a radial footprint as the filter.
@@ -379,31 +375,15 @@ def fractions_skill_score(obs_binary, fxx_binary, window=None, radius=None):
     if window != None:
         print("Window size: %sx%s grid boxes" % (window, window))
         return_this["window"] = window
-        obs_fracs = ndimage.generic_filter(
-            obs_binary, fraction, size=window, mode="constant", cval=0
-        )
-        fxx_fracs = ndimage.generic_filter(
-            fxx_binary, fraction, size=window, mode="constant", cval=0
-        )
+        obs_fracs = footprint_fraction(obs_binary, square_footprint(window))
+        fxx_fracs = footprint_fraction(fxx_binary, square_footprint(window))
 
     elif radius != None:
         # "It might be preferable to use a different kernel, such as a circular mean filter..."
         print("Footprint radius: %s grid boxes" % radius)
         return_this["radius"] = radius
-        obs_fracs = ndimage.generic_filter(
-            obs_binary,
-            fraction,
-            footprint=radial_footprint(radius),
-            mode="constant",
-            cval=0,
-        )
-        fxx_fracs = ndimage.generic_filter(
-            fxx_binary,
-            fraction,
-            footprint=radial_footprint(radius),
-            mode="constant",
-            cval=0,
-        )
+        obs_fracs = footprint_fraction(obs_binary, radial_footprint(radius))
+        fxx_fracs = footprint_fraction(fxx_binary, radial_footprint(radius))
 
     ## c. Compute fractions skill score:
     print("Compute fractions skill score")
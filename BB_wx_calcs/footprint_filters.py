@@ -0,0 +1,214 @@
+## Brian Blaylock
+## October 19, 2026
+
+"""
+Neighborhood (footprint) filters without a Python callback for each grid point.
+
+ndimage.generic_filter(values, np.max, footprint=footprint) calls a Python
+function for every point of the grid (1.9 million times for the HRRR grid).
+These filters give the same result for any boolean footprint:
+
+    footprint_max      - Maximum value in the footprint (i.e. bloat GLM events)
+    footprint_min      - Minimum value in the footprint
+    footprint_sum      - Sum of the values in the footprint
+    footprint_mean     - Mean of the values in the footprint
+    footprint_fraction - Fraction of the footprint that is True
+
+The footprint is decomposed into rectangles. The maximum and minimum are the
+max/min of separable ndimage.maximum_filter/minimum_filter of each rectangle.
+Sums of binary fields are four lookups per rectangle in a summed-area table
+(integral image), and sums of float fields are an ndimage.correlate.
+
+The filters are applied to the last two dimensions, so a stack of grids, i.e.
+(fxx, y, x), is filtered at once. Edges are handled like ndimage: mode is
+'reflect', 'constant', 'nearest', 'mirror', or 'wrap'.
+"""
+
+import numpy as np
+import scipy.ndimage as ndimage
+
+# ndimage boundary modes and the matching np.pad modes
+_PAD_MODES = {
+    "reflect": "symmetric",
+    "constant": "constant",
+    "nearest": "edge",
+    "mirror": "reflect",
+    "wrap": "wrap",
+}
+
+
+def radial_footprint(radius):
+    """A footprint with the given radius"""
+    y, x = np.ogrid[-radius : radius + 1, -radius : radius + 1]
+    footprint = x ** 2 + y ** 2 <= radius ** 2
+    footprint = 1 * footprint.astype(float)
+    return footprint
+
+
+def square_footprint(size):
+    """A square window footprint with size x size grid points"""
+    return np.ones((size, size))
+
+
+def footprint_rectangles(footprint, overlap=False):
+    """
+    Decompose a footprint into rectangles (row0, row1, col0, col1) of True
+    values. Rows are [row0, row1) and columns are [col0, col1).
+
+    Input:
+        footprint - 2D array. Nonzero values are in the footprint.
+        overlap   - If False, the rectangles don't overlap (for sums).
+                    If True, rectangles may overlap and each run of a row is
+                    extended as far up and down as possible, so there are
+                    fewer rectangles (for max and min).
+    """
+    footprint = np.asarray(footprint) != 0
+    assert footprint.ndim == 2, "footprint must be 2D"
+
+    # Contiguous runs of True in each row
+    runs = []
+    for r, row in enumerate(footprint):
+        edges = np.diff(np.concatenate([[0], row.astype(np.int8), [0]]))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        runs.append(list(zip(starts, ends)))
+
+    rectangles = []
+    if overlap:
+        for r, row_runs in enumerate(runs):
+            for c0, c1 in row_runs:
+                r0 = r
+                while r0 > 0 and footprint[r0 - 1, c0:c1].all():
+                    r0 -= 1
+                r1 = r + 1
+                while r1 < len(runs) and footprint[r1, c0:c1].all():
+                    r1 += 1
+                rect = (r0, r1, int(c0), int(c1))
+                if rect not in rectangles:
+                    rectangles.append(rect)
+    else:
+        # Merge identical runs in consecutive rows.
+        open_rects = {}
+        for r, row_runs in enumerate(runs + [[]]):
+            row_runs = [(int(c0), int(c1)) for c0, c1 in row_runs]
+            for run in list(open_rects):
+                if run not in row_runs:
+                    rectangles.append((open_rects.pop(run), r) + run)
+            for run in row_runs:
+                if run not in open_rects:
+                    open_rects[run] = r
+
+    return rectangles
+
+
+def _pad(values, footprint_shape, mode, cval):
+    """Pad the last two dimensions so every footprint is inside the array."""
+    assert mode in _PAD_MODES, "mode must be one of %s" % list(_PAD_MODES)
+    fh, fw = footprint_shape
+    ch, cw = fh // 2, fw // 2
+    pad_width = [(0, 0)] * (values.ndim - 2) + [(ch, fh - 1 - ch), (cw, fw - 1 - cw)]
+    if mode == "constant":
+        return np.pad(values, pad_width, mode="constant", constant_values=cval)
+    return np.pad(values, pad_width, mode=_PAD_MODES[mode])
+
+
+def _extreme_filter(values, footprint, mode, cval, func, combine):
+    values = np.asarray(values)
+    footprint = np.asarray(footprint) != 0
+    ny, nx = values.shape[-2:]
+    padded = _pad(values, footprint.shape, mode, cval)
+    lead = (1,) * (values.ndim - 2)
+
+    out = None
+    for r0, r1, c0, c1 in footprint_rectangles(footprint, overlap=True):
+        h, w = r1 - r0, c1 - c0
+        filtered = func(padded, size=lead + (h, w))
+        # The centered filter at [r0 + h//2, c0 + w//2] covers the rectangle
+        # for the output point at [0, 0].
+        window = filtered[
+            ..., r0 + h // 2 : r0 + h // 2 + ny, c0 + w // 2 : c0 + w // 2 + nx
+        ]
+        out = window.copy() if out is None else combine(out, window, out=out)
+    return out
+
+
+def footprint_max(values, footprint, mode="reflect", cval=0.0):
+    """
+    Maximum value in the footprint around each grid point. Same as
+    ndimage.generic_filter(values, np.max, footprint=footprint).
+    """
+    return _extreme_filter(
+        values, footprint, mode, cval, ndimage.maximum_filter, np.maximum
+    )
+
+
+def footprint_min(values, footprint, mode="reflect", cval=0.0):
+    """
+    Minimum value in the footprint around each grid point. Same as
+    ndimage.generic_filter(values, np.min, footprint=footprint).
+    """
+    return _extreme_filter(
+        values, footprint, mode, cval, ndimage.minimum_filter, np.minimum
+    )
+
+
+def footprint_sum(values, footprint, mode="reflect", cval=0):
+    """
+    Sum of the values in the footprint around each grid point. Same as
+    ndimage.generic_filter(values, np.sum, footprint=footprint).
+
+    Boolean and integer values (i.e. binary fields) are summed exactly with a
+    summed-area table, which is four lookups per rectangle of the footprint.
+    Float values are summed with ndimage.correlate, so a neighborhood of zeros
+    sums to exactly zero.
+    """
+    values = np.asarray(values)
+    footprint = np.asarray(footprint) != 0
+    lead = (1,) * (values.ndim - 2)
+
+    if values.dtype.kind not in "biu" or int(cval) != cval:
+        return ndimage.correlate(
+            values.astype(float),
+            footprint.astype(float).reshape(lead + footprint.shape),
+            mode=mode,
+            cval=cval,
+        )
+
+    ny, nx = values.shape[-2:]
+    padded = _pad(values.astype(np.int64), footprint.shape, mode, int(cval))
+
+    # Summed-area table with a row and column of zeros in front, so the sum of
+    # padded[..., a:b, c:d] is S[b, d] - S[a, d] - S[b, c] + S[a, c]
+    S = np.zeros(
+        padded.shape[:-2] + (padded.shape[-2] + 1, padded.shape[-1] + 1),
+        dtype=np.int64,
+    )
+    S[..., 1:, 1:] = padded.cumsum(axis=-2).cumsum(axis=-1)
+
+    out = np.zeros(values.shape, dtype=np.int64)
+    for r0, r1, c0, c1 in footprint_rectangles(footprint):
+        out += S[..., r1 : r1 + ny, c1 : c1 + nx]
+        out -= S[..., r0 : r0 + ny, c1 : c1 + nx]
+        out -= S[..., r1 : r1 + ny, c0 : c0 + nx]
+        out += S[..., r0 : r0 + ny, c0 : c0 + nx]
+    return out
+
+
+def footprint_mean(values, footprint, mode="reflect", cval=0.0):
+    """
+    Mean of the values in the footprint around each grid point. Same as
+    ndimage.generic_filter(values, np.mean, footprint=footprint).
+    """
+    num = np.sum(np.asarray(footprint) != 0)
+    return footprint_sum(values, footprint, mode=mode, cval=cval) / num
+
+
+def footprint_fraction(binary, footprint, mode="constant", cval=0):
+    """
+    Fraction of the footprint that is True around each grid point. Used for
+    the fractions skill score, where "points outside the domain are assigned
+    a value of zero" (Roberts and Lean, 2008).
+    """
+    return footprint_mean(
+        np.asarray(binary, dtype=bool), footprint, mode=mode, cval=cval
+    )
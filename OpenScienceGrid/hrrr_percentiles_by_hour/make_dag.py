@@ -2,16 +2,22 @@
 # August 7, 2018
 
 """
-Make a new DAGMan file for a set of jobs for a given variable. One job per
-hour of the year.
+Make a new DAGMan file for a set of jobs for a given variable. Each job works
+on one hour and forecast for up to jobs_per_worker consecutive days (see
+plan_jobs.py for how the days are split so the jobs download the fewest
+grids). The expected number of grid downloads is printed before the file is
+written.
 
 Also:
     Create a ./log directory, if one doesn't exist
     Removes all old dag files.
+    Writes manifest.json for run_dag.py, if write_manifest is True.
 """
 
 import os
-from datetime import datetime, timedelta
+from datetime import datetime
+
+import plan_jobs
 
 variable = "TMP:2-m"
 
@@ -26,6 +32,9 @@ jobs_per_worker = 4
 
 retry = 10
 
+# Also write a JSON manifest to run the jobs with run_dag.py?
+write_manifest = False
+
 print("Creating DAGMan for:", variable)
 
 # =============================================================================
@@ -56,32 +65,23 @@ DAGMan File structure:
 """
 
 var = variable.replace(" ", "-")
-DATES = [sDATE + timedelta(days=d) for d in range((eDATE - sDATE).days)]
-
-
-# length of DATES* length of hours must be divisible by jobs_per_worker.
-# If DATES is all hours of the year equal to 1, 2, 3, 4, 6, 8, 9, 12, 16 if
-# doing all hours of the year.
-
-# Filter by number of jobs each worker works on (a worker will work on a date
-# and then the next x number of days defined by jobs_per_worker).
-jobDATES = DATES[::jobs_per_worker]
-if len(DATES) * len(hours) % jobs_per_worker != 0:
-    raise ValueError("job_per_worker must be divisible by %s" % len(DATES) * len(hours))
-else:
-    print("Writing %s unique jobs" % (len(jobDATES) * len(hours)))
-
-# List the arguments for each job
-args = [[D.month, D.day, hour, f] for D in jobDATES for hour in hours for f in fxx]
-
-with open("submit.dag", "w") as f:
-    for i, (month, day, hour, fxx) in enumerate(args):
-        f.write("JOB %s_%s %s\n" % (var, i, "job.submit"))
-        f.write(
-            'VARS %s_%s ID="%04d" var="%s" month="%s" day="%s" hour="%s" fxx="%s" window="%s" jobs_per_worker="%s"\n'
-            % (var, i, i, var, month, day, hour, fxx, window, jobs_per_worker)
-        )
-        f.write("RETRY %s_%s %s\n" % (var, i, retry))
-        f.write("\n")
-
-print("  - Wrote a new submit.dag file for %s jobs." % len(args))
+
+# Split the days of the year into the fewest jobs of up to jobs_per_worker
+# consecutive days (a worker will work on a date and then the next days).
+plan = plan_jobs.plan_jobs(
+    hours=hours,
+    fxx=fxx,
+    days_per_job=jobs_per_worker,
+    window=window,
+    sDATE=sDATE,
+    eDATE=eDATE,
+)
+print("Writing %s unique jobs" % len(plan["jobs"]))
+plan_jobs.print_report(plan, fields=2 if variable[:2] == "UV" else 1)
+
+plan_jobs.write_dag(plan, var, FILE="submit.dag", retry=retry)
+print("  - Wrote a new submit.dag file for %s jobs." % len(plan["jobs"]))
+
+if write_manifest:
+    plan_jobs.write_manifest(plan, var, FILE="manifest.json", retry=retry)
+    print("  - Wrote manifest.json for run_dag.py")
@@ -9,6 +9,13 @@ For every hour of the year, calculate +/-15 day (31 total days) mean and
 percentiles for the CONUS from the Pando HRRR archive. New file is created for
 each hour saved as a HDF5 file.
 
+When a worker does more than one day (jobs_per_worker > 1), the grids are
+kept in a sliding window (sliding_percentiles.py). Only the grids entering
+the window are downloaded, and the sorted window is updated instead of
+sorting all the grids again. The grids themselves aren't kept: the grids
+leaving the window are read again from the grid cache (GRID_CACHE) to remove
+them from the window.
+
 Built to run on the Open Science Grid
 """
 
@@ -22,9 +29,47 @@ import sys
 sys.path.append("../../../pyBKB_v3")
 from BB_HRRR.HRRR_Pando import get_hrrr_variable
 from BB_wx_calcs.wind import wind_uv_to_spd
+from sliding_percentiles import (
+    new_window,
+    slide_window,
+    window_percentiles,
+    window_mean,
+    new_histogram,
+    slide_histogram,
+    histogram_percentiles,
+    histogram_mean,
+)
 
 
 def get_HRRR_value(validDATE):
+    """
+    Get HRRR data from the grid cache (GRID_CACHE), or download it and save it
+    in the cache so other jobs on this computer with the grid in their window
+    don't download it again.
+    """
+    if GRID_CACHE is None:
+        return download_HRRR_value(validDATE)
+
+    runDATE = validDATE - timedelta(hours=fxx)
+    FILE = os.path.join(
+        GRID_CACHE, "%s_%s_f%02d.npy" % (var_str, runDATE.strftime("%Y%m%d%H"), fxx)
+    )
+    if os.path.exists(FILE):
+        try:
+            return np.load(FILE)
+        except (OSError, ValueError):
+            pass
+
+    value = download_HRRR_value(validDATE)
+    if value is not None:
+        TMP = FILE + ".%s.tmp" % os.getpid()
+        with open(TMP, "wb") as f:
+            np.save(f, np.ma.filled(np.ma.asarray(value, dtype=np.float32), np.nan))
+        os.replace(TMP, FILE)
+    return value
+
+
+def download_HRRR_value(validDATE):
     """
     Get HRRR data. Retrun the value, not the latitude and longitude.
     """
@@ -78,31 +123,50 @@ def get_HRRR_value(validDATE):
             return H["value"]
 
 
-def stats_save(H, centerDATE, validDATES, SAVEDIR=".", SEND_TO_PANDO=True):
+def new_sample(H):
+    """
+    The sliding window of the HRRR grids (None for grids that could not be
+    downloaded). Exit with exit code 74 if there aren't any grids.
+    """
+    if all(x is None for x in H):
+        print("!!! None of the HRRR grids were retrieved")
+        print("!!! Exit with exit code 74")
+        sys.exit(os.EX_IOERR)
+    if method == "histogram":
+        return new_histogram(H, bins=bins)
+    else:
+        return new_window(H, capacity=len(H))
+
+
+def slide_sample(W, remove, add):
+    """Remove and add grids to the sliding window."""
+    if method == "histogram":
+        return slide_histogram(W, remove=remove, add=add)
+    else:
+        return slide_window(W, remove=remove, add=add)
+
+
+def stats_save(W, centerDATE, validDATES, SAVEDIR=".", SEND_TO_PANDO=True):
     """
     Calculate the statistics for a set of HRRR grids and save them to an HDF5
     file.
 
     Input:
-        H           - Three dimensional array of the HRRR grids
+        W           - The sliding window of the HRRR grids from new_sample()
         centerDATE  - Datetime object, assuming a leapyear 2016, of the
                       center date of intereste in the validDATES list
         validDATES  - List of datetimes the data represents
     """
-    # Remove empty arrays that may exist. None arrays exist if the HRRR file
-    # could not be downloaded from Pando.
+    # None arrays exist if the HRRR file could not be downloaded from Pando.
+    # They are not in the window.
     print("    Date Range", validDATES[0], validDATES[-1])
-    print("    Removing empty arrays...", end="")
-    count_none = np.sum(1 for x in H if x is None)
-    H = list(filter(lambda x: x is not None, H))
-    print("done!")
-    print("    Counted %s None values" % count_none)
-    percentage_retrieved = 100 * len(H) / float(len(validDATES))
+    count = W["samples"]
+    print("    Counted %s None values" % (len(validDATES) - count))
+    percentage_retrieved = 100 * count / float(len(validDATES))
     print(
         "    Retrieved %s/%s expected samples for calculations --- %.2f%% \n"
-        % (len(H), len(validDATES), percentage_retrieved)
+        % (count, len(validDATES), percentage_retrieved)
     )
-    H = np.array(H)
 
     # Exit if job didn't download enough.
     if percentage_retrieved < 90:
@@ -114,16 +178,20 @@ def stats_save(H, centerDATE, validDATES, SAVEDIR=".", SEND_TO_PANDO=True):
 
     # Percentiles
     timer = datetime.now()
-    print("    Calculate percentiles...", end="")
-    perH = np.percentile(H, percentiles, axis=0)
+    print("    Calculate percentiles (%s)..." % method, end="")
+    if method == "histogram":
+        perH = histogram_percentiles(W, percentiles)
+    else:
+        perH = window_percentiles(W, percentiles)
     perH = np.round(perH, 2)
     print("done!")
 
     # Mean
     print("    Calculate mean...", end="")
-    sumH = np.sum(H, axis=0)
-    count = len(H)
-    meanH = sumH / count
+    if method == "histogram":
+        meanH = histogram_mean(W)
+    else:
+        meanH = window_mean(W)
     meanH = np.round(meanH, 2)
     print("done!")
 
@@ -203,6 +271,7 @@ if sys.argv[1] == "TEST":
     fxx = 0
     window = 15
     jobs_per_worker = 1
+    method = "sorted"
 
 else:
     # Variable to work on. For wind speed calculations, use "UVGRD:10-m".
@@ -216,6 +285,23 @@ else:
     window = int(sys.argv[6])
     # Worker Jobs. The number of jobs each worker should do.
     jobs_per_worker = int(sys.argv[7])
+    # Method: "sorted" (exact percentiles) or "histogram" (approximate
+    # percentiles in about a third of the memory, up to 255 samples)
+    method = sys.argv[8] if len(sys.argv) > 8 else "sorted"
+
+# Number of bins for each grid point in the histogram method
+bins = 64
+
+# Directory of grids shared by the jobs on a computer (run_dag.py sets it).
+# None to not cache the grids.
+GRID_CACHE = os.environ.get("GRID_CACHE")
+
+# Send the HDF5 files to Pando? (run_dag.py sets SEND_TO_PANDO=0)
+SEND_TO_PANDO = os.environ.get("SEND_TO_PANDO", "1") != "0"
+
+# Most CPUs the job may use to download (run_dag.py sets it to the job's
+# share of the computer). None to use up to 8.
+JOB_CPUS = int(os.environ["JOB_CPUS"]) if "JOB_CPUS" in os.environ else None
 
 var_str = variable.replace(":", "-").replace(" ", "-")
 
@@ -286,6 +372,8 @@ if len(validDATES) != 0:
             use_cpu = np.minimum(
                 8, cpu_count
             )  # don't save much download time when using more than 8 cores
+            if JOB_CPUS is not None:
+                use_cpu = np.minimum(use_cpu, JOB_CPUS)
             print("    Using %s CPUs" % use_cpu)
             p = multiprocessing.Pool(use_cpu)
             H = p.map(get_HRRR_value, validDATES)
@@ -308,8 +396,12 @@ if len(validDATES) != 0:
         download_timer = datetime.now() - timer
         print("    Serial Download Timer: %s" % download_timer)
 
-    # Compute statistics and save data
-    stats_save(H, centerDATE, validDATES, SAVEDIR=SAVEDIR)
+    # Compute statistics and save data. Only remember which grids were
+    # retrieved; the grids are read again when they leave the window.
+    retrieved = {DATE: h is not None for DATE, h in zip(validDATES, H)}
+    W = new_sample(H)
+    del H
+    stats_save(W, centerDATE, validDATES, SAVEDIR=SAVEDIR, SEND_TO_PANDO=SEND_TO_PANDO)
 
     if jobs_per_worker > 1:
         job = 2
@@ -335,18 +427,43 @@ if len(validDATES) != 0:
                 ]
                 new_validDATES += a
 
-            # Which grids in H do we already have?
-            grids_to_keep = [i in new_validDATES for i in validDATES]
-            new_H = [h for i, h in enumerate(H) if grids_to_keep[i]]
+            # Which grids leave the window?
+            grids_to_drop = [i for i in validDATES if i not in new_validDATES]
 
             # Which grids to I need to get
             grids_to_get = [i for i in new_validDATES if i not in validDATES]
             print("    Need to download %s additional grids." % len(grids_to_get))
-            for dd in grids_to_get:
-                new_H.append(get_HRRR_value(dd))
+            timer = datetime.now()
+            add = [get_HRRR_value(dd) for dd in grids_to_get]
+            print("    Serial Download Timer: %s" % (datetime.now() - timer))
 
-            # Run stats and save data
-            stats_save(new_H, centerDATE, new_validDATES, SAVEDIR=SAVEDIR)
+            # Read the grids leaving the window again
+            timer = datetime.now()
+            remove = []
+            for dd in grids_to_drop:
+                if retrieved.pop(dd):
+                    value = get_HRRR_value(dd)
+                    if value is None:
+                        print("!!! Could not read %s again to remove it" % dd)
+                        print("!!! Exit with exit code 74")
+                        sys.exit(os.EX_IOERR)
+                    remove.append(value)
+            print("    Read Dropped Grids Timer: %s" % (datetime.now() - timer))
+            retrieved.update({dd: h is not None for dd, h in zip(grids_to_get, add)})
+
+            # Slide the window, run stats, and save data
+            timer = datetime.now()
+            slide_sample(W, remove=remove, add=add)
+            del remove, add
+            print("    Slide Window Timer: %s" % (datetime.now() - timer))
+            validDATES = new_validDATES
+            stats_save(
+                W,
+                centerDATE,
+                validDATES,
+                SAVEDIR=SAVEDIR,
+                SEND_TO_PANDO=SEND_TO_PANDO,
+            )
             job += 1
 
 
@@ -0,0 +1,229 @@
+# Brian Blaylock
+# October 19, 2026
+
+"""
+Plan which days each percentile job works on so the jobs download as few
+HRRR grids as possible.
+
+A job works on one hour and forecast (fxx) and a run of center days. The
+grids a job downloads are the valid times of the window (+/- window days) of
+each of its days, for each year of the archive, and a grid is a (run, fxx)
+pair. Grids are only shared by center days with the same hour and fxx (a
+different hour or fxx is a different run or a different forecast), so:
+
+    - A job with n consecutive days downloads 2*window + n days of grids for
+      each year. Days that aren't consecutive download more.
+    - The fewest downloads for workers of up to `days_per_job` days is the
+      fewest jobs: ceil(366 / days_per_job) runs of consecutive days for each
+      hour and fxx, with the days split as evenly as possible (the last job
+      doesn't get the leftover days, and no job crosses the end of the year).
+
+    plan = plan_jobs(hours=range(24), fxx=[0, 6], days_per_job=5)
+    print_report(plan)
+    write_dag(plan, 'TMP:2-m')          # submit.dag for condor_submit_dag
+    write_manifest(plan, 'TMP:2-m')     # manifest.json for run_dag.py
+"""
+
+import json
+import functools
+from datetime import datetime, timedelta
+
+# The archive period percentiles.py uses (adjusted by the window)
+ARCHIVE_START = datetime(2016, 7, 15)
+ARCHIVE_END = datetime(2018, 7, 15)
+
+# Approximate size of a downloaded GRIB2 field (MB)
+GRID_MB = 1.5
+
+
+def archive_range(window):
+    """sDATE and eDATE of the archive, the same as percentiles.py."""
+    return (
+        ARCHIVE_START + timedelta(days=window + 1),
+        ARCHIVE_END + timedelta(days=window + 1),
+    )
+
+
+def valid_dates(month, day, hour, window):
+    """
+    The valid dates percentiles.py downloads for a center day, i.e. the days
+    within +/- window days of the center day in each year of the archive.
+    """
+    sDATE, eDATE = archive_range(window)
+    DATES = []
+    for y in range(sDATE.year, eDATE.year + 1):
+        try:
+            center = datetime(y, month, day, hour)
+        except ValueError:
+            # February 29 isn't in every year
+            continue
+        DATES += [
+            center - timedelta(days=d)
+            for d in range(window, -window - 1, -1)
+            if sDATE <= center - timedelta(days=d) < eDATE
+        ]
+    return DATES
+
+
+@functools.lru_cache(maxsize=None)
+def _job_valid_dates(days, hour, window):
+    """The valid dates of the days (a tuple), the same for every fxx."""
+    return frozenset(V for D in days for V in valid_dates(D.month, D.day, hour, window))
+
+
+def job_grids(job, window):
+    """The (run, fxx) grids a job downloads."""
+    f = job["fxx"]
+    return {
+        (V - timedelta(hours=f), f)
+        for V in _job_valid_dates(tuple(job["days"]), job["hour"], window)
+    }
+
+
+def split_days(DATES, days_per_job):
+    """Split the days into the fewest runs of consecutive days, evenly."""
+    n = -(-len(DATES) // days_per_job)
+    size, extra = divmod(len(DATES), n)
+    runs = []
+    start = 0
+    for i in range(n):
+        end = start + size + (i < extra)
+        runs.append(DATES[start:end])
+        start = end
+    return runs
+
+
+def plan_jobs(
+    hours=range(24),
+    fxx=[0],
+    days_per_job=4,
+    window=15,
+    sDATE=datetime(2016, 1, 1),
+    eDATE=datetime(2017, 1, 1),
+):
+    """
+    The jobs with the fewest grid downloads.
+
+    Input:
+        hours        - Hours of the day
+        fxx          - Forecast hours
+        days_per_job - The most center days a worker does (jobs_per_worker)
+        window       - +/- days in the sample
+        sDATE, eDATE - Center days (the default is every day of the leap
+                       year; eDATE not included)
+
+    Return:
+        Dictionary with the 'jobs' (list of dictionaries with the 'hour',
+        'fxx', and 'days' of each job), the 'window', and the 'downloads'
+        of each job
+    """
+    DATES = [sDATE + timedelta(days=d) for d in range((eDATE - sDATE).days)]
+    jobs = [
+        {"hour": h, "fxx": f, "days": days}
+        for days in split_days(DATES, days_per_job)
+        for h in hours
+        for f in fxx
+    ]
+    return {
+        "jobs": jobs,
+        "window": window,
+        "days_per_job": days_per_job,
+        "downloads": [
+            len(_job_valid_dates(tuple(job["days"]), job["hour"], window))
+            for job in jobs
+        ],
+    }
+
+
+def download_report(plan, fields=1, grid_MB=GRID_MB):
+    """
+    Number and size of the grids the jobs download.
+
+    Input:
+        fields  - GRIB2 fields for each grid (2 for wind speed from U and V)
+
+    Return:
+        Dictionary with 'jobs', 'downloads' (the grids every job downloads),
+        'unique' (the grids if jobs share downloads, like run_dag.py's
+        GRID_CACHE), 'MB', and 'unique MB'
+    """
+    # Only jobs with the same hour and fxx share grids
+    valid = {}
+    for job in plan["jobs"]:
+        key = (job["hour"], job["fxx"])
+        valid[key] = valid.get(key, frozenset()) | _job_valid_dates(
+            tuple(job["days"]), job["hour"], plan["window"]
+        )
+    downloads = sum(plan["downloads"])
+    unique = sum(len(v) for v in valid.values())
+    return {
+        "jobs": len(plan["jobs"]),
+        "downloads": downloads,
+        "unique": unique,
+        "MB": downloads * fields * grid_MB,
+        "unique MB": unique * fields * grid_MB,
+    }
+
+
+def print_report(plan, fields=1, grid_MB=GRID_MB):
+    report = download_report(plan, fields=fields, grid_MB=grid_MB)
+    print("  Jobs:                   %s" % report["jobs"])
+    print(
+        "  Grid downloads:         %s (%.1f GB)"
+        % (report["downloads"], report["MB"] / 1024)
+    )
+    print(
+        "  Unique grids:           %s (%.1f GB)"
+        % (report["unique"], report["unique MB"] / 1024)
+    )
+    print(
+        "  Downloads/unique grid:  %.2f"
+        % (report["downloads"] / max(report["unique"], 1))
+    )
+    return report
+
+
+def job_vars(plan, var):
+    """The VARS of each job (the arguments of percentiles.py)."""
+    return [
+        {
+            "ID": "%04d" % i,
+            "var": var,
+            "month": str(job["days"][0].month),
+            "day": str(job["days"][0].day),
+            "hour": str(job["hour"]),
+            "fxx": str(job["fxx"]),
+            "window": str(plan["window"]),
+            "jobs_per_worker": str(len(job["days"])),
+        }
+        for i, job in enumerate(plan["jobs"])
+    ]
+
+
+def write_dag(plan, var, FILE="submit.dag", submit="job.submit", retry=10):
+    """Write the jobs in a DAGMan file."""
+    with open(FILE, "w") as f:
+        for v in job_vars(plan, var):
+            name = "%s_%s" % (var, int(v["ID"]))
+            f.write("JOB %s %s\n" % (name, submit))
+            f.write("VARS %s %s\n" % (name, " ".join('%s="%s"' % (k, v[k]) for k in v)))
+            f.write("RETRY %s %s\n" % (name, retry))
+            f.write("\n")
+    return FILE
+
+
+def write_manifest(plan, var, FILE="manifest.json", retry=10, memory="6GB"):
+    """Write the jobs in a JSON manifest for run_dag.py."""
+    jobs = [
+        {
+            "name": "%s_%s" % (var, int(v["ID"])),
+            "ID": v["ID"],
+            "vars": v,
+            "retry": retry,
+            "memory": memory,
+        }
+        for v in job_vars(plan, var)
+    ]
+    with open(FILE, "w") as f:
+        json.dump(jobs, f, indent=1)
+    return FILE
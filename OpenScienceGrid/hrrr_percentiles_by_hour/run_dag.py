@@ -0,0 +1,459 @@
+# Brian Blaylock
+# October 19, 2026
+
+"""
+Run the percentile DAG on one computer instead of the Open Science Grid.
+
+Reads the jobs from submit.dag (JOB, VARS, RETRY, PARENT/CHILD) and the
+submit file each job uses (arguments, request_memory, request_cpus), or
+from a JSON manifest with the same information, and runs percentiles.py for
+each job in a local process. Jobs are started while there are CPUs and memory
+left in the budget. Like DAGMan, a job that fails is run again up to its
+RETRY count (a job that exits with 74, EX_IOERR, didn't download enough
+grids and is started again after retry_delay seconds).
+
+The jobs share a grid cache (GRID_CACHE in percentiles.py), so a grid that is
+in the window of more than one job is only downloaded once. A grid is removed
+from the cache when the last job with the grid in its window is finished,
+and cache_GB limits the size of the cache (the oldest grids are removed
+first).
+
+The output of each job is written to ./log/local_<start time>_*/job_<ID>.out
+(a new directory for each run, apart from the condor logs), and the timers
+in the output (download, statistics, HDF5) are added up in the summary.
+
+    $ python run_dag.py submit.dag --cpus 32 --memory 120GB
+    $ python run_dag.py manifest.json
+
+A JSON manifest is a list of jobs:
+    [{"name": "TMP:2-m_0", "ID": "0000",
+      "vars": {"var": "TMP:2-m", "month": "1", ...},
+      "retry": 10, "memory": "6GB", "cpus": 1}, ...]
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import tempfile
+import argparse
+import subprocess
+from datetime import datetime, timedelta
+
+from plan_jobs import job_grids
+
+# Exit code percentiles.py uses when it didn't get enough grids
+EX_IOERR = 74
+
+# Arguments of percentiles.py (job.submit runs runthis.sh with these)
+ARGUMENTS = "$(var) $(month) $(day) $(hour) $(fxx) $(window) $(jobs_per_worker)"
+
+# Timers printed by percentiles.py, added up by stage
+STAGES = {
+    "download": re.compile(r"Download Timer:?\s+(\S+)"),
+    "statistics": re.compile(r"Statistics Timer:?\s+(\S+)"),
+    "slide": re.compile(r"Slide Window Timer:?\s+(\S+)"),
+    "HDF5": re.compile(r"HDF5 Timer:?\s+(\S+)"),
+}
+
+
+def parse_memory(value, default=2048):
+    """Megabytes of a request_memory value, i.e. '6GB', '150MB', or 2048."""
+    if value is None:
+        return default
+    m = re.match(r"\s*([\d.]+)\s*([KMGT]?)B?\s*$", str(value).upper())
+    if m is None:
+        raise ValueError("Can't read the memory request %s" % value)
+    scale = {"K": 1 / 1024, "": 1, "M": 1, "G": 1024, "T": 1024 ** 2}[m.group(2)]
+    return float(m.group(1)) * scale
+
+
+def parse_submit(FILE):
+    """The settings (key = value) in an HTCondor submit file."""
+    submit = {}
+    with open(FILE) as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("#") or "=" not in line:
+                continue
+            key, value = line.split("=", 1)
+            submit[key.strip().lower()] = value.strip()
+    return submit
+
+
+def parse_dag(FILE):
+    """
+    The jobs in a DAGMan file.
+
+    Return:
+        List of job dictionaries with 'name', 'submit', 'vars', 'retry',
+        'unless_exit', and 'parents'. 'memory', 'cpus', and 'arguments'
+        are from the submit file.
+    """
+    DIR = os.path.dirname(os.path.abspath(FILE))
+    jobs = {}
+    submits = {}
+    with open(FILE) as f:
+        for line in f:
+            words = line.split()
+            if len(words) == 0 or words[0].startswith("#"):
+                continue
+            key = words[0].upper()
+            if key == "JOB":
+                SUBMIT = os.path.join(DIR, words[2])
+                if SUBMIT not in submits:
+                    submits[SUBMIT] = (
+                        parse_submit(SUBMIT) if os.path.exists(SUBMIT) else {}
+                    )
+                submit = submits[SUBMIT]
+                jobs[words[1]] = {
+                    "name": words[1],
+                    "submit": words[2],
+                    "vars": {},
+                    "retry": 0,
+                    "unless_exit": None,
+                    "parents": [],
+                    "arguments": submit.get("arguments", ARGUMENTS),
+                    "memory": submit.get("request_memory"),
+                    "cpus": submit.get("request_cpus"),
+                }
+            elif key == "VARS":
+                values = re.findall(r'(\w+)\s*=\s*"([^"]*)"', line)
+                jobs[words[1]]["vars"].update(values)
+            elif key == "RETRY":
+                jobs[words[1]]["retry"] = int(words[2])
+                if len(words) > 4 and words[3].upper() == "UNLESS-EXIT":
+                    jobs[words[1]]["unless_exit"] = int(words[4])
+            elif key == "PARENT":
+                i = [w.upper() for w in words].index("CHILD")
+                for child in words[i + 1 :]:
+                    jobs[child]["parents"] += words[1:i]
+    return list(jobs.values())
+
+
+def read_jobs(FILE):
+    """Jobs from a DAG file or a JSON manifest."""
+    if FILE.endswith(".json"):
+        with open(FILE) as f:
+            jobs = json.load(f)
+        for job in jobs:
+            job.setdefault("vars", {})
+            job.setdefault("retry", 0)
+            job.setdefault("unless_exit", None)
+            job.setdefault("parents", [])
+            job.setdefault("arguments", ARGUMENTS)
+        return jobs
+    return parse_dag(FILE)
+
+
+def job_command(job, python=sys.executable, script="percentiles.py"):
+    """The percentiles.py command for a job, with the VARS in the arguments."""
+    arguments = re.sub(
+        r"\$\((\w+)\)", lambda m: job["vars"].get(m.group(1), ""), job["arguments"]
+    )
+    return [python, script] + arguments.split()
+
+
+def job_cache_files(job):
+    """
+    Names of the grids in GRID_CACHE a job uses (the names get_HRRR_value in
+    percentiles.py saves), or None if the VARS don't have the job's days.
+    """
+    v = job["vars"]
+    try:
+        month, day, hour, fxx, window, days = [
+            int(v[k])
+            for k in ["month", "day", "hour", "fxx", "window", "jobs_per_worker"]
+        ]
+        var_str = v["var"].replace(":", "-").replace(" ", "-")
+    except (KeyError, ValueError):
+        return None
+    DAYS = [datetime(2016, month, day) + timedelta(days=d) for d in range(days)]
+    return [
+        "%s_%s_f%02d.npy" % (var_str, runDATE.strftime("%Y%m%d%H"), f)
+        for runDATE, f in job_grids({"hour": hour, "fxx": fxx, "days": DAYS}, window)
+    ]
+
+
+def trim_cache(GRID_CACHE, cache_GB):
+    """Remove the oldest grids until the cache is smaller than cache_GB."""
+    FILES = []
+    for name in os.listdir(GRID_CACHE):
+        if name.endswith(".npy"):
+            try:
+                stat = os.stat(os.path.join(GRID_CACHE, name))
+            except OSError:
+                continue
+            FILES.append((stat.st_mtime, stat.st_size, name))
+    size = sum(f[1] for f in FILES)
+    removed = 0
+    for mtime, nbytes, name in sorted(FILES):
+        if size <= cache_GB * 1024 ** 3:
+            break
+        try:
+            os.remove(os.path.join(GRID_CACHE, name))
+            removed += 1
+        except OSError:
+            pass
+        size -= nbytes
+    return removed
+
+
+def parse_timers(OUTFILE):
+    """Seconds of each stage timer in a job's output."""
+    timers = {stage: 0.0 for stage in STAGES}
+    try:
+        with open(OUTFILE) as f:
+            text = f.read()
+    except OSError:
+        return timers
+    for stage, pattern in STAGES.items():
+        for value in pattern.findall(text):
+            h, m, s = value.split(":")
+            timers[stage] += int(h) * 3600 + int(m) * 60 + float(s)
+    return timers
+
+
+def run_jobs(
+    jobs,
+    cpus=os.cpu_count(),
+    memory="16GB",
+    job_cpus=1,
+    job_memory="6GB",
+    GRID_CACHE="./grid_cache",
+    keep_cache=False,
+    cache_GB=None,
+    retry_delay=10,
+    LOGDIR="./log",
+    python=sys.executable,
+    env={},
+    verbose=True,
+):
+    """
+    Run the jobs in local processes.
+
+    Input:
+        jobs        - List of jobs from read_jobs()
+        cpus        - Number of CPUs the jobs can use at the same time
+        memory      - Memory the jobs can use at the same time, i.e. '120GB'
+        job_cpus    - CPUs for a job without request_cpus. percentiles.py
+                      downloads with this many processes (JOB_CPUS).
+        job_memory  - Memory for a job without request_memory
+        GRID_CACHE  - Directory of the grids shared by the jobs. None to not
+                      share grids.
+        keep_cache  - If False, remove each grid when the last job that uses
+                      it is finished, and remove the grid cache when all jobs
+                      are done. If True, keep the grids (except to stay
+                      under cache_GB).
+        cache_GB    - Most GB of grids in the cache. None for no limit.
+        retry_delay - Seconds to wait before starting a job again after it
+                      exits with 74 (EX_IOERR).
+        LOGDIR      - The job output is in a new local_<start time>_*
+                      directory in LOGDIR.
+        env         - Other environment variables for the jobs
+
+    Return:
+        Summary dictionary (see print_summary)
+    """
+    budget_cpus = cpus
+    budget_memory = parse_memory(memory)
+    # A new log directory for each run, so the timers of an earlier run (or
+    # the condor logs) aren't added to this run's summary
+    os.makedirs(LOGDIR, exist_ok=True)
+    LOGDIR = tempfile.mkdtemp(
+        prefix="local_%s_" % datetime.now().strftime("%Y%m%d_%H%M%S"), dir=LOGDIR
+    )
+    if verbose:
+        print("  Job output in %s" % LOGDIR)
+
+    job_env = dict(os.environ, SEND_TO_PANDO="0", **env)
+    if GRID_CACHE is not None:
+        os.makedirs(GRID_CACHE, exist_ok=True)
+        job_env["GRID_CACHE"] = os.path.abspath(GRID_CACHE)
+
+    # Number of jobs that aren't finished that use each cached grid
+    users = {}
+    if GRID_CACHE is not None and not keep_cache:
+        for job in jobs:
+            job["grids"] = job_cache_files(job)
+            for name in job["grids"] or []:
+                users[name] = users.get(name, 0) + 1
+    removed = 0
+
+    def finish(job, status):
+        """Set the final status of a job and remove the grids no job needs."""
+        nonlocal removed
+        job["status"] = status
+        for name in job.get("grids") or []:
+            users[name] -= 1
+            if users[name] == 0:
+                try:
+                    os.remove(os.path.join(GRID_CACHE, name))
+                    removed += 1
+                except OSError:
+                    pass
+        if GRID_CACHE is not None and cache_GB is not None:
+            removed += trim_cache(GRID_CACHE, cache_GB)
+
+    for i, job in enumerate(jobs):
+        job["ID"] = job.get("ID", job["vars"].get("ID", "%04d" % i))
+        job["need_cpus"] = min(int(job.get("cpus") or job_cpus), budget_cpus)
+        job["need_memory"] = min(
+            parse_memory(job.get("memory"), parse_memory(job_memory)), budget_memory
+        )
+        job["attempts"] = 0
+        job["status"] = "waiting"
+        job["exit codes"] = []
+        job["not before"] = 0
+
+    names = {job["name"]: job for job in jobs}
+    running = []
+    free_cpus, free_memory = budget_cpus, budget_memory
+    timer = datetime.now()
+
+    while any(job["status"] in ["waiting", "running"] for job in jobs):
+        # Start the jobs that are ready while there are CPUs and memory
+        for job in jobs:
+            if job["status"] != "waiting" or job["not before"] > time.time():
+                continue
+            parents = [names[p]["status"] for p in job["parents"] if p in names]
+            if "failed" in parents:
+                finish(job, "failed")
+                continue
+            if any(p != "done" for p in parents):
+                continue
+            if job["need_cpus"] > free_cpus or job["need_memory"] > free_memory:
+                continue
+            job["attempts"] += 1
+            OUT = os.path.join(LOGDIR, "job_%s.out" % job["ID"])
+            ERR = os.path.join(LOGDIR, "job_%s.err" % job["ID"])
+            job["out"] = OUT
+            job["start"] = time.time()
+            job["files"] = [open(OUT, "a"), open(ERR, "a")]
+            job["process"] = subprocess.Popen(
+                job_command(job, python=python),
+                stdout=job["files"][0],
+                stderr=job["files"][1],
+                env=dict(
+                    job_env,
+                    JOB_CPUS=str(job["need_cpus"]),
+                    OMP_NUM_THREADS=str(job["need_cpus"]),
+                ),
+            )
+            job["status"] = "running"
+            running.append(job)
+            free_cpus -= job["need_cpus"]
+            free_memory -= job["need_memory"]
+
+        time.sleep(0.2)
+
+        # Check the running jobs
+        for job in list(running):
+            code = job["process"].poll()
+            if code is None:
+                continue
+            running.remove(job)
+            for f in job.pop("files"):
+                f.close()
+            free_cpus += job["need_cpus"]
+            free_memory += job["need_memory"]
+            job["exit codes"].append(code)
+            job["seconds"] = job.get("seconds", 0) + time.time() - job["start"]
+
+            if code == 0:
+                finish(job, "done")
+            elif job["attempts"] > job["retry"] or code == job["unless_exit"]:
+                finish(job, "failed")
+            else:
+                job["status"] = "waiting"
+                if code == EX_IOERR:
+                    job["not before"] = time.time() + retry_delay
+            if verbose:
+                print(
+                    "  %-20s exit %s  (attempt %s) %s"
+                    % (job["name"], code, job["attempts"], job["status"])
+                )
+
+    wall = (datetime.now() - timer).total_seconds()
+    if GRID_CACHE is not None and not keep_cache:
+        shutil.rmtree(GRID_CACHE, ignore_errors=True)
+
+    summary = {
+        "jobs": len(jobs),
+        "done": sum(job["status"] == "done" for job in jobs),
+        "failed": [job["name"] for job in jobs if job["status"] == "failed"],
+        "retries": sum(max(job["attempts"] - 1, 0) for job in jobs),
+        "EX_IOERR": sum(job["exit codes"].count(EX_IOERR) for job in jobs),
+        "wall seconds": wall,
+        "job seconds": sum(job.get("seconds", 0) for job in jobs),
+        "stages": {stage: 0.0 for stage in STAGES},
+        "cache removed": removed,
+    }
+    hours = 0
+    for job in jobs:
+        for stage, seconds in parse_timers(job.get("out", "")).items():
+            summary["stages"][stage] += seconds
+        if job["status"] == "done":
+            hours += int(job["vars"].get("jobs_per_worker", 1))
+    summary["hours of year"] = hours
+    if verbose:
+        print_summary(summary)
+    return summary
+
+
+def print_summary(summary):
+    wall = max(summary["wall seconds"], 1e-9)
+    print("\n ===== Local DAG summary =====")
+    print("  Jobs done:      %s/%s" % (summary["done"], summary["jobs"]))
+    print("  Failed:         %s %s" % (len(summary["failed"]), summary["failed"][:5]))
+    print(
+        "  Retries:        %s (%s exit 74)" % (summary["retries"], summary["EX_IOERR"])
+    )
+    print("  Wall time:      %s" % timedelta(seconds=round(wall)))
+    print("  Job time:       %s" % timedelta(seconds=round(summary["job seconds"])))
+    print("  Cache removed:  %s grids" % summary["cache removed"])
+    print(
+        "  Throughput:     %.1f jobs/hour, %.1f hours of the year/hour"
+        % (summary["done"] / wall * 3600, summary["hours of year"] / wall * 3600)
+    )
+    total = sum(summary["stages"].values())
+    for stage, seconds in summary["stages"].items():
+        print(
+            "  %-15s %s (%.0f%%)"
+            % (
+                stage + ":",
+                timedelta(seconds=round(seconds)),
+                100 * seconds / total if total else 0,
+            )
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a percentile DAG locally")
+    parser.add_argument("FILE", help="submit.dag or a JSON manifest")
+    parser.add_argument("--cpus", type=int, default=os.cpu_count())
+    parser.add_argument("--memory", default="16GB")
+    parser.add_argument(
+        "--job-cpus", type=int, default=1, help="download processes for each job"
+    )
+    parser.add_argument("--job-memory", default="6GB")
+    parser.add_argument("--grid-cache", default="./grid_cache")
+    parser.add_argument("--keep-cache", action="store_true")
+    parser.add_argument("--cache-GB", type=float, default=None)
+    parser.add_argument("--retry-delay", type=float, default=10)
+    args = parser.parse_args()
+
+    summary = run_jobs(
+        read_jobs(args.FILE),
+        cpus=args.cpus,
+        memory=args.memory,
+        job_cpus=args.job_cpus,
+        job_memory=args.job_memory,
+        GRID_CACHE=args.grid_cache,
+        keep_cache=args.keep_cache,
+        cache_GB=args.cache_GB,
+        retry_delay=args.retry_delay,
+    )
+    sys.exit(1 if summary["failed"] else 0)
@@ -0,0 +1,297 @@
+# Brian Blaylock
+# October 19, 2026
+
+"""
+Percentiles of a sliding window of HRRR grids.
+
+When a worker does more than one day (jobs_per_worker > 1), the 31 day window
+for the next day shares all but one day of grids per year with the window
+before. np.percentile sorts (partitions) the whole float64 stack again for
+every day. Instead, the window is kept as a float32 stack that is sorted at
+each grid point. When the window slides one day, the grid leaving the window
+is removed and the grid entering the window is inserted in the sorted stack
+(one pass over the stack), and the percentiles are read from the sorted
+values.
+
+    W = new_window(H)                         # H is a list of grids
+    P = window_percentiles(W, [5, 50, 95])    # like np.percentile(H, ...)
+    slide_window(W, remove=[old_grid], add=[new_grid])
+
+Missing values (NaN) are kept at the end of the sorted stack, so each grid
+point uses the samples it has.
+
+The histogram mode counts the samples in fixed bins at each grid point, so
+the percentiles are only as exact as the bin width. The counts are uint8 (at
+most 255 samples), so for the HRRR grid (1059 x 1799 points) 64 bins are
+~122 MB (plus ~23 MB for the sum and count), instead of ~472 MB for the
+float32 stack of 62 samples. Neither window keeps the grids, so the grids
+leaving the window have to be read again to be removed.
+
+    Hist = new_histogram(H, bins=64)
+    slide_histogram(Hist, remove=[old_grid], add=[new_grid])
+    P = histogram_percentiles(Hist, [5, 50, 95])
+"""
+
+import numpy as np
+
+# Number of grid points worked on at once (limits the temporary arrays)
+CHUNK = 2 ** 18
+
+# Most samples in a histogram window (the counts are uint8)
+MAX_HISTOGRAM_SAMPLES = np.iinfo(np.uint8).max
+
+
+def _flat(grid, shape):
+    """A grid as a flat float32 array (masked and missing values are NaN)."""
+    if grid is None:
+        return np.full(int(np.prod(shape)), np.nan, dtype=np.float32)
+    grid = np.ma.filled(np.ma.asarray(grid, dtype=np.float32), np.nan)
+    return grid.ravel()
+
+
+def new_window(grids, capacity=None):
+    """
+    A sorted window from a list of grids.
+
+    Input:
+        grids    - List of 2D grids (None for missing grids)
+        capacity - Number of samples the window can hold before it has to
+                   grow. Default is the number of grids.
+
+    Return:
+        Dictionary with the sorted stack, 'sum' and 'count' at each grid
+        point, and 'samples' (number of grids in the window)
+    """
+    shape = np.shape(next(g for g in grids if g is not None))
+    if capacity is None:
+        capacity = len(grids)
+    stack = np.full((max(capacity, 1), int(np.prod(shape))), np.nan, dtype=np.float32)
+    for i, g in enumerate(grids):
+        stack[i] = _flat(g, shape)
+    stack.sort(axis=0)  # NaN are sorted to the end
+    valid = ~np.isnan(stack)
+    return {
+        "sorted": stack,
+        "shape": shape,
+        "sum": np.where(valid, stack, 0).sum(axis=0, dtype=np.float64),
+        "count": valid.sum(axis=0).astype(np.int32),
+        "samples": sum(g is not None for g in grids),
+    }
+
+
+def _replace(S, count, old, new):
+    """
+    Remove `old` and insert `new` in each column of the sorted array S
+    (n, m) in place. NaN in `old` removes one of the NaN at the end (adds a
+    sample); NaN in `new` adds a NaN at the end (removes a sample).
+    """
+    n, m = S.shape
+    k = np.arange(n, dtype=np.int32)[:, np.newaxis]
+    cols = np.arange(m)
+
+    # Position of the old value and where the new value goes
+    p_old = np.where(np.isnan(old), count, (S < old).sum(axis=0, dtype=np.int32))
+    p_new = np.where(np.isnan(new), n, (S < new).sum(axis=0, dtype=np.int32))
+
+    # Shift the values between the two positions by one: down (k - 1) if the
+    # new value goes before the old value, up (k + 1) if it goes after.
+    up = p_new <= p_old
+    first = np.where(up, p_new + 1, p_old)
+    last = np.where(up, p_old, p_new - 2)
+    src = k + np.where(up, -1, 1) * ((k >= first) & (k <= last))
+    S[:] = np.take_along_axis(S, src, axis=0)
+    S[np.where(up, p_new, p_new - 1), cols] = new
+
+
+def slide_window(W, remove=[], add=[]):
+    """
+    Remove grids from and add grids to a sorted window (in place).
+
+    Input:
+        W      - Window from new_window()
+        remove - List of grids leaving the window (exactly the grids that
+                 were added before; None for a missing grid)
+        add    - List of grids entering the window (None for missing grids)
+    """
+    remove = [g for g in remove if g is not None]
+    add = [g for g in add if g is not None]
+    pairs = max(len(remove), len(add))
+    extra = W["samples"] - len(remove) + len(add) - len(W["sorted"])
+    if extra > 0:
+        # Make room for the extra samples
+        grow = np.full((extra, W["sorted"].shape[1]), np.nan, dtype=np.float32)
+        W["sorted"] = np.concatenate([W["sorted"], grow])
+
+    S = W["sorted"]
+    for i in range(pairs):
+        old = _flat(remove[i] if i < len(remove) else None, W["shape"])
+        new = _flat(add[i] if i < len(add) else None, W["shape"])
+        for c in range(0, S.shape[1], CHUNK):
+            j = slice(c, c + CHUNK)
+            _replace(S[:, j], W["count"][j], old[j], new[j])
+        W["sum"] += np.nan_to_num(new, nan=0) - np.nan_to_num(old, nan=0)
+        W["count"] += ~np.isnan(new)
+        W["count"] -= ~np.isnan(old)
+    W["samples"] += len(add) - len(remove)
+    return W
+
+
+def window_percentiles(W, percentiles):
+    """
+    Percentiles at each grid point, the same as np.percentile (linear
+    interpolation) of the samples at each grid point.
+
+    Return:
+        float32 array (percentile, y, x). NaN where there aren't samples.
+    """
+    q = np.asarray(percentiles, dtype=np.float64)[:, np.newaxis] / 100
+    S = W["sorted"]
+    out = np.full((len(q), S.shape[1]), np.nan, dtype=np.float32)
+    for c in range(0, S.shape[1], CHUNK):
+        j = slice(c, c + CHUNK)
+        n = W["count"][j]
+        pos = q * np.maximum(n - 1, 0)
+        lo = np.floor(pos).astype(np.intp)
+        hi = np.minimum(lo + 1, np.maximum(n - 1, 0))
+        frac = (pos - lo).astype(np.float32)
+        a = np.take_along_axis(S[:, j], lo, axis=0)
+        b = np.take_along_axis(S[:, j], hi, axis=0)
+        out[:, j] = np.where(n > 0, a + (b - a) * frac, np.nan)
+    return out.reshape((len(q),) + tuple(W["shape"]))
+
+
+def window_mean(W):
+    """Mean of the samples at each grid point (NaN where there aren't any)."""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (W["sum"] / W["count"]).reshape(W["shape"])
+
+
+def new_histogram(grids, bins=64, lo=None, hi=None, pad=0.25):
+    """
+    A histogram window from a list of grids.
+
+    Input:
+        grids  - List of 2D grids (None for missing grids)
+        bins   - Number of bins at each grid point
+        lo, hi - Range of the bins. Default is the range of the grids, made
+                 bigger by `pad` of the range on each side for the grids
+                 added later. Values outside the range are counted in the
+                 first or last bin.
+
+    Return:
+        Dictionary with the uint8 'counts' (grid point, bin), the bin
+        'edges', 'sum' and 'count' at each grid point, and 'samples'
+    """
+    shape = np.shape(next(g for g in grids if g is not None))
+    if lo is None or hi is None:
+        stack_min = np.nanmin([np.nanmin(g) for g in grids if g is not None])
+        stack_max = np.nanmax([np.nanmax(g) for g in grids if g is not None])
+        span = max(stack_max - stack_min, 1e-6)
+        lo = stack_min - pad * span if lo is None else lo
+        hi = stack_max + pad * span if hi is None else hi
+    Hist = {
+        "counts": np.zeros((int(np.prod(shape)), bins), dtype=np.uint8),
+        "edges": np.linspace(lo, hi, bins + 1),
+        "shape": shape,
+        "sum": np.zeros(int(np.prod(shape))),
+        "count": np.zeros(int(np.prod(shape)), dtype=np.int32),
+        "samples": 0,
+    }
+    return slide_histogram(Hist, add=grids)
+
+
+def _count_grid(Hist, grid, sign):
+    """Add (sign=1) or remove (sign=-1) a grid's samples from the histogram."""
+    values = _flat(grid, Hist["shape"])
+    ok = np.flatnonzero(~np.isnan(values))
+    edges = Hist["edges"]
+    bins = len(edges) - 1
+    b = ((values[ok] - edges[0]) / (edges[1] - edges[0])).astype(np.intp)
+    b = np.clip(b, 0, bins - 1)
+    # The bins of each grid point are next to each other in memory
+    counts = Hist["counts"].reshape(-1)
+    counts[ok * bins + b] += np.uint8(1) if sign > 0 else np.uint8(255)
+    Hist["sum"][ok] += sign * values[ok]
+    Hist["count"][ok] += sign
+
+
+def slide_histogram(Hist, remove=[], add=[]):
+    """
+    Remove grids from and add grids to a histogram window (in place). The
+    grids removed must be the same values that were added.
+    """
+    samples = (
+        Hist["samples"]
+        - sum(g is not None for g in remove)
+        + sum(g is not None for g in add)
+    )
+    if samples > MAX_HISTOGRAM_SAMPLES:
+        raise ValueError(
+            "The histogram counts hold at most %s samples (got %s)"
+            % (MAX_HISTOGRAM_SAMPLES, samples)
+        )
+    for g in remove:
+        if g is not None:
+            _count_grid(Hist, g, -1)
+            Hist["samples"] -= 1
+    for g in add:
+        if g is not None:
+            _count_grid(Hist, g, 1)
+            Hist["samples"] += 1
+    return Hist
+
+
+def _order_statistic(C, counts, edges, k):
+    """
+    Approximate k-th smallest samples (k is a sorted integer array
+    (grid point, ...)) from the cumulative counts C (grid point, bin). The
+    samples in a bin are assumed to be spread evenly across the bin.
+    """
+    m, bins = C.shape
+    rows = np.arange(m)[:, np.newaxis]
+    # Offset each grid point's cumulative counts so one searchsorted finds
+    # the bin of k at every grid point.
+    step = int(C[:, -1].max(initial=0)) + 1
+    offset = rows * step
+    flat = (C + offset).ravel()
+    b = np.searchsorted(flat, (k.reshape(m, -1) + offset).ravel(), "right")
+    b = np.clip(b.reshape(m, -1) - rows * bins, 0, bins - 1)
+    below = np.where(b > 0, C[rows, np.maximum(b - 1, 0)], 0)
+    inside = np.maximum(counts[rows, b], 1)
+    value = edges[b] + (k.reshape(m, -1) - below + 0.5) / inside * (edges[1] - edges[0])
+    return value.reshape(k.shape)
+
+
+def histogram_percentiles(Hist, percentiles):
+    """
+    Approximate percentiles at each grid point from the histogram: the
+    linear interpolation between the samples around the rank (like
+    np.percentile), where each sample is placed in its bin.
+
+    Return:
+        float32 array (percentile, y, x). NaN where there aren't samples.
+    """
+    q = np.sort(np.asarray(percentiles, dtype=np.float64)) / 100
+    edges = Hist["edges"]
+    out = np.full((len(Hist["count"]), len(q)), np.nan, dtype=np.float32)
+    for c in range(0, len(Hist["count"]), CHUNK):
+        j = slice(c, c + CHUNK)
+        counts = Hist["counts"][j]
+        n = Hist["count"][j, np.newaxis]
+        C = np.cumsum(counts, axis=1, dtype=np.int32)
+        rank = q * np.maximum(n - 1, 0)
+        lo = np.floor(rank).astype(np.int32)
+        hi = np.minimum(lo + 1, np.maximum(n - 1, 0))
+        a, b = np.moveaxis(
+            _order_statistic(C, counts, edges, np.stack([lo, hi], -1)), -1, 0
+        )
+        out[j] = np.where(n > 0, a + (b - a) * (rank - lo), np.nan)
+    # Back in the order of `percentiles`
+    order = np.argsort(np.argsort(percentiles, kind="stable"), kind="stable")
+    return out.T[order].reshape((len(q),) + tuple(Hist["shape"]))
+
+
+def histogram_mean(Hist):
+    """Mean of the samples at each grid point (NaN where there aren't any)."""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (Hist["sum"] / Hist["count"]).reshape(Hist["shape"])
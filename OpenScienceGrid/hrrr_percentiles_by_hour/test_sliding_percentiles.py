@@ -0,0 +1,88 @@
+"""
+Test the sliding windows against np.nanpercentile of the same samples.
+
+    cd OpenScienceGrid/hrrr_percentiles_by_hour
+    python -m unittest test_sliding_percentiles
+"""
+
+import os
+import unittest
+import numpy as np
+
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import sliding_percentiles as sp
+
+PERCENTILES = [0, 1, 5, 10, 25, 50, 66, 90, 95, 99, 100]
+
+
+def make_grids(n, seed=0, shape=(30, 41)):
+    """Grids of temperature-like values with missing grids and NaN."""
+    rng = np.random.default_rng(seed)
+    grids = []
+    for i in range(n):
+        g = rng.normal(290, 8, size=shape).astype(np.float32)
+        g[rng.random(shape) < 0.05] = np.nan
+        grids.append(None if i % 17 == 5 else g)
+    return grids
+
+
+def expected(grids):
+    stack = np.array([g for g in grids if g is not None])
+    return np.nanpercentile(stack, PERCENTILES, axis=0), np.nanmean(stack, axis=0)
+
+
+class TestSlidingPercentiles(unittest.TestCase):
+    def setUp(self):
+        self.grids = make_grids(80)
+        self.size = 62
+
+    def slide(self, new, slide, percentiles, mean):
+        """Slide the window one grid at a time and compare each window."""
+        g = self.grids
+        W = new(g[: self.size])
+        for i in range(len(g) - self.size + 1):
+            if i > 0:
+                slide(W, remove=[g[i - 1]], add=[g[i + self.size - 1]])
+            P, M = expected(g[i : i + self.size])
+            yield W, percentiles(W, PERCENTILES), mean(W), P, M
+
+    def test_sorted_window(self):
+        for W, P, M, P_np, M_np in self.slide(
+            sp.new_window, sp.slide_window, sp.window_percentiles, sp.window_mean
+        ):
+            np.testing.assert_allclose(P, P_np, rtol=1e-6)
+            np.testing.assert_allclose(M, M_np, rtol=1e-6)
+
+    def test_histogram_window(self):
+        for W, P, M, P_np, M_np in self.slide(
+            sp.new_histogram,
+            sp.slide_histogram,
+            sp.histogram_percentiles,
+            sp.histogram_mean,
+        ):
+            width = W["edges"][1] - W["edges"][0]
+            self.assertEqual(W["counts"].dtype, np.uint8)
+            self.assertLessEqual(np.nanmax(np.abs(P - P_np)), width)
+            np.testing.assert_allclose(M, M_np, rtol=1e-6)
+            # The counts are the samples at each grid point
+            np.testing.assert_array_equal(W["counts"].sum(axis=1), W["count"])
+
+    def test_histogram_memory(self):
+        """The histogram counts are smaller than the sorted stack."""
+        grids = self.grids[: self.size]
+        W = sp.new_window(grids)
+        Hist = sp.new_histogram(grids)
+        self.assertLess(Hist["counts"].nbytes, W["sorted"].nbytes)
+
+    def test_histogram_too_many_samples(self):
+        g = np.ones((2, 3))
+        Hist = sp.new_histogram([g] * sp.MAX_HISTOGRAM_SAMPLES)
+        with self.assertRaises(ValueError):
+            sp.slide_histogram(Hist, add=[g])
+        self.assertEqual(Hist["samples"], sp.MAX_HISTOGRAM_SAMPLES)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+"""
+NumPy version of the geojson area functions.
+
+Same algorithm as area.ring__area (Chamberlain and Duquette, 2007), but the
+vertices are an (N, 2) array of (lon, lat) and the loop over the vertices is
+done with array operations. Many rings can be computed at once from a ragged
+batch, where the vertices of all the rings are stacked in one (M, 2) array
+and `offsets` gives the start of each ring (length is number of rings + 1).
+
+    >>> coords = np.array([[-180, -90], [-180, 90], [180, 90], [180, -90], [-180, -90]])
+    >>> ring_area(coords)
+    511207893395811.06
+"""
+
+import json
+
+import numpy as np
+
+from . import WGS84_RADIUS
+
+
+def pack_rings(rings):
+    """
+    Pack a list of rings into a ragged batch.
+
+    @Returns
+
+    {tuple} (offsets, coords) where coords is the (M, 2) array of all the
+    vertices and the vertices of ring i are coords[offsets[i]:offsets[i+1]].
+    """
+    rings = [np.asarray(r, dtype=float) for r in rings]
+    rings = [r.reshape(0, 2) if r.size == 0 else r for r in rings]
+    offsets = np.zeros(len(rings) + 1, dtype=np.intp)
+    offsets[1:] = np.cumsum([len(r) for r in rings])
+    if len(rings) == 0:
+        return offsets, np.empty((0, 2))
+    return offsets, np.concatenate(rings)
+
+
+def rings_area(offsets, coords):
+    """
+    Calculate the signed area of every ring in a ragged batch. The area is
+    positive if the ring is oriented clockwise, otherwise it is negative.
+    Rings with less than three vertices have zero area.
+
+    @Returns
+
+    {ndarray} The approximate signed geodesic area of each ring in square meters.
+    """
+    offsets = np.asarray(offsets, dtype=np.intp)
+    coords = np.asarray(coords, dtype=float).reshape(-1, 2)
+
+    lengths = np.diff(offsets)
+    num_rings = len(lengths)
+
+    # For each vertex (the "middle" point), find the previous and next vertex
+    # in the same ring, wrapping around at the ends of the ring.
+    ring_id = np.repeat(np.arange(num_rings), lengths)
+    start = offsets[:-1][ring_id]
+    length = lengths[ring_id]
+    position = np.arange(len(coords)) - start
+    upper = start + (position + 1) % length
+    lower = start + (position - 1) % length
+
+    lon = np.radians(coords[:, 0])
+    sin_lat = np.sin(np.radians(coords[:, 1]))
+
+    terms = (lon[upper] - lon[lower]) * sin_lat
+    _area = np.bincount(ring_id, weights=terms, minlength=num_rings)
+    _area[lengths <= 2] = 0
+
+    return _area * WGS84_RADIUS * WGS84_RADIUS / 2
+
+
+def ring_area(coordinates):
+    """
+    Calculate the signed area of a single ring from an (N, 2) array of
+    (lon, lat) vertices.
+
+    @Returns
+
+    {float} The approximate signed geodesic area of the polygon in square meters.
+    """
+    coordinates = np.asarray(coordinates, dtype=float).reshape(-1, 2)
+    return float(rings_area([0, len(coordinates)], coordinates)[0])
+
+
+def polygons_area(offsets, coords, polygon_offsets):
+    """
+    Calculate the area of many polygons from a ragged batch of rings. The
+    first ring of each polygon is the outer ring and the others are holes.
+
+    polygon_offsets gives the index of the first ring of each polygon
+    (length is number of polygons + 1).
+
+    @Returns
+
+    {ndarray} The area of each polygon in square meters.
+    """
+    polygon_offsets = np.asarray(polygon_offsets, dtype=np.intp)
+    num_rings = np.diff(polygon_offsets)
+
+    # Outer ring area is added, hole areas are subtracted.
+    ring_areas = np.abs(rings_area(offsets, coords))
+    polygon_id = np.repeat(np.arange(len(num_rings)), num_rings)
+    sign = np.where(np.arange(len(ring_areas)) == polygon_offsets[polygon_id], 1, -1)
+
+    return np.bincount(polygon_id, weights=sign * ring_areas, minlength=len(num_rings))
+
+
+def _geometry_polygons(geometry, polygons):
+    """Collect the polygons (a list of rings) in a geometry."""
+    if geometry["type"] == "Polygon":
+        polygons.append(geometry["coordinates"])
+    elif geometry["type"] == "MultiPolygon":
+        polygons.extend(geometry["coordinates"])
+    elif geometry["type"] == "GeometryCollection":
+        for g in geometry["geometries"]:
+            _geometry_polygons(g, polygons)
+    return polygons
+
+
+def area(geometry):
+    """
+    Area of a GeoJSON geometry (Polygon, MultiPolygon, or
+    GeometryCollection) in square meters. All the rings in the geometry are
+    computed in one batch.
+    """
+    if isinstance(geometry, str):
+        geometry = json.loads(geometry)
+
+    assert isinstance(geometry, dict)
+
+    polygons = _geometry_polygons(geometry, [])
+    polygons = [p for p in polygons if len(p) > 0]
+    if len(polygons) == 0:
+        return 0
+
+    offsets, coords = pack_rings([ring for p in polygons for ring in p])
+    polygon_offsets = np.zeros(len(polygons) + 1, dtype=np.intp)
+    polygon_offsets[1:] = np.cumsum([len(p) for p in polygons])
+
+    return float(np.sum(polygons_area(offsets, coords, polygon_offsets)))
@@ -1,10 +1,12 @@
 import json
 import unittest
 
-from area import area
+import numpy as np
 
+from area import area, ring__area
+from area import vectorized
 
-f = open("illinois.json", "U")
+f = open("illinois.json", "r")
 illinois = json.loads(f.read())
 
 world = {
@@ -51,5 +53,70 @@ class AreaTestCase(unittest.TestCase):
         )
 
 
+class VectorizedAreaTestCase(unittest.TestCase):
+    def test_area_illinois(self):
+        """Compute the area of illinois with arrays"""
+        self.assertAlmostEqual(vectorized.area(illinois), illinois_area, places=2)
+
+    def test_area_world(self):
+        """Compute the area of the whole world with arrays"""
+        self.assertAlmostEqual(vectorized.area(world), world_area, places=2)
+
+    def test_ring_area_matches(self):
+        """Signed ring area matches the pure Python ring area"""
+        ring = world["coordinates"][0]
+        self.assertAlmostEqual(
+            vectorized.ring_area(np.array(ring)), ring__area(ring), places=2
+        )
+        self.assertAlmostEqual(
+            vectorized.ring_area(np.array(ring[::-1])), ring__area(ring[::-1]), places=2
+        )
+
+    def test_rings_area_batch(self):
+        """Ragged batch of rings, including rings with less than three points"""
+        rings = [
+            illinois["coordinates"][0][0],
+            [],
+            [[0, 0], [1, 1]],
+            world["coordinates"][0],
+        ]
+        offsets, coords = vectorized.pack_rings(rings)
+        areas = vectorized.rings_area(offsets, coords)
+        self.assertEqual(len(areas), len(rings))
+        for a, ring in zip(areas, rings):
+            self.assertAlmostEqual(a, ring__area(ring), places=2)
+
+    def test_polygon_with_hole(self):
+        """Holes are subtracted from the outer ring"""
+        poly = {
+            "type": "Polygon",
+            "coordinates": [
+                [[0, 0], [0, 10], [10, 10], [10, 0], [0, 0]],
+                [[2, 2], [4, 2], [4, 4], [2, 4], [2, 2]],
+            ],
+        }
+        self.assertAlmostEqual(vectorized.area(poly), area(poly), places=2)
+
+    def test_multipolygon_and_collection(self):
+        """Compute the area of a multipolygon and a geometry collection"""
+        multi = {
+            "type": "MultiPolygon",
+            "coordinates": [world["coordinates"]] + illinois["coordinates"],
+        }
+        total = illinois_area + world_area
+        self.assertAlmostEqual(vectorized.area(multi), total, places=2)
+        self.assertAlmostEqual(
+            vectorized.area(
+                {"type": "GeometryCollection", "geometries": [world, illinois]}
+            ),
+            total,
+            places=2,
+        )
+
+    def test_point_area(self):
+        """Compute the area of a point"""
+        self.assertEqual(vectorized.area({"type": "Point", "coordinates": [0, 0]}), 0)
+
+
 if __name__ == "__main__":
     unittest.main()